@@ -1,14 +1,25 @@
 import json
 import os
 import re
-from boto3.dynamodb.conditions import Key, Attr
-from aje_libs.bd.helpers.pinecone_helper import PineconeHelper
+import boto3
 from aje_libs.common.helpers.bedrock_helper import BedrockHelper
 from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
-from aje_libs.common.helpers.s3_helper import S3Helper
-from aje_libs.common.helpers.secrets_helper import SecretsHelper
-from aje_libs.common.helpers.ssm_helper import SSMParameterHelper
 from aje_libs.common.logger import custom_logger
+from aws_lambda_powertools import Metrics
+from shared.bedrock_client import CONVERSE_RATE_PER_SECOND, is_throttling_error, resilient_bedrock_client
+from shared.chunk_store import get_texts
+from shared.config import get_config
+from shared.intent_router import GREETING, LIST_RESOURCES, EmbeddingIntentClassifier, IntentRouter
+from shared.context_compression import compress_chunks, estimate_tokens, format_passages
+from shared.lazy import LazyResource
+from shared.model_router import choose_route, estimate_input_tokens, route_model, user_question
+from shared.library import library_resource_ids
+from shared.local_index import LocalVectorIndex, s3_snapshot_loader
+from shared.namespaces import vector_namespace
+from shared.payload_logging import PayloadLogger
+from shared.prompt_cache import build_converse_request, cache_support
+from shared.tracing import add_count, add_usage, attach_debug, current_trace, span, start_trace, traced
+from shared.vector_store import get_vector_store
 
 # Configuración
 ENVIRONMENT = os.environ["ENVIRONMENT"]
@@ -18,56 +29,99 @@ DYNAMO_CHAT_HISTORY_TABLE = os.environ["DYNAMO_CHAT_HISTORY_TABLE"]
 DYNAMO_RESOURCES_TABLE = os.environ["DYNAMO_RESOURCES_TABLE"]
 DYNAMO_RESOURCES_HASH_TABLE = os.environ["DYNAMO_RESOURCES_HASH_TABLE"]
 DYNAMO_LIBRARY_TABLE = os.environ["DYNAMO_LIBRARY_TABLE"]
+DYNAMO_CHUNKS_TABLE = os.environ["DYNAMO_CHUNKS_TABLE"]
 S3_RESOURCES_BUCKET = os.environ["S3_RESOURCES_BUCKET"]
+# Permite devolver los tiempos por fase en el campo "debug" si la petición lo pide
+DEBUG_RESPONSE_ENABLED = os.environ.get("DEBUG_RESPONSE_ENABLED", "false").lower() == "true"
+# Índice en memoria por sílabo (snapshots de S3); Pinecone queda como respaldo
+LOCAL_INDEX_ENABLED = os.environ.get("LOCAL_INDEX_ENABLED", "false").lower() == "true"
+LOCAL_INDEX_MEMORY_MB = int(os.environ.get("LOCAL_INDEX_MEMORY_MB", 256))
+LOCAL_INDEX_DTYPE = os.environ.get("LOCAL_INDEX_DTYPE", "float32")
+LOCAL_INDEX_RETRY_SECONDS = int(os.environ.get("LOCAL_INDEX_RETRY_SECONDS", 60))
+LOCAL_INDEX_SEGMENT_TTL_SECONDS = int(os.environ.get("LOCAL_INDEX_SEGMENT_TTL_SECONDS", 300))
+# Fragmentos de retrieve_context unidos, sin solapamientos ni repetidos y limitados en tokens
+CONTEXT_COMPRESSION_ENABLED = os.environ.get("CONTEXT_COMPRESSION_ENABLED", "true").lower() == "true"
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", 2500))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.environ.get("CONTEXT_DUPLICATE_THRESHOLD", 0.85))
+# Puntos de caché de Bedrock en el prefijo estable (solo con modelos que los admiten)
+PROMPT_CACHE_ENABLED = os.environ.get("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+PROMPT_CACHE_MESSAGES = os.environ.get("PROMPT_CACHE_MESSAGES", "true").lower() == "true"
+# Listados de recursos y saludos se responden sin llamar al modelo (reglas y, opcionalmente, embeddings)
+INTENT_ROUTER_ENABLED = os.environ.get("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+INTENT_ROUTER_INTENTS = [i for i in os.environ.get("INTENT_ROUTER_INTENTS", "list_resources,greeting").split(",") if i]
+INTENT_ROUTER_EMBEDDINGS = os.environ.get("INTENT_ROUTER_EMBEDDINGS", "false").lower() == "true"
+INTENT_ROUTER_THRESHOLD = float(os.environ.get("INTENT_ROUTER_THRESHOLD", 0.8))
+# Modelo por tipo de turno, tamaño de la entrada y presupuesto de latencia (claves CHATBOT_MODEL_ID_* en SSM)
+MODEL_ROUTER_ENABLED = os.environ.get("MODEL_ROUTER_ENABLED", "true").lower() == "true"
+MODEL_ROUTER_LARGE_INPUT_TOKENS = int(os.environ.get("MODEL_ROUTER_LARGE_INPUT_TOKENS", 6000))
+MODEL_ROUTER_LATENCY_BUDGET_MS = int(os.environ.get("MODEL_ROUTER_LATENCY_BUDGET_MS", 0))
+MODEL_ROUTER_FAST_BELOW_MS = int(os.environ.get("MODEL_ROUTER_FAST_BELOW_MS", 0))
+
+# Parameter Store y Secrets (carga perezosa, concurrente y con TTL)
+config = get_config()
+config.prefetch("chatbot", "pinecone")
+
+def chatbot_parameter(key: str):
+    """
+    Obtiene un valor del parámetro chatbot de SSM desde la caché compartida.
 
-# Parameter Store
-ssm_chatbot = SSMParameterHelper(f"/{ENVIRONMENT}/{PROJECT_NAME}/chatbot")
-PARAMETER_VALUE = json.loads(ssm_chatbot.get_parameter_value())
-CHATBOT_MODEL_ID = PARAMETER_VALUE["CHATBOT_MODEL_ID"]
-CHATBOT_REGION = PARAMETER_VALUE["CHATBOT_REGION"]
-CHATBOT_LLM_MAX_TOKENS = int(PARAMETER_VALUE["CHATBOT_LLM_MAX_TOKENS"])
-CHATBOT_HISTORY_ELEMENTS = int(PARAMETER_VALUE["CHATBOT_HISTORY_ELEMENTS"])
-PINECONE_MAX_RETRIEVE_DOCUMENTS = int(PARAMETER_VALUE["PINECONE_MAX_RETRIEVE_DOCUMENTS"])
-PINECONE_MIN_THRESHOLD = float(PARAMETER_VALUE["PINECONE_MIN_THRESHOLD"])
-EMBEDDINGS_MODEL_ID = PARAMETER_VALUE["EMBEDDINGS_MODEL_ID"]
-EMBEDDINGS_REGION = PARAMETER_VALUE["EMBEDDINGS_REGION"]
-
-# Secrets
-secret_pinecone = SecretsHelper(f"{ENVIRONMENT}/{PROJECT_NAME}/pinecone-api")
-PINECONE_INDEX_NAME = secret_pinecone.get_secret_value("PINECONE_INDEX_NAME")
-PINECONE_API_KEY = secret_pinecone.get_secret_value("PINECONE_API_KEY")
+    :param key: Clave dentro del JSON del parámetro
+    :return: Valor configurado
+    """
+    return config.value("chatbot", key)
 
 logger = custom_logger(__name__, owner=OWNER, service=PROJECT_NAME)
+# Payloads grandes (mensajes, prompts, fragmentos): muestreados o solo ante errores según el entorno
+payload_logger = PayloadLogger(logger)
 
-# Inicialización de recursos
-history_table_helper = DynamoDBHelper(
+# Métricas EMF (duración por fase y tokens por petición)
+metrics = Metrics(namespace=os.environ.get("POWERTOOLS_METRICS_NAMESPACE", PROJECT_NAME), service="ask")
+metrics.set_default_dimensions(environment=ENVIRONMENT)
+
+# Inicialización de recursos (se construyen en el primer uso)
+history_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_CHAT_HISTORY_TABLE,
     pk_name="ALUMNO_ID",
     sk_name="DATE_TIME"
-)
-files_table_helper = DynamoDBHelper(
+))
+files_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_RESOURCES_TABLE,
     pk_name="resource_id"
-)
-hash_table_helper = DynamoDBHelper(
-    table_name=DYNAMO_RESOURCES_HASH_TABLE,
-    pk_name="file_hash"
-)
-library_table_helper = DynamoDBHelper(
+))
+library_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_LIBRARY_TABLE,
     pk_name="silabus_id"
-)
-pinecone_helper = PineconeHelper(
-    index_name=PINECONE_INDEX_NAME,
-    api_key=PINECONE_API_KEY,
-    embeddings_model_id=EMBEDDINGS_MODEL_ID,
-    embeddings_region=CHATBOT_REGION,
-    max_retrieve_documents=PINECONE_MAX_RETRIEVE_DOCUMENTS,
-    min_threshold=PINECONE_MIN_THRESHOLD
-)
-
-s3_helper = S3Helper(bucket_name=S3_RESOURCES_BUCKET)
-bedrock_helper = BedrockHelper(region_name=CHATBOT_REGION)
+))
+chunks_table_helper = LazyResource(lambda: DynamoDBHelper(
+    table_name=DYNAMO_CHUNKS_TABLE,
+    pk_name="resource_id",
+    sk_name="chunk_id"
+))
+local_index = LazyResource(lambda: LocalVectorIndex(
+    s3_snapshot_loader(boto3.client("s3"), S3_RESOURCES_BUCKET),
+    memory_budget_bytes=LOCAL_INDEX_MEMORY_MB * 1024 * 1024,
+    dtype=LOCAL_INDEX_DTYPE,
+    retry_seconds=LOCAL_INDEX_RETRY_SECONDS,
+    segment_ttl_seconds=LOCAL_INDEX_SEGMENT_TTL_SECONDS
+))
+def build_bedrock_helper() -> BedrockHelper:
+    """
+    BedrockHelper con el cliente resiliente (reintentos con jitter, limitador y destinos
+    alternativos ante limitaciones de cuota) en lugar del cliente de boto3 por defecto.
+    """
+    region = chatbot_parameter("CHATBOT_REGION")
+    helper = BedrockHelper(region_name=region)
+    helper.bedrock_client = resilient_bedrock_client(region, CONVERSE_RATE_PER_SECOND)
+    return helper
+
+bedrock_helper = LazyResource(build_bedrock_helper)
+intent_router = LazyResource(lambda: IntentRouter(
+    intents=INTENT_ROUTER_INTENTS,
+    classifier=EmbeddingIntentClassifier(
+        lambda text: get_vector_store("CHATBOT_REGION", retrieval=True).get_embeddings(text),
+        threshold=INTENT_ROUTER_THRESHOLD
+    ) if INTENT_ROUTER_EMBEDDINGS else None
+))
 
 DATA_PROMPT = """  
     ### Configuración del Chatbot "{asistente_nombre}"
@@ -148,9 +202,53 @@ Instrucciones del modelo:
 - Mantén **siempre un tono formal, claro y enfocado al ámbito académico**.
 """
 
+# Herramientas del agente: la definición es fija para que el prefijo enviado a Bedrock sea
+# idéntico en cada ronda y petición (y se pueda leer de la caché de prompts)
+TOOL_CONFIG = {
+    "tools": [
+        {
+            "toolSpec": {
+                "name": "get_resources",
+                "description": "Obtiene los títulos de los recursos.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {},
+                        "required": []
+                    }
+                }
+            }
+        },
+        {
+            "toolSpec": {
+                "name": "retrieve_context",
+                "description": "Consulta la base vectorial de Pinecone y devuelve los fragmentos relevantes según la consulta del usuario.",
+                "inputSchema": {
+                    "json": {
+                        "type": "object",
+                        "properties": {
+                            "query": {
+                                "type": "string",
+                                "description": "Consulta o pregunta del usuario a buscar en la base vectorial"
+                            },
+                        },
+                        "required": ["query"]
+                    }
+                }
+            }
+        }
+    ],
+    "toolChoice": {
+        "auto": {}
+    }
+}
+
+@traced("converse")
 def get_converse_response(messages: list, system_prompt: str, max_tokens: int, temperature: float = 1.0) -> dict:
     """
     Conversa con el modelo de Bedrock usando un prompt de sistema separado y mensajes estructurados.
+    Con PROMPT_CACHE_ENABLED, y si el modelo lo admite, el prefijo estable (prompt de sistema,
+    herramientas y mensajes ya enviados en la ronda anterior) se marca con puntos de caché.
     
     Parámetros:
     - messages: lista de mensajes estructurados entre user y assistant
@@ -159,46 +257,7 @@ def get_converse_response(messages: list, system_prompt: str, max_tokens: int, t
     - temperature: control de aleatoriedad
     """
 
-    logger.info(json.dumps(messages, indent=2))
-
-    tool_config = {
-        "tools": [
-            {
-                "toolSpec": {
-                    "name": "get_resources",
-                    "description": "Obtiene los títulos de los recursos.",
-                    "inputSchema": {
-                        "json": {
-                            "type": "object",
-                            "properties": {},
-                            "required": []
-                        }
-                    }
-                }
-            },
-            {
-                "toolSpec": {
-                    "name": "retrieve_context",
-                    "description": "Consulta la base vectorial de Pinecone y devuelve los fragmentos relevantes según la consulta del usuario.",
-                    "inputSchema": {
-                        "json": {
-                            "type": "object",
-                            "properties": {
-                                "query": {
-                                    "type": "string",
-                                    "description": "Consulta o pregunta del usuario a buscar en la base vectorial"
-                                },
-                            },
-                            "required": ["query"]
-                        }
-                    }
-                }
-            }
-        ],
-        "toolChoice": {
-            "auto": {}
-        }
-    }
+    payload_logger.log("Mensajes enviados a Bedrock", payload=messages, messages=len(messages))
 
     parameters = {
         "max_tokens": max_tokens,
@@ -206,21 +265,65 @@ def get_converse_response(messages: list, system_prompt: str, max_tokens: int, t
         "top_p": 0.2
     }
 
-    response = bedrock_helper.converse(
-        model=CHATBOT_MODEL_ID,
-        messages=messages,
-        system_prompt=system_prompt,
-        parameters=parameters,
-        tool_config=tool_config
-    )
+    model_id = select_model(messages, system_prompt)
+    if PROMPT_CACHE_ENABLED and cache_support(model_id):
+        response = bedrock_helper.bedrock_client.converse(**build_converse_request(
+            model_id, messages, system_prompt, parameters, TOOL_CONFIG,
+            cache_messages=PROMPT_CACHE_MESSAGES
+        ))
+    else:
+        response = bedrock_helper.converse(
+            model=model_id,
+            messages=messages,
+            system_prompt=system_prompt,
+            parameters=parameters,
+            tool_config=TOOL_CONFIG
+        )
+    add_usage(response.get("usage"))
+    # La respuesta de Converse no indica el modelo: se anota para el body y los logs
+    response["modelId"] = model_id
 
     return response
 
-def get_message_history(alumno_id, silabo_id, cant_items=CHATBOT_HISTORY_ELEMENTS):
+def select_model(messages: list, system_prompt: str) -> str:
+    """
+    Modelo de la llamada a converse. Con MODEL_ROUTER_ENABLED se elige la ruta (selección
+    de herramientas, respuesta corta, síntesis larga o modelo rápido si se agota el
+    presupuesto de latencia) y su modelo en el parámetro chatbot; si no, CHATBOT_MODEL_ID.
+
+    :param messages: Mensajes de la llamada
+    :param system_prompt: Prompt de sistema
+    :return: ID del modelo
+    """
+    if not MODEL_ROUTER_ENABLED:
+        return chatbot_parameter("CHATBOT_MODEL_ID")
+    trace = current_trace()
+    remaining_ms = None
+    if MODEL_ROUTER_LATENCY_BUDGET_MS and trace is not None:
+        remaining_ms = MODEL_ROUTER_LATENCY_BUDGET_MS - trace.total_ms
+    input_tokens = estimate_input_tokens(messages, system_prompt)
+    route, reason = choose_route(
+        messages, user_question(messages), input_tokens, remaining_ms,
+        large_input_tokens=MODEL_ROUTER_LARGE_INPUT_TOKENS,
+        fast_below_ms=MODEL_ROUTER_FAST_BELOW_MS
+    )
+    model_id = route_model(route, config.get("chatbot"))
+    add_count(f"model_route_{route}")
+    logger.info("Modelo seleccionado", extra={
+        "route": route, "reason": reason, "model_id": model_id,
+        "input_tokens_estimate": input_tokens, "remaining_ms": remaining_ms
+    })
+    return model_id
+
+@traced("history_load")
+def get_message_history(alumno_id, silabo_id, cant_items=None):
     """
     Obtiene el historial de mensajes utilizando DynamoDBHelper.
     """
     try:
+        if cant_items is None:
+            cant_items = int(chatbot_parameter("CHATBOT_HISTORY_ELEMENTS"))
+
         # Usa query si estás buscando por ALUMNO_ID específico:
         messages = history_table_helper.query_table(
             key_condition=f"{history_table_helper.pk_name} = :user_id",
@@ -252,12 +355,16 @@ def get_message_history(alumno_id, silabo_id, cant_items=CHATBOT_HISTORY_ELEMENT
                     "content": [{"text": msg["AI_MESSAGE"]}]
                 })
 
-        logger.info(f"Mensajes obtenidos para ALUMNO_ID: {alumno_id}, SILABUS_ID: {silabo_id}: {messages}")
+        payload_logger.log(
+            "Historial obtenido", payload=messages,
+            alumno_id=alumno_id, silabus_id=silabo_id, items=len(messages)
+        )
         return formatted_messages
     except Exception as e:
         logger.error(f"Error al obtener los mensajes: {e}")
         return []
 
+@traced("history_write")
 def upload_message(alumno_id, silabo_id, user_msg, ai_msg, prompt=""):
     """
     Sube un mensaje a DynamoDB. Permite marcar mensajes como irrelevantes para el contexto futuro.
@@ -287,10 +394,14 @@ def upload_message(alumno_id, silabo_id, user_msg, ai_msg, prompt=""):
         }
 
         history_table_helper.put_item(data=item)
-        logger.info(f"Elemento subido con éxito: {item}")
+        payload_logger.log(
+            "Elemento subido con éxito", payload=item,
+            alumno_id=alumno_id, date_time=current_datetime
+        )
     except Exception as e:
         logger.error(f"Error al subir el elemento: {e}")
 
+@traced("resources_lookup")
 def get_resource_ids_by_syllabus(silabus_id):
     """
     Busca en DynamoDB por silabus_id usando DynamoDBHelper los id de los recursos.
@@ -302,51 +413,125 @@ def get_resource_ids_by_syllabus(silabus_id):
         logger.error(f"Error al buscar en DynamoDB: {e}")
         return None
 
-def get_documents_context_json(question, data=None):
+def query_local_index(silabus_id, resource_ids, embeddings, vector_store):
+    """
+    Consulta el índice en memoria del sílabo con el mismo top-k y umbral que Pinecone.
+
+    :param silabus_id: ID del silabo
+    :param resource_ids: Recursos en los que buscar
+    :param embeddings: Embedding de la pregunta
+    :param vector_store: Almacén de vectores (de él se toman top-k y umbral)
+    :return: Matches, o None si hay que consultar Pinecone
+    """
+    try:
+        with span("local_query"):
+            return local_index.query(
+                silabus_id, resource_ids, embeddings,
+                top_k=vector_store.max_retrieve_documents,
+                min_score=vector_store.min_threshold
+            )
+    except Exception as e:
+        logger.warning(f"Índice local no disponible, se consulta Pinecone: {e}")
+        return None
+
+def get_documents_context_json(question, data=None, namespace=None, silabus_id=None):
     """
     Obtiene contexto relevante para una pregunta usando PineconeHelper.
+
+    :param question: Pregunta del alumno
+    :param data: Entrada de la biblioteca (o dict con ``resources``) para filtrar por resource_id
+    :param namespace: Namespace del sílabo (None para el namespace por defecto)
+    :param silabus_id: ID del silabo; con LOCAL_INDEX_ENABLED se busca primero en su índice en memoria
     """
     try:
-        logger.info(f"Pregunta: {question}")
+        payload_logger.log("Pregunta", question=question)
             
         # Si data tiene valor, extraer los resource_id y agregarlos al filtro
         filter_conditions = {}
-        if data and 'resources' in data:
-            resource_ids = [str(item["resource_id"]) for item in data["resources"]]
-            filter_conditions["resource_id"] = {"$in": resource_ids}
+        if data:
+            filter_conditions["resource_id"] = {"$in": library_resource_ids(data)}
             
-        logger.info(f"Condiciones de filtro: {filter_conditions}")
+        payload_logger.log("Condiciones de filtro", filter_conditions=filter_conditions)
         
-        # Obtener resultados crudos de Pinecone
-        raw_results = pinecone_helper.search_by_text(
-            query_text=question,
-            filter_conditions=filter_conditions if filter_conditions else None,
-            return_format="raw"
-        )
+        # Obtener resultados crudos de Pinecone (embedding y consulta se miden por separado)
+        vector_store = get_vector_store("CHATBOT_REGION", retrieval=True)
+        with span("embedding"):
+            embeddings = vector_store.get_embeddings(question)
+        raw_results = None
+        if LOCAL_INDEX_ENABLED and silabus_id and data is not None:
+            raw_results = query_local_index(silabus_id, library_resource_ids(data), embeddings, vector_store)
+        if raw_results is None:
+            with span("pinecone_query"):
+                raw_results = vector_store.query(
+                    embeddings=embeddings,
+                    filter_conditions=filter_conditions if filter_conditions else None,
+                    namespace=namespace
+                )
         
+        # Los vectores nuevos no llevan el texto en los metadatos: se leen los del top-k
+        # de la tabla de chunks en un solo BatchGetItem (los anteriores aún lo traen)
+        missing_texts = [match.get("id") for match in raw_results if "text" not in match.get("metadata", {})]
+        texts = {}
+        if missing_texts:
+            with span("chunk_hydrate"):
+                texts = get_texts(chunks_table_helper, missing_texts)
+
         # Convertir a JSON estructurado para Nova
         json_chunks = {}
         for i, match in enumerate(raw_results):
             chunk_text = (
-                match.get("metadata", {})
-                .get("text", "")
+                (match.get("metadata", {}).get("text") or texts.get(match.get("id"), ""))
                 .replace("\n", " ")
                 .strip()
             )
             resource_id = match.get("metadata", {}).get("resource_id", "unknown")
             json_chunks[f"chunk_{i+1}"] = {
+                "id": match.get("id"),
                 "text": chunk_text,
                 "resource_id": resource_id,
                 "score": match.get("score")
             }
 
-        logger.info(f"Chunks JSON: {json_chunks}")
+        payload_logger.log(
+            "Chunks JSON", payload=json_chunks,
+            chunks=len(json_chunks), scores=[chunk["score"] for chunk in json_chunks.values()]
+        )
         return json_chunks
     
     except Exception as e:
         logger.error(f"Error al obtener el contexto JSON de documentos: {e}")
         return {}
 
+def build_context_tool_content(json_chunks: dict) -> list:
+    """
+    Contenido del toolResult de retrieve_context. Con CONTEXT_COMPRESSION_ENABLED los
+    fragmentos se envían como pasajes compactos (se reenvían en cada ronda posterior,
+    así que cada token cuenta varias veces); si no, el JSON con un objeto por chunk.
+
+    :param json_chunks: Fragmentos devueltos por get_documents_context_json
+    :return: Bloques de contenido del toolResult
+    """
+    if not CONTEXT_COMPRESSION_ENABLED:
+        return [{"json": json_chunks}]
+    with span("context_compress"):
+        passages = compress_chunks(
+            json_chunks.values(),
+            token_budget=CONTEXT_TOKEN_BUDGET,
+            duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD
+        )
+        context_text = format_passages(passages)
+    tokens_before = estimate_tokens(json.dumps(json_chunks, ensure_ascii=False))
+    tokens_after = estimate_tokens(context_text)
+    add_count("context_chunks", len(json_chunks))
+    add_count("context_passages", len(passages))
+    add_count("context_tokens_saved", max(tokens_before - tokens_after, 0))
+    payload_logger.log(
+        "Contexto comprimido", payload=context_text,
+        chunks=len(json_chunks), passages=len(passages),
+        tokens_before=tokens_before, tokens_after=tokens_after
+    )
+    return [{"text": context_text}]
+
 # Extrar el contenido válido
 def extract_relevant_text_from_response(text: str, tags: list[str] = None) -> str:
     """
@@ -394,13 +579,15 @@ def strip_internal_thoughts(text: str) -> str:
     return text
 
 # Format Success Response
-def format_success_response(answer_text: str, usage_info: dict, message: str = "Respuesta generada correctamente") -> dict:
+def format_success_response(answer_text: str, usage_info: dict, message: str = "Respuesta generada correctamente",
+                            model_id: str = None) -> dict:
     """
     Formatea una respuesta HTTP estándar para Lambda con estructura unificada.
 
     :param answer_text: Texto final generado o devuelto al usuario.
     :param usage_info: Diccionario con tokens utilizados (input/output).
     :param message: Mensaje contextual que se desea mostrar (por ejemplo, si vino de herramienta).
+    :param model_id: Modelo que generó la respuesta (None si se respondió sin modelo).
     :return: Diccionario con statusCode y body estandarizado.
     """
     return {
@@ -410,11 +597,15 @@ def format_success_response(answer_text: str, usage_info: dict, message: str = "
             "message": message,
             "answer": answer_text,
             "input_tokens": usage_info.get('inputTokens', 0),
-            "output_tokens": usage_info.get('outputTokens', 0)
+            "output_tokens": usage_info.get('outputTokens', 0),
+            "cache_read_tokens": usage_info.get('cacheReadInputTokens', 0),
+            "cache_write_tokens": usage_info.get('cacheWriteInputTokens', 0),
+            "model_id": model_id
         })
     }
 
 # Tools
+@traced("get_resources")
 def get_resources(silabus_id) -> list[str]:
     """
     Obtiene los títulos de los recursos asociados a un silabo específico.
@@ -423,14 +614,11 @@ def get_resources(silabus_id) -> list[str]:
     :return: Lista de títulos de recursos
     """
     try:
-        library_item = library_table_helper.get_item(silabus_id)
-        if library_item and "resources" in library_item:
-            resources = library_item["resources"]
-        else:
+        resource_ids = library_resource_ids(library_table_helper.get_item(silabus_id))
+        if not resource_ids:
             logger.warning(f"No se encontraron recursos para el silabo {silabus_id}")
             return []
         
-        resource_ids = [resource["resource_id"] for resource in resources]
         logger.info(f"Se encontraron {len(resource_ids)} resource_id(s) en el silabo {silabus_id}")
 
         titles = []
@@ -444,6 +632,26 @@ def get_resources(silabus_id) -> list[str]:
         logger.error(f"Error obteniendo títulos de recursos para el silabo {silabus_id}: {e}")
         return []
     
+def format_resources_text(resource_titles: list[str], usuario_nombre: str, curso: str) -> str:
+    """
+    Texto con el listado de recursos (resultado de get_resources y respuesta directa del router).
+
+    :param resource_titles: Títulos de los recursos
+    :param usuario_nombre: Nombre del usuario
+    :param curso: Nombre del curso
+    """
+    if not resource_titles:
+        return (
+            f"{usuario_nombre}, no se encontraron recursos disponibles "
+            f"para el curso *{curso}* en este momento."
+        )
+    recursos_listados = "\n- " + "\n- ".join(resource_titles)
+    return (
+        f"{usuario_nombre}, estos son los recursos disponibles "
+        f"para el curso *{curso}*:\n"
+        f"{recursos_listados}"
+    )
+
 def get_title_from_resource_id(resource_id) -> str:
     """
     Obtiene el título de un recurso dado su ID.
@@ -462,7 +670,11 @@ def get_title_from_resource_id(resource_id) -> str:
         logger.error(f"Error obteniendo título del recurso {resource_id}: {e}")
         return None
 
+@traced("retrieve_context")
 def retrieve_context(syllabus_event_id, message_text, resources):
+    # Con un namespace por sílabo la consulta ya se limita al curso: no hace falta leer la biblioteca
+    # (salvo para el índice local, que necesita saber qué recursos cargar)
+    namespace = vector_namespace(syllabus_event_id)
     # Obtener recursos
     if resources:
         if isinstance(resources, str):
@@ -470,14 +682,51 @@ def retrieve_context(syllabus_event_id, message_text, resources):
         data = {
             "resources": [{"resource_id": rid} for rid in resources]
         }             
+    elif namespace and not LOCAL_INDEX_ENABLED:
+        data = None
     else:
         logger.info(f"Buscando resource_ids para syllabus_event_id: {syllabus_event_id}")
         data = get_resource_ids_by_syllabus(syllabus_event_id)
 
-    # Consultar Pinecone
-    text_context = get_documents_context_json(message_text, data)
+    # Consultar el índice local del sílabo o Pinecone
+    text_context = get_documents_context_json(message_text, data, namespace, syllabus_event_id)
     return text_context
 
+@traced("intent_route")
+def answer_routed_intent(user_id, syllabus_event_id, message_text, asistente_nombre, usuario_nombre, curso):
+    """
+    Responde sin llamar al modelo los mensajes que el router reconoce (listado de
+    recursos o saludo). Publica ``intent_router_hit`` (1 o 0, su media es la tasa de
+    aciertos) y un contador por intención.
+
+    :return: Respuesta HTTP, o None si el mensaje debe ir al modelo
+    """
+    if not INTENT_ROUTER_ENABLED:
+        return None
+    try:
+        intent, method = intent_router.route(message_text, asistente_nombre)
+    except Exception as e:
+        logger.warning(f"Router de intenciones no disponible, se usa el modelo: {e}")
+        intent, method = None, None
+    add_count("intent_router_hit", 1 if intent else 0)
+    if not intent:
+        return None
+
+    add_count(f"intent_{intent}")
+    logger.info("Intención resuelta sin modelo", extra={"intent": intent, "method": method})
+    if intent == LIST_RESOURCES:
+        answer_text = format_resources_text(get_resources(syllabus_event_id), usuario_nombre, curso)
+    elif intent == GREETING:
+        answer_text = (
+            f"Hola {usuario_nombre}, soy {asistente_nombre}, tu guía en {curso}. "
+            f"¿En qué puedo ayudarte hoy en relación con {curso}?"
+        )
+    else:
+        return None
+
+    upload_message(alumno_id=user_id, silabo_id=syllabus_event_id, user_msg=message_text, ai_msg=answer_text)
+    return format_success_response(answer_text, {})
+
 # Others
 def invoke_with_prompt(
         user_id, syllabus_event_id, message_text, usuario_nombre, curso, resources,
@@ -507,7 +756,10 @@ def invoke(
         }
     )
     response = get_converse_response(messages, system_prompt, max_tokens, temperature)
-    logger.info(f"Agent: {response}")
+    payload_logger.log(
+        "Agent", payload=response,
+        stop_reason=response.get("stopReason"), usage=response.get("usage")
+    )
 
     return handle_response(
         user_id, syllabus_event_id, message_text, usuario_nombre, curso, resources,
@@ -548,7 +800,7 @@ def handle_response(
             answer_text = parts[0].strip() if parts else ''
 
         upload_message(alumno_id=user_id, silabo_id=syllabus_event_id, user_msg=message_text, ai_msg=answer_text, prompt=system_prompt)
-        return format_success_response(answer_text, usage_info)
+        return format_success_response(answer_text, usage_info, model_id=response.get('modelId'))
     # Caso 2: Tool Calling
     elif stop_reason == 'tool_use':
         tool_block = next((block for block in content_blocks if 'toolUse' in block), None)
@@ -560,30 +812,22 @@ def handle_response(
             (block["text"] for block in content_blocks if "text" in block),
             "[Sin razonamiento textual del modelo]"
         )
-        logger.info(f"Pensamiento previo a la herramienta: {thought_process}")
+        payload_logger.log("Pensamiento previo a la herramienta", thought_process=thought_process)
                 
         tool_name = tool_block['toolUse']['name']
         tool_input = tool_block['toolUse']['input']
         tool_use_id = tool_block['toolUse']['toolUseId']
-        logger.info(f"Herramienta solicitada: {tool_name} con input: {tool_input}")
+        payload_logger.log("Herramienta solicitada", tool_name=tool_name, tool_input=tool_input)
 
         # Ejecutar herramienta correspondiente 
         if tool_name == "get_resources":
             resource_titles = get_resources(syllabus_event_id)
-            if not resource_titles:
-                tool_result_text = (
-                    f"{usuario_nombre}, no se encontraron recursos disponibles "
-                    f"para el curso *{curso}* en este momento."
-                )
-            else:
-                recursos_listados = "\n- " + "\n- ".join(resource_titles)
-                tool_result_text = (
-                    f"{usuario_nombre}, estos son los recursos disponibles "
-                    f"para el curso *{curso}*:\n"
-                    f"{recursos_listados}"
-                )
+            tool_result_text = format_resources_text(resource_titles, usuario_nombre, curso)
 
-            logger.info(f"Resultado de la herramienta get_resources: {tool_result_text}")
+            payload_logger.log(
+                "Resultado de la herramienta get_resources", payload=tool_result_text,
+                resources=len(resource_titles)
+            )
             
             # Retornar resultado a Nova
             tool_result = [{
@@ -596,7 +840,7 @@ def handle_response(
         
             return invoke(
                 user_id, syllabus_event_id, message_text, usuario_nombre, curso, resources,
-                tool_result, messages, system_prompt, CHATBOT_LLM_MAX_TOKENS, 0
+                tool_result, messages, system_prompt, int(chatbot_parameter("CHATBOT_LLM_MAX_TOKENS")), 0
             )
 
         elif tool_name == "retrieve_context":
@@ -606,14 +850,14 @@ def handle_response(
             tool_result = [{
                 "toolResult": {
                     "toolUseId": tool_use_id,
-                    "content": [{"json": pinecone_chunks}],
+                    "content": build_context_tool_content(pinecone_chunks),
                     "status": "success"
                 }
             }]
         
             return invoke(
                 user_id, syllabus_event_id, message_text, usuario_nombre, curso, resources,
-                tool_result, messages, system_prompt, CHATBOT_LLM_MAX_TOKENS, 0
+                tool_result, messages, system_prompt, int(chatbot_parameter("CHATBOT_LLM_MAX_TOKENS")), 0
             )
 
         else:
@@ -627,7 +871,7 @@ def handle_response(
         answer_text = next((block.get('text', '') for block in content_blocks if 'text' in block), '')
         relevant_text = extract_relevant_text_from_response(answer_text, ["<thinking>", "</thinking>"])
         upload_message(alumno_id=user_id, silabo_id=syllabus_event_id, user_msg=message_text, ai_msg=relevant_text, prompt=system_prompt)
-        return format_success_response(relevant_text, usage_info)
+        return format_success_response(relevant_text, usage_info, model_id=response.get('modelId'))
         '''
         return invoke_with_prompt(
             user_id, syllabus_event_id, "Por favor continue.", usuario_nombre, curso, resources,
@@ -639,7 +883,33 @@ def handle_response(
         logger.warning(f"Razón de detención no reconocida: {stop_reason}")
         raise ValueError(f"Unknown stop reason: {stop_reason}")
 
+@metrics.log_metrics
 def lambda_handler(event, context):
+    payload_logger.start_request()
+    with start_trace("ask") as trace:
+        response = handle_request(event)
+
+    trace.publish(metrics)
+    logger.info("Tiempos de la petición", extra={"request_trace": trace.summary()})
+    if DEBUG_RESPONSE_ENABLED and debug_requested(event):
+        attach_debug(response, trace)
+    return response
+
+def debug_requested(event) -> bool:
+    """
+    Indica si la petición pide el detalle de tiempos ("debug": true en el body).
+
+    :param event: Evento de API Gateway
+    """
+    body = event.get('body', event)
+    if isinstance(body, str):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return False
+    return isinstance(body, dict) and bool(body.get("debug"))
+
+def handle_request(event):
     try:
         body = event.get('body', event)
         if isinstance(body, str):
@@ -669,10 +939,16 @@ def lambda_handler(event, context):
         institucion = body["institucion"]
         curso = body["curso"]
         resources = body.get("resources", None)
+
+        # Listados y saludos se responden directamente, sin historial ni modelo
+        routed_response = answer_routed_intent(
+            user_id, syllabus_event_id, message_text, asistente_nombre, usuario_nombre, curso
+        )
+        if routed_response:
+            return routed_response
         
         # Obtener historial de conversación
         messages = get_message_history(user_id, syllabus_event_id)
-        logger.info(f"Messages: {messages}")
         # Armar el prompt
         system_prompt = SYSTEM_PROMPT2.format(
             asistente_nombre=asistente_nombre,
@@ -681,14 +957,30 @@ def lambda_handler(event, context):
             curso=curso,
             institucion=institucion
         )
-        logger.info(f"System prompt: {system_prompt}")
+        payload_logger.log("System prompt", payload=system_prompt, length=len(system_prompt))
 
         return invoke_with_prompt(
             user_id, syllabus_event_id, message_text, usuario_nombre, curso, resources,
-            messages, system_prompt, CHATBOT_LLM_MAX_TOKENS, 0.7
+            messages, system_prompt, int(chatbot_parameter("CHATBOT_LLM_MAX_TOKENS")), 0.7
         )
 
     except Exception as e:
+        payload_logger.flush_on_error()
+        if is_throttling_error(e):
+            # Cuota de Bedrock agotada tras reintentos y destinos alternativos: el cliente puede reintentar
+            logger.warning(f"Bedrock limitado tras reintentos: {e}")
+            return {
+                "statusCode": 429,
+                "headers": {"Retry-After": "5"},
+                "body": json.dumps({
+                    "success": False,
+                    "message": "El asistente está recibiendo muchas consultas. Inténtalo de nuevo en unos segundos.",
+                    "error": {
+                        "code": "MODEL_THROTTLED",
+                        "details": str(e)
+                    }
+                })
+            }
         logger.error(f"Error en la función Lambda: {str(e)}")
         return {
             "statusCode": 500,
@@ -1,14 +1,20 @@
 import json
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, List, Optional, Set
 
 # Importar helpers de aje-libs
 from aje_libs.common.helpers.s3_helper import S3Helper
 from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
-from aje_libs.bd.helpers.pinecone_helper import PineconeHelper
 from aje_libs.common.logger import custom_logger
-from aje_libs.common.helpers.secrets_helper import SecretsHelper
-from aje_libs.common.helpers.ssm_helper import SSMParameterHelper
+from shared.batch_get import batch_get_items
+from shared.chunk_store import delete_chunks, delete_resource_chunks
+from shared.config import get_config
+from shared.lazy import LazyResource
+from shared.library import library_resource_ids, remove_from_library
+from shared.local_index import snapshot_key
+from shared.namespaces import NAMESPACE_ATTRIBUTE, deletion_namespaces
+from shared.vector_ids import resource_vector_ids, vector_prefix
+from shared.vector_store import get_vector_store
 # Configuración
 ENVIRONMENT = os.environ["ENVIRONMENT"]
 PROJECT_NAME = os.environ["PROJECT_NAME"]
@@ -16,42 +22,38 @@ OWNER = os.environ["OWNER"]
 DYNAMO_RESOURCES_TABLE = os.environ["DYNAMO_RESOURCES_TABLE"]
 DYNAMO_LIBRARY_TABLE = os.environ["DYNAMO_LIBRARY_TABLE"]
 DYNAMO_RESOURCES_HASH_TABLE = os.environ["DYNAMO_RESOURCES_HASH_TABLE"]
+DYNAMO_CHUNKS_TABLE = os.environ["DYNAMO_CHUNKS_TABLE"]
 S3_RESOURCES_BUCKET = os.environ["S3_RESOURCES_BUCKET"]
 
-# Parameter Store
-ssm_chatbot = SSMParameterHelper(f"/{ENVIRONMENT}/{PROJECT_NAME}/chatbot")
-PARAMETER_VALUE = json.loads(ssm_chatbot.get_parameter_value())
+# Límites por petición de cada servicio en el borrado masivo
+PINECONE_DELETE_BATCH = 1000
+S3_DELETE_BATCH = 1000
 
-EMBEDDINGS_MODEL_ID = PARAMETER_VALUE["EMBEDDINGS_MODEL_ID"]
-EMBEDDINGS_REGION = PARAMETER_VALUE["EMBEDDINGS_REGION"]
-# Secrets
-secret_pinecone = SecretsHelper(f"{ENVIRONMENT}/{PROJECT_NAME}/pinecone-api")
-
-PINECONE_INDEX_NAME = secret_pinecone.get_secret_value("PINECONE_INDEX_NAME")
-PINECONE_API_KEY = secret_pinecone.get_secret_value("PINECONE_API_KEY")
+# Parameter Store y Secrets (carga perezosa, concurrente y con TTL)
+config = get_config()
+config.prefetch("chatbot", "pinecone")
 
 logger = custom_logger(__name__, owner=OWNER, service=PROJECT_NAME)
 
-# Crear helper instances
-s3_helper = S3Helper(bucket_name=S3_RESOURCES_BUCKET)
-files_table_helper = DynamoDBHelper(
+# Crear helper instances (se construyen en el primer uso)
+s3_helper = LazyResource(lambda: S3Helper(bucket_name=S3_RESOURCES_BUCKET))
+files_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_RESOURCES_TABLE,
     pk_name="resource_id"
-)
-hash_table_helper = DynamoDBHelper(
+))
+hash_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_RESOURCES_HASH_TABLE,
     pk_name="file_hash"
-)
-library_table_helper = DynamoDBHelper(
+))
+library_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_LIBRARY_TABLE,
     pk_name="silabus_id"
-)
-pinecone_helper = PineconeHelper(
-    index_name=PINECONE_INDEX_NAME,
-    api_key=PINECONE_API_KEY,
-    embeddings_model_id=EMBEDDINGS_MODEL_ID,
-    embeddings_region=EMBEDDINGS_REGION
-)
+))
+chunks_table_helper = LazyResource(lambda: DynamoDBHelper(
+    table_name=DYNAMO_CHUNKS_TABLE,
+    pk_name="resource_id",
+    sk_name="chunk_id"
+))
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
@@ -70,7 +72,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 body = json.loads(event['body'])
         else:
             body = event
-        
+
+        # Borrado masivo (POST /api/v1/delete_resource/bulk): lista de recursos o sílabo completo
+        if "RecursoDidacticoIds" in body or "Purge" in body:
+            return handle_bulk_request(body)
+
         # Validar que los campos necesarios estén presentes usando el formato estandarizado
         
         required_fields = ["RecursoDidacticoId", "SilaboEventoId"]
@@ -142,21 +148,24 @@ def process_resource_deletion(resource_id: str, silabus_id: str) -> Dict[str, An
         if not item:
             message = f"El recurso con resource_id '{resource_id}' no existe."
             logger.info(message)
+            # Vectores que pudo dejar una ingesta que falló antes de escribir el registro
+            delete_orphan_vectors([resource_id], silabus_id)
+            delete_object_batches([snapshot_key(resource_id)])
             return {"success": False, "message": message}
         
         file_hash = item.get('file_hash')
         s3_path = item.get('s3_path')
-        pinecone_ids = item.get('pinecone_ids', [])
+        # IDs calculados a partir de vector_count (o la lista de registros anteriores)
+        pinecone_ids = resource_vector_ids(resource_id, item)
         
         # 1. Eliminar vectores de Pinecone si hay IDs
         if pinecone_ids:
             logger.info(f"Eliminando {len(pinecone_ids)} vectores de Pinecone")
-            try:
-                pinecone_helper.delete_vectors(pinecone_ids)
+            namespaces = deletion_namespaces(item.get(NAMESPACE_ATTRIBUTE), silabus_id)
+            if not any([delete_vector_batches(pinecone_ids, namespace) for namespace in namespaces]):
                 logger.info(f"Vectores eliminados exitosamente de Pinecone")
-            except Exception as e:
-                logger.error(f"Error eliminando vectores de Pinecone: {str(e)}", exc_info=True)
-                # Continuamos con el proceso aunque falle Pinecone
+            # Continuamos con el proceso aunque falle Pinecone
+            delete_chunk_texts(pinecone_ids)
         
         # 2. Eliminar objeto de S3 si existe la ruta
         if s3_path:
@@ -169,6 +178,7 @@ def process_resource_deletion(resource_id: str, silabus_id: str) -> Dict[str, An
             except Exception as e:
                 logger.error(f"Error eliminando objeto de S3: {str(e)}", exc_info=True)
                 # Continuamos con el proceso aunque falle S3
+        delete_object_batches([snapshot_key(resource_id)])
         
         # 3. Eliminar registros de DynamoDB
         deleted_tables = []
@@ -179,46 +189,12 @@ def process_resource_deletion(resource_id: str, silabus_id: str) -> Dict[str, An
                 deleted_tables.append(DYNAMO_RESOURCES_HASH_TABLE)
                 logger.info(f"Registro eliminado de la tabla hash: {file_hash}")
 
-            library_item = library_table_helper.get_item(silabus_id)
-            if library_item and "resources" in library_item and any(r.get('resource_id') == resource_id for r in library_item["resources"]):
-                # Eliminar el recurso
-                new_resources = [r for r in library_item["resources"] if r.get('resource_id') != resource_id]
-
-                update_expression = "SET resources = :resources"
-                expression_attribute_values = {
-                    ":resources": new_resources
-                }
-
-                library_table_helper.update_item(
-                    partition_key=silabus_id, 
-                    update_expression=update_expression,
-                    expression_attribute_values=expression_attribute_values
-                )
+            # DELETE atómico sobre el conjunto de la biblioteca (sin leer y reescribir la lista)
+            if remove_from_library(library_table_helper, silabus_id, [resource_id]):
                 deleted_tables.append(DYNAMO_LIBRARY_TABLE)
                 logger.info(f"Recurso {resource_id} eliminado del listado de recursos de silabus {silabus_id}")
             else:
                 logger.info(f"No se encontró el recurso {resource_id} en la lista de recursos de silabus {silabus_id}")
-            
-            '''
-            library_item = library_table_helper.get_item(silabus_id)
-            if library_item and "resources" in library_item and resource_id in library_item["resources"]:
-                # Eliminar un resource_id de library_item["resources"]
-                update_expression = "SET resources = :resources"
-                new_resources = [r for r in library_item["resources"] if r != resource_id]
-                expression_attribute_values = {
-                    ":resources": new_resources
-                }
-                
-                library_table_helper.update_item(
-                    partition_key=silabus_id, 
-                    update_expression=update_expression,
-                    expression_attribute_values=expression_attribute_values
-                )
-                
-                logger.info(f"Recurso {resource_id} eliminado del listado de recursos de silabus {silabus_id}")
-            else:
-                logger.info(f"No se encontró el recurso {resource_id} en la lista de recursos de silabus {silabus_id}")
-            '''
 
             files_table_helper.delete_item(resource_id)
             deleted_tables.append(DYNAMO_RESOURCES_TABLE)
@@ -242,4 +218,203 @@ def process_resource_deletion(resource_id: str, silabus_id: str) -> Dict[str, An
         return {
             "success": False,
             "message": f"Error al eliminar el recurso: {str(e)}"
-        }
\ No newline at end of file
+        }
+
+def handle_bulk_request(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida una petición de borrado masivo y la procesa.
+
+    :param body: Body con SilaboEventoId y RecursoDidacticoIds (lista) o Purge (true)
+    :return: Respuesta estandarizada con el estado de cada recurso
+    """
+    resource_ids = body.get("RecursoDidacticoIds")
+    purge = body.get("Purge") is True
+    error = None
+    if "SilaboEventoId" not in body:
+        error = ("MISSING_FIELDS", "Campos requeridos faltantes: ['SilaboEventoId']")
+    elif not purge and (not isinstance(resource_ids, list) or not resource_ids):
+        error = ("INVALID_RESOURCES", "RecursoDidacticoIds debe ser una lista no vacía (o Purge: true)")
+    if error:
+        logger.error(error[1])
+        return {
+            "statusCode": 400,
+            "body": json.dumps({
+                "success": False,
+                "message": error[1],
+                "error": {"code": error[0], "details": error[1]}
+            })
+        }
+
+    silabus_id = body["SilaboEventoId"]
+    result = process_bulk_deletion(silabus_id, resource_ids or [], purge=purge)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "success": result["success"],
+            "data": {
+                "silaboEventoId": silabus_id,
+                "summary": result["summary"],
+                "results": result["results"]
+            }
+        })
+    }
+
+def process_bulk_deletion(silabus_id: str, resource_ids: List[str], purge: bool = False) -> Dict[str, Any]:
+    """
+    Elimina varios recursos (o todos los de un sílabo) con operaciones por lotes:
+    lecturas BatchGetItem de hasta 100 claves, borrados de vectores de hasta
+    PINECONE_DELETE_BATCH IDs, DeleteObjects de hasta S3_DELETE_BATCH claves,
+    BatchWriteItem para los registros y un único ``DELETE`` sobre la biblioteca.
+
+    Como en el borrado individual, un fallo en Pinecone o S3 no detiene el proceso:
+    queda reflejado en los ``details`` del recurso.
+
+    :param silabus_id: ID del silabo
+    :param resource_ids: IDs de los recursos a eliminar
+    :param purge: True para eliminar todos los recursos asociados al sílabo
+    :return: success, summary (recursos por estado) y results (estado de cada recurso)
+    """
+    if purge:
+        resource_ids = library_resource_ids(library_table_helper.get_item(silabus_id))
+    resource_ids = list(dict.fromkeys(str(resource_id) for resource_id in resource_ids))
+    logger.info(f"Iniciando eliminación masiva de {len(resource_ids)} recursos del silabus {silabus_id}")
+
+    items = {}
+    if resource_ids:
+        for item in batch_get_items(files_table_helper, [{"resource_id": resource_id} for resource_id in resource_ids]):
+            items[item["resource_id"]] = item
+
+    # 1. Vectores de Pinecone, en lotes de IDs calculados sin leer listas
+    vectors = {resource_id: resource_vector_ids(resource_id, item) for resource_id, item in items.items()}
+    by_namespace: Dict[Optional[str], List[str]] = {}
+    for resource_id, item in items.items():
+        for namespace in deletion_namespaces(item.get(NAMESPACE_ATTRIBUTE), silabus_id):
+            by_namespace.setdefault(namespace, []).extend(vectors[resource_id])
+    failed_vectors: Set[str] = set()
+    for namespace, namespace_ids in by_namespace.items():
+        failed_vectors |= delete_vector_batches(namespace_ids, namespace)
+    delete_chunk_texts([vector_id for ids in vectors.values() for vector_id in ids])
+    delete_orphan_vectors([resource_id for resource_id in resource_ids if resource_id not in items], silabus_id)
+
+    # 2. Objetos de S3 con DeleteObjects
+    object_keys = {
+        resource_id: item["s3_path"].replace(f"s3://{S3_RESOURCES_BUCKET}/", "")
+        for resource_id, item in items.items() if item.get("s3_path")
+    }
+    # Los snapshots del índice local van en las mismas peticiones (también los de recursos sin registro)
+    failed_keys = delete_object_batches(
+        list(object_keys.values()) + [snapshot_key(resource_id) for resource_id in resource_ids]
+    )
+
+    # 3. Registros de DynamoDB con BatchWriteItem (el writer reintenta los no procesados)
+    records_error = None
+    try:
+        hash_keys = [{"file_hash": item["file_hash"]} for item in items.values() if item.get("file_hash")]
+        if hash_keys:
+            hash_table_helper.batch_write_items(delete_items=hash_keys)
+        if items:
+            files_table_helper.batch_write_items(delete_items=[{"resource_id": resource_id} for resource_id in items])
+    except Exception as e:
+        logger.error(f"Error eliminando registros de DynamoDB: {str(e)}", exc_info=True)
+        records_error = str(e)
+
+    # 4. Un único DELETE sobre la biblioteca (también quita asociaciones a recursos inexistentes)
+    removed: Set[str] = set()
+    if resource_ids:
+        try:
+            removed = set(remove_from_library(library_table_helper, silabus_id, resource_ids))
+        except Exception as e:
+            logger.error(f"Error actualizando la biblioteca del silabus {silabus_id}: {str(e)}", exc_info=True)
+
+    results = []
+    for resource_id in resource_ids:
+        item = items.get(resource_id)
+        if item is None:
+            status, message = "not_found", f"El recurso con resource_id '{resource_id}' no existe."
+        elif records_error:
+            status, message = "error", f"Error al eliminar el recurso: {records_error}"
+        else:
+            status, message = "deleted", f"Recurso {resource_id} eliminado exitosamente"
+        details = {"removed_from_library": resource_id in removed}
+        if item is not None:
+            details["deleted_from_pinecone"] = not failed_vectors.intersection(vectors[resource_id])
+            details["deleted_from_s3"] = resource_id in object_keys and object_keys[resource_id] not in failed_keys
+        results.append({"resourceId": resource_id, "status": status, "message": message, "details": details})
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        summary[result["status"]] = summary.get(result["status"], 0) + 1
+    logger.info("Eliminación masiva terminada", extra={"silabus_id": silabus_id, "summary": summary})
+    return {"success": not summary.get("error"), "summary": summary, "results": results}
+
+def batches(values: List[Any], size: int) -> Iterator[List[Any]]:
+    """Divide una lista en lotes de como máximo ``size`` elementos."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+def delete_vector_batches(vector_ids: List[str], namespace: Optional[str] = None) -> Set[str]:
+    """
+    Elimina vectores de Pinecone en lotes de PINECONE_DELETE_BATCH IDs.
+
+    :param vector_ids: IDs de los vectores
+    :param namespace: Namespace de los vectores (None para el namespace por defecto)
+    :return: IDs de los lotes que fallaron
+    """
+    failed: Set[str] = set()
+    for batch in batches(vector_ids, PINECONE_DELETE_BATCH):
+        try:
+            get_vector_store().delete_vectors(batch, namespace=namespace)
+        except Exception as e:
+            logger.error(f"Error eliminando {len(batch)} vectores de Pinecone: {str(e)}", exc_info=True)
+            failed.update(batch)
+    logger.info(f"Vectores eliminados de Pinecone: {len(vector_ids) - len(failed)} de {len(vector_ids)}")
+    return failed
+
+def delete_chunk_texts(vector_ids: List[str]) -> None:
+    """
+    Elimina de la tabla de chunks los textos de los vectores (sin propagar errores:
+    un chunk sin vector no se vuelve a leer).
+
+    :param vector_ids: IDs de los vectores
+    """
+    try:
+        logger.info(f"Chunks eliminados: {delete_chunks(chunks_table_helper, vector_ids)}")
+    except Exception as e:
+        logger.error(f"Error eliminando chunks: {str(e)}", exc_info=True)
+
+def delete_orphan_vectors(resource_ids: List[str], silabus_id: str) -> None:
+    """
+    Elimina por prefijo los vectores de recursos sin registro (sin propagar errores),
+    en el namespace por defecto y en el del sílabo.
+
+    :param resource_ids: IDs de los recursos
+    :param silabus_id: ID del silabo
+    """
+    for resource_id in resource_ids:
+        try:
+            deleted = sum(
+                get_vector_store().delete_by_prefix(vector_prefix(resource_id), namespace=namespace)
+                for namespace in deletion_namespaces(None, silabus_id)
+            )
+            deleted_chunks = delete_resource_chunks(chunks_table_helper, resource_id)
+            if deleted or deleted_chunks:
+                logger.info(f"Eliminados {deleted} vectores y {deleted_chunks} chunks huérfanos del recurso {resource_id}")
+        except Exception as e:
+            logger.warning(f"No se pudieron eliminar los vectores huérfanos de {resource_id}: {e}")
+
+def delete_object_batches(object_keys: List[str]) -> Set[str]:
+    """
+    Elimina objetos de S3 con DeleteObjects (hasta S3_DELETE_BATCH claves por llamada).
+
+    :param object_keys: Claves de los objetos
+    :return: Claves que no se pudieron eliminar
+    """
+    failed: Set[str] = set()
+    for batch in batches(object_keys, S3_DELETE_BATCH):
+        try:
+            response = s3_helper.delete_objects(batch)
+            failed.update(error["Key"] for error in response.get("Errors", []))
+        except Exception as e:
+            logger.error(f"Error eliminando {len(batch)} objetos de S3: {str(e)}", exc_info=True)
+            failed.update(batch)
+    return failed
@@ -1,31 +1,25 @@
 import json
 import os
-import boto3
 from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
 from aje_libs.common.logger import custom_logger
 from aje_libs.common.utils import DecimalEncoder
-from boto3.dynamodb.conditions import Attr
-from aje_libs.common.helpers.ssm_helper import SSMParameterHelper
+from shared.lazy import LazyResource
 # Configuración
 ENVIRONMENT = os.environ["ENVIRONMENT"]
 PROJECT_NAME = os.environ["PROJECT_NAME"]
 OWNER = os.environ["OWNER"]
 DYNAMO_CHAT_HISTORY_TABLE = os.environ["DYNAMO_CHAT_HISTORY_TABLE"]
 
-# Parameter Store
-ssm_chatbot = SSMParameterHelper(f"/{ENVIRONMENT}/{PROJECT_NAME}/chatbot")
-PARAMETER_VALUE = json.loads(ssm_chatbot.get_parameter_value())
-
 HISTORY_CANT_ELEMENTS = int(os.environ.get("HISTORY_CANT_ELEMENTS", 5))
 
 logger = custom_logger(__name__, owner=OWNER, service=PROJECT_NAME)
   
 # Inicializar DynamoDBHelper
-dynamo_chat_history = DynamoDBHelper(
+dynamo_chat_history = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_CHAT_HISTORY_TABLE,
     pk_name="ALUMNO_ID",
     sk_name="DATE_TIME"
-)
+))
 
 def lambda_handler(event, context):
     """Función Lambda para obtener historial de conversación."""
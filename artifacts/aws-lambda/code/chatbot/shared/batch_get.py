@@ -0,0 +1,22 @@
+from typing import Any, Dict, List
+
+# Claves por petición de BatchGetItem
+BATCH_GET_LIMIT = 100
+
+
+def batch_get_items(helper, keys: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Lee cualquier número de items con BatchGetItem, en lotes de BATCH_GET_LIMIT claves.
+
+    ``DynamoDBHelper.batch_get_items`` solo lee el primer lote: tras él continúa con
+    las claves no procesadas en lugar de con el siguiente tramo. Aquí se le pasa cada
+    tramo por separado (dentro de un tramo sí reintenta las no procesadas).
+
+    :param helper: DynamoDBHelper de la tabla.
+    :param keys: Claves de los items.
+    :return: Items encontrados (los que no existen no aparecen).
+    """
+    items: List[Dict[str, Any]] = []
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        items.extend(helper.batch_get_items(keys[start:start + BATCH_GET_LIMIT]))
+    return items
@@ -0,0 +1,224 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import boto3
+from aje_libs.common.logger import custom_logger
+from botocore.config import Config
+from botocore.exceptions import ClientError, ConnectionError as BotocoreConnectionError, ReadTimeoutError
+from shared.tracing import add_count
+
+logger = custom_logger(__name__)
+
+# Errores de Bedrock que se reintentan (el resto se propaga en el primer intento)
+THROTTLING_CODES = frozenset({"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"})
+RETRYABLE_CODES = THROTTLING_CODES | frozenset({
+    "ServiceUnavailableException", "ModelNotReadyException", "InternalServerException", "ModelTimeoutException",
+})
+
+# Configuración común (variables de entorno de la Lambda)
+MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", 4))
+BASE_DELAY_MS = int(os.environ.get("BEDROCK_BASE_DELAY_MS", 200))
+MAX_DELAY_MS = int(os.environ.get("BEDROCK_MAX_DELAY_MS", 4000))
+MAX_TOTAL_MS = int(os.environ.get("BEDROCK_MAX_TOTAL_MS", 20000))
+FALLBACK_REGIONS = [r for r in os.environ.get("BEDROCK_FALLBACK_REGIONS", "").split(",") if r]
+# "modelo=perfil,modelo=perfil": modelo (o perfil) alternativo cuando el primero está saturado
+MODEL_FALLBACKS = dict(
+    pair.split("=", 1) for pair in os.environ.get("BEDROCK_MODEL_FALLBACKS", "").split(",") if "=" in pair
+)
+# Peticiones por segundo por contenedor (0 sin límite): la cuota de la cuenta entre los contenedores esperados
+CONVERSE_RATE_PER_SECOND = float(os.environ.get("BEDROCK_CONVERSE_RPS", 0))
+EMBEDDINGS_RATE_PER_SECOND = float(os.environ.get("BEDROCK_EMBEDDINGS_RPS", 0))
+
+# Los reintentos los hace ResilientBedrockClient: botocore no reintenta por su cuenta
+_BOTO_CONFIG = Config(retries={"mode": "standard", "max_attempts": 1})
+
+
+def error_code(error: Exception) -> Optional[str]:
+    """Código de error de AWS (None si no es un ClientError)."""
+    if isinstance(error, ClientError):
+        return error.response.get("Error", {}).get("Code")
+    return None
+
+
+def is_throttling_error(error: Exception) -> bool:
+    """True si el error es una limitación de cuota de Bedrock."""
+    return error_code(error) in THROTTLING_CODES
+
+
+class TokenBucket:
+    """
+    Limitador de peticiones por segundo en el cliente, adaptativo: cada limitación de
+    Bedrock reduce la tasa a la mitad y cada respuesta correcta la recupera poco a poco
+    hasta la configurada. Con ``rate`` 0 no limita.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None, min_rate: float = 0.5,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep) -> None:
+        """
+        :param rate: Peticiones por segundo (la cuota de la cuenta repartida entre los contenedores esperados).
+        :param burst: Capacidad del cubo (por defecto, ``rate``; al menos una ficha).
+        :param min_rate: Tasa mínima tras reducciones sucesivas.
+        """
+        self.max_rate = rate
+        self.rate = rate
+        # Con menos de 1 petición por segundo el cubo tiene que poder llenar una ficha entera
+        self.capacity = max(burst or rate, 1)
+        self.min_rate = min(min_rate, rate) if rate else 0
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Espera hasta que haya una ficha disponible. Devuelve los segundos esperados."""
+        if not self.max_rate:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+    def on_throttle(self) -> None:
+        if self.max_rate:
+            with self._lock:
+                self.rate = max(self.min_rate, self.rate / 2)
+
+    def on_success(self) -> None:
+        if self.max_rate and self.rate < self.max_rate:
+            with self._lock:
+                self.rate = min(self.max_rate, self.rate + self.max_rate * 0.1)
+
+
+class ResilientBedrockClient:
+    """
+    Cliente de ``bedrock-runtime`` con la misma interfaz para ``converse`` e
+    ``invoke_model`` (sustituye al ``bedrock_client`` de BedrockHelper y PineconeHelper).
+
+    Antes de cada llamada toma una ficha del ``TokenBucket``. Las limitaciones y errores
+    transitorios se reintentan con backoff exponencial y jitter completo (espera
+    aleatoria entre 0 y ``min(max_delay, base * 2^intento)``). Si el destino sigue
+    saturado tras ``max_attempts``, se pasa al siguiente: el modelo alternativo de
+    ``model_fallbacks`` (p. ej. un perfil de inferencia entre regiones) y después las
+    ``fallback_regions``. Publica ``bedrock_retries``, ``bedrock_throttles``,
+    ``bedrock_fallbacks`` y ``bedrock_rate_wait_ms`` en la traza de la petición.
+    """
+
+    def __init__(
+        self,
+        region_name: str,
+        fallback_regions: Sequence[str] = (),
+        model_fallbacks: Optional[Dict[str, str]] = None,
+        bucket: Optional[TokenBucket] = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        base_delay_ms: int = BASE_DELAY_MS,
+        max_delay_ms: int = MAX_DELAY_MS,
+        max_total_ms: int = MAX_TOTAL_MS,
+        client_factory: Optional[Callable[[str], Any]] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """
+        :param region_name: Región principal.
+        :param fallback_regions: Regiones secundarias, en orden.
+        :param model_fallbacks: Modelo alternativo por ID de modelo.
+        :param bucket: Limitador de peticiones (None para no limitar).
+        :param max_attempts: Intentos por destino (región y modelo).
+        :param max_total_ms: Tiempo máximo de espera entre reintentos; agotado, cada destino restante se prueba una vez.
+        :param client_factory: Crea el cliente de una región (por defecto, boto3 sin reintentos propios).
+        """
+        self.region_name = region_name
+        self.fallback_regions = [region for region in fallback_regions if region != region_name]
+        self.model_fallbacks = model_fallbacks or {}
+        self.bucket = bucket or TokenBucket(0)
+        self.max_attempts = max(max_attempts, 1)
+        self.base_delay = base_delay_ms / 1000
+        self.max_delay = max_delay_ms / 1000
+        self.max_total = max_total_ms / 1000
+        self._client_factory = client_factory or (
+            lambda region: boto3.client("bedrock-runtime", region_name=region, config=_BOTO_CONFIG)
+        )
+        self._sleep = sleep
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def converse(self, **kwargs) -> Dict[str, Any]:
+        return self._call("converse", kwargs)
+
+    def invoke_model(self, **kwargs) -> Dict[str, Any]:
+        return self._call("invoke_model", kwargs)
+
+    def _client(self, region: str):
+        with self._lock:
+            if region not in self._clients:
+                self._clients[region] = self._client_factory(region)
+            return self._clients[region]
+
+    def targets(self, model_id: str) -> List[Tuple[str, str]]:
+        """Destinos ``(región, modelo)`` en orden de uso."""
+        targets = [(self.region_name, model_id)]
+        if self.model_fallbacks.get(model_id):
+            targets.append((self.region_name, self.model_fallbacks[model_id]))
+        targets += [(region, model_id) for region in self.fallback_regions]
+        return targets
+
+    def _call(self, operation: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        last_error = None
+        for number, (region, model_id) in enumerate(self.targets(kwargs.get("modelId"))):
+            if number:
+                add_count("bedrock_fallbacks")
+                logger.warning("Bedrock saturado, se usa un destino alternativo",
+                               extra={"operation": operation, "region": region, "model_id": model_id})
+            for attempt in range(self.max_attempts):
+                waited = self.bucket.acquire()
+                if waited:
+                    add_count("bedrock_rate_wait_ms", waited * 1000, "Milliseconds")
+                try:
+                    response = getattr(self._client(region), operation)(**{**kwargs, "modelId": model_id})
+                    self.bucket.on_success()
+                    return response
+                except (ClientError, BotocoreConnectionError, ReadTimeoutError) as error:
+                    code = error_code(error)
+                    if isinstance(error, ClientError) and code not in RETRYABLE_CODES:
+                        raise
+                    last_error = error
+                    if code in THROTTLING_CODES:
+                        add_count("bedrock_throttles")
+                        self.bucket.on_throttle()
+                if attempt + 1 == self.max_attempts:
+                    break
+                # Jitter completo: espera aleatoria hasta el backoff exponencial del intento
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                if time.monotonic() - started + delay > self.max_total:
+                    # Sin tiempo para otra espera: se prueba directamente el siguiente destino
+                    break
+                add_count("bedrock_retries")
+                self._sleep(delay)
+        raise last_error
+
+
+def resilient_bedrock_client(region_name: str, rate_per_second: float = 0, burst: Optional[float] = None) -> ResilientBedrockClient:
+    """
+    Cliente resiliente con la configuración de las variables de entorno ``BEDROCK_*``.
+
+    :param region_name: Región principal (CHATBOT_REGION o EMBEDDINGS_REGION).
+    :param rate_per_second: Peticiones por segundo de este contenedor (0 para no limitar).
+    :param burst: Capacidad del cubo de fichas.
+    """
+    return ResilientBedrockClient(
+        region_name,
+        fallback_regions=FALLBACK_REGIONS,
+        model_fallbacks=MODEL_FALLBACKS,
+        bucket=TokenBucket(rate_per_second, burst),
+    )
@@ -0,0 +1,104 @@
+from typing import Any, Dict, Iterable, List
+
+from shared.vector_ids import SEPARATOR
+
+# Tabla de chunks: clave (resource_id, chunk_id), con chunk_id igual al ID del vector
+RESOURCE_ID = "resource_id"
+CHUNK_ID = "chunk_id"
+TEXT = "text"
+
+# Único metadato que queda en Pinecone: el que usan los filtros de las consultas
+FILTER_FIELDS = ("resource_id",)
+
+BATCH_GET_LIMIT = 100
+
+
+def slim_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Metadatos del vector en Pinecone: solo los campos filtrables."""
+    return {name: metadata[name] for name in FILTER_FIELDS if name in metadata}
+
+
+def chunk_key(vector_id: str) -> Dict[str, str]:
+    """Clave del chunk a partir del ID del vector (``{resource_id}#{índice}``)."""
+    return {RESOURCE_ID: vector_id.rsplit(SEPARATOR, 1)[0], CHUNK_ID: vector_id}
+
+
+def put_chunks(helper, chunks: Iterable[Dict[str, Any]]) -> None:
+    """
+    Guarda los chunks (``resource_id``, ``chunk_id``, ``text`` y atributos del
+    recurso) con BatchWriteItem. Los IDs son deterministas: reescribir un recurso
+    sobrescribe sus chunks.
+
+    :param helper: DynamoDBHelper de la tabla de chunks.
+    :param chunks: Items a guardar.
+    """
+    chunks = list(chunks)
+    if chunks:
+        helper.batch_write_items(put_items=chunks)
+
+
+def get_texts(helper, vector_ids: Iterable[str]) -> Dict[str, str]:
+    """
+    Textos de varios chunks con BatchGetItem (una llamada para un top-k normal).
+
+    :param helper: DynamoDBHelper de la tabla de chunks.
+    :param vector_ids: IDs de los vectores.
+    :return: Texto por ID (los que no existen no aparecen).
+    """
+    keys = [chunk_key(vector_id) for vector_id in dict.fromkeys(vector_ids)]
+    if not keys:
+        return {}
+    # Solo el texto: los atributos del recurso no hacen falta para el contexto
+    client = helper.table.meta.client
+    texts: Dict[str, str] = {}
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        request = {helper.table.name: {
+            "Keys": keys[start:start + BATCH_GET_LIMIT],
+            "ProjectionExpression": "#chunk_id, #text",
+            "ExpressionAttributeNames": {"#chunk_id": CHUNK_ID, "#text": TEXT},
+        }}
+        while request:
+            response = client.batch_get_item(RequestItems=request)
+            for item in response.get("Responses", {}).get(helper.table.name, []):
+                texts[item[CHUNK_ID]] = item.get(TEXT, "")
+            request = response.get("UnprocessedKeys") or None
+    return texts
+
+
+def delete_chunks(helper, vector_ids: Iterable[str]) -> int:
+    """
+    Elimina chunks por ID con BatchWriteItem.
+
+    :param helper: DynamoDBHelper de la tabla de chunks.
+    :param vector_ids: IDs de los chunks (iguales a los de sus vectores).
+    :return: Chunks eliminados.
+    """
+    keys = [chunk_key(vector_id) for vector_id in dict.fromkeys(vector_ids)]
+    if keys:
+        helper.batch_write_items(delete_items=keys)
+    return len(keys)
+
+
+def delete_resource_chunks(helper, resource_id: str) -> int:
+    """
+    Elimina todos los chunks de un recurso buscándolos por ``resource_id`` (para
+    recursos sin registro, p. ej. de una ingesta que falló antes de escribirlo).
+
+    :param helper: DynamoDBHelper de la tabla de chunks.
+    :param resource_id: ID del recurso.
+    :return: Chunks eliminados.
+    """
+    vector_ids: List[str] = []
+    kwargs = {
+        "KeyConditionExpression": "#resource_id = :resource_id",
+        "ProjectionExpression": "#chunk_id",
+        "ExpressionAttributeNames": {"#resource_id": RESOURCE_ID, "#chunk_id": CHUNK_ID},
+        "ExpressionAttributeValues": {":resource_id": resource_id},
+    }
+    while True:
+        response = helper.table.query(**kwargs)
+        vector_ids.extend(item[CHUNK_ID] for item in response.get("Items", []))
+        if "LastEvaluatedKey" not in response:
+            break
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    return delete_chunks(helper, vector_ids)
@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from aje_libs.common.logger import custom_logger
+from shared.snapstart import register_after_restore
+
+logger = custom_logger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+EXTENSION_DEFAULT_PORT = 2773
+EXTENSION_TIMEOUT_SECONDS = 2
+
+SOURCE_PARAMETER = "parameter"
+SOURCE_SECRET = "secret"
+
+
+class LazyConfig:
+    """
+    Cache perezoso de parámetros de SSM y secretos de Secrets Manager.
+
+    Cada fuente registrada se obtiene una sola vez (bajo demanda o mediante
+    ``prefetch`` en paralelo) y se reutiliza entre invocaciones calientes hasta
+    que vence su TTL, de modo que las rotaciones se recogen sin esperar a un
+    cold start. Si está disponible, usa la caché local de la extensión
+    "AWS Parameters and Secrets Lambda Extension".
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        use_extension: bool = False,
+        extension_port: int = EXTENSION_DEFAULT_PORT,
+    ) -> None:
+        """
+        :param ttl_seconds: Segundos que un valor se considera vigente antes de refrescarlo.
+        :param use_extension: Si se debe consultar primero la extensión local de Parameters and Secrets.
+        :param extension_port: Puerto HTTP de la extensión.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.use_extension = use_extension
+        self.extension_port = extension_port
+        self._sources: Dict[str, Dict[str, str]] = {}
+        self._values: Dict[str, Any] = {}
+        self._fetched_at: Dict[str, float] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def register_parameter(self, alias: str, name: str) -> None:
+        """
+        Registra un parámetro de SSM (con contenido JSON) bajo un alias.
+
+        :param alias: Nombre corto con el que se consultará el parámetro.
+        :param name: Nombre completo del parámetro en Parameter Store.
+        """
+        self._sources[alias] = {"kind": SOURCE_PARAMETER, "name": name}
+
+    def register_secret(self, alias: str, name: str) -> None:
+        """
+        Registra un secreto de Secrets Manager (con contenido JSON) bajo un alias.
+
+        :param alias: Nombre corto con el que se consultará el secreto.
+        :param name: Nombre del secreto.
+        """
+        self._sources[alias] = {"kind": SOURCE_SECRET, "name": name}
+
+    def prefetch(self, *aliases: str) -> None:
+        """
+        Lanza en segundo plano la carga concurrente de las fuentes indicadas
+        (o de todas las registradas). No bloquea: el primer ``get`` espera al
+        resultado si aún no ha llegado.
+        """
+        aliases = aliases or tuple(self._sources)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(len(self._sources), 1),
+                    thread_name_prefix="config-prefetch"
+                )
+            for alias in aliases:
+                if alias in self._inflight or self._is_fresh(alias):
+                    continue
+                self._inflight[alias] = self._executor.submit(self._load, alias)
+
+    def wait_for_prefetch(self, timeout: Optional[float] = None) -> None:
+        """
+        Espera a que terminen las cargas lanzadas con ``prefetch``.
+
+        :param timeout: Segundos máximos de espera por cada fuente.
+        """
+        with self._lock:
+            futures = list(self._inflight.values())
+        for future in futures:
+            try:
+                future.result(timeout=timeout)
+            except Exception as e:
+                logger.warning(f"Falló la precarga de configuración: {e}")
+
+    def get(self, alias: str) -> Dict[str, Any]:
+        """
+        Devuelve el contenido (ya parseado) de una fuente, cargándolo si no está
+        en caché o si su TTL venció.
+
+        :param alias: Alias registrado.
+        :return: Diccionario con el contenido JSON de la fuente.
+        """
+        if alias not in self._sources:
+            raise KeyError(f"Fuente de configuración no registrada: {alias}")
+
+        if self._is_fresh(alias):
+            return self._values[alias]
+
+        with self._lock:
+            future = self._inflight.get(alias)
+            if future is None:
+                if self._is_fresh(alias):
+                    return self._values[alias]
+                future = Future()
+                self._inflight[alias] = future
+                owner = True
+            else:
+                owner = False
+
+        if owner:
+            try:
+                future.set_result(self._load(alias))
+            except Exception as e:
+                future.set_exception(e)
+
+        try:
+            return future.result()
+        except Exception as e:
+            # Si ya teníamos un valor, preferimos servirlo vencido antes que fallar la petición
+            if alias in self._values:
+                logger.warning(f"No se pudo refrescar '{alias}', se usa el valor en caché: {e}")
+                return self._values[alias]
+            raise
+
+    def value(self, alias: str, key: str) -> Any:
+        """
+        Devuelve una clave concreta de una fuente.
+
+        :param alias: Alias registrado.
+        :param key: Clave dentro del JSON de la fuente.
+        """
+        return self.get(alias)[key]
+
+    def invalidate(self, alias: Optional[str] = None) -> None:
+        """
+        Descarta los valores en caché para forzar su recarga en el próximo acceso.
+
+        :param alias: Alias a invalidar; si es None se invalidan todos.
+        """
+        with self._lock:
+            aliases = [alias] if alias else list(self._fetched_at)
+            for name in aliases:
+                self._fetched_at.pop(name, None)
+
+    def _is_fresh(self, alias: str) -> bool:
+        fetched_at = self._fetched_at.get(alias)
+        return fetched_at is not None and (time.monotonic() - fetched_at) < self.ttl_seconds
+
+    def _load(self, alias: str) -> Dict[str, Any]:
+        source = self._sources[alias]
+        try:
+            raw = self._fetch(source["kind"], source["name"])
+            value = json.loads(raw)
+            with self._lock:
+                self._values[alias] = value
+                self._fetched_at[alias] = time.monotonic()
+            logger.info(f"Configuración '{alias}' cargada desde {source['name']}")
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(alias, None)
+
+    def _fetch(self, kind: str, name: str) -> str:
+        if self.use_extension:
+            try:
+                return self._fetch_from_extension(kind, name)
+            except Exception as e:
+                logger.warning(f"Extensión de Parameters and Secrets no disponible, se usa el SDK: {e}")
+
+        if kind == SOURCE_PARAMETER:
+            from aje_libs.common.helpers.ssm_helper import SSMParameterHelper
+            return SSMParameterHelper(name).get_parameter_value()
+
+        from aje_libs.common.helpers.secrets_helper import SecretsHelper
+        return json.dumps(SecretsHelper(name).get_secret_value())
+
+    def _fetch_from_extension(self, kind: str, name: str) -> str:
+        quoted = urllib.parse.quote(name, safe="")
+        if kind == SOURCE_PARAMETER:
+            path = f"/systemsmanager/parameters/get?name={quoted}&withDecryption=true"
+        else:
+            path = f"/secretsmanager/get?secretId={quoted}"
+
+        request = urllib.request.Request(
+            f"http://localhost:{self.extension_port}{path}",
+            headers={"X-Aws-Parameters-Secrets-Token": os.environ.get("AWS_SESSION_TOKEN", "")}
+        )
+        with urllib.request.urlopen(request, timeout=EXTENSION_TIMEOUT_SECONDS) as response:
+            payload = json.loads(response.read())
+
+        if kind == SOURCE_PARAMETER:
+            return payload["Parameter"]["Value"]
+        return payload["SecretString"]
+
+
+_config: Optional[LazyConfig] = None
+
+
+def get_config() -> LazyConfig:
+    """
+    Devuelve la instancia compartida de configuración del proyecto, con el
+    parámetro ``chatbot`` y el secreto ``pinecone`` ya registrados.
+    """
+    global _config
+    if _config is None:
+        environment = os.environ["ENVIRONMENT"]
+        project_name = os.environ["PROJECT_NAME"]
+
+        config = LazyConfig(
+            ttl_seconds=float(os.environ.get("CONFIG_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+            use_extension=os.environ.get("CONFIG_USE_EXTENSION", "false").lower() == "true",
+            extension_port=int(os.environ.get("PARAMETERS_SECRETS_EXTENSION_HTTP_PORT", EXTENSION_DEFAULT_PORT)),
+        )
+        config.register_parameter("chatbot", f"/{environment}/{project_name}/chatbot")
+        config.register_secret("pinecone", f"{environment}/{project_name}/pinecone-api")
+        # Con SnapStart los valores del snapshot pueden estar desactualizados al restaurar
+        register_after_restore(config.invalidate)
+        _config = config
+    return _config
@@ -0,0 +1,152 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from shared.vector_ids import vector_prefix
+
+# Estimación de tokens sin tokenizador (la misma que usan los benchmarks): 4 caracteres por token
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 2500
+# add_resource solapa 20 palabras entre chunks consecutivos; se busca hasta este margen
+DEFAULT_MAX_OVERLAP_WORDS = 50
+# Proporción de n-gramas del pasaje más corto presentes en otro para considerarlo repetido
+DEFAULT_DUPLICATE_THRESHOLD = 0.85
+SHINGLE_WORDS = 3
+
+EMPTY_CONTEXT = "No se encontraron fragmentos relevantes en la base de conocimientos."
+
+
+def estimate_tokens(text: str) -> int:
+    """Tokens aproximados de un texto."""
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def chunk_position(chunk_id: Optional[str], resource_id: str) -> Optional[int]:
+    """
+    Índice del chunk dentro de su recurso a partir del ID del vector (``{resource_id}#{i}``).
+    None para los IDs del formato anterior, que no permiten saber qué chunks son contiguos.
+    """
+    prefix = vector_prefix(resource_id)
+    if chunk_id and chunk_id.startswith(prefix) and chunk_id[len(prefix):].isdigit():
+        return int(chunk_id[len(prefix):])
+    return None
+
+
+def join_overlapping(left: List[str], right: List[str], max_overlap: int) -> List[str]:
+    """
+    Une las palabras de dos chunks consecutivos quitando el solapamiento: el sufijo
+    más largo de ``left`` que coincide con el inicio de ``right``.
+    """
+    for size in range(min(max_overlap, len(left), len(right)), 0, -1):
+        if left[-size:] == right[:size]:
+            return left + right[size:]
+    return left + right
+
+
+def _shingles(words: List[str]) -> set:
+    words = [word.lower() for word in words]
+    if len(words) < SHINGLE_WORDS:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1)}
+
+
+def _overlap_ratio(a: set, b: set) -> float:
+    """Fracción del conjunto más pequeño contenida en el otro (detecta también fragmentos incluidos)."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def _merge_runs(chunks: List[Dict[str, Any]], max_overlap: int) -> List[Dict[str, Any]]:
+    """Agrupa los chunks contiguos de un mismo recurso en pasajes (en el orden del documento)."""
+    passages = []
+    by_resource: Dict[str, Dict[int, Dict[str, Any]]] = {}
+    for chunk in chunks:
+        resource_id = chunk.get("resource_id", "unknown")
+        position = chunk_position(chunk.get("id"), resource_id)
+        if position is None:
+            passages.append({
+                "resource_id": resource_id, "chunks": [], "words": chunk.get("text", "").split(),
+                "score": chunk.get("score") or 0.0,
+            })
+        else:
+            # El mismo vector puede llegar dos veces (p. ej. de dos namespaces): se conserva uno
+            by_resource.setdefault(resource_id, {}).setdefault(position, chunk)
+
+    for resource_id, positions in by_resource.items():
+        current = None
+        for position in sorted(positions):
+            chunk = positions[position]
+            words = chunk.get("text", "").split()
+            score = chunk.get("score") or 0.0
+            if current is not None and position == current["chunks"][-1] + 1:
+                current["words"] = join_overlapping(current["words"], words, max_overlap)
+                current["chunks"].append(position)
+                current["score"] = max(current["score"], score)
+            else:
+                current = {"resource_id": resource_id, "chunks": [position], "words": words, "score": score}
+                passages.append(current)
+    return passages
+
+
+def compress_chunks(
+    chunks: Iterable[Dict[str, Any]],
+    token_budget: int = DEFAULT_TOKEN_BUDGET,
+    max_overlap_words: int = DEFAULT_MAX_OVERLAP_WORDS,
+    duplicate_threshold: float = DEFAULT_DUPLICATE_THRESHOLD,
+) -> List[Dict[str, Any]]:
+    """
+    Reduce los fragmentos recuperados al contexto que se envía al modelo.
+
+    Une los chunks contiguos de un recurso quitando el solapamiento entre ellos,
+    descarta los pasajes casi repetidos y llena el presupuesto de tokens en orden
+    de score. Si el mejor pasaje no cabe solo, se recorta.
+
+    :param chunks: Fragmentos con ``id``, ``text``, ``resource_id`` y ``score``.
+    :param token_budget: Tokens máximos del texto de los pasajes.
+    :param max_overlap_words: Solapamiento máximo que se busca entre chunks contiguos.
+    :param duplicate_threshold: Similitud (n-gramas compartidos) desde la que un pasaje se descarta.
+    :return: Pasajes con ``resource_id``, ``chunks`` (índices), ``text`` y ``score``, de mayor a menor score.
+    """
+    passages = _merge_runs([chunk for chunk in chunks if chunk.get("text")], max_overlap_words)
+    passages.sort(key=lambda passage: passage["score"], reverse=True)
+
+    kept = []
+    kept_shingles = []
+    used_tokens = 0
+    for passage in passages:
+        shingles = _shingles(passage["words"])
+        if any(_overlap_ratio(shingles, other) >= duplicate_threshold for other in kept_shingles):
+            continue
+        text = " ".join(passage["words"])
+        tokens = estimate_tokens(text)
+        if used_tokens + tokens > token_budget:
+            if kept:
+                # Puede que un pasaje más corto con menos score aún quepa
+                continue
+            text = text[:token_budget * CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+            tokens = estimate_tokens(text)
+        kept.append({
+            "resource_id": passage["resource_id"],
+            "chunks": passage["chunks"],
+            "text": text,
+            "score": passage["score"],
+        })
+        kept_shingles.append(shingles)
+        used_tokens += tokens
+    return kept
+
+
+def format_passages(passages: List[Dict[str, Any]]) -> str:
+    """
+    Texto compacto para el ``toolResult``: una cabecera corta por pasaje seguida de su
+    texto, en lugar del JSON con un objeto por chunk.
+    """
+    if not passages:
+        return EMPTY_CONTEXT
+    blocks = []
+    for number, passage in enumerate(passages, start=1):
+        chunks = passage["chunks"]
+        location = ""
+        if chunks:
+            location = f", fragmento {chunks[0]}" if len(chunks) == 1 else f", fragmentos {chunks[0]}-{chunks[-1]}"
+        blocks.append(f"[{number}] recurso {passage['resource_id']}{location} (score {passage['score']:.2f})\n{passage['text']}")
+    return "\n\n".join(blocks)
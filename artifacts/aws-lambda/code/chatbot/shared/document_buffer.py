@@ -0,0 +1,279 @@
+import io
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Union
+
+DEFAULT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+DEFAULT_TMP_QUOTA_BYTES = 384 * 1024 * 1024
+DEFAULT_TMP_MIN_FREE_BYTES = 32 * 1024 * 1024
+DEFAULT_DIRECTORY = "/tmp/downloads"
+# Las escrituras a disco reservan cuota por bloques para no consultar el disco en cada una
+RESERVE_STEP_BYTES = 4 * 1024 * 1024
+FILE_PREFIX = "doc-"
+
+# Bytes en disco de los buffers vivos del proceso (compartido entre hilos)
+_reserved_bytes = 0
+_reserved_lock = threading.Lock()
+
+
+class TmpQuotaExceededError(RuntimeError):
+    """No hay espacio en /tmp (o se superó la cuota) para volcar un documento a disco."""
+
+
+def safe_suffix(file_name: str) -> str:
+    """
+    Extensión del nombre de archivo apta para un archivo temporal (solo letras y
+    dígitos, en minúsculas); vacía si el nombre no tiene una válida.
+
+    :param file_name: Nombre original (p. ej. el título del recurso).
+    """
+    suffix = os.path.splitext(file_name)[1].lower()
+    return suffix if re.fullmatch(r"\.[a-z0-9]{1,10}", suffix) else ""
+
+
+def reserved_bytes() -> int:
+    """Bytes que ocupan en disco los buffers abiertos de este proceso."""
+    return _reserved_bytes
+
+
+def cleanup_stale(directory: str = DEFAULT_DIRECTORY, max_age_seconds: float = 900) -> int:
+    """
+    Elimina archivos temporales de documentos que quedaron de invocaciones
+    anteriores (p. ej. cortadas por timeout antes de limpiar).
+
+    :param directory: Carpeta de los archivos temporales.
+    :param max_age_seconds: Antigüedad mínima para considerarlos abandonados.
+    :return: Número de archivos eliminados.
+    """
+    removed = 0
+    limit = time.time() - max_age_seconds
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.name.startswith(FILE_PREFIX) and entry.is_file() and entry.stat().st_mtime < limit:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+class DocumentBuffer:
+    """
+    Copia única de un documento descargado, compartida por todas las etapas de
+    la ingesta (hash, conteo de páginas, extracción y subida a S3).
+
+    Los documentos pequeños se mantienen en memoria; al superar ``spool_max_bytes``
+    se vuelcan a un archivo temporal con nombre único en ``directory`` (nunca se
+    usa el nombre que envía el usuario). Antes de escribir en disco se comprueba
+    la cuota de /tmp: bytes de los buffers vivos del proceso frente a
+    ``quota_bytes`` y espacio libre mínimo ``min_free_bytes``, para que
+    invocaciones calientes sucesivas o concurrentes no agoten el almacenamiento
+    efímero. Al cerrar (o al salir del ``with``) el archivo se elimina siempre.
+
+    Lectura:
+
+    - ``view()``: vista de solo lectura sin copias (``mmap`` del archivo o
+      ``memoryview`` de los bytes en memoria).
+    - ``open()``: stream binario independiente (cada lector tiene su posición).
+    - ``path``: ruta en disco para librerías que solo aceptan rutas; un buffer en
+      memoria se vuelca a disco la primera vez que se pide.
+
+    Una vez finalizado, varios hilos pueden leerlo a la vez.
+
+    La configuración por defecto se lee de ``DOCUMENT_SPOOL_MAX_BYTES``,
+    ``TMP_QUOTA_BYTES`` y ``TMP_MIN_FREE_BYTES``.
+    """
+
+    def __init__(
+        self,
+        file_name: str = "",
+        spool_max_bytes: Optional[int] = None,
+        quota_bytes: Optional[int] = None,
+        min_free_bytes: Optional[int] = None,
+        directory: str = DEFAULT_DIRECTORY,
+    ) -> None:
+        """
+        :param file_name: Nombre original del documento (solo se usa su extensión).
+        :param spool_max_bytes: Tamaño máximo que se mantiene en memoria.
+        :param quota_bytes: Bytes en /tmp que pueden ocupar a la vez los buffers del proceso.
+        :param min_free_bytes: Espacio libre que debe quedar en el sistema de archivos.
+        :param directory: Carpeta de los archivos temporales.
+        """
+        self.suffix = safe_suffix(file_name)
+        self.spool_max_bytes = int(spool_max_bytes if spool_max_bytes is not None
+                                   else os.environ.get("DOCUMENT_SPOOL_MAX_BYTES", DEFAULT_SPOOL_MAX_BYTES))
+        self.quota_bytes = int(quota_bytes if quota_bytes is not None
+                               else os.environ.get("TMP_QUOTA_BYTES", DEFAULT_TMP_QUOTA_BYTES))
+        self.min_free_bytes = int(min_free_bytes if min_free_bytes is not None
+                                  else os.environ.get("TMP_MIN_FREE_BYTES", DEFAULT_TMP_MIN_FREE_BYTES))
+        self.directory = directory
+        self.size = 0
+        self._memory: Optional[io.BytesIO] = io.BytesIO()
+        self._data: Optional[bytes] = None
+        self._file: Optional[BinaryIO] = None
+        self._path: Optional[str] = None
+        self._reserved = 0
+        self._finalized = False
+        self._closed = False
+        # Lectores de varios hilos (p. ej. extracción y subida a S3 en paralelo)
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> "DocumentBuffer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def in_memory(self) -> bool:
+        return self._path is None
+
+    def expect(self, size: Optional[int]) -> None:
+        """
+        Anticipa el tamaño total (p. ej. el Content-Length de la descarga): si no
+        cabe en memoria se escribe directamente a disco, comprobando la cuota antes
+        de descargar nada.
+
+        :param size: Tamaño esperado en bytes, o None si no se conoce.
+        """
+        if size and size > self.spool_max_bytes and self.in_memory:
+            self._spool(size)
+
+    def write(self, data: Union[bytes, bytearray, memoryview]) -> int:
+        """
+        Añade datos al final del documento.
+
+        :param data: Bloque de bytes.
+        :return: Bytes escritos.
+        """
+        self._check_open()
+        if self._finalized:
+            raise ValueError("El buffer ya se finalizó; no admite más escrituras")
+        length = len(data)
+        if self.in_memory and self.size + length > self.spool_max_bytes:
+            self._spool(self.size + length)
+        if self.in_memory:
+            self._memory.write(data)
+        else:
+            self._reserve(self.size + length, headroom=RESERVE_STEP_BYTES)
+            self._file.write(data)
+        self.size += length
+        return length
+
+    def finalize(self) -> "DocumentBuffer":
+        """Termina la escritura; a partir de aquí el contenido es de solo lectura."""
+        self._check_open()
+        if not self._finalized:
+            if self.in_memory:
+                self._data = self._memory.getvalue()
+                self._memory = None
+            else:
+                self._file.flush()
+            self._finalized = True
+        return self
+
+    @contextmanager
+    def view(self) -> Iterator[Union[memoryview, mmap.mmap]]:
+        """Vista de solo lectura del contenido completo sin copiarlo."""
+        self.finalize()
+        with self._lock:
+            data = self._data if self.in_memory else None
+        if data is not None or self.size == 0:
+            view = memoryview(data if data is not None else b"")
+            try:
+                yield view
+            finally:
+                view.release()
+            return
+        with open(self._path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+    def open(self) -> BinaryIO:
+        """Stream binario de lectura con posición propia (hay que cerrarlo)."""
+        self.finalize()
+        with self._lock:
+            if self.in_memory:
+                # BytesIO sobre bytes comparte el objeto hasta que se escribe en él
+                return io.BytesIO(self._data)
+            return open(self._path, "rb")
+
+    @property
+    def path(self) -> str:
+        """Ruta del contenido en disco (se vuelca si estaba en memoria)."""
+        self.finalize()
+        with self._lock:
+            if self.in_memory:
+                self._spool(self.size)
+                self._file.write(self._data)
+                self._file.flush()
+                self._data = None
+            return self._path
+
+    def close(self) -> None:
+        """Libera la memoria y elimina el archivo temporal (se puede llamar varias veces)."""
+        global _reserved_bytes
+        if self._closed:
+            return
+        self._closed = True
+        self._memory = None
+        self._data = None
+        if self._file is not None:
+            self._file.close()
+        if self._path is not None:
+            try:
+                os.remove(self._path)
+            except FileNotFoundError:
+                pass
+        with _reserved_lock:
+            _reserved_bytes -= self._reserved
+        self._reserved = 0
+
+    def _spool(self, size: int) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._reserve(size)
+        descriptor, self._path = tempfile.mkstemp(prefix=FILE_PREFIX, suffix=self.suffix, dir=self.directory)
+        self._file = os.fdopen(descriptor, "wb")
+        if self._memory is not None:
+            self._file.write(self._memory.getbuffer())
+            self._memory = None
+
+    def _reserve(self, size: int, headroom: int = 0) -> None:
+        global _reserved_bytes
+        if size <= self._reserved:
+            return
+        with _reserved_lock:
+            available = self.quota_bytes - (_reserved_bytes - self._reserved)
+            if size > available:
+                raise TmpQuotaExceededError(
+                    f"Cuota de /tmp superada: se necesitan {size} bytes y quedan {available} de {self.quota_bytes}"
+                )
+            target = min(size + headroom, available)
+            extra = target - self._reserved
+            free = shutil.disk_usage(self.directory).free
+            if free - (size - self._reserved) < self.min_free_bytes:
+                raise TmpQuotaExceededError(
+                    f"Espacio insuficiente en {self.directory}: {free} bytes libres, se necesitan {size - self._reserved}"
+                )
+            _reserved_bytes += extra
+            self._reserved = target
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise ValueError("El buffer está cerrado")
@@ -0,0 +1,146 @@
+import math
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Intenciones que ask responde sin llamar al modelo
+LIST_RESOURCES = "list_resources"
+GREETING = "greeting"
+INTENTS = (LIST_RESOURCES, GREETING)
+
+# Cómo se reconoció la intención
+RULE = "rule"
+EMBEDDING = "embedding"
+
+# Reglas sobre el texto normalizado (minúsculas, sin tildes ni signos). Son estrictas a
+# propósito: el mensaje entero tiene que ser la petición, así "¿qué recursos hay sobre
+# inflación?" sigue yendo al modelo.
+_COURSE = r"(?: (?:del|(?:en|de|para)(?: (?:el|este|mi|la|esta))?|el|este|mi|la|esta) (?:curso|clase|materia|asignatura|silabo))?"
+_RESOURCES = r"(?:los |las )?(?:recursos|materiales|documentos|archivos|lecturas|clases)(?: disponibles)?"
+_POLITE = r"(?:(?:por favor|porfa|gracias) )?"
+RULES: Dict[str, List[str]] = {
+    LIST_RESOURCES: [
+        rf"{_POLITE}(?:que|cuales) (?:son {_RESOURCES}|{_RESOURCES} (?:hay|tiene|tengo|tenemos|existen|estan disponibles)){_COURSE}(?: por favor)?",
+        rf"{_POLITE}(?:lista(?:me)?|listar|muestra(?:me)?|mostrar|dame|quiero ver|ver) {_RESOURCES}{_COURSE}(?: por favor)?",
+        rf"{_RESOURCES}{_COURSE}",
+    ],
+    GREETING: [
+        r"(?:hola|buenas|buenos dias|buenas tardes|buenas noches|hey|saludos|que tal)(?: (?:hola|buenas|buenos dias|buenas tardes|buenas noches|que tal|como estas))*",
+    ],
+}
+
+# Ejemplos para el clasificador por embeddings (opcional)
+EXAMPLES: Dict[str, List[str]] = {
+    LIST_RESOURCES: [
+        "¿Qué recursos hay en el curso?",
+        "¿Cuáles son los materiales disponibles?",
+        "Muéstrame la lista de documentos del curso",
+        "¿Qué archivos tengo para estudiar?",
+    ],
+    GREETING: [
+        "Hola",
+        "Buenos días",
+        "Hola, ¿cómo estás?",
+        "Buenas tardes",
+    ],
+}
+
+
+def normalize(text: str, strip_words: Iterable[str] = ()) -> str:
+    """
+    Texto en minúsculas, sin tildes, signos ni espacios repetidos.
+
+    :param text: Mensaje del usuario.
+    :param strip_words: Palabras a quitar (p. ej. el nombre del asistente: "Hola Sofía").
+    """
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode("ascii").lower()
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    stripped = {normalize(word) for word in strip_words if word}
+    return " ".join(word for word in words if word not in stripped)
+
+
+def _cosine(a: Sequence[float], b: Sequence[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class EmbeddingIntentClassifier:
+    """
+    Clasifica por similitud coseno con frases de ejemplo de cada intención. Los ejemplos
+    se vectorizan una vez por contenedor; cada mensaje cuesta un embedding (mucho menos
+    que una llamada a converse).
+    """
+
+    def __init__(self, embed: Callable[[str], List[float]], threshold: float = 0.8,
+                 examples: Optional[Dict[str, List[str]]] = None) -> None:
+        """
+        :param embed: Función que devuelve el embedding de un texto.
+        :param threshold: Similitud mínima con el ejemplo más cercano.
+        :param examples: Frases por intención (por defecto, ``EXAMPLES``).
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.examples = examples or EXAMPLES
+        self._vectors: Optional[List[Tuple[str, List[float]]]] = None
+        self._lock = threading.Lock()
+
+    def classify(self, text: str, intents: Iterable[str]) -> Optional[str]:
+        """
+        :param text: Mensaje del usuario.
+        :param intents: Intenciones habilitadas.
+        :return: Intención más cercana si supera el umbral, o None.
+        """
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = [(intent, self.embed(example))
+                                 for intent, phrases in self.examples.items() for example in phrases]
+        intents = set(intents)
+        embedding = self.embed(text)
+        best, best_score = None, self.threshold
+        for intent, vector in self._vectors:
+            score = _cosine(embedding, vector)
+            if intent in intents and score >= best_score:
+                best, best_score = intent, score
+        return best
+
+
+class IntentRouter:
+    """
+    Reconoce los mensajes que se pueden responder sin el modelo: primero con reglas y,
+    si no coinciden y hay clasificador, por embeddings. El resto son preguntas abiertas.
+    """
+
+    def __init__(self, intents: Iterable[str] = INTENTS, classifier: Optional[EmbeddingIntentClassifier] = None,
+                 max_words: int = 12) -> None:
+        """
+        :param intents: Intenciones habilitadas.
+        :param classifier: Clasificador por embeddings (opcional).
+        :param max_words: Mensajes más largos van siempre al modelo.
+        """
+        unknown = set(intents) - set(INTENTS)
+        if unknown:
+            raise ValueError(f"Intenciones no soportadas: {sorted(unknown)}")
+        self.intents = [intent for intent in INTENTS if intent in set(intents)]
+        self.classifier = classifier
+        self.max_words = max_words
+        self._rules = {intent: [re.compile(pattern) for pattern in RULES[intent]] for intent in self.intents}
+
+    def route(self, message: str, assistant_name: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        :param message: Mensaje del usuario.
+        :param assistant_name: Nombre del asistente (se ignora en el mensaje).
+        :return: ``(intención, método)``, o ``(None, None)`` si hay que llamar al modelo.
+        """
+        text = normalize(message, (assistant_name or "").split())
+        if not text or len(text.split()) > self.max_words:
+            return None, None
+        for intent, patterns in self._rules.items():
+            if any(pattern.fullmatch(text) for pattern in patterns):
+                return intent, RULE
+        if self.classifier is not None:
+            intent = self.classifier.classify(message, self.intents)
+            if intent:
+                return intent, EMBEDDING
+        return None, None
@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Callable
+
+
+class LazyResource:
+    """
+    Proxy que construye el objeto real en el primer acceso a uno de sus atributos.
+
+    Permite declarar los helpers a nivel de módulo (como hasta ahora) sin pagar
+    su inicialización (clientes boto3, ``describe_table``, ``head_bucket``...)
+    durante el cold start, sino solo cuando una petición los usa.
+    """
+
+    def __init__(self, factory: Callable[[], Any]) -> None:
+        """
+        :param factory: Función sin argumentos que construye el objeto real.
+        """
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def get_instance(self) -> Any:
+        """Devuelve el objeto real, construyéndolo si es necesario."""
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            with object.__getattribute__(self, "_lock"):
+                instance = object.__getattribute__(self, "_instance")
+                if instance is None:
+                    instance = object.__getattribute__(self, "_factory")()
+                    object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self.get_instance(), name, value)
@@ -0,0 +1,128 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+# Conjunto de strings (SS) con los IDs de los recursos del sílabo
+RESOURCE_IDS = "resource_ids"
+# Formato anterior: lista de mapas [{"resource_id": ...}] reescrita completa en cada cambio
+LEGACY_RESOURCES = "resources"
+
+MIGRATION_ATTEMPTS = 3
+
+
+def library_resource_ids(item: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    IDs de recursos de una entrada de la biblioteca (o de un dict con la lista
+    ``resources``), combinando el conjunto ``resource_ids`` con el formato anterior.
+
+    :param item: Entrada de la tabla de biblioteca.
+    :return: IDs ordenados y sin duplicados.
+    """
+    if not item:
+        return []
+    ids = {str(resource_id) for resource_id in item.get(RESOURCE_IDS) or ()}
+    ids.update(str(resource["resource_id"]) for resource in item.get(LEGACY_RESOURCES) or () if "resource_id" in resource)
+    return sorted(ids)
+
+
+def timestamp() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def add_update(resource_ids: Iterable[str]) -> Dict[str, Any]:
+    """
+    Expresión que añade recursos al conjunto de forma atómica (``ADD``): escritores
+    concurrentes no se pisan y repetirla no tiene efecto.
+
+    :param resource_ids: IDs a añadir (al menos uno).
+    :return: ``UpdateExpression`` y ``ExpressionAttributeValues`` (formato de boto3 resource).
+    """
+    return {
+        "UpdateExpression": f"ADD {RESOURCE_IDS} :ids SET last_updated = :now",
+        "ExpressionAttributeValues": {":ids": set(resource_ids), ":now": timestamp()},
+    }
+
+
+def add_to_library(helper, silabus_id: str, resource_ids: Iterable[str]) -> List[str]:
+    """
+    Asocia recursos a un sílabo (crea la entrada si no existe).
+
+    :param helper: DynamoDBHelper de la tabla de biblioteca.
+    :param silabus_id: ID del sílabo.
+    :param resource_ids: IDs a asociar.
+    :return: IDs que no estaban asociados antes.
+    """
+    resource_ids = set(resource_ids)
+    if not resource_ids:
+        return []
+    response = helper.table.update_item(
+        Key={helper.pk_name: silabus_id}, ReturnValues="ALL_OLD", **add_update(resource_ids)
+    )
+    # Incluye la lista del formato anterior: en una entrada sin migrar ya pueden estar asociados
+    previous = set(library_resource_ids(response.get("Attributes")))
+    return sorted(resource_ids - previous)
+
+
+def remove_from_library(helper, silabus_id: str, resource_ids: Iterable[str]) -> List[str]:
+    """
+    Desasocia recursos de un sílabo con ``DELETE`` sobre el conjunto. Si la entrada
+    conserva la lista del formato anterior, antes se migra al conjunto.
+
+    :param helper: DynamoDBHelper de la tabla de biblioteca.
+    :param silabus_id: ID del sílabo.
+    :param resource_ids: IDs a desasociar.
+    :return: IDs que estaban asociados y se eliminaron.
+    """
+    resource_ids = set(resource_ids)
+    if not resource_ids:
+        return []
+    migrate_legacy_resources(helper, silabus_id)
+    try:
+        response = helper.table.update_item(
+            Key={helper.pk_name: silabus_id},
+            UpdateExpression=f"DELETE {RESOURCE_IDS} :ids SET last_updated = :now",
+            ConditionExpression=f"attribute_exists({helper.pk_name})",
+            ExpressionAttributeValues={":ids": resource_ids, ":now": timestamp()},
+            ReturnValues="ALL_OLD",
+        )
+    except helper.table.meta.client.exceptions.ConditionalCheckFailedException:
+        return []
+    previous = set(response.get("Attributes", {}).get(RESOURCE_IDS) or ())
+    return sorted(resource_ids & previous)
+
+
+def migrate_legacy_resources(helper, silabus_id: str) -> None:
+    """
+    Pasa la lista ``resources`` de una entrada al conjunto ``resource_ids``.
+
+    La escritura está condicionada a que la lista no haya cambiado desde la lectura
+    (por si aún escribe una versión anterior del código); si cambió, se reintenta.
+
+    :param helper: DynamoDBHelper de la tabla de biblioteca.
+    :param silabus_id: ID del sílabo.
+    """
+    client_errors = helper.table.meta.client.exceptions
+    for _ in range(MIGRATION_ATTEMPTS):
+        item = helper.table.get_item(Key={helper.pk_name: silabus_id}, ConsistentRead=True).get("Item")
+        if not item or LEGACY_RESOURCES not in item:
+            return
+        legacy = item[LEGACY_RESOURCES]
+        ids = {str(resource["resource_id"]) for resource in legacy if "resource_id" in resource}
+        try:
+            if ids:
+                helper.table.update_item(
+                    Key={helper.pk_name: silabus_id},
+                    UpdateExpression=f"ADD {RESOURCE_IDS} :ids REMOVE {LEGACY_RESOURCES}",
+                    ConditionExpression=f"{LEGACY_RESOURCES} = :legacy",
+                    ExpressionAttributeValues={":ids": ids, ":legacy": legacy},
+                )
+            else:
+                helper.table.update_item(
+                    Key={helper.pk_name: silabus_id},
+                    UpdateExpression=f"REMOVE {LEGACY_RESOURCES}",
+                    ConditionExpression=f"{LEGACY_RESOURCES} = :legacy",
+                    ExpressionAttributeValues={":legacy": legacy},
+                )
+            return
+        except client_errors.ConditionalCheckFailedException:
+            continue
+    raise RuntimeError(f"No se pudo migrar la biblioteca del sílabo {silabus_id}: la lista cambió durante la migración")
@@ -0,0 +1,269 @@
+import io
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from aje_libs.common.logger import custom_logger
+from shared.vector_ids import vector_id
+
+try:
+    import numpy as np
+except ImportError:  # La capa de NumPy es opcional: sin ella no hay índice local y se usa Pinecone
+    np = None
+
+logger = custom_logger(__name__)
+
+# Un snapshot por recurso (matriz float16 de vectores normalizados, fila i = chunk i),
+# escrito por add_resource junto al upsert. El índice de un sílabo se arma con los de
+# sus recursos, así que asociar o quitar un recurso no obliga a reescribir nada.
+SNAPSHOT_PREFIX = "vector_snapshots/"
+
+# Tipo de la matriz en memoria. NumPy no tiene BLAS para float16 (convertir y multiplicar
+# 5.000 x 1.024 cuesta ~17 ms frente a ~1 ms en float32), así que float16 es solo el
+# formato del snapshot. int8 usa una escala por fila y ocupa la cuarta parte.
+FLOAT32 = "float32"
+INT8 = "int8"
+
+LOAD_PARALLELISM = 8
+
+
+def snapshot_key(resource_id: str) -> str:
+    """Clave en S3 del snapshot de los vectores de un recurso."""
+    return f"{SNAPSHOT_PREFIX}{resource_id}.npy"
+
+
+def _normalize(matrix: "np.ndarray") -> "np.ndarray":
+    """Filas con norma 1: el producto escalar es la similitud coseno (el score de Pinecone)."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def write_snapshot(s3_client, bucket: str, resource_id: str, vectors: Sequence[Sequence[float]]) -> int:
+    """
+    Guarda en S3 el snapshot de los vectores de un recurso.
+
+    :param s3_client: Cliente de S3.
+    :param bucket: Bucket de recursos.
+    :param resource_id: ID del recurso.
+    :param vectors: Embeddings en el orden de sus chunks.
+    :return: Bytes escritos.
+    """
+    matrix = _normalize(np.asarray(vectors, dtype=np.float32)).astype(np.float16)
+    buffer = io.BytesIO()
+    np.save(buffer, matrix, allow_pickle=False)
+    body = buffer.getvalue()
+    s3_client.put_object(Bucket=bucket, Key=snapshot_key(resource_id), Body=body)
+    return len(body)
+
+
+def s3_snapshot_loader(s3_client, bucket: str) -> Callable[[str], Optional["np.ndarray"]]:
+    """
+    Función que lee el snapshot de un recurso (None si el recurso no tiene, p. ej. si
+    se ingestó antes de que existieran).
+
+    :param s3_client: Cliente de S3.
+    :param bucket: Bucket de recursos.
+    """
+    def load(resource_id: str) -> Optional["np.ndarray"]:
+        try:
+            response = s3_client.get_object(Bucket=bucket, Key=snapshot_key(resource_id))
+        except s3_client.exceptions.NoSuchKey:
+            return None
+        return np.load(io.BytesIO(response["Body"].read()), allow_pickle=False)
+    return load
+
+
+class SyllabusIndex:
+    """Vectores de los recursos de un sílabo en una sola matriz."""
+
+    def __init__(self, segments: Dict[str, "np.ndarray"], missing: Iterable[str], dtype: str,
+                 segment_loaded_at: Optional[Dict[str, float]] = None) -> None:
+        """
+        :param segments: Matriz float16 o del tipo ``dtype`` por recurso.
+        :param missing: Recursos sin snapshot.
+        :param dtype: Tipo de la matriz en memoria (``float32`` o ``int8``).
+        :param segment_loaded_at: Momento en que se leyó cada snapshot (por defecto, ahora).
+        """
+        self.resource_ids = list(segments)
+        self.missing = set(missing)
+        self.dtype = dtype
+        self.loaded_at = time.monotonic()
+        segment_loaded_at = segment_loaded_at or {}
+        self.segment_loaded_at = {rid: segment_loaded_at.get(rid, self.loaded_at) for rid in self.resource_ids}
+        self.starts = np.cumsum([0] + [len(segments[rid]) for rid in self.resource_ids])
+        # Recurso de cada fila (índice en resource_ids), para filtrar y devolver resource_id
+        self.owners = np.repeat(np.arange(len(self.resource_ids), dtype=np.int32), np.diff(self.starts))
+        rows = [segments[rid] for rid in self.resource_ids]
+        dim = next((len(row[0]) for row in rows if len(row)), 0)
+        matrix = np.concatenate(rows).astype(np.float32) if rows else np.zeros((0, dim), dtype=np.float32)
+        self.scales = None
+        if dtype == INT8:
+            # Cuantización simétrica por fila: valor = int8 * escala
+            scales = np.abs(matrix).max(axis=1) / 127
+            scales[scales == 0] = 1
+            matrix = np.round(matrix / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        self.matrix = matrix
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.owners.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def segment(self, resource_id: str) -> "np.ndarray":
+        """Filas de un recurso (para reutilizarlas al reconstruir el índice)."""
+        position = self.resource_ids.index(resource_id)
+        rows = self.matrix[self.starts[position]:self.starts[position + 1]]
+        if self.scales is not None:
+            return rows.astype(np.float32) * self.scales[self.starts[position]:self.starts[position + 1], None]
+        return rows
+
+    def search(self, embedding: Sequence[float], top_k: int, min_score: float,
+               resource_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Top-k por similitud coseno, con el mismo formato de resultado que Pinecone.
+
+        :param embedding: Embedding de la consulta.
+        :param top_k: Resultados máximos.
+        :param min_score: Score mínimo (``PINECONE_MIN_THRESHOLD``).
+        :param resource_ids: Limitar a estos recursos (None para todos).
+        :return: Matches con ``id``, ``score`` y ``metadata.resource_id``, de mayor a menor score.
+        """
+        if not len(self.matrix) or top_k < 1:
+            return []
+        query = _normalize(np.asarray([embedding], dtype=np.float32))[0]
+        scores = self.matrix @ query if self.scales is None else (self.matrix @ query) * self.scales
+        if resource_ids is not None:
+            resource_ids = set(resource_ids)
+            allowed = [position for position, rid in enumerate(self.resource_ids) if rid in resource_ids]
+            scores = np.where(np.isin(self.owners, allowed), scores, -np.inf)
+        top_k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        matches = []
+        for row in candidates[np.argsort(-scores[candidates], kind="stable")]:
+            score = float(scores[row])
+            if score < min_score:
+                break
+            owner = int(self.owners[row])
+            resource_id = self.resource_ids[owner]
+            matches.append({
+                "id": vector_id(resource_id, int(row - self.starts[owner])),
+                "score": score,
+                "metadata": {"resource_id": resource_id},
+            })
+        return matches
+
+
+class LocalVectorIndex:
+    """
+    Índices en memoria por sílabo para consultar sin ir a Pinecone.
+
+    Cada sílabo se carga la primera vez desde los snapshots de sus recursos y queda en
+    caché mientras el contenedor siga caliente. Si se piden recursos que el índice no
+    tiene (un recurso recién asociado) se reconstruye reutilizando las filas ya
+    cargadas; los recursos quitados de la biblioteca se excluyen con una máscara. Las
+    filas de un recurso se vuelven a leer pasados ``segment_ttl_seconds``, para que un
+    recurso reingestado (o borrado y añadido con el mismo ID) no siga devolviendo
+    filas de la versión anterior. La caché se limita por memoria y descarta primero
+    los sílabos menos usados.
+
+    ``query`` devuelve None cuando no puede responder igual que Pinecone (algún recurso
+    sin snapshot o un sílabo que no cabe en el presupuesto): el llamador usa Pinecone.
+    """
+
+    def __init__(self, load_snapshot: Callable[[str], Optional["np.ndarray"]], memory_budget_bytes: int,
+                 dtype: str = FLOAT32, retry_seconds: float = 60, segment_ttl_seconds: float = 300) -> None:
+        """
+        :param load_snapshot: Lee la matriz de un recurso (None si no tiene snapshot).
+        :param memory_budget_bytes: Memoria máxima de los índices en caché.
+        :param dtype: Tipo de la matriz en memoria: ``float32`` o ``int8``.
+        :param retry_seconds: Tiempo antes de volver a buscar los snapshots que faltaban.
+        :param segment_ttl_seconds: Tiempo máximo que se reutilizan las filas leídas de un snapshot.
+        """
+        if np is None:
+            raise RuntimeError("NumPy no está disponible: el índice local necesita la capa de NumPy")
+        if dtype not in (FLOAT32, INT8):
+            raise ValueError(f"Tipo de índice local no válido: {dtype}")
+        self.memory_budget_bytes = memory_budget_bytes
+        self.dtype = dtype
+        self.retry_seconds = retry_seconds
+        self.segment_ttl_seconds = segment_ttl_seconds
+        self._load_snapshot = load_snapshot
+        self._indexes: "OrderedDict[str, SyllabusIndex]" = OrderedDict()
+        # Sílabos que no caben en el presupuesto: van a Pinecone hasta retry_seconds
+        self._oversized: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return sum(index.nbytes for index in self._indexes.values())
+
+    def query(self, silabus_id: str, resource_ids: Iterable[str], embedding: Sequence[float],
+              top_k: int, min_score: float) -> Optional[List[Dict[str, Any]]]:
+        """
+        Busca en los vectores de los recursos indicados del sílabo.
+
+        :param silabus_id: ID del sílabo (clave de la caché).
+        :param resource_ids: Recursos en los que buscar (los de la biblioteca o los pedidos).
+        :param embedding: Embedding de la consulta.
+        :param top_k: Resultados máximos.
+        :param min_score: Score mínimo.
+        :return: Matches como los de Pinecone, o None si hay que consultar Pinecone.
+        """
+        resource_ids = set(resource_ids)
+        if not resource_ids:
+            return []
+        with self._lock:
+            index = self._index(silabus_id, resource_ids)
+            if index is None or index.missing & resource_ids:
+                return None
+            restrict = None if resource_ids == set(index.resource_ids) else resource_ids
+            return index.search(embedding, top_k, min_score, restrict)
+
+    def _index(self, silabus_id: str, resource_ids: set) -> Optional[SyllabusIndex]:
+        if time.monotonic() - self._oversized.get(silabus_id, -self.retry_seconds) < self.retry_seconds:
+            return None
+        now = time.monotonic()
+        index = self._indexes.get(silabus_id)
+        fresh = set()
+        if index is not None:
+            fresh = {rid for rid, loaded_at in index.segment_loaded_at.items()
+                     if now - loaded_at < self.segment_ttl_seconds}
+            known = fresh | index.missing
+            retry = index.missing & resource_ids and now - index.loaded_at >= self.retry_seconds
+            if resource_ids <= known and not retry:
+                self._indexes.move_to_end(silabus_id)
+                return index
+
+        segments = {}
+        segment_loaded_at = {}
+        to_load = []
+        for resource_id in sorted(resource_ids):
+            if resource_id in fresh:
+                segments[resource_id] = index.segment(resource_id)
+                segment_loaded_at[resource_id] = index.segment_loaded_at[resource_id]
+            else:
+                to_load.append(resource_id)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=min(LOAD_PARALLELISM, len(to_load) or 1)) as executor:
+            loaded = dict(zip(to_load, executor.map(self._load_snapshot, to_load)))
+        missing = {resource_id for resource_id, matrix in loaded.items() if matrix is None}
+        segments.update((resource_id, matrix) for resource_id, matrix in loaded.items() if matrix is not None)
+        index = SyllabusIndex({rid: segments[rid] for rid in sorted(segments)}, missing, self.dtype, segment_loaded_at)
+
+        self._indexes.pop(silabus_id, None)
+        logger.info("Índice local cargado", extra={
+            "silabus_id": silabus_id, "resources": len(index.resource_ids), "missing": len(missing),
+            "snapshots_read": len(to_load), "rows": len(index.matrix), "bytes": index.nbytes,
+            "load_ms": round((time.perf_counter() - started) * 1000, 2),
+        })
+        if index.nbytes > self.memory_budget_bytes:
+            logger.warning(f"El índice del sílabo {silabus_id} supera el presupuesto de memoria: se usa Pinecone")
+            self._oversized[silabus_id] = time.monotonic()
+            return None
+        self._indexes[silabus_id] = index
+        while self.nbytes > self.memory_budget_bytes:
+            evicted, _ = self._indexes.popitem(last=False)
+            logger.info(f"Índice local descartado por memoria: {evicted}")
+        return index
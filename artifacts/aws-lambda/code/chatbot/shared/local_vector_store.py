@@ -0,0 +1,241 @@
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+from shared.bedrock_client import EMBEDDINGS_RATE_PER_SECOND, resilient_bedrock_client
+from shared.vector_store import VectorStore
+
+try:
+    import numpy as np
+except ImportError:  # Solo el backend local necesita NumPy
+    np = None
+
+# Búsqueda exacta (fuerza bruta) o aproximada (IVF: k-means y sondeo de las listas más cercanas)
+EXACT = "exact"
+APPROXIMATE = "approximate"
+
+KMEANS_ITERATIONS = 10
+DEFAULT_NAMESPACE_FILE = "__default__"
+
+
+def matches_filter(metadata: Dict[str, Any], conditions: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evalúa el subconjunto de filtros de Pinecone que usan las Lambdas: igualdad,
+    ``$eq``, ``$ne``, ``$in``, ``$nin`` y ``$and``.
+    """
+    for field, condition in (conditions or {}).items():
+        if field == "$and":
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+            continue
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, expected in condition.items():
+            if operator == "$eq" and value != expected:
+                return False
+            if operator == "$ne" and value == expected:
+                return False
+            if operator == "$in" and value not in expected:
+                return False
+            if operator == "$nin" and value in expected:
+                return False
+            if operator not in ("$eq", "$ne", "$in", "$nin"):
+                raise ValueError(f"Operador de filtro no soportado por el backend local: {operator}")
+    return True
+
+
+class _Namespace:
+    """Vectores de un namespace y la matriz normalizada que se reconstruye tras cada cambio."""
+
+    def __init__(self) -> None:
+        self.records: Dict[str, tuple] = {}
+        self.ids: List[str] = []
+        self.matrix = None
+        self.lists = None
+        self.centroids = None
+
+    def invalidate(self) -> None:
+        self.matrix = self.lists = self.centroids = None
+
+    def build(self, search: str, nlist: Optional[int]) -> None:
+        self.ids = list(self.records)
+        vectors = np.asarray([self.records[vector_id][0] for vector_id in self.ids], dtype=np.float32)
+        if vectors.size:
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+        self.matrix = vectors
+        if search == APPROXIMATE and len(self.ids):
+            self.centroids, assignments = _kmeans(vectors, nlist or max(int(len(self.ids) ** 0.5), 1))
+            self.lists = [np.flatnonzero(assignments == cluster) for cluster in range(len(self.centroids))]
+
+
+def _kmeans(vectors: "np.ndarray", clusters: int) -> tuple:
+    """K-means esférico con semilla fija (centroides normalizados y similitud coseno)."""
+    clusters = min(clusters, len(vectors))
+    rng = np.random.default_rng(0)
+    centroids = vectors[rng.choice(len(vectors), clusters, replace=False)]
+    assignments = np.zeros(len(vectors), dtype=np.int64)
+    for _ in range(KMEANS_ITERATIONS):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(clusters):
+            members = vectors[assignments == cluster]
+            if len(members):
+                centroid = members.sum(axis=0)
+                centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1)
+    return centroids, assignments
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Backend de referencia en memoria, con persistencia opcional en disco, para ejecutar
+    la ingesta y ``ask`` sin un índice de Pinecone y comparar backends.
+
+    Devuelve los mismos resultados que un índice de Pinecone con métrica coseno: matches
+    con ``id``, ``score`` y ``metadata`` filtrados por ``min_threshold``. La búsqueda
+    exacta recorre todos los vectores; la aproximada (IVF) solo los de las ``nprobe``
+    listas con centroides más cercanos a la consulta. Los embeddings se piden a Bedrock
+    igual que en ``PineconeHelper``.
+    """
+
+    def __init__(
+        self,
+        embeddings_model_id: str,
+        embeddings_region: str,
+        max_retrieve_documents: int = 5,
+        min_threshold: float = 0.3,
+        path: Optional[str] = None,
+        search: str = EXACT,
+        nlist: Optional[int] = None,
+        nprobe: int = 4,
+    ) -> None:
+        """
+        :param path: Directorio con un registro de operaciones por namespace; sin él, solo en memoria.
+        :param search: ``exact`` o ``approximate``.
+        :param nlist: Listas del IVF (por defecto, la raíz cuadrada del número de vectores).
+        :param nprobe: Listas que se recorren en cada consulta aproximada.
+        """
+        if np is None:
+            raise RuntimeError("NumPy no está disponible: el backend local lo necesita")
+        if search not in (EXACT, APPROXIMATE):
+            raise ValueError(f"Tipo de búsqueda no válido: {search}")
+        self.embeddings_model_id = embeddings_model_id
+        self.embeddings_region = embeddings_region
+        self.max_retrieve_documents = max_retrieve_documents
+        self.min_threshold = min_threshold
+        self.path = path
+        self.search = search
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self._namespaces: Dict[str, _Namespace] = {}
+        self._bedrock_client = None
+        self._lock = threading.RLock()
+
+    @property
+    def bedrock_client(self):
+        if self._bedrock_client is None:
+            self._bedrock_client = resilient_bedrock_client(self.embeddings_region, EMBEDDINGS_RATE_PER_SECOND)
+        return self._bedrock_client
+
+    def get_embeddings(self, text: str) -> List[float]:
+        response = self.bedrock_client.invoke_model(
+            body=json.dumps({"inputText": text}),
+            modelId=self.embeddings_model_id
+        )
+        return json.loads(response["body"].read()).get("embedding", [])
+
+    def query(
+        self,
+        embeddings: List[float],
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        include_metadata: bool = True,
+        namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        top_k = top_k or self.max_retrieve_documents
+        with self._lock:
+            store = self._namespace(namespace)
+            if store.matrix is None:
+                store.build(self.search, self.nlist)
+            if not len(store.ids):
+                return []
+            query = np.asarray(embeddings, dtype=np.float32)
+            query = query / (np.linalg.norm(query) or 1)
+            if store.lists is not None:
+                probed = np.argsort(-(store.centroids @ query))[:self.nprobe]
+                rows = np.concatenate([store.lists[cluster] for cluster in probed])
+            else:
+                rows = np.arange(len(store.ids))
+            if filter_conditions:
+                rows = np.asarray([row for row in rows
+                                   if matches_filter(store.records[store.ids[row]][1], filter_conditions)], dtype=np.int64)
+            if not len(rows):
+                return []
+            scores = store.matrix[rows] @ query
+            order = np.argsort(-scores, kind="stable")[:top_k]
+            matches = []
+            for position in order:
+                if scores[position] < self.min_threshold:
+                    break
+                vector_id = store.ids[rows[position]]
+                match = {"id": vector_id, "score": float(scores[position])}
+                if include_metadata:
+                    match["metadata"] = dict(store.records[vector_id][1])
+                matches.append(match)
+            return matches
+
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            store = self._namespace(namespace)
+            for vector in vectors:
+                store.records[vector["id"]] = (list(vector["values"]), dict(vector.get("metadata") or {}))
+            store.invalidate()
+            self._append(namespace, {"upsert": vectors})
+        return {"upserted_count": len(vectors)}
+
+    def delete_vectors(self, ids: List[str], namespace: Optional[str] = None) -> Dict[str, Any]:
+        with self._lock:
+            store = self._namespace(namespace)
+            deleted = sum(store.records.pop(vector_id, None) is not None for vector_id in ids)
+            store.invalidate()
+            self._append(namespace, {"delete": list(ids)})
+        return {"deleted_count": deleted}
+
+    def delete_by_prefix(self, prefix: str, namespace: Optional[str] = None) -> int:
+        with self._lock:
+            vector_ids = [vector_id for vector_id in self._namespace(namespace).records if vector_id.startswith(prefix)]
+            self.delete_vectors(vector_ids, namespace=namespace)
+        return len(vector_ids)
+
+    def _namespace(self, namespace: Optional[str]) -> _Namespace:
+        key = namespace or ""
+        if key not in self._namespaces:
+            store = _Namespace()
+            file_path = self._file(namespace)
+            if file_path and os.path.exists(file_path):
+                # Se reproducen las operaciones en el orden en que se escribieron
+                with open(file_path, encoding="utf-8") as handle:
+                    for line in handle:
+                        entry = json.loads(line)
+                        for vector in entry.get("upsert", []):
+                            store.records[vector["id"]] = (vector["values"], vector.get("metadata") or {})
+                        for vector_id in entry.get("delete", []):
+                            store.records.pop(vector_id, None)
+            self._namespaces[key] = store
+        return self._namespaces[key]
+
+    def _file(self, namespace: Optional[str]) -> Optional[str]:
+        if not self.path:
+            return None
+        name = re.sub(r"[^A-Za-z0-9_.-]", "_", namespace) if namespace else DEFAULT_NAMESPACE_FILE
+        return os.path.join(self.path, f"{name}.jsonl")
+
+    def _append(self, namespace: Optional[str], entry: Dict[str, Any]) -> None:
+        """Añade la operación al registro del namespace (cada escritura cuesta lo que su lote)."""
+        file_path = self._file(namespace)
+        if file_path:
+            os.makedirs(self.path, exist_ok=True)
+            with open(file_path, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
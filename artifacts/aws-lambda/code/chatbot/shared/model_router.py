@@ -0,0 +1,99 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from shared.intent_router import normalize
+
+# Tipos de turno (rutas). Cada uno se asocia a una clave del parámetro chatbot de SSM;
+# si la clave no existe se usa CHATBOT_MODEL_ID.
+TOOL_SELECTION = "tool_selection"
+SHORT_ANSWER = "short_answer"
+LONG_SYNTHESIS = "long_synthesis"
+FAST = "fast"
+ROUTES = (TOOL_SELECTION, SHORT_ANSWER, LONG_SYNTHESIS, FAST)
+
+DEFAULT_MODEL_KEY = "CHATBOT_MODEL_ID"
+MODEL_KEYS = {
+    TOOL_SELECTION: "CHATBOT_MODEL_ID_TOOL_SELECTION",
+    SHORT_ANSWER: "CHATBOT_MODEL_ID_SHORT_ANSWER",
+    LONG_SYNTHESIS: "CHATBOT_MODEL_ID_LONG_SYNTHESIS",
+    FAST: "CHATBOT_MODEL_ID_FAST",
+}
+
+# Misma estimación que el resto del repositorio: 4 caracteres por token
+CHARS_PER_TOKEN = 4
+
+# Preguntas que piden desarrollar (explicar, comparar, resumir...) en lugar de un dato
+SYNTHESIS_PATTERN = re.compile(
+    r"\b(?:explica\w*|resum\w*|compar\w*|analiz\w*|analisis|desarroll\w*|detall\w*|por que|como funciona\w*"
+    r"|diferencia\w*|ventajas|desventajas|ensayo|argument\w*|evalu\w*|relacion\w*)\b"
+)
+
+
+def estimate_input_tokens(messages: List[Dict[str, Any]], system_prompt: Optional[str] = None) -> int:
+    """Tokens aproximados de la entrada de converse (mensajes y prompt de sistema)."""
+    return (len(json.dumps(messages, ensure_ascii=False)) + len(system_prompt or "")) // CHARS_PER_TOKEN
+
+
+def is_tool_result_round(messages: List[Dict[str, Any]]) -> bool:
+    """True si el último mensaje lleva resultados de herramientas (ronda de síntesis)."""
+    return bool(messages) and any("toolResult" in block for block in messages[-1].get("content", []))
+
+
+def user_question(messages: List[Dict[str, Any]]) -> str:
+    """Último mensaje de texto del usuario (la pregunta que originó las rondas de herramientas)."""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        texts = [block["text"] for block in message.get("content", []) if "text" in block]
+        if texts:
+            return " ".join(texts)
+    return ""
+
+
+def choose_route(
+    messages: List[Dict[str, Any]],
+    question: str,
+    input_tokens: int,
+    remaining_ms: Optional[float] = None,
+    large_input_tokens: int = 6000,
+    long_question_words: int = 30,
+    fast_below_ms: float = 0,
+) -> Tuple[str, str]:
+    """
+    Elige la ruta de una llamada a converse.
+
+    Por orden: si queda menos de ``fast_below_ms`` del presupuesto de latencia, el
+    modelo rápido; en la primera ronda (sin resultados de herramientas), el de
+    selección de herramientas; con una entrada grande o una pregunta que pide
+    desarrollo, el de síntesis larga; si no, el de respuesta corta.
+
+    :param messages: Mensajes de la llamada.
+    :param question: Mensaje original del usuario.
+    :param input_tokens: Tokens estimados de la entrada.
+    :param remaining_ms: Presupuesto de latencia restante (None si no hay).
+    :param large_input_tokens: Entrada desde la que se usa el modelo de síntesis larga.
+    :param long_question_words: Preguntas con más palabras se tratan como de síntesis.
+    :param fast_below_ms: Presupuesto restante por debajo del cual se usa el modelo rápido.
+    :return: ``(ruta, motivo)``.
+    """
+    if remaining_ms is not None and remaining_ms < fast_below_ms:
+        return FAST, "latency_budget"
+    if not is_tool_result_round(messages):
+        return TOOL_SELECTION, "turn_type"
+    if input_tokens >= large_input_tokens:
+        return LONG_SYNTHESIS, "input_size"
+    text = normalize(question)
+    if SYNTHESIS_PATTERN.search(text) or len(text.split()) > long_question_words:
+        return LONG_SYNTHESIS, "question"
+    return SHORT_ANSWER, "turn_type"
+
+
+def route_model(route: str, parameters: Dict[str, Any]) -> str:
+    """
+    Modelo de una ruta según el parámetro chatbot (CHATBOT_MODEL_ID si la ruta no tiene uno propio).
+
+    :param route: Ruta elegida.
+    :param parameters: Contenido del parámetro chatbot de SSM.
+    """
+    return parameters.get(MODEL_KEYS[route]) or parameters[DEFAULT_MODEL_KEY]
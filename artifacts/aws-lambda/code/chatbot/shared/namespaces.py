@@ -0,0 +1,45 @@
+import os
+from typing import List, Optional
+
+# Todos los vectores en el namespace por defecto, filtrados por resource_id en cada consulta
+SHARED = "shared"
+# Un namespace por sílabo: las consultas solo recorren los vectores del curso
+SYLLABUS = "syllabus"
+
+NAMESPACE_PREFIX = "silabo-"
+# Atributo del registro del recurso con el namespace de sus vectores
+NAMESPACE_ATTRIBUTE = "namespace"
+
+
+def namespace_mode() -> str:
+    """Modo configurado en ``PINECONE_NAMESPACE_MODE`` (``shared`` por defecto)."""
+    mode = os.environ.get("PINECONE_NAMESPACE_MODE", SHARED)
+    if mode not in (SHARED, SYLLABUS):
+        raise ValueError(f"PINECONE_NAMESPACE_MODE no válido: {mode}")
+    return mode
+
+
+def syllabus_namespace(silabus_id: str) -> str:
+    """Namespace de los vectores de un sílabo."""
+    return f"{NAMESPACE_PREFIX}{silabus_id}"
+
+
+def vector_namespace(silabus_id: str) -> Optional[str]:
+    """
+    Namespace en el que se escriben y consultan los vectores del sílabo según el
+    modo configurado (None es el namespace por defecto).
+    """
+    return syllabus_namespace(silabus_id) if namespace_mode() == SYLLABUS else None
+
+
+def deletion_namespaces(recorded: Optional[str], silabus_id: str) -> List[Optional[str]]:
+    """
+    Namespaces donde pueden estar los vectores de un recurso: el de su registro (o el
+    por defecto, en registros anteriores) y el de su sílabo, que puede tener una copia
+    de la migración aunque el registro aún no lo indique.
+
+    :param recorded: Namespace guardado en el registro del recurso.
+    :param silabus_id: ID del sílabo.
+    :return: Namespaces sin duplicados.
+    """
+    return list(dict.fromkeys([recorded or None, syllabus_namespace(silabus_id)]))
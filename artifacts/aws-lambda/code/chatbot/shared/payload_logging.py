@@ -0,0 +1,130 @@
+import logging
+import os
+import random
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional, Tuple, Union
+
+MODE_FULL = "full"
+MODE_SAMPLED = "sampled"
+MODE_ERROR = "error"
+MODE_OFF = "off"
+MODES = (MODE_FULL, MODE_SAMPLED, MODE_ERROR, MODE_OFF)
+
+Payload = Union[Any, Callable[[], Any]]
+
+
+def truncate(value: Any, max_chars: int) -> Any:
+    """
+    Recorta los strings de ``value`` (recorriendo dicts, listas y tuplas) a ``max_chars``.
+
+    :param value: Valor a recortar.
+    :param max_chars: Longitud máxima de cada string; 0 o menos no recorta.
+    :return: Copia recortada (los tipos no contenedores se devuelven tal cual).
+    """
+    if max_chars <= 0:
+        return value
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value
+        return f"{value[:max_chars]}... (+{len(value) - max_chars} caracteres)"
+    if isinstance(value, dict):
+        return {key: truncate(item, max_chars) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [truncate(item, max_chars) for item in value]
+    return value
+
+
+class PayloadLogger:
+    """
+    Registro de payloads grandes (mensajes, prompts, respuestas del modelo, fragmentos)
+    sin pagar su formateo en cada petición.
+
+    Cada llamada a ``log`` escribe un mensaje estructurado con campos cortos y
+    recortados; el payload completo (un valor o una función sin argumentos que lo
+    construye) solo se serializa cuando la petición está muestreada. Según el modo:
+
+    - ``full``: todas las peticiones incluyen los payloads.
+    - ``sampled``: una fracción ``sample_rate`` de las peticiones los incluye; el resto
+      los guarda por referencia y solo se vuelcan si la petición falla.
+    - ``error``: solo se vuelcan si la petición falla.
+    - ``off``: nunca se registran payloads.
+
+    La configuración por defecto se lee de ``LOG_PAYLOAD_MODE``,
+    ``LOG_PAYLOAD_SAMPLE_RATE``, ``LOG_FIELD_MAX_CHARS`` y ``LOG_PAYLOAD_MAX_CHARS``.
+    """
+
+    def __init__(
+        self,
+        logger,
+        mode: Optional[str] = None,
+        sample_rate: Optional[float] = None,
+        field_max_chars: Optional[int] = None,
+        payload_max_chars: Optional[int] = None,
+        buffer_size: int = 20,
+    ) -> None:
+        """
+        :param logger: Logger de Powertools (``custom_logger``).
+        :param mode: "full", "sampled", "error" u "off".
+        :param sample_rate: Fracción de peticiones con payload completo en modo "sampled".
+        :param field_max_chars: Longitud máxima de los campos cortos.
+        :param payload_max_chars: Longitud máxima de cada string dentro de un payload.
+        :param buffer_size: Payloads retenidos por petición para el volcado en error.
+        """
+        self.logger = logger
+        self.mode = (mode or os.environ.get("LOG_PAYLOAD_MODE", MODE_SAMPLED)).lower()
+        if self.mode not in MODES:
+            raise ValueError(f"Modo de log de payloads no válido: {self.mode} (opciones: {', '.join(MODES)})")
+        self.sample_rate = float(sample_rate if sample_rate is not None else os.environ.get("LOG_PAYLOAD_SAMPLE_RATE", 0.01))
+        self.field_max_chars = int(field_max_chars if field_max_chars is not None else os.environ.get("LOG_FIELD_MAX_CHARS", 300))
+        self.payload_max_chars = int(payload_max_chars if payload_max_chars is not None else os.environ.get("LOG_PAYLOAD_MAX_CHARS", 20000))
+        self.sampled = self.mode == MODE_FULL
+        self._pending: Deque[Tuple[str, Payload]] = deque(maxlen=buffer_size)
+
+    def start_request(self) -> bool:
+        """
+        Decide si la petición que empieza se registra con payloads completos y
+        descarta los pendientes de la anterior.
+
+        :return: True si la petición está muestreada.
+        """
+        self._pending.clear()
+        if self.mode == MODE_FULL:
+            self.sampled = True
+        elif self.mode == MODE_SAMPLED:
+            self.sampled = random.random() < self.sample_rate
+        else:
+            self.sampled = False
+        return self.sampled
+
+    def log(self, message: str, payload: Payload = None, level: int = logging.INFO, **fields: Any) -> None:
+        """
+        Registra ``message`` con ``fields`` recortados y, si corresponde, el payload.
+
+        :param message: Mensaje del log.
+        :param payload: Valor o función que construye el payload (se evalúa solo si se registra).
+        :param level: Nivel de logging.
+        :param fields: Campos cortos (ids, contadores, tamaños) que se registran siempre.
+        """
+        if payload is not None and self.mode != MODE_OFF and not self.sampled:
+            self._pending.append((message, payload))
+        if not self.logger.isEnabledFor(level):
+            return
+        extra = truncate(fields, self.field_max_chars)
+        if payload is not None and self.sampled:
+            extra["payload"] = self._render(payload)
+        self.logger.log(level, message, extra=extra, stacklevel=2)
+
+    def flush_on_error(self) -> None:
+        """Vuelca los payloads retenidos de la petición en curso (llamar al capturar un error)."""
+        if not self._pending:
+            return
+        payloads = [{"message": message, "payload": self._render(payload)} for message, payload in self._pending]
+        self._pending.clear()
+        self.logger.error("Payloads de la petición fallida", extra={"payloads": payloads})
+
+    def _render(self, payload: Payload) -> Any:
+        try:
+            value = payload() if callable(payload) else payload
+        except Exception as e:
+            return f"<payload no disponible: {e}>"
+        return truncate(value, self.payload_max_chars)
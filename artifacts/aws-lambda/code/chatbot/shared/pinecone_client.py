@@ -0,0 +1,193 @@
+import logging
+import os
+import socket
+import threading
+from typing import Any, Dict, List, Optional
+
+from aje_libs.bd.helpers.pinecone_helper import PineconeHelper
+from aje_libs.common.logger import custom_logger
+from shared.bedrock_client import EMBEDDINGS_RATE_PER_SECOND, resilient_bedrock_client
+from shared.vector_store import VectorStore
+
+logger = custom_logger(__name__)
+
+VALIDATE_SKIP = "skip"
+VALIDATE_BACKGROUND = "background"
+VALIDATE_EAGER = "eager"
+
+# IDs por llamada a delete (límite de Pinecone)
+DELETE_BATCH = 1000
+
+# Keep-alive TCP para que la conexión al índice sobreviva entre invocaciones calientes
+KEEPALIVE_IDLE_SECONDS = int(os.environ.get("PINECONE_KEEPALIVE_IDLE_SECONDS", 30))
+KEEPALIVE_INTERVAL_SECONDS = int(os.environ.get("PINECONE_KEEPALIVE_INTERVAL_SECONDS", 10))
+KEEPALIVE_PROBES = int(os.environ.get("PINECONE_KEEPALIVE_PROBES", 3))
+
+_keepalive_configured = False
+
+
+def configure_keepalive() -> None:
+    """
+    Activa keep-alive TCP en las conexiones urllib3 (usadas por el SDK de Pinecone)
+    para que el pool no se cierre por inactividad entre invocaciones calientes.
+    """
+    global _keepalive_configured
+    if _keepalive_configured:
+        return
+    try:
+        from urllib3.connection import HTTPConnection
+
+        options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options += [
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, KEEPALIVE_IDLE_SECONDS),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, KEEPALIVE_INTERVAL_SECONDS),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, KEEPALIVE_PROBES),
+            ]
+        existing = list(HTTPConnection.default_socket_options)
+        HTTPConnection.default_socket_options = existing + [o for o in options if o not in existing]
+    except Exception as e:
+        logger.warning(f"No se pudo configurar keep-alive para Pinecone: {e}")
+    _keepalive_configured = True
+
+
+class LazyPineconeHelper(PineconeHelper, VectorStore):
+    """
+    PineconeHelper que no abre conexiones al construirse.
+
+    El cliente de Pinecone, el índice y el cliente de Bedrock (con reintentos y
+    limitador, ``shared.bedrock_client``) se crean en el primer uso. La validación del índice (``describe_index_stats``) se puede
+    omitir, lanzar en segundo plano o ejecutar de forma síncrona.
+    """
+
+    def __init__(
+        self,
+        index_name: str,
+        api_key: str,
+        embeddings_model_id: str,
+        embeddings_region: str,
+        max_retrieve_documents: int = 5,
+        min_threshold: float = 0.3,
+        index_host: Optional[str] = None,
+        validate: str = VALIDATE_SKIP,
+        pool_threads: Optional[int] = None,
+    ) -> None:
+        """
+        :param index_host: Host del índice; si se indica se evita la llamada describe_index.
+        :param validate: Modo de validación del índice: "skip", "background" o "eager".
+        :param pool_threads: Tamaño del pool de conexiones del índice.
+        """
+        self.index_name = index_name
+        self.api_key = api_key
+        self.embeddings_model_id = embeddings_model_id
+        self.embeddings_region = embeddings_region
+        self.max_retrieve_documents = max_retrieve_documents
+        self.min_threshold = min_threshold
+        self.index_host = index_host
+        self.validate = validate
+        self.pool_threads = pool_threads
+        self._index = None
+        self._bedrock_client = None
+        self._lock = threading.Lock()
+
+    @property
+    def bedrock_client(self):
+        if self._bedrock_client is None:
+            self._bedrock_client = resilient_bedrock_client(self.embeddings_region, EMBEDDINGS_RATE_PER_SECOND)
+        return self._bedrock_client
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._connect()
+        return self._index
+
+    def _connect(self):
+        from pinecone import Pinecone
+
+        configure_keepalive()
+        index_kwargs = {}
+        if self.pool_threads:
+            index_kwargs["pool_threads"] = self.pool_threads
+
+        pinecone_client = Pinecone(api_key=self.api_key)
+        if self.index_host:
+            index = pinecone_client.Index(host=self.index_host, **index_kwargs)
+        else:
+            index = pinecone_client.Index(self.index_name, **index_kwargs)
+        logger.info(f"Configured helper for Pinecone serverless index: {self.index_name}")
+
+        if self.validate == VALIDATE_EAGER:
+            self._validate(index)
+        elif self.validate == VALIDATE_BACKGROUND:
+            threading.Thread(target=self._validate, args=(index,), daemon=True).start()
+        return index
+
+    def query(
+        self,
+        embeddings: List[float],
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        top_k: Optional[int] = None,
+        include_metadata: bool = True,
+        namespace: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Igual que ``PineconeHelper.query`` pero sin volcar al log el vector de la
+        consulta ni los metadatos de cada resultado (solo ids y scores en DEBUG).
+        """
+        kwargs = {
+            "vector": embeddings,
+            "top_k": top_k or self.max_retrieve_documents,
+            "include_metadata": include_metadata
+        }
+        if filter_conditions:
+            kwargs["filter"] = filter_conditions
+        if namespace:
+            kwargs["namespace"] = namespace
+
+        try:
+            response = self.index.query(**kwargs)
+        except Exception as error:
+            logger.error(f"Query failed - Index: {self.index_name} | Error: {str(error)}")
+            raise error
+
+        results = response.get("matches", [])
+        filtered_results = [match for match in results if match["score"] >= self.min_threshold]
+        logger.info(
+            "Pinecone query",
+            extra={"matches": len(results), "above_threshold": len(filtered_results), "top_k": kwargs["top_k"]}
+        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Pinecone matches", extra={"matches": [(m["id"], round(m["score"], 4)) for m in filtered_results]})
+        return filtered_results
+
+    def delete_by_prefix(self, prefix: str, namespace: Optional[str] = None) -> int:
+        """
+        Elimina todos los vectores cuyo ID empieza por ``prefix``. Los IDs se listan
+        por páginas (``Index.list``, solo en índices serverless) y después se
+        eliminan en lotes de ``DELETE_BATCH``.
+
+        :param prefix: Prefijo de los IDs (p. ej. ``shared.vector_ids.vector_prefix``).
+        :param namespace: Namespace de los vectores.
+        :return: Número de vectores eliminados.
+        """
+        kwargs = {"prefix": prefix}
+        if namespace:
+            kwargs["namespace"] = namespace
+        # Se lista todo antes de borrar para no alterar la paginación en curso
+        vector_ids = [vector_id for page in self.index.list(**kwargs) for vector_id in page]
+        for start in range(0, len(vector_ids), DELETE_BATCH):
+            self.delete_vectors(vector_ids[start:start + DELETE_BATCH], namespace=namespace)
+        logger.info("Pinecone delete by prefix", extra={"prefix": prefix, "deleted": len(vector_ids)})
+        return len(vector_ids)
+
+    def _validate(self, index) -> None:
+        try:
+            index.describe_index_stats()
+            logger.info(f"Successfully connected to Pinecone index: {self.index_name}")
+        except Exception as error:
+            logger.error(f"Index {self.index_name} does not exist or is inaccessible: {error}")
+            if self.validate == VALIDATE_EAGER:
+                raise
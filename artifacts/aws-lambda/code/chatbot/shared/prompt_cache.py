@@ -0,0 +1,110 @@
+from typing import Any, Dict, FrozenSet, List, Optional
+
+# Bloque de Converse que marca el final de un prefijo cacheable
+CACHE_POINT = {"cachePoint": {"type": "default"}}
+
+SYSTEM = "system"
+TOOLS = "tools"
+MESSAGES = "messages"
+
+# Dónde admite cada familia de modelos puntos de caché (Bedrock prompt caching). Se
+# compara por subcadena para aceptar perfiles de inferencia ("us.amazon.nova-pro-v1:0")
+# y ARNs. Nova no admite cachePoint en toolConfig.
+CACHE_SUPPORT = (
+    ("amazon.nova-", frozenset({SYSTEM, MESSAGES})),
+    ("anthropic.claude-3-5-haiku", frozenset({SYSTEM, TOOLS, MESSAGES})),
+    ("anthropic.claude-3-7-sonnet", frozenset({SYSTEM, TOOLS, MESSAGES})),
+    ("anthropic.claude-sonnet-4", frozenset({SYSTEM, TOOLS, MESSAGES})),
+    ("anthropic.claude-opus-4", frozenset({SYSTEM, TOOLS, MESSAGES})),
+    ("anthropic.claude-haiku-4", frozenset({SYSTEM, TOOLS, MESSAGES})),
+)
+
+# Converse acepta como máximo 4 puntos de caché por petición: sistema, herramientas y dos mensajes
+MESSAGE_CACHE_POINTS = 2
+
+
+def cache_support(model_id: Optional[str]) -> FrozenSet[str]:
+    """
+    Partes de la petición en las que el modelo admite puntos de caché.
+
+    :param model_id: ID del modelo, perfil de inferencia o ARN.
+    :return: Subconjunto de ``system``, ``tools`` y ``messages`` (vacío si no admite caché).
+    """
+    for prefix, parts in CACHE_SUPPORT:
+        if model_id and prefix in model_id:
+            return parts
+    return frozenset()
+
+
+def with_tool_cache_point(tool_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia de ``tool_config`` con un punto de caché tras la última herramienta."""
+    return {**tool_config, "tools": [*tool_config["tools"], CACHE_POINT]}
+
+
+def with_message_cache_points(messages: List[Dict[str, Any]], count: int = MESSAGE_CACHE_POINTS) -> List[Dict[str, Any]]:
+    """
+    Copia de los mensajes con un punto de caché al final de los ``count`` últimos
+    mensajes del usuario (no modifica la lista original, que sigue creciendo en el
+    bucle de herramientas).
+
+    El último cubre todo lo enviado en esta ronda y lo leerá la siguiente; el anterior
+    coincide con el último de la ronda previa, así que su prefijo ya está en caché.
+
+    :param messages: Mensajes de la conversación.
+    :param count: Mensajes del usuario que se marcan.
+    """
+    marked = list(messages)
+    remaining = count
+    for position in range(len(marked) - 1, -1, -1):
+        if remaining == 0:
+            break
+        message = marked[position]
+        if message.get("role") != "user":
+            continue
+        marked[position] = {**message, "content": [*message["content"], CACHE_POINT]}
+        remaining -= 1
+    return marked
+
+
+def build_converse_request(
+    model_id: str,
+    messages: List[Dict[str, Any]],
+    system_prompt: Optional[str],
+    parameters: Dict[str, Any],
+    tool_config: Optional[Dict[str, Any]] = None,
+    cache_messages: bool = True,
+) -> Dict[str, Any]:
+    """
+    Petición de Converse igual a la que arma ``BedrockHelper.converse``, con puntos de
+    caché tras el prompt de sistema, la definición de herramientas y los últimos
+    mensajes, en las partes que admite el modelo. El helper solo acepta el prompt de
+    sistema como texto, así que no puede enviar el bloque ``cachePoint``.
+
+    :param model_id: ID del modelo.
+    :param messages: Mensajes de la conversación.
+    :param system_prompt: Prompt de sistema.
+    :param parameters: ``max_tokens``, ``temperature`` y ``top_p``.
+    :param tool_config: Configuración de herramientas.
+    :param cache_messages: Marcar también los últimos mensajes (historial y resultados de herramientas).
+    :return: Argumentos para ``bedrock-runtime.converse``.
+    """
+    support = cache_support(model_id)
+    request = {
+        "modelId": model_id,
+        "messages": with_message_cache_points(messages) if cache_messages and MESSAGES in support else messages,
+        "inferenceConfig": {
+            "maxTokens": parameters.get("max_tokens", 1024),
+            "temperature": parameters.get("temperature", 0.3),
+            "topP": parameters.get("top_p", 0.2)
+        },
+        "additionalModelRequestFields": {
+            "inferenceConfig": {
+                "topK": 1
+            }
+        }
+    }
+    if system_prompt:
+        request["system"] = [{"text": system_prompt}, CACHE_POINT] if SYSTEM in support else [{"text": system_prompt}]
+    if tool_config:
+        request["toolConfig"] = with_tool_cache_point(tool_config) if TOOLS in support else tool_config
+    return request
@@ -0,0 +1,27 @@
+from typing import Callable
+
+from aje_libs.common.logger import custom_logger
+
+logger = custom_logger(__name__)
+
+
+def register_after_restore(callback: Callable[[], None]) -> bool:
+    """
+    Registra un callback que se ejecuta cuando Lambda restaura una instancia
+    desde un snapshot de SnapStart (runtimes de Python 3.12 o superior).
+
+    Se usa para descartar el estado capturado en el snapshot que no debe
+    reutilizarse tal cual: configuración/secretos cargados durante el init y
+    conexiones de red abiertas. Fuera de SnapStart no hace nada.
+
+    :param callback: Función sin argumentos a ejecutar tras la restauración.
+    :return: True si el callback quedó registrado.
+    """
+    try:
+        from snapshot_restore_py import register_after_restore as register
+    except ImportError:
+        return False
+
+    register(callback)
+    logger.debug(f"Callback de SnapStart registrado: {getattr(callback, '__qualname__', callback)}")
+    return True
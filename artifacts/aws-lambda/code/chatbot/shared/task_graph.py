@@ -0,0 +1,78 @@
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+
+class TaskGraph:
+    """
+    Ejecuta pasos de I/O independientes en paralelo respetando sus dependencias.
+
+    Cada tarea recibe como argumentos con nombre los resultados de las tareas de
+    las que depende (``after``); una tarea solo puede depender de tareas añadidas
+    antes, así que el grafo no puede tener ciclos. Las tareas corren en hilos con
+    una copia del contexto de quien llama (la traza activa de ``shared.tracing``
+    sigue registrando sus fases). Si una falla no se lanzan más tareas, se espera
+    a las que están en curso y se relanza el primer error; ``completed`` indica qué
+    tareas terminaron, para compensar efectos parciales.
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        """
+        :param max_workers: Hilos para ejecutar tareas a la vez.
+        """
+        self.max_workers = max_workers
+        self.completed: Set[str] = set()
+        self._tasks: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, function: Callable[..., Any], after: Iterable[str] = ()) -> None:
+        """
+        Registra una tarea.
+
+        :param name: Nombre único de la tarea (y del argumento con su resultado).
+        :param function: Función que recibe los resultados de ``after`` por nombre.
+        :param after: Tareas que deben terminar antes.
+        """
+        after = tuple(after)
+        if name in self._tasks:
+            raise ValueError(f"Tarea duplicada: {name}")
+        missing = [dependency for dependency in after if dependency not in self._tasks]
+        if missing:
+            raise ValueError(f"La tarea '{name}' depende de tareas no registradas: {missing}")
+        self._tasks[name] = (function, after)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta el grafo completo.
+
+        :return: Resultado de cada tarea por nombre.
+        """
+        results: Dict[str, Any] = {}
+        pending: List[str] = list(self._tasks)
+        running: Dict[Future, str] = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while pending or running:
+                if error is None:
+                    for name in [name for name in pending if all(d in results for d in self._tasks[name][1])]:
+                        function, after = self._tasks[name]
+                        arguments = {dependency: results[dependency] for dependency in after}
+                        # Cada tarea necesita su propia copia: un contexto no se puede usar en dos hilos a la vez
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, function, **arguments)] = name
+                        pending.remove(name)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                        self.completed.add(name)
+                    except Exception as e:
+                        error = error or e
+
+        if error is not None:
+            raise error
+        return results
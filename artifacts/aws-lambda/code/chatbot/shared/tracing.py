@@ -0,0 +1,241 @@
+import functools
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+_current_trace: ContextVar[Optional["RequestTrace"]] = ContextVar("request_trace", default=None)
+
+
+class RequestTrace:
+    """
+    Tiempos por fase, consumo de tokens y contadores (bytes, páginas, chunks...) de
+    una petición.
+
+    Las fases se registran con ``span``; si una fase se repite (p. ej. la segunda
+    llamada a converse) se numera: ``converse``, ``converse_2``... Las fases
+    anidadas se miden por separado, por lo que su suma puede superar el total.
+    """
+
+    def __init__(self, name: str) -> None:
+        """
+        :param name: Nombre de la operación trazada (p. ej. "ask").
+        """
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.values: Dict[str, float] = {}
+        self.units: Dict[str, str] = {}
+        self._counts: Dict[str, int] = {}
+
+    @contextmanager
+    def span(self, phase: str) -> Iterator[None]:
+        """
+        Mide la duración del bloque como una fase de la petición.
+
+        :param phase: Nombre de la fase.
+        """
+        count = self._counts.get(phase, 0) + 1
+        self._counts[phase] = count
+        name = phase if count == 1 else f"{phase}_{count}"
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            span = {
+                "name": name,
+                "start_ms": round((started - self.started) * 1000, 2),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if error:
+                span["error"] = error
+            self.spans.append(span)
+
+    def add_usage(self, usage: Optional[Dict[str, Any]]) -> None:
+        """
+        Acumula el uso de tokens devuelto por Bedrock (``inputTokens``/``outputTokens`` y,
+        con prompt caching, ``cacheReadInputTokens``/``cacheWriteInputTokens``).
+
+        :param usage: Campo ``usage`` de la respuesta de converse.
+        """
+        if usage:
+            self.input_tokens += int(usage.get("inputTokens", 0) or 0)
+            self.output_tokens += int(usage.get("outputTokens", 0) or 0)
+            self.cache_read_tokens += int(usage.get("cacheReadInputTokens", 0) or 0)
+            self.cache_write_tokens += int(usage.get("cacheWriteInputTokens", 0) or 0)
+
+    def add_count(self, name: str, value: float = 1, unit: str = "Count") -> None:
+        """
+        Suma ``value`` al contador ``name``.
+
+        :param name: Nombre del contador (p. ej. "chunks", "downloaded_bytes").
+        :param value: Cantidad a sumar.
+        :param unit: Nombre de ``MetricUnit`` con el que se publica ("Count", "Bytes"...).
+        """
+        self.values[name] = self.values.get(name, 0) + value
+        self.units[name] = unit
+
+    def set_value(self, name: str, value: float, unit: str = "Count") -> None:
+        """
+        Fija el valor de una medida (p. ej. un throughput calculado al final).
+
+        :param name: Nombre de la medida.
+        :param value: Valor.
+        :param unit: Nombre de ``MetricUnit`` con el que se publica ("CountPerSecond"...).
+        """
+        self.values[name] = value
+        self.units[name] = unit
+
+    def finish(self) -> None:
+        if self.finished is None:
+            self.finished = time.perf_counter()
+
+    @property
+    def total_ms(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return round((end - self.started) * 1000, 2)
+
+    @property
+    def phases_ms(self) -> Dict[str, float]:
+        return {span["name"]: span["duration_ms"] for span in self.spans}
+
+    def summary(self) -> Dict[str, Any]:
+        """Resumen serializable de la traza (para logs y el campo ``debug``)."""
+        summary = {
+            "operation": self.name,
+            "total_ms": self.total_ms,
+            "phases_ms": self.phases_ms,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+        if self.cache_read_tokens or self.cache_write_tokens:
+            summary["cache_read_tokens"] = self.cache_read_tokens
+            summary["cache_write_tokens"] = self.cache_write_tokens
+        if self.values:
+            summary["values"] = {name: round(value, 2) for name, value in self.values.items()}
+        return summary
+
+    def publish(self, metrics) -> None:
+        """
+        Añade duraciones, tokens y contadores como métricas EMF a un ``Metrics`` de Powertools.
+        Se emiten al hacer flush (p. ej. con el decorador ``log_metrics``).
+
+        :param metrics: Instancia de ``aws_lambda_powertools.Metrics``.
+        """
+        from aws_lambda_powertools.metrics import MetricUnit
+
+        metrics.add_metric(name="TotalDuration", unit=MetricUnit.Milliseconds, value=self.total_ms)
+        for phase, duration_ms in self.phases_ms.items():
+            metrics.add_metric(name=f"{phase}_duration", unit=MetricUnit.Milliseconds, value=duration_ms)
+        if self.input_tokens or self.output_tokens:
+            metrics.add_metric(name="InputTokens", unit=MetricUnit.Count, value=self.input_tokens)
+            metrics.add_metric(name="OutputTokens", unit=MetricUnit.Count, value=self.output_tokens)
+        if self.cache_read_tokens or self.cache_write_tokens:
+            metrics.add_metric(name="CacheReadInputTokens", unit=MetricUnit.Count, value=self.cache_read_tokens)
+            metrics.add_metric(name="CacheWriteInputTokens", unit=MetricUnit.Count, value=self.cache_write_tokens)
+        for name, value in self.values.items():
+            metrics.add_metric(name=name, unit=MetricUnit[self.units[name]], value=value)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    """Traza de la petición en curso, o None si no hay ninguna activa."""
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(name: str) -> Iterator[RequestTrace]:
+    """
+    Activa una traza para la petición en curso; ``span`` y ``traced`` la usan
+    implícitamente sin tener que pasarla entre funciones.
+
+    :param name: Nombre de la operación trazada.
+    """
+    trace = RequestTrace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(phase: str) -> Iterator[None]:
+    """
+    Mide una fase en la traza activa; sin traza activa no hace nada.
+
+    :param phase: Nombre de la fase.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(phase):
+        yield
+
+
+def traced(phase: str) -> Callable:
+    """
+    Decorador que mide cada llamada a la función como una fase.
+
+    :param phase: Nombre de la fase.
+    """
+    def decorator(function: Callable) -> Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(phase):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_usage(usage: Optional[Dict[str, Any]]) -> None:
+    """
+    Acumula tokens en la traza activa (si la hay).
+
+    :param usage: Campo ``usage`` de la respuesta de converse.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_usage(usage)
+
+
+def add_count(name: str, value: float = 1, unit: str = "Count") -> None:
+    """
+    Suma ``value`` al contador ``name`` de la traza activa (si la hay).
+
+    :param name: Nombre del contador.
+    :param value: Cantidad a sumar.
+    :param unit: Nombre de ``MetricUnit`` con el que se publica.
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_count(name, value, unit)
+
+
+def attach_debug(response: Dict[str, Any], trace: RequestTrace) -> Dict[str, Any]:
+    """
+    Añade el resumen de la traza en el campo ``debug`` del body de una respuesta HTTP.
+
+    :param response: Respuesta de Lambda con ``body`` en JSON.
+    :param trace: Traza de la petición.
+    :return: La misma respuesta con el body actualizado.
+    """
+    try:
+        body = json.loads(response.get("body") or "{}")
+    except (TypeError, ValueError):
+        return response
+    if isinstance(body, dict):
+        body["debug"] = trace.summary()
+        response["body"] = json.dumps(body)
+    return response
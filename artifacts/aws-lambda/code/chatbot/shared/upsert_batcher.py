@@ -0,0 +1,99 @@
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+Vector = Dict[str, Any]
+
+
+class _Ticket:
+    """Vectores de una llamada a ``upsert`` que aún no se han escrito."""
+
+    def __init__(self, remaining: int) -> None:
+        self.remaining = remaining
+        self.error: Optional[BaseException] = None
+
+
+class UpsertBatcher:
+    """
+    Agrupa los upserts de varios documentos que se indexan en paralelo.
+
+    Cada llamada a ``upsert`` encola sus vectores y espera hasta que estén escritos:
+    si la cola alcanza ``max_vectors`` se escribe un lote en ese momento; si no, se
+    espera hasta ``max_wait_seconds`` a que otros documentos completen el lote. El
+    hilo que escribe es el primero que encuentra el lote listo, y una petición nunca
+    supera ``max_vectors`` (los documentos grandes se parten en varios lotes). Si un
+    lote falla, el error se relanza en todas las llamadas con vectores en él.
+    """
+
+    def __init__(self, upsert: Callable[[List[Vector]], Any], max_vectors: int = 100,
+                 max_wait_seconds: float = 0.05) -> None:
+        """
+        :param upsert: Función que escribe un lote (p. ej. ``PineconeHelper.upsert_vectors``).
+        :param max_vectors: Vectores máximos por petición.
+        :param max_wait_seconds: Espera máxima para completar un lote; 0 escribe sin esperar.
+        """
+        if max_vectors < 1:
+            raise ValueError("max_vectors debe ser al menos 1")
+        self.max_vectors = max_vectors
+        self.max_wait_seconds = max_wait_seconds
+        self._upsert = upsert
+        self._condition = threading.Condition()
+        self._pending: List[tuple] = []
+
+    def upsert(self, vectors: List[Vector]) -> int:
+        """
+        Escribe los vectores (junto con los de otros documentos, si llegan a tiempo).
+
+        :param vectors: Vectores con ``id``, ``values`` y ``metadata``.
+        :return: Peticiones de upsert que hizo este hilo.
+        """
+        if not vectors:
+            return 0
+        ticket = _Ticket(len(vectors))
+        deadline = time.monotonic() + self.max_wait_seconds
+        flushes = 0
+        with self._condition:
+            self._pending.extend((vector, ticket) for vector in vectors)
+            self._condition.notify_all()
+
+        while True:
+            with self._condition:
+                batch = self._wait_for_batch(ticket, deadline)
+            if batch is None:
+                break
+            self._flush(batch)
+            flushes += 1
+
+        if ticket.error is not None:
+            raise ticket.error
+        return flushes
+
+    def _wait_for_batch(self, ticket: _Ticket, deadline: float) -> Optional[List[tuple]]:
+        """
+        Espera (con el lock tomado) a que los vectores del ticket estén escritos o a
+        que haya un lote que escribir.
+
+        :return: Lote a escribir por este hilo, o None si el ticket terminó.
+        """
+        while ticket.remaining:
+            remaining_wait = deadline - time.monotonic()
+            if len(self._pending) >= self.max_vectors or (self._pending and remaining_wait <= 0):
+                batch = self._pending[:self.max_vectors]
+                del self._pending[:self.max_vectors]
+                return batch
+            # Sin cola propia (los vectores van en el lote de otro hilo) se espera su aviso
+            self._condition.wait(remaining_wait if self._pending else None)
+        return None
+
+    def _flush(self, batch: List[tuple]) -> None:
+        error = None
+        try:
+            self._upsert([vector for vector, _ in batch])
+        except Exception as e:
+            error = e
+        with self._condition:
+            for _, ticket in batch:
+                ticket.remaining -= 1
+                if error is not None and ticket.error is None:
+                    ticket.error = error
+            self._condition.notify_all()
@@ -0,0 +1,57 @@
+from typing import Any, Dict, List, Optional
+
+# Los vectores de un recurso se llaman "{resource_id}#{índice del chunk}"
+SEPARATOR = "#"
+# Número de vectores del recurso (sustituye a la lista ``pinecone_ids`` en el registro)
+VECTOR_COUNT = "vector_count"
+# Formato anterior: lista de UUIDs aleatorios guardada en el registro del recurso
+LEGACY_VECTOR_IDS = "pinecone_ids"
+
+
+def vector_prefix(resource_id: str) -> str:
+    """
+    Prefijo común de los vectores de un recurso. Incluye el separador para que
+    ``rec-1`` no abarque los vectores de ``rec-10``.
+    """
+    return f"{resource_id}{SEPARATOR}"
+
+
+def vector_id(resource_id: str, chunk_index: int) -> str:
+    """ID determinista del vector de un chunk: reindexar el recurso lo sobrescribe."""
+    return f"{vector_prefix(resource_id)}{chunk_index}"
+
+
+def vector_ids(resource_id: str, count: int) -> List[str]:
+    """IDs de los ``count`` primeros chunks de un recurso."""
+    return [vector_id(resource_id, index) for index in range(count)]
+
+
+def resource_vector_ids(resource_id: str, item: Optional[Dict[str, Any]]) -> List[str]:
+    """
+    IDs de los vectores de un recurso a partir de su registro, sin consultar Pinecone.
+
+    :param resource_id: ID del recurso.
+    :param item: Registro de la tabla de recursos (``vector_count`` o, en registros
+        anteriores, la lista ``pinecone_ids``).
+    :return: IDs de los vectores.
+    """
+    if not item:
+        return []
+    if item.get(LEGACY_VECTOR_IDS):
+        return [str(legacy_id) for legacy_id in item[LEGACY_VECTOR_IDS]]
+    return vector_ids(resource_id, int(item.get(VECTOR_COUNT) or 0))
+
+
+def stale_vector_ids(resource_id: str, previous: Optional[Dict[str, Any]], current_ids: List[str]) -> List[str]:
+    """
+    Vectores de una ingesta anterior del recurso que la nueva no sobrescribe: los
+    índices desde el nuevo número de chunks hasta el anterior, o toda la lista de
+    registros anteriores con UUIDs.
+
+    :param resource_id: ID del recurso.
+    :param previous: Registro del recurso antes de reindexarlo (o None).
+    :param current_ids: IDs de los vectores de la nueva ingesta.
+    :return: IDs que quedarían huérfanos.
+    """
+    current = set(current_ids)
+    return [stale_id for stale_id in resource_vector_ids(resource_id, previous) if stale_id not in current]
@@ -0,0 +1,194 @@
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from aje_libs.common.logger import custom_logger
+from shared.snapstart import register_after_restore
+
+logger = custom_logger(__name__)
+
+VALIDATE_SKIP = "skip"
+
+# Backend de vectores de las Lambdas (VECTOR_STORE_BACKEND)
+PINECONE = "pinecone"
+LOCAL = "local"
+
+_helpers: Dict[Tuple, "VectorStore"] = {}
+_helpers_lock = threading.Lock()
+
+
+def reset_helpers() -> None:
+    """
+    Descarta los helpers en caché (y sus conexiones). Se ejecuta al restaurar
+    desde un snapshot de SnapStart, donde las conexiones capturadas ya no son válidas.
+    """
+    with _helpers_lock:
+        _helpers.clear()
+
+
+register_after_restore(reset_helpers)
+
+
+class VectorStore(ABC):
+    """
+    Operaciones de las Lambdas sobre el almacén de vectores.
+
+    ``LazyPineconeHelper`` es la implementación de producción y ``LocalVectorStore``
+    la de referencia (en memoria o en disco) para pruebas y benchmarks. ``query``
+    devuelve matches con ``id``, ``score`` y ``metadata`` con score mayor o igual que
+    ``min_threshold``, de mayor a menor.
+    """
+
+    max_retrieve_documents: int
+    min_threshold: float
+
+    @abstractmethod
+    def get_embeddings(self, text: str) -> List[float]:
+        """Embedding de un texto con el modelo de Bedrock configurado."""
+
+    @abstractmethod
+    def query(self, embeddings: List[float], filter_conditions: Optional[Dict[str, Any]] = None,
+              top_k: Optional[int] = None, include_metadata: bool = True,
+              namespace: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Vectores más similares a ``embeddings`` (hasta ``top_k``, por defecto ``max_retrieve_documents``)."""
+
+    @abstractmethod
+    def upsert_vectors(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Escribe vectores con ``id``, ``values`` y ``metadata``."""
+
+    @abstractmethod
+    def delete_vectors(self, ids: List[str], namespace: Optional[str] = None) -> Dict[str, Any]:
+        """Elimina vectores por ID."""
+
+    @abstractmethod
+    def delete_by_prefix(self, prefix: str, namespace: Optional[str] = None) -> int:
+        """Elimina los vectores cuyo ID empieza por ``prefix`` y devuelve cuántos eran."""
+
+
+def get_vector_store(embeddings_region_key: str = "EMBEDDINGS_REGION", retrieval: bool = False) -> VectorStore:
+    """
+    Almacén de vectores de las Lambdas con la configuración del proyecto: credenciales
+    del secreto ``pinecone`` y modelo de embeddings del parámetro ``chatbot``. La
+    conexión se abre en el primer uso y se reutiliza entre invocaciones calientes.
+
+    :param embeddings_region_key: Clave del parámetro chatbot con la región de los embeddings.
+    :param retrieval: Leer también ``PINECONE_MAX_RETRIEVE_DOCUMENTS`` y ``PINECONE_MIN_THRESHOLD`` (consultas).
+    """
+    from shared.config import get_config
+
+    config = get_config()
+    pinecone_secret = config.get("pinecone")
+    options = {}
+    if retrieval:
+        options = {
+            "max_retrieve_documents": int(config.value("chatbot", "PINECONE_MAX_RETRIEVE_DOCUMENTS")),
+            "min_threshold": float(config.value("chatbot", "PINECONE_MIN_THRESHOLD")),
+        }
+    return lazy_vector_store(
+        index_name=pinecone_secret["PINECONE_INDEX_NAME"],
+        api_key=pinecone_secret["PINECONE_API_KEY"],
+        embeddings_model_id=config.value("chatbot", "EMBEDDINGS_MODEL_ID"),
+        embeddings_region=config.value("chatbot", embeddings_region_key),
+        index_host=pinecone_secret.get("PINECONE_INDEX_HOST"),
+        **options
+    )
+
+
+def vector_store_backend() -> str:
+    """Backend configurado en ``VECTOR_STORE_BACKEND`` (``pinecone`` por defecto)."""
+    backend = os.environ.get("VECTOR_STORE_BACKEND", PINECONE)
+    if backend not in (PINECONE, LOCAL):
+        raise ValueError(f"VECTOR_STORE_BACKEND no válido: {backend}")
+    return backend
+
+
+def lazy_vector_store(
+    index_name: str,
+    api_key: str,
+    embeddings_model_id: str,
+    embeddings_region: str,
+    max_retrieve_documents: int = 5,
+    min_threshold: float = 0.3,
+    index_host: Optional[str] = None,
+) -> VectorStore:
+    """
+    Devuelve el almacén de vectores del backend configurado, reutilizable entre
+    invocaciones calientes: Pinecone (``lazy_pinecone_helper``) o el backend local,
+    con ``VECTOR_STORE_PATH`` (directorio; sin él, en memoria), ``VECTOR_STORE_SEARCH``
+    (``exact`` o ``approximate``), ``VECTOR_STORE_NLIST`` y ``VECTOR_STORE_NPROBE``.
+    """
+    if vector_store_backend() == PINECONE:
+        return lazy_pinecone_helper(index_name, api_key, embeddings_model_id, embeddings_region,
+                                    max_retrieve_documents, min_threshold, index_host)
+
+    from shared.local_vector_store import EXACT, LocalVectorStore
+
+    nlist = os.environ.get("VECTOR_STORE_NLIST")
+    options = {
+        "path": os.environ.get("VECTOR_STORE_PATH") or None,
+        "search": os.environ.get("VECTOR_STORE_SEARCH", EXACT),
+        "nlist": int(nlist) if nlist else None,
+        "nprobe": int(os.environ.get("VECTOR_STORE_NPROBE", 4)),
+    }
+    key = (LOCAL, embeddings_model_id, embeddings_region, max_retrieve_documents, min_threshold,
+           *options.values())
+    store = _helpers.get(key)
+    if store is None:
+        with _helpers_lock:
+            store = _helpers.get(key)
+            if store is None:
+                store = LocalVectorStore(
+                    embeddings_model_id=embeddings_model_id,
+                    embeddings_region=embeddings_region,
+                    max_retrieve_documents=max_retrieve_documents,
+                    min_threshold=min_threshold,
+                    **options,
+                )
+                _helpers.clear()
+                _helpers[key] = store
+    return store
+
+
+def lazy_pinecone_helper(
+    index_name: str,
+    api_key: str,
+    embeddings_model_id: str,
+    embeddings_region: str,
+    max_retrieve_documents: int = 5,
+    min_threshold: float = 0.3,
+    index_host: Optional[str] = None,
+) -> "LazyPineconeHelper":
+    """
+    Devuelve un LazyPineconeHelper reutilizable entre invocaciones calientes.
+
+    Se reutiliza la misma instancia (y su pool de conexiones) mientras la
+    configuración no cambie; si rota la API key o cambia el índice se crea una
+    nueva en el siguiente acceso. El SDK de Pinecone solo se importa aquí, no al
+    importar el handler.
+    """
+    from shared.pinecone_client import LazyPineconeHelper
+
+    key = (index_name, api_key, embeddings_model_id, embeddings_region,
+           max_retrieve_documents, min_threshold, index_host)
+    helper = _helpers.get(key)
+    if helper is None:
+        with _helpers_lock:
+            helper = _helpers.get(key)
+            if helper is None:
+                pool_threads = os.environ.get("PINECONE_POOL_THREADS")
+                helper = LazyPineconeHelper(
+                    index_name=index_name,
+                    api_key=api_key,
+                    embeddings_model_id=embeddings_model_id,
+                    embeddings_region=embeddings_region,
+                    max_retrieve_documents=max_retrieve_documents,
+                    min_threshold=min_threshold,
+                    index_host=index_host,
+                    validate=os.environ.get("PINECONE_VALIDATE_INDEX", VALIDATE_SKIP),
+                    pool_threads=int(pool_threads) if pool_threads else None,
+                )
+                # Solo se conserva la configuración vigente
+                _helpers.clear()
+                _helpers[key] = helper
+    return helper
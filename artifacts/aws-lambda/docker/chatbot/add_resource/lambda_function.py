@@ -1,23 +1,34 @@
 import json
 import os
 import hashlib
-import requests
+import mimetypes
 import unicodedata
 import re
-import boto3
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
-from uuid import uuid4
-from datetime import datetime
+from typing import Dict, Any, List, Optional
 
 # Importar helpers de aje-libs
 from aje_libs.common.helpers.s3_helper import S3Helper
 from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
-from aje_libs.bd.helpers.pinecone_helper import PineconeHelper
 from aje_libs.documents.helpers.document_processor import DocumentProcessor
 from aje_libs.common.logger import custom_logger
-from aje_libs.common.helpers.secrets_helper import SecretsHelper
-from aje_libs.common.helpers.ssm_helper import SSMParameterHelper
+from aws_lambda_powertools import Metrics
+from boto3.dynamodb.types import TypeSerializer
+from boto3.s3.transfer import TransferConfig
+from shared.chunk_store import delete_chunks, put_chunks, slim_metadata
+from shared.config import get_config
+from shared.document_buffer import DocumentBuffer, cleanup_stale
+from shared.lazy import LazyResource
+from shared.library import add_to_library
+from shared.local_index import write_snapshot
+from shared.namespaces import NAMESPACE_ATTRIBUTE, deletion_namespaces, vector_namespace
+from shared.task_graph import TaskGraph
+from shared.tracing import add_count, span, start_trace
+from shared.upsert_batcher import UpsertBatcher
+from shared.vector_ids import VECTOR_COUNT, stale_vector_ids, vector_ids
+from shared.vector_store import get_vector_store
 
 # Configuración
 ENVIRONMENT = os.environ["ENVIRONMENT"]
@@ -26,47 +37,60 @@ OWNER = os.environ["OWNER"]
 DYNAMO_RESOURCES_TABLE = os.environ["DYNAMO_RESOURCES_TABLE"]
 DYNAMO_RESOURCES_HASH_TABLE = os.environ["DYNAMO_RESOURCES_HASH_TABLE"]
 DYNAMO_LIBRARY_TABLE = os.environ["DYNAMO_LIBRARY_TABLE"]
+DYNAMO_CHUNKS_TABLE = os.environ["DYNAMO_CHUNKS_TABLE"]
 S3_RESOURCES_BUCKET = os.environ["S3_RESOURCES_BUCKET"]
 
-# Parameter Store
-ssm_chatbot = SSMParameterHelper(f"/{ENVIRONMENT}/{PROJECT_NAME}/chatbot")
-PARAMETER_VALUE = json.loads(ssm_chatbot.get_parameter_value())
-
-EMBEDDINGS_MODEL_ID = PARAMETER_VALUE["EMBEDDINGS_MODEL_ID"]
-EMBEDDINGS_REGION = PARAMETER_VALUE["EMBEDDINGS_REGION"]
-# Secrets
-secret_pinecone = SecretsHelper(f"{ENVIRONMENT}/{PROJECT_NAME}/pinecone-api")
-
-PINECONE_INDEX_NAME = secret_pinecone.get_secret_value("PINECONE_INDEX_NAME")
-PINECONE_API_KEY = secret_pinecone.get_secret_value("PINECONE_API_KEY")
+# Parameter Store y Secrets (carga perezosa, concurrente y con TTL)
+config = get_config()
+config.prefetch("chatbot", "pinecone")
 
 DOWNLOAD_FOLDER = "/tmp/downloads"
 S3_PATH = "SOFIA_FILE/PLANIFICACION/AV_Recursos"
+
+# Subida multipart: tamaño de parte y partes en paralelo
+S3_MULTIPART_CHUNK_BYTES = int(os.environ.get("S3_MULTIPART_CHUNK_BYTES", 8 * 1024 * 1024))
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=S3_MULTIPART_CHUNK_BYTES,
+    multipart_chunksize=S3_MULTIPART_CHUNK_BYTES,
+    max_concurrency=int(os.environ.get("S3_UPLOAD_CONCURRENCY", 4)),
+)
+
+# Ingesta masiva: recursos por petición, recursos en paralelo y lotes de upsert compartidos
+BULK_MAX_RESOURCES = int(os.environ.get("BULK_MAX_RESOURCES", 50))
+BULK_MAX_PARALLELISM = int(os.environ.get("BULK_MAX_PARALLELISM", 4))
+UPSERT_BATCH_VECTORS = int(os.environ.get("UPSERT_BATCH_VECTORS", 100))
+UPSERT_BATCH_WAIT_MS = int(os.environ.get("UPSERT_BATCH_WAIT_MS", 50))
+# IDs por petición de borrado en Pinecone (vectores sobrantes de una reingesta)
+PINECONE_DELETE_BATCH = 1000
  
 logger = custom_logger(__name__, owner=OWNER, service=PROJECT_NAME)
 
-# Crear helper instances
-s3_helper = S3Helper(bucket_name=S3_RESOURCES_BUCKET)
-files_table_helper = DynamoDBHelper(
+# Métricas EMF por etapa de la ingesta (duraciones, tamaños y throughput)
+metrics = Metrics(namespace=os.environ.get("POWERTOOLS_METRICS_NAMESPACE", PROJECT_NAME), service="add_resource")
+metrics.set_default_dimensions(environment=ENVIRONMENT)
+
+# Crear helper instances (se construyen en el primer uso)
+s3_helper = LazyResource(lambda: S3Helper(bucket_name=S3_RESOURCES_BUCKET))
+files_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_RESOURCES_TABLE,
     pk_name="resource_id"
-)
-hash_table_helper = DynamoDBHelper(
+))
+hash_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_RESOURCES_HASH_TABLE,
     pk_name="file_hash"
-)
-library_table_helper = DynamoDBHelper(
+))
+library_table_helper = LazyResource(lambda: DynamoDBHelper(
     table_name=DYNAMO_LIBRARY_TABLE,
     pk_name="silabus_id"
-)
-pinecone_helper = PineconeHelper(
-    index_name=PINECONE_INDEX_NAME,
-    api_key=PINECONE_API_KEY,
-    embeddings_model_id=EMBEDDINGS_MODEL_ID,
-    embeddings_region=EMBEDDINGS_REGION
-)
+))
+chunks_table_helper = LazyResource(lambda: DynamoDBHelper(
+    table_name=DYNAMO_CHUNKS_TABLE,
+    pk_name="resource_id",
+    sk_name="chunk_id"
+))
 document_processor = DocumentProcessor()
 
+@metrics.log_metrics
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handler principal de Lambda para agregar un recurso educativo.
@@ -84,7 +108,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 body = json.loads(event['body'])
         else:
             body = event
-        
+
+        # Ingesta masiva (POST /api/v1/add_resource/bulk): lista de recursos de un sílabo
+        if "Recursos" in body:
+            return handle_bulk_request(body)
+
         # Validar que los campos necesarios estén presentes usando el formato estandarizado
         required_fields = ["RecursoDidacticoId", "DriveId", "TituloRecurso", "SilaboEventoId"]
         missing_fields = [field for field in required_fields if field not in body]
@@ -117,7 +145,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 "body": json.dumps({
                     "success": True,
                     "data": {
-                    "resourceId": resource_id
+                    "resourceId": resource_id,
+                    "metrics": result.get('metrics')
                     }
                 })
             }
@@ -126,7 +155,8 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
                 "statusCode": 500,
                 "body": json.dumps({
                     "success": False,
-                    "message": result['message']
+                    "message": result['message'],
+                    "metrics": result.get('metrics')
                 })
             }
         
@@ -142,7 +172,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
 def process_resource_addition(resource_id: str, title: str, drive_id: str, silabus_id: str) -> Dict[str, Any]:
     """
-    Procesa la adición de un recurso educativo.
+    Procesa la adición de un recurso educativo y mide cada etapa de la ingesta.
+
+    Las duraciones por etapa, tamaños (bytes, páginas, caracteres, chunks) y
+    throughput se publican como métricas EMF (con la dimensión ``file_type``) y se
+    devuelven en ``metrics`` del resultado.
     
     :param resource_id: ID del recurso
     :param title: Título del recurso
@@ -150,19 +184,206 @@ def process_resource_addition(resource_id: str, title: str, drive_id: str, silab
     :param silabus_id: ID del silabo
     :return: Resultado de la operación
     """
+    file_type = Path(title).suffix.lower().replace('.', '') or "unknown"
+    result, trace = traced_ingestion(resource_id, title, drive_id, silabus_id)
+    metrics.add_dimension(name="file_type", value=file_type)
+    trace.publish(metrics)
+    logger.info("Métricas de la ingesta", extra={"ingestion": result['metrics'], "file_type": file_type})
+    return result
+
+def traced_ingestion(resource_id: str, title: str, drive_id: str, silabus_id: str, **options) -> tuple:
+    """
+    Ejecuta la ingesta de un recurso dentro de su propia traza.
+
+    :param options: Argumentos adicionales de ``ingest_resource``
+    :return: Resultado (con ``metrics``) y traza, para publicarla después
+    """
+    with start_trace("add_resource") as trace:
+        result = ingest_resource(resource_id, title, drive_id, silabus_id, **options)
+    add_throughput(trace)
+    result['metrics'] = trace.summary()
+    return result, trace
+
+def handle_bulk_request(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Valida una petición de ingesta masiva y la procesa.
+
+    :param body: Body con SilaboEventoId y Recursos (lista de {RecursoDidacticoId, DriveId, TituloRecurso})
+    :return: Respuesta estandarizada con el estado de cada recurso
+    """
+    resources = body.get("Recursos")
+    error = None
+    if "SilaboEventoId" not in body:
+        error = ("MISSING_FIELDS", "Campos requeridos faltantes: ['SilaboEventoId']")
+    elif not isinstance(resources, list) or not resources:
+        error = ("INVALID_RESOURCES", "Recursos debe ser una lista no vacía")
+    elif len(resources) > BULK_MAX_RESOURCES:
+        error = ("TOO_MANY_RESOURCES", f"Se admiten como máximo {BULK_MAX_RESOURCES} recursos por petición")
+    if error:
+        logger.error(error[1])
+        return {
+            "statusCode": 400,
+            "body": json.dumps({
+                "success": False,
+                "message": error[1],
+                "error": {"code": error[0], "details": error[1]}
+            })
+        }
+
+    silabus_id = body["SilaboEventoId"]
+    result = process_bulk_addition(silabus_id, resources)
+    return {
+        "statusCode": 200,
+        "body": json.dumps({
+            "success": result['success'],
+            "data": {
+                "silaboEventoId": silabus_id,
+                "summary": result['summary'],
+                "results": result['results']
+            }
+        })
+    }
+
+def process_bulk_addition(silabus_id: str, resources: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Ingesta varios recursos de un sílabo en una sola invocación.
+
+    Los recursos se procesan en paralelo (como máximo BULK_MAX_PARALLELISM a la vez)
+    y comparten un UpsertBatcher, así que los documentos pequeños se escriben en
+    Pinecone en lotes comunes. Cada recurso escribe su registro y su hash; la
+    asociación con el sílabo se hace al final con un único ``ADD`` para todos los
+    recursos añadidos.
+
+    :param silabus_id: ID del silabo
+    :param resources: Lista de {RecursoDidacticoId, DriveId, TituloRecurso}
+    :return: success, summary (recursos por estado) y results (estado de cada recurso)
+    """
+    required_fields = ["RecursoDidacticoId", "DriveId", "TituloRecurso"]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(resources)
+    accepted = {}
+    for position, resource in enumerate(resources):
+        missing_fields = [field for field in required_fields if not isinstance(resource, dict) or field not in resource]
+        resource_id = resource.get("RecursoDidacticoId") if isinstance(resource, dict) else None
+        if missing_fields:
+            results[position] = {"resourceId": resource_id, "status": "error",
+                                 "message": f"Campos requeridos faltantes: {missing_fields}"}
+        elif resource_id in accepted.values():
+            results[position] = {"resourceId": resource_id, "status": "duplicate",
+                                 "message": "Resource repeated in the request"}
+        else:
+            accepted[position] = resource_id
+
+    # Todos los recursos son del mismo sílabo: comparten namespace y lotes
+    namespace = vector_namespace(silabus_id)
+    batcher = UpsertBatcher(
+        lambda vectors: get_vector_store().upsert_vectors(vectors, namespace=namespace),
+        max_vectors=UPSERT_BATCH_VECTORS,
+        max_wait_seconds=UPSERT_BATCH_WAIT_MS / 1000,
+    )
+
+    def ingest(position: int) -> tuple:
+        resource = resources[position]
+        return traced_ingestion(
+            resource["RecursoDidacticoId"], resource["TituloRecurso"], resource["DriveId"], silabus_id,
+            batcher=batcher, associate=False
+        )
+
+    # Los hilos del pool parten de un contexto vacío: cada recurso abre su propia traza
+    with ThreadPoolExecutor(max_workers=max(1, min(BULK_MAX_PARALLELISM, len(accepted) or 1))) as executor:
+        ingested = dict(zip(accepted, executor.map(ingest, accepted)))
+
+    added = []
+    for position, (result, trace) in ingested.items():
+        # Las métricas se publican desde este hilo: Metrics no es seguro entre hilos
+        trace.publish(metrics)
+        resource_id = accepted[position]
+        results[position] = {"resourceId": resource_id, "status": result['status'],
+                             "message": result['message'], "metrics": result['metrics']}
+        if result['status'] == "added":
+            added.append(resource_id)
+
+    # Una sola escritura en la biblioteca para todos los recursos nuevos
+    if added:
+        try:
+            newly_associated = set(add_to_library(library_table_helper, silabus_id, added))
+            logger.info(f"{len(newly_associated)} recursos asociados al sílabo '{silabus_id}'")
+        except Exception as e:
+            logger.error(f"Error asociando recursos al sílabo: {str(e)}", exc_info=True)
+            newly_associated = None
+        for item in results:
+            if item["status"] != "added":
+                continue
+            if newly_associated is None:
+                item.update(status="error", message="Resource indexed but not associated with the syllabus")
+            elif item["resourceId"] not in newly_associated:
+                item.update(status="already_associated",
+                            message="Resource already associated with the selected syllabus")
+
+    metrics.add_dimension(name="file_type", value="bulk")
+    metrics.add_metric(name="bulk_resources", unit="Count", value=len(resources))
+
+    summary: Dict[str, int] = {}
+    for item in results:
+        summary[item["status"]] = summary.get(item["status"], 0) + 1
+    logger.info("Ingesta masiva terminada", extra={"silabus_id": silabus_id, "summary": summary})
+    return {
+        'success': not summary.get("error"),
+        'summary': summary,
+        'results': results
+    }
+
+def add_throughput(trace) -> None:
+    """
+    Calcula el throughput de las etapas con volumen (descarga, extracción, embeddings).
+
+    :param trace: Traza de la ingesta
+    """
+    phases_ms = trace.phases_ms
+    rates = [
+        ("download_bytes_per_second", "downloaded_bytes", "download", "BytesPerSecond"),
+        ("extraction_bytes_per_second", "downloaded_bytes", "extract", "BytesPerSecond"),
+        ("embeddings_per_second", "embeddings", "embed", "CountPerSecond"),
+    ]
+    for name, counter, phase, unit in rates:
+        if trace.values.get(counter) and phases_ms.get(phase):
+            trace.set_value(name, trace.values[counter] / (phases_ms[phase] / 1000), unit)
+
+def ingest_resource(resource_id: str, title: str, drive_id: str, silabus_id: str,
+                    batcher: Optional[UpsertBatcher] = None, associate: bool = True) -> Dict[str, Any]:
+    """
+    Etapas de la ingesta: descarga, hash y deduplicación; después, en paralelo,
+    indexación (extracción, limpieza, chunking, embeddings, upsert), subida a S3 y
+    lectura del registro anterior; por último, las escrituras en DynamoDB y la
+    asociación con el sílabo.
+    
+    :param resource_id: ID del recurso
+    :param title: Título del recurso
+    :param drive_id: ID de Google Drive
+    :param silabus_id: ID del silabo
+    :param batcher: Lotes de upsert compartidos con otros documentos (ingesta masiva)
+    :param associate: False para no asociar el recurso al sílabo (lo hace quien llama)
+    :return: Resultado de la operación (success, status y message)
+    """
+    document = None
     try:
-        # Descargar archivo desde Google Drive
-        file_path = download_file_from_gdrive(title, drive_id)
+        # Archivos que dejaron invocaciones anteriores cortadas (p. ej. por timeout)
+        cleanup_stale(DOWNLOAD_FOLDER)
+
+        # Descargar archivo desde Google Drive (una sola copia para todas las etapas)
+        with span("download"):
+            document = download_file_from_gdrive(title, drive_id)
+        add_count("downloaded_bytes", len(document), unit="Bytes")
         
         # Generar hash del archivo
-        file_hash = generate_file_hash(file_path)
+        with span("hash"):
+            file_hash = generate_file_hash(document)
         
         # Verificar si el hash ya existe en DynamoDB
-        existing_hash = hash_table_helper.get_item(file_hash)
+        with span("dedup_lookup"):
+            existing_hash = hash_table_helper.get_item(file_hash)
         if existing_hash:
             logger.info(f"Hash {file_hash} already exists in DynamoDB")
-            os.remove(file_path)  # Limpiar archivo temporal
-            return {'success': True, 'message': 'Resource already exists'}
+            return {'success': True, 'status': 'exists', 'message': 'Resource already exists'}
         
         # Registrar en DynamoDB
         metadata = {
@@ -170,110 +391,230 @@ def process_resource_addition(resource_id: str, title: str, drive_id: str, silab
             'resource_title': title,
             'drive_id': drive_id,
             'file_hash': file_hash,
-            #'s3_path': s3_path,
-            #'pinecone_ids': []
         }
-        
-        # Procesar el documento y obtener los IDs de Pinecone
-        pinecone_ids = process_document_to_pinecone(file_path, metadata)
-        if not pinecone_ids:
-            os.remove(file_path)
-            raise RuntimeError("Failed to process document for Pinecone")
-
-        # Subir archivo a S3
         object_key = f"{S3_PATH}/{sanitize_filename(title)}"
-        s3_path = s3_helper.upload_file(file_path, object_key)
-
-        resource_data = {
-            'resource_id': resource_id,
-            'resource_title': title,
-            'drive_id': drive_id,
-            'file_hash': file_hash,
-            's3_path': s3_path,
-            'pinecone_ids': pinecone_ids
-        }
-        # Actualizar los IDs de Pinecone en el recurso
-        #resource_data['pinecone_ids'] = pinecone_ids
-        
-        # Guardar en DynamoDB
-        files_table_helper.put_item(resource_data)
-        hash_table_helper.put_item({
-            'file_hash': file_hash,
-            's3_path': s3_path
-        })
+        namespace = vector_namespace(silabus_id)
 
+        # Indexación, subida a S3 y lecturas de DynamoDB son independientes: se
+        # ejecutan en paralelo y los registros se escriben cuando terminan
+        graph = TaskGraph(max_workers=4)
+        graph.add("pinecone_ids", lambda: index_document(document, metadata, batcher, namespace))
+        graph.add("s3_path", lambda: upload_document(document, object_key, title))
+        # Registro de una ingesta anterior del mismo resource_id (sus vectores sobrantes se borran al final)
+        graph.add("previous_item", lambda: get_previous_item(resource_id))
+        graph.add(
+            "records",
+            lambda pinecone_ids, s3_path: write_resource_records(
+                resource_id, title, drive_id, file_hash, s3_path, pinecone_ids, namespace=namespace
+            ),
+            after=("pinecone_ids", "s3_path"),
+        )
         try:
-            library_item = library_table_helper.get_item(silabus_id)
-            if library_item and "resources" in library_item:
-                resources = library_item["resources"]
-                
-                if any(r.get('resource_id') == resource_id for r in resources):
-                    return {'success': True, 'message': 'Resource already associated with the selected syllabus'}
-                
-                resources.append({'resource_id': resource_id})
-            else:
-                resources = [{'resource_id': resource_id}]
-
-            item = {
-                "silabus_id": silabus_id,
-                "resources": resources,
-                "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-            library_table_helper.put_item(item)
-            logger.info(f"Sílabo '{silabus_id}' actualizado o creado con {len(resources)} recursos")
-        except Exception as e:
-            logger.error(f"Error eliminando registros de DynamoDB: {str(e)}", exc_info=True)
+            results = graph.run()
+        except Exception:
+            # Sin registros en DynamoDB el objeto subido quedaría huérfano
+            if "s3_path" in graph.completed:
+                delete_uploaded_object(object_key)
             raise
-        
-        # Limpiar archivo temporal
-        os.remove(file_path)
-        
+        delete_stale_vectors(resource_id, results["previous_item"], results["pinecone_ids"], silabus_id)
+
+        # El estado sale del propio ADD (ALL_OLD), no de una lectura previa: sin carreras
+        # entre ingestas paralelas en el mismo sílabo
+        if associate:
+            try:
+                associated = associate_resource(resource_id, silabus_id)
+            except Exception as e:
+                logger.error(f"Error asociando el recurso al sílabo: {str(e)}", exc_info=True)
+                return {'success': False, 'status': 'error',
+                        'message': 'Resource indexed but not associated with the syllabus'}
+            if not associated:
+                return {'success': True, 'status': 'already_associated',
+                        'message': 'Resource already associated with the selected syllabus'}
+
         logger.info(f"Successfully added resource {resource_id}")
-        return {'success': True, 'message': 'Resource added successfully'}
+        return {'success': True, 'status': 'added', 'message': 'Resource added successfully'}
         
     except Exception as e:
         logger.error(f"Error processing resource addition: {str(e)}", exc_info=True)
-        return {'success': False, 'message': str(e)}
+        return {'success': False, 'status': 'error', 'message': str(e)}
+    finally:
+        # Limpiar el archivo temporal en todas las salidas
+        if document is not None:
+            document.close()
+
+def index_document(document: DocumentBuffer, metadata: Dict[str, Any],
+                   batcher: Optional[UpsertBatcher] = None, namespace: Optional[str] = None) -> List[str]:
+    """
+    Extrae, divide e indexa el documento en Pinecone.
+
+    :param document: Documento descargado
+    :param metadata: Metadatos de los vectores
+    :param batcher: Lotes de upsert compartidos (opcional)
+    :param namespace: Namespace de los vectores (None para el namespace por defecto)
+    :return: IDs de los vectores
+    """
+    # Los extractores solo aceptan rutas: si estaba en memoria se vuelca a /tmp
+    pinecone_ids = process_document_to_pinecone(document.path, metadata, batcher, namespace)
+    if not pinecone_ids:
+        raise RuntimeError("Failed to process document for Pinecone")
+    return pinecone_ids
+
+def upload_document(document: DocumentBuffer, object_key: str, title: str) -> str:
+    """
+    Sube el documento a S3 desde el mismo buffer, en multipart con el tamaño de
+    parte y la concurrencia de TRANSFER_CONFIG.
+
+    :param document: Documento descargado
+    :param object_key: Clave del objeto en S3
+    :param title: Título del recurso (para el Content-Type)
+    :return: Ruta s3:// del objeto
+    """
+    content_type, _ = mimetypes.guess_type(title)
+    extra_args = {'ContentType': content_type} if content_type else {}
+    with span("s3_upload"), document.open() as stream:
+        # S3Helper.upload_fileobj no admite TransferConfig; se usa su cliente
+        s3_helper.s3_client.upload_fileobj(
+            stream, S3_RESOURCES_BUCKET, object_key, ExtraArgs=extra_args, Config=TRANSFER_CONFIG
+        )
+    return f"s3://{S3_RESOURCES_BUCKET}/{object_key}"
+
+def delete_uploaded_object(object_key: str) -> None:
+    """
+    Elimina un objeto subido cuya ingesta falló (sin propagar errores).
 
-def download_file_from_gdrive(file_name: str, gdrive_id: str) -> str:
+    :param object_key: Clave del objeto en S3
     """
-    Descarga un archivo desde Google Drive y lo guarda localmente.
+    try:
+        s3_helper.delete_object(object_key)
+    except Exception as e:
+        logger.warning(f"No se pudo eliminar el objeto huérfano {object_key}: {e}")
+
+def get_previous_item(resource_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Lee el registro del recurso antes de reindexarlo.
+
+    :param resource_id: ID del recurso
+    :return: Registro del recurso, o None si es nuevo
+    """
+    with span("previous_lookup"):
+        return files_table_helper.get_item(resource_id)
+
+def delete_stale_vectors(resource_id: str, previous_item: Optional[Dict[str, Any]],
+                         pinecone_ids: List[str], silabus_id: str) -> None:
+    """
+    Elimina los vectores y chunks de la ingesta anterior que la nueva no sobrescribió
+    (p. ej. ``{resource_id}#N`` cuando el documento tiene ahora menos chunks), para que
+    ``ask`` no los siga recuperando con el filtro por ``resource_id``. Sin propagar
+    errores: el recurso ya está indexado.
+
+    :param resource_id: ID del recurso
+    :param previous_item: Registro anterior del recurso (o None)
+    :param pinecone_ids: IDs de los vectores de esta ingesta
+    :param silabus_id: ID del silabo
+    """
+    stale_ids = stale_vector_ids(resource_id, previous_item, pinecone_ids)
+    if not stale_ids:
+        return
+    try:
+        with span("stale_vectors_delete"):
+            for namespace in deletion_namespaces(previous_item.get(NAMESPACE_ATTRIBUTE), silabus_id):
+                for start in range(0, len(stale_ids), PINECONE_DELETE_BATCH):
+                    get_vector_store().delete_vectors(stale_ids[start:start + PINECONE_DELETE_BATCH], namespace=namespace)
+            delete_chunks(chunks_table_helper, stale_ids)
+        add_count("stale_vectors_deleted", len(stale_ids))
+        logger.info(f"Eliminados {len(stale_ids)} vectores de la ingesta anterior de {resource_id}")
+    except Exception as e:
+        logger.warning(f"No se pudieron eliminar los vectores anteriores de {resource_id}: {e}")
+
+def write_resource_records(resource_id: str, title: str, drive_id: str, file_hash: str, s3_path: str,
+                           pinecone_ids: List[str], namespace: Optional[str] = None) -> None:
+    """
+    Escribe el recurso y su hash en una única transacción (TransactWriteItems): o
+    quedan los dos registros o ninguno.
+
+    :param resource_id: ID del recurso
+    :param title: Título del recurso
+    :param drive_id: ID de Google Drive
+    :param file_hash: Hash SHA256 del archivo
+    :param s3_path: Ruta del objeto en S3
+    :param pinecone_ids: IDs de los vectores (deterministas: solo se guarda cuántos hay)
+    :param namespace: Namespace de los vectores (se guarda para el borrado)
+    """
+    resource_data = {
+        'resource_id': resource_id,
+        'resource_title': title,
+        'drive_id': drive_id,
+        'file_hash': file_hash,
+        's3_path': s3_path,
+        VECTOR_COUNT: len(pinecone_ids)
+    }
+    if namespace:
+        resource_data[NAMESPACE_ATTRIBUTE] = namespace
+
+    # El helper solo transacciona sobre su propia tabla; se usa su cliente para las dos
+    serializer = TypeSerializer()
+    serialize = lambda values: {key: serializer.serialize(value) for key, value in values.items()}
+    transact_items = [
+        {"Put": {"TableName": DYNAMO_RESOURCES_TABLE, "Item": serialize(resource_data)}},
+        {"Put": {"TableName": DYNAMO_RESOURCES_HASH_TABLE, "Item": serialize({'file_hash': file_hash, 's3_path': s3_path})}},
+    ]
+    with span("dynamodb_write"):
+        files_table_helper.dynamodb_client.transact_write_items(TransactItems=transact_items)
+
+def associate_resource(resource_id: str, silabus_id: str) -> bool:
+    """
+    Asocia el recurso al sílabo con un ``ADD`` atómico sobre el conjunto de la
+    biblioteca, como la ingesta masiva.
+
+    :param resource_id: ID del recurso
+    :param silabus_id: ID del silabo
+    :return: False si el recurso ya estaba asociado al sílabo
+    """
+    with span("library_write"):
+        associated = bool(add_to_library(library_table_helper, silabus_id, [resource_id]))
+    if associated:
+        logger.info(f"Recurso {resource_id} asociado al sílabo '{silabus_id}'")
+    return associated
+
+def download_file_from_gdrive(file_name: str, gdrive_id: str) -> DocumentBuffer:
+    """
+    Descarga un archivo desde Google Drive a un DocumentBuffer: en memoria si es
+    pequeño o en un archivo temporal con nombre único (con control de cuota de /tmp).
     
-    :param file_name: Nombre del archivo
+    :param file_name: Nombre del archivo (solo se usa su extensión)
     :param gdrive_id: ID de Google Drive
-    :return: Ruta del archivo descargado
+    :return: Buffer con el contenido; quien lo recibe debe cerrarlo
     """
+    # requests solo se necesita en esta ruta; se importa aquí para no cargarlo en el cold start
+    import requests
+
     url = f"https://drive.google.com/uc?export=download&id={gdrive_id}"
-    file_path = os.path.join(DOWNLOAD_FOLDER, file_name)
-    
-    # Crear directorio si no existe
-    os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
     
     logger.info(f"Downloading {file_name} from Google Drive")
     response = requests.get(url, stream=True)
     response.raise_for_status()
     
-    with open(file_path, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
-    
-    return file_path
+    document = DocumentBuffer(file_name, directory=DOWNLOAD_FOLDER)
+    try:
+        document.expect(int(response.headers.get('Content-Length') or 0))
+        for chunk in response.iter_content(chunk_size=1024 * 1024):
+            document.write(chunk)
+        return document.finalize()
+    except Exception:
+        document.close()
+        raise
 
-def generate_file_hash(file_path: str) -> str:
+def generate_file_hash(document: DocumentBuffer) -> str:
     """
-    Genera un hash SHA256 para el archivo dado.
+    Genera un hash SHA256 del documento sobre su vista en memoria (mmap si está en
+    disco), sin volver a leerlo por bloques.
     
-    :param file_path: Ruta al archivo
+    :param document: Documento descargado
     :return: Hash SHA256
     """
     logger.info("Generating file hash")
-    sha256_hash = hashlib.sha256()
-    
-    with open(file_path, 'rb') as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    
-    return sha256_hash.hexdigest()
+    with document.view() as content:
+        return hashlib.sha256(content).hexdigest()
 
 def sanitize_filename(filename: str) -> str:
     """
@@ -314,63 +655,131 @@ def chunk_text(text: str, chunk_size: int = 500, overlap: int = 20) -> List[str]
     
     return chunks
 
-def process_document_to_pinecone(file_path: str, metadata: Dict[str, Any]) -> List[str]:
+def process_document_to_pinecone(file_path: str, metadata: Dict[str, Any],
+                                 batcher: Optional[UpsertBatcher] = None,
+                                 namespace: Optional[str] = None) -> List[str]:
     """
     Procesa un documento y lo indexa en Pinecone.
     
     :param file_path: Ruta al archivo
     :param metadata: Metadatos del documento
+    :param batcher: Lotes de upsert compartidos; sin él, los vectores del documento
+        se escriben en lotes de UPSERT_BATCH_VECTORS sin esperar a otros documentos
+    :param namespace: Namespace de los vectores si no se pasa ``batcher``
     :return: Lista de IDs de Pinecone
     """
     file_extension = Path(file_path).suffix.lower().replace('.', '')
     
     try:
         # Extraer texto del documento usando DocumentProcessor
-        text_content = document_processor.process_document(file_path)
+        with span("extract"):
+            text_content = document_processor.process_document(file_path)
+        add_count("pages", count_pages(file_path, file_extension))
         
         if not text_content:
             logger.warning(f"No text content extracted from {file_path}")
             return []
+        add_count("characters", len(text_content))
         
         # Dividir texto en chunks (sin usar langchain)
-        chunks = chunk_text(clean_pdf_text_keep_lines(text_content))
+        with span("clean"):
+            cleaned_text = clean_pdf_text_keep_lines(text_content)
+        with span("chunk"):
+            chunks = chunk_text(cleaned_text)
+        add_count("chunks", len(chunks))
         
-        # Generar UUIDs para los vectores
-        uuids = [str(uuid4()) for _ in range(len(chunks))]
+        # IDs deterministas ("{resource_id}#{chunk}"): reintentar la ingesta sobrescribe
+        # los mismos vectores y el borrado puede calcularlos o buscarlos por prefijo
+        ids = vector_ids(metadata['resource_id'], len(chunks))
         
         # Convertir chunks a vectores y subir a Pinecone
+        vector_store = get_vector_store()
         vectors_to_upsert = []
-        for chunk, doc_id in zip(chunks, uuids):
-            # Obtener embeddings
-            embedding = pinecone_helper.get_embeddings(chunk)
-            logger.info(f"Embeddings length: {len(embedding)}")
-            # Crear vector con metadata
-            vectors_to_upsert.append({
-                'id': doc_id,
-                'values': embedding,
-                'metadata': {
-                    **metadata,
-                    'text': chunk  # Agregar el texto como parte de metadata
-                }
-            })
+        with span("embed"):
+            for chunk, doc_id in zip(chunks, ids):
+                # Obtener embeddings
+                embedding = vector_store.get_embeddings(chunk)
+                # En Pinecone solo quedan los metadatos filtrables; el texto va a la tabla de chunks
+                vectors_to_upsert.append({
+                    'id': doc_id,
+                    'values': embedding,
+                    'metadata': slim_metadata(metadata)
+                })
+        add_count("embeddings", len(vectors_to_upsert))
         
         if not vectors_to_upsert:
             logger.warning("No vectors to upsert")
             return []
+
+        # Los textos se guardan antes del upsert: un vector consultable siempre tiene su texto
+        with span("chunk_store_write"):
+            put_chunks(chunks_table_helper, (
+                {
+                    'resource_id': metadata['resource_id'],
+                    'chunk_id': doc_id,
+                    'resource_title': metadata.get('resource_title'),
+                    'text': chunk
+                }
+                for chunk, doc_id in zip(chunks, ids)
+            ))
         
         # Subir vectores a Pinecone
         logger.info(f"Vectors to upsert: {len(vectors_to_upsert)}")
         
-        response = pinecone_helper.upsert_vectors(vectors_to_upsert)
-        logger.info(f"Upsert successful. Response: {response}")
+        if batcher is None:
+            batcher = UpsertBatcher(
+                lambda vectors: vector_store.upsert_vectors(vectors, namespace=namespace),
+                max_vectors=UPSERT_BATCH_VECTORS, max_wait_seconds=0
+            )
+        with span("upsert"):
+            # Solo cuenta los lotes que escribió este hilo (los demás, en la traza de su documento)
+            upsert_batches = batcher.upsert(vectors_to_upsert)
+        if upsert_batches:
+            add_count("upsert_batches", upsert_batches)
+        logger.info(f"Upsert successful: {len(vectors_to_upsert)} vectors")
+
+        # Snapshot de los vectores para el índice en memoria de ask (si falla, ask usa Pinecone)
+        try:
+            with span("snapshot_write"):
+                write_snapshot(s3_helper.s3_client, S3_RESOURCES_BUCKET, metadata['resource_id'],
+                               [vector['values'] for vector in vectors_to_upsert])
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el snapshot de vectores de {metadata['resource_id']}: {e}")
         
         # Devolver IDs de los vectores
-        return uuids
+        return ids
         
     except Exception as e:
         logger.error(f"Error processing document to Pinecone: {str(e)}", exc_info=True)
         return []
     
+def count_pages(file_path: str, file_extension: str) -> int:
+    """
+    Cuenta páginas (PDF), diapositivas (PPTX) u hojas (XLSX) sin volver a extraer
+    el texto. Para DOCX usa el conteo que guarda Word en docProps/app.xml, si existe.
+
+    :param file_path: Ruta al archivo
+    :param file_extension: Extensión sin punto
+    :return: Número de páginas, o 0 si no se puede determinar
+    """
+    try:
+        if file_extension == 'pdf':
+            from PyPDF2 import PdfReader
+            return len(PdfReader(file_path).pages)
+        if file_extension in ('pptx', 'xlsx', 'docx'):
+            with zipfile.ZipFile(file_path) as archive:
+                names = archive.namelist()
+                if file_extension == 'pptx':
+                    return sum(1 for name in names if re.fullmatch(r"ppt/slides/slide\d+\.xml", name))
+                if file_extension == 'xlsx':
+                    return sum(1 for name in names if re.fullmatch(r"xl/worksheets/sheet\d+\.xml", name))
+                if "docProps/app.xml" in names:
+                    match = re.search(rb"<Pages>(\d+)</Pages>", archive.read("docProps/app.xml"))
+                    return int(match.group(1)) if match else 0
+    except Exception as e:
+        logger.warning(f"No se pudo contar las páginas de {file_path}: {e}")
+    return 0
+
 def clean_pdf_text_keep_lines(text: str) -> str:
     # Paso 1: normalizar saltos múltiples -> un solo salto
     text = re.sub(r'\n+', '\n', text)
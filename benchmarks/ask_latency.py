@@ -0,0 +1,231 @@
+"""
+Benchmark de latencia de extremo a extremo del handler ``ask``.
+
+Ejecuta ``lambda_handler`` de ``ask`` contra los sustitutos de ``benchmarks.stubs``
+(DynamoDB con moto, Pinecone y Bedrock en memoria) para una matriz de escenarios:
+tamaño del historial (``CHATBOT_HISTORY_ELEMENTS``) × chunks recuperados
+(``PINECONE_MAX_RETRIEVE_DOCUMENTS``). Converse sigue un guion determinista por
+ronda (``--script``, p. ej. ``get_resources,retrieve_context,end_turn``) con
+latencia base, jitter log-normal reproducible y tiempo de generación por token de
+salida. Por escenario reporta:
+
+- Latencia p50/p95/p99 de la petición completa y mediana por fase (de la traza
+  ``debug`` del handler).
+- Rondas al modelo por petición, bytes enviados y tokens de entrada (sin caché y leídos
+  de la caché de prompts) en cada ronda.
+
+Cada petición usa un alumno distinto con el historial ya sembrado, para que las
+respuestas guardadas por peticiones anteriores no cambien el escenario.
+
+Uso:
+    python -m benchmarks.ask_latency
+    python -m benchmarks.ask_latency --history 0 20 --chunks 5 --requests 50 --jitter 0.3
+    python -m benchmarks.ask_latency --script get_resources,retrieve_context,end_turn --ms-per-output-token 15
+    python -m benchmarks.ask_latency --latency bedrock-runtime.Converse=1500 --latency-scale 0.5
+"""
+import argparse
+import json
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import stubs
+from benchmarks.fakes import BedrockStandIn, LatencyModel
+from benchmarks.power_tuning import parse_latency, silenced_stdout
+
+REPORTS_PATH = Path(__file__).resolve().parent / "reports"
+
+SILABUS_ID = "silabo-1"
+RESOURCES = [
+    {"resource_id": "rec-1", "title": "Semana 1 - Introducción.pdf", "silabus_id": SILABUS_ID, "chunks": 40},
+    {"resource_id": "rec-2", "title": "Semana 2 - Conceptos.docx", "silabus_id": SILABUS_ID, "chunks": 40},
+]
+QUESTION = "¿Qué es el análisis de costo y demanda en el mercado?"
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por rango más cercano (sin interpolar, válido con pocas muestras)."""
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def build_event(user_id: str) -> Dict[str, Any]:
+    return {"body": json.dumps({
+        "user_id": user_id,
+        "syllabus_event_id": SILABUS_ID,
+        "message": QUESTION,
+        "asistente_nombre": "Sofía",
+        "usuario_nombre": "Ana",
+        "usuario_rol": "Alumno",
+        "institucion": "Instituto",
+        "curso": "Economía",
+        "debug": True,
+    }, ensure_ascii=False)}
+
+
+def run_scenario(env: stubs.StubEnvironment, module, history: int, chunks: int, requests: int,
+                 message_words: int) -> Dict[str, Any]:
+    """Siembra el escenario y ejecuta ``requests`` peticiones; devuelve sus estadísticas."""
+    users = [f"alumno-{i}" for i in range(requests + 1)]
+    env.reset()
+    env.seed({
+        "history": [
+            {"user_id": user_id, "syllabus_event_id": SILABUS_ID, "count": history, "message_words": message_words}
+            for user_id in users
+        ] if history else [],
+        "resources": RESOURCES,
+        "chatbot": {
+            # Con 0 elementos el historial se pide igualmente, pero el alumno no tiene mensajes
+            "CHATBOT_HISTORY_ELEMENTS": max(history, 1),
+            "PINECONE_MAX_RETRIEVE_DOCUMENTS": chunks,
+            "PINECONE_MIN_THRESHOLD": -1,
+        },
+    })
+
+    latencies_ms, phases, rounds = [], [], []
+    bytes_per_round: Dict[int, List[int]] = {}
+    tokens_per_round: Dict[int, List[int]] = {}
+    cached_per_round: Dict[int, List[int]] = {}
+    # La primera petición calienta conexiones y configuración, no se mide
+    for attempt, user_id in enumerate(users):
+        env.bedrock.reset()
+        with silenced_stdout():
+            started = time.perf_counter()
+            response = module.lambda_handler(build_event(user_id), None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if response.get("statusCode") != 200:
+            raise RuntimeError(f"ask devolvió {response.get('statusCode')}: {response.get('body')}")
+        if attempt == 0:
+            continue
+
+        converse = [request for request in env.bedrock.requests if request["operation"] == "Converse"]
+        latencies_ms.append(elapsed_ms)
+        phases.append(json.loads(response["body"]).get("debug", {}).get("phases_ms", {}))
+        rounds.append(len(converse))
+        for number, request in enumerate(converse, start=1):
+            bytes_per_round.setdefault(number, []).append(request["request_bytes"])
+            tokens_per_round.setdefault(number, []).append(request["input_tokens"])
+            cached_per_round.setdefault(number, []).append(request["cache_read_tokens"])
+
+    phase_names = sorted({name for sample in phases for name in sample})
+    return {
+        "requests": len(latencies_ms),
+        "latency_ms": {
+            "p50": percentile(latencies_ms, 50),
+            "p95": percentile(latencies_ms, 95),
+            "p99": percentile(latencies_ms, 99),
+            "mean": statistics.mean(latencies_ms),
+        },
+        "phases_ms_median": {
+            name: statistics.median(sample.get(name, 0.0) for sample in phases) for name in phase_names
+        },
+        "model_rounds_mean": statistics.mean(rounds),
+        "rounds": {
+            str(number): {
+                "request_bytes_median": statistics.median(bytes_per_round[number]),
+                "input_tokens_median": statistics.median(tokens_per_round[number]),
+                "cache_read_tokens_median": statistics.median(cached_per_round[number]),
+            }
+            for number in sorted(bytes_per_round)
+        },
+    }
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    settings = report["settings"]
+    lines = [
+        f"Revisión: `{report['revision']}` · guion {' → '.join(settings['script'])}"
+        f" · jitter {settings['jitter']} · {settings['ms_per_output_token']} ms/token de salida",
+        "",
+        "| Historial | Chunks | p50 (ms) | p95 (ms) | p99 (ms) | Rondas | Bytes por ronda | Tokens de entrada por ronda "
+        "| Tokens leídos de caché por ronda |",
+        "|---:|---:|---:|---:|---:|---:|---|---|---|",
+    ]
+    for scenario in report["scenarios"]:
+        result = scenario["result"]
+        latency = result["latency_ms"]
+        sizes = " / ".join(f"{r['request_bytes_median'] / 1024:.1f} KB" for r in result["rounds"].values())
+        tokens = " / ".join(f"{r['input_tokens_median']:.0f}" for r in result["rounds"].values())
+        cached = " / ".join(f"{r['cache_read_tokens_median']:.0f}" for r in result["rounds"].values())
+        lines.append(
+            f"| {scenario['history']} | {scenario['chunks']} | {latency['p50']:.0f} | {latency['p95']:.0f} | "
+            f"{latency['p99']:.0f} | {result['model_rounds_mean']:.1f} | {sizes} | {tokens} | {cached} |"
+        )
+
+    phase_names = sorted({name for s in report["scenarios"] for name in s["result"]["phases_ms_median"]})
+    lines += ["", "| Historial | Chunks | " + " | ".join(phase_names) + " |",
+              "|---:|---:|" + "---:|" * len(phase_names)]
+    for scenario in report["scenarios"]:
+        phases = scenario["result"]["phases_ms_median"]
+        lines.append(f"| {scenario['history']} | {scenario['chunks']} | "
+                     + " | ".join(f"{phases.get(name, 0.0):.0f}" for name in phase_names) + " |")
+    lines += ["", "Fases: mediana en ms de la traza del handler."]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, nargs="+", default=[0, 10, 40],
+                        help="Mensajes de historial enviados al modelo")
+    parser.add_argument("--chunks", type=int, nargs="+", default=[3, 8], help="Chunks recuperados de Pinecone")
+    parser.add_argument("--requests", type=int, default=15, help="Peticiones medidas por escenario")
+    parser.add_argument("--script", default="retrieve_context,end_turn",
+                        help="Pasos de Converse por ronda: nombre de herramienta o end_turn")
+    parser.add_argument("--answer-words", type=int, default=150, help="Palabras de la respuesta final")
+    parser.add_argument("--message-words", type=int, default=40, help="Palabras por mensaje del historial")
+    parser.add_argument("--ms-per-output-token", type=float, default=10.0,
+                        help="Latencia de generación por token de salida")
+    parser.add_argument("--latency", action="append", default=[], metavar="SERVICIO[.Operacion]=MS",
+                        help="Sobrescribe una latencia simulada (ver benchmarks.fakes.DEFAULT_LATENCIES_MS)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Factor para todas las latencias simuladas")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Sigma del factor log-normal de cada latencia")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del jitter")
+    parser.add_argument("--output", type=Path, help="Ruta del informe JSON (por defecto benchmarks/reports/)")
+    args = parser.parse_args(argv)
+
+    script = [step.strip() for step in args.script.split(",") if step.strip()]
+    latency = LatencyModel(parse_latency(args.latency), scale=args.latency_scale, jitter=args.jitter, seed=args.seed)
+    bedrock = BedrockStandIn(script=script, answer_words=args.answer_words,
+                             ms_per_output_token=args.ms_per_output_token)
+
+    report = {
+        "revision": stubs.git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "script": script,
+            "requests": args.requests,
+            "answer_words": args.answer_words,
+            "message_words": args.message_words,
+            "ms_per_output_token": args.ms_per_output_token,
+            "latencies_ms": latency.latencies_ms,
+            "latency_scale": args.latency_scale,
+            "jitter": args.jitter,
+            "seed": args.seed,
+        },
+        "scenarios": [],
+    }
+    with stubs.StubEnvironment(latency=latency, bedrock=bedrock) as env:
+        module = stubs.load_handler("ask")
+        from shared.config import get_config
+        get_config().wait_for_prefetch()
+        # El detalle de tiempos por fase se pide en cada petición con "debug": true
+        module.DEBUG_RESPONSE_ENABLED = True
+        for history in args.history:
+            for chunks in args.chunks:
+                result = run_scenario(env, module, history, chunks, args.requests, args.message_words)
+                report["scenarios"].append({"history": history, "chunks": chunks, "result": result})
+
+    output = args.output or REPORTS_PATH / f"ask_latency-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    print(render_markdown(report))
+    print(f"\nInforme guardado en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Perfilado del cold start (fase de init) de cada handler de Lambda.
+
+Cada ejecución lanza un proceso nuevo de Python con ``-X importtime`` que carga el
+handler en el entorno local de ``benchmarks.stubs`` y espera la precarga de
+configuración, igual que haría Lambda durante el init. Se reporta:
+
+- Tiempo total de init (mediana de N ejecuciones).
+- Tiempo de importación acumulado por paquete de primer nivel y los módulos más caros.
+- Llamadas de red hechas durante el init (deberían ser solo SSM y Secrets Manager).
+
+El informe se guarda en ``benchmarks/reports/cold_start-<commit>.json`` para poder
+compararlo entre commits con ``--compare``.
+
+Uso:
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --handlers ask add_resource --runs 10
+    python -m benchmarks.cold_start --compare benchmarks/reports/cold_start-<commit>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import stubs
+
+REPORTS_PATH = Path(__file__).resolve().parent / "reports"
+IMPORTTIME_SENTINEL = "cold-start-benchmark: handler import begins"
+TOP_MODULES = 15
+
+
+def run_child(handler_name: str) -> None:
+    """Carga un handler en este proceso e imprime las mediciones en JSON por stdout."""
+    stubs.apply_lambda_env({"POWERTOOLS_LOG_LEVEL": "WARNING"})
+    recorder = stubs.NetworkRecorder()
+    stubs.guard_sockets(recorder)
+    stubs.register_botocore_handlers([
+        ("before-call", recorder.botocore_hook),
+        ("before-call", stubs.make_responder(stubs.canned_init_response)),
+    ])
+
+    print(IMPORTTIME_SENTINEL, file=sys.stderr, flush=True)
+    started = time.perf_counter()
+    stubs.load_handler(handler_name)
+    imported = time.perf_counter()
+
+    from shared.config import get_config
+    get_config().wait_for_prefetch(timeout=10)
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "init_ms": (finished - started) * 1000,
+        "network_calls": sorted({call["target"] for call in recorder.calls_in_phase("init")}),
+    }))
+
+
+def parse_importtime(stderr: str) -> Dict[str, float]:
+    """
+    Convierte la salida de ``-X importtime`` (posterior al centinela) en un
+    diccionario módulo -> tiempo propio en ms.
+    """
+    lines = stderr.splitlines()
+    if IMPORTTIME_SENTINEL in lines:
+        lines = lines[lines.index(IMPORTTIME_SENTINEL) + 1:]
+
+    self_times: Dict[str, float] = {}
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        # Formato: "import time:  <self us> | <acumulado us> | <módulo indentado>"
+        try:
+            self_us, _, module = line.split(":", 1)[1].split("|")
+            module = module.strip()
+            self_times[module] = self_times.get(module, 0.0) + int(self_us) / 1000
+        except ValueError:
+            continue
+    return self_times
+
+
+def run_handler(handler_name: str, runs: int) -> Dict[str, Any]:
+    """Ejecuta ``runs`` cold starts de un handler y agrega los resultados."""
+    init_times: List[float] = []
+    import_times: List[float] = []
+    network_calls = set()
+    module_times: Dict[str, List[float]] = defaultdict(list)
+
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "benchmarks.cold_start", "--child", handler_name],
+            cwd=stubs.REPO_ROOT,
+            capture_output=True,
+            text=True,
+            env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Falló el cold start de {handler_name}:\n{completed.stderr[-4000:]}")
+
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        init_times.append(result["init_ms"])
+        import_times.append(result["import_ms"])
+        network_calls.update(result["network_calls"])
+        for module, ms in parse_importtime(completed.stderr).items():
+            module_times[module].append(ms)
+
+    module_medians = {module: statistics.median(times) for module, times in module_times.items()}
+    package_times: Dict[str, float] = defaultdict(float)
+    for module, ms in module_medians.items():
+        package_times[module.split(".")[0]] += ms
+
+    return {
+        "runs": runs,
+        "init_ms_median": statistics.median(init_times),
+        "import_ms_median": statistics.median(import_times),
+        "init_ms_min": min(init_times),
+        "init_ms_max": max(init_times),
+        "network_calls": sorted(network_calls),
+        "packages_ms": dict(sorted(package_times.items(), key=lambda item: item[1], reverse=True)),
+        "top_modules_ms": dict(sorted(module_medians.items(), key=lambda item: item[1], reverse=True)[:TOP_MODULES]),
+    }
+
+
+def render_markdown(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Tabla resumen por handler, con diferencias respecto a un informe base si se indica."""
+    header = "| Handler | Init p50 (ms) | Imports p50 (ms) | Paquetes más caros | Red en init |"
+    separator = "|---|---:|---:|---|---|"
+    if baseline:
+        header = "| Handler | Init p50 (ms) | Δ vs base (ms) | Imports p50 (ms) | Paquetes más caros | Red en init |"
+        separator = "|---|---:|---:|---:|---|---|"
+
+    rows = [f"Revisión: `{report['revision']}`", "", header, separator]
+    for name, result in report["handlers"].items():
+        packages = ", ".join(f"{pkg} {ms:.0f}" for pkg, ms in list(result["packages_ms"].items())[:4])
+        network = ", ".join(result["network_calls"]) or "-"
+        cells = [name, f"{result['init_ms_median']:.0f}"]
+        if baseline:
+            base = baseline["handlers"].get(name)
+            cells.append(f"{result['init_ms_median'] - base['init_ms_median']:+.0f}" if base else "n/a")
+        cells += [f"{result['import_ms_median']:.0f}", packages, network]
+        rows.append("| " + " | ".join(cells) + " |")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--handlers", nargs="+", choices=sorted(stubs.HANDLER_PATHS), default=list(stubs.HANDLER_PATHS))
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts por handler")
+    parser.add_argument("--compare", type=Path, help="Informe JSON base para calcular diferencias")
+    parser.add_argument("--output", type=Path, help="Ruta del informe JSON (por defecto benchmarks/reports/)")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    report = {
+        "revision": stubs.git_revision(),
+        "python": sys.version.split()[0],
+        "handlers": {name: run_handler(name, args.runs) for name in args.handlers},
+    }
+
+    output = args.output or REPORTS_PATH / f"cold_start-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print(render_markdown(report, baseline))
+    print(f"\nInforme guardado en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+"""
+Sustitutos locales de Pinecone y Bedrock para los benchmarks, con latencias
+simuladas configurables.
+
+- ``LatencyModel``: latencia por servicio u operación (``"dynamodb"``,
+  ``"bedrock-runtime.Converse"``, ``"pinecone.query"``...), aplicada con sleep para
+  que el tiempo de pared refleje la espera real (y el solapamiento si hay hilos).
+- ``StandInMeter``: acumula el CPU consumido por los sustitutos (moto, índice falso,
+  respuestas de Bedrock) para descontarlo del CPU atribuido al handler.
+- ``FakePineconeIndex``: índice en memoria con similitud coseno y filtros de metadata.
+- ``BedrockStandIn``: respuestas deterministas de Converse y de embeddings.
+"""
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+EMBEDDING_DIMENSION = 1024
+
+DEFAULT_LATENCIES_MS = {
+    "ssm": 15,
+    "secretsmanager": 20,
+    "dynamodb": 8,
+    "s3": 25,
+    "bedrock-runtime.Converse": 900,
+    "bedrock-runtime.InvokeModel": 60,
+    "pinecone.query": 35,
+    "pinecone.upsert": 60,
+    "pinecone.delete": 30,
+    "pinecone.fetch": 25,
+    "pinecone.list": 25,
+    "pinecone.describe_index_stats": 20,
+    "drive.download": 300,
+}
+
+
+class LatencyModel:
+    """Latencias simuladas por servicio/operación, en milisegundos."""
+
+    def __init__(self, latencies_ms: Optional[Dict[str, float]] = None, scale: float = 1.0,
+                 jitter: float = 0.0, seed: int = 0) -> None:
+        """
+        :param latencies_ms: Sobrescrituras de DEFAULT_LATENCIES_MS.
+        :param scale: Factor aplicado a todas las latencias (0 las desactiva).
+        :param jitter: Desviación (sigma) de un factor log-normal aplicado a cada espera,
+            para simular la cola de latencias; 0 las deja fijas.
+        :param seed: Semilla del jitter (las ejecuciones son reproducibles).
+        """
+        self.latencies_ms = {**DEFAULT_LATENCIES_MS, **(latencies_ms or {})}
+        self.scale = scale
+        self.jitter = jitter
+        self.calls: Dict[str, int] = {}
+        self.simulated_seconds = 0.0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def latency_for(self, service: str, operation: str) -> float:
+        key = f"{service}.{operation}"
+        return self.latencies_ms.get(key, self.latencies_ms.get(service, 0)) * self.scale / 1000
+
+    def wait(self, service: str, operation: str) -> None:
+        self.wait_seconds(f"{service}.{operation}", self.latency_for(service, operation))
+
+    def wait_seconds(self, key: str, seconds: float) -> None:
+        """
+        Espera ``seconds`` (ya escalados) registrándolos bajo ``key``; se usa también
+        para latencias que dependen de la respuesta, como la generación de tokens.
+        """
+        with self._lock:
+            if self.jitter and seconds > 0:
+                seconds *= self._random.lognormvariate(0, self.jitter)
+            self.calls[key] = self.calls.get(key, 0) + 1
+            self.simulated_seconds += seconds
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.calls = {}
+            self.simulated_seconds = 0.0
+
+    @contextmanager
+    def paused(self):
+        """Desactiva temporalmente las latencias (para preparar datos)."""
+        scale, self.scale = self.scale, 0
+        try:
+            yield
+        finally:
+            self.scale = scale
+
+    def botocore_hook(self, model=None, **kwargs) -> None:
+        """Handler de ``before-call`` que aplica la latencia de la operación de AWS."""
+        if model is not None:
+            self.wait(model.service_model.service_name, model.name)
+
+
+class StandInMeter:
+    """CPU (segundos) consumido por los sustitutos locales, sumado entre hilos."""
+
+    def __init__(self) -> None:
+        self.cpu_seconds = 0.0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def measure(self):
+        # Las llamadas anidadas (p. ej. moto dentro de un sustituto) se cuentan una vez
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        started = time.thread_time()
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                elapsed = time.thread_time() - started
+                with self._lock:
+                    self.cpu_seconds += elapsed
+
+    def reset(self) -> None:
+        with self._lock:
+            self.cpu_seconds = 0.0
+
+
+def text_embedding(text: str, dimension: int = EMBEDDING_DIMENSION) -> List[float]:
+    """
+    Embedding determinista por hashing de palabras y bigramas: textos que comparten
+    vocabulario quedan cerca, lo que basta para ejercitar búsquedas y umbrales.
+    """
+    vector = [0.0] * dimension
+    words = re.findall(r"\w+", text.lower())
+    for token in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimension
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def _matches_filter(metadata: Dict[str, Any], conditions: Optional[Dict[str, Any]]) -> bool:
+    if not conditions:
+        return True
+    for field, condition in conditions.items():
+        if field == "$and":
+            if not all(_matches_filter(metadata, sub) for sub in condition):
+                return False
+            continue
+        value = metadata.get(field)
+        if isinstance(condition, dict):
+            for operator, expected in condition.items():
+                if operator == "$in" and value not in expected:
+                    return False
+                if operator == "$nin" and value in expected:
+                    return False
+                if operator == "$eq" and value != expected:
+                    return False
+                if operator == "$ne" and value == expected:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class FakePineconeIndex:
+    """Índice de Pinecone en memoria con la interfaz usada por PineconeHelper."""
+
+    def __init__(self, latency: Optional[LatencyModel] = None, meter: Optional[StandInMeter] = None) -> None:
+        self.latency = latency or LatencyModel(scale=0)
+        self.meter = meter or StandInMeter()
+        self.namespaces: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.request_counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _namespace(self, namespace: Optional[str]) -> Dict[str, Dict[str, Any]]:
+        return self.namespaces.setdefault(namespace or "", {})
+
+    def _call(self, operation: str) -> None:
+        with self._lock:
+            self.request_counts[operation] = self.request_counts.get(operation, 0) + 1
+        self.latency.wait("pinecone", operation)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._call("upsert")
+        with self.meter.measure(), self._lock:
+            records = self._namespace(namespace)
+            for vector in vectors:
+                records[vector["id"]] = {
+                    "id": vector["id"],
+                    "values": list(vector["values"]),
+                    "metadata": dict(vector.get("metadata") or {}),
+                }
+        return {"upserted_count": len(vectors)}
+
+    def query(
+        self,
+        vector: List[float],
+        top_k: int = 10,
+        filter: Optional[Dict[str, Any]] = None,
+        include_metadata: bool = True,
+        namespace: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        self._call("query")
+        with self.meter.measure():
+            with self._lock:
+                records = list(self._namespace(namespace).values())
+            scored = []
+            for record in records:
+                if not _matches_filter(record["metadata"], filter):
+                    continue
+                score = sum(a * b for a, b in zip(vector, record["values"]))
+                scored.append((score, record))
+            scored.sort(key=lambda item: item[0], reverse=True)
+            matches = []
+            for score, record in scored[:top_k]:
+                match = {"id": record["id"], "score": score}
+                if include_metadata:
+                    match["metadata"] = dict(record["metadata"])
+                matches.append(match)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def delete(
+        self,
+        ids: Optional[List[str]] = None,
+        delete_all: bool = False,
+        namespace: Optional[str] = None,
+        filter: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        self._call("delete")
+        with self.meter.measure(), self._lock:
+            records = self._namespace(namespace)
+            if delete_all:
+                records.clear()
+            elif filter:
+                for vector_id in [i for i, r in records.items() if _matches_filter(r["metadata"], filter)]:
+                    del records[vector_id]
+            else:
+                for vector_id in ids or []:
+                    records.pop(vector_id, None)
+        return {}
+
+    def fetch(self, ids: List[str], namespace: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self._call("fetch")
+        with self._lock:
+            records = self._namespace(namespace)
+            return {"vectors": {i: dict(records[i]) for i in ids if i in records}, "namespace": namespace or ""}
+
+    def list(self, prefix: Optional[str] = None, namespace: Optional[str] = None, limit: int = 100, **kwargs) -> Iterable[List[str]]:
+        """Igual que el SDK: genera páginas de IDs que empiezan por ``prefix``."""
+        with self._lock:
+            ids = sorted(i for i in self._namespace(namespace) if not prefix or i.startswith(prefix))
+        for start in range(0, len(ids), limit):
+            self._call("list")
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self, **kwargs) -> Dict[str, Any]:
+        self._call("describe_index_stats")
+        with self._lock:
+            namespaces = {name: {"vector_count": len(records)} for name, records in self.namespaces.items()}
+        return {
+            "dimension": EMBEDDING_DIMENSION,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
+
+    def vector_count(self, namespace: Optional[str] = None) -> int:
+        return len(self._namespace(namespace))
+
+
+class BedrockStandIn:
+    """
+    Respuestas deterministas para ``bedrock-runtime``.
+
+    Converse sigue un guion por ronda del bucle de herramientas de la petición
+    (rondas = resultados de herramienta desde el último mensaje de texto del
+    usuario): cada paso es el nombre de la herramienta a pedir o ``end_turn`` para
+    responder con un texto de ``answer_words`` palabras. Sin guion, pide
+    ``tool_name`` una vez (si hay herramientas) y luego responde.
+    InvokeModel: devuelve ``text_embedding`` del ``inputText``.
+
+    Cada petición queda en ``requests`` con su tamaño en bytes y tokens estimados
+    (4 caracteres por token); ``generation_seconds`` da la latencia extra por tokens
+    de salida (``ms_per_output_token``).
+
+    Los bloques ``cachePoint`` se contabilizan como en Bedrock: el prefijo hasta un
+    punto ya enviado antes cuenta como ``cacheReadInputTokens``, el prefijo nuevo hasta
+    el último punto como ``cacheWriteInputTokens`` y el resto como ``inputTokens``
+    (por modelo, sin mínimo de tokens por punto ni caducidad). La caché sobrevive a ``reset()``
+    salvo con ``cache=True``.
+    """
+
+    def __init__(self, tool_name: Optional[str] = "retrieve_context", answer_words: int = 120,
+                 script: Optional[List[str]] = None, ms_per_output_token: float = 0.0) -> None:
+        self.tool_name = tool_name
+        self.answer_words = answer_words
+        self.script = script
+        self.ms_per_output_token = ms_per_output_token
+        self.requests: List[Dict[str, Any]] = []
+        self.cached_prefixes: set = set()
+        self._lock = threading.Lock()
+
+    def respond(self, operation: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if operation == "Converse":
+            response = self._converse(params)
+        elif operation == "InvokeModel":
+            response = self._invoke_model(params)
+        else:
+            return None
+        record = {
+            "operation": operation,
+            "params": params,
+            "request_bytes": len(json.dumps(params, ensure_ascii=False).encode("utf-8")),
+        }
+        if operation == "Converse":
+            record.update(
+                model_id=params.get("modelId"),
+                input_tokens=response["usage"]["inputTokens"],
+                output_tokens=response["usage"]["outputTokens"],
+                cache_read_tokens=response["usage"].get("cacheReadInputTokens", 0),
+                cache_write_tokens=response["usage"].get("cacheWriteInputTokens", 0),
+                stop_reason=response["stopReason"],
+            )
+        with self._lock:
+            self.requests.append(record)
+        return response
+
+    def generation_seconds(self, response: Dict[str, Any]) -> float:
+        """Latencia de generación (sin escalar) según los tokens de salida de una respuesta de Converse."""
+        return response.get("usage", {}).get("outputTokens", 0) * self.ms_per_output_token / 1000
+
+    def reset(self, cache: bool = False) -> None:
+        with self._lock:
+            self.requests = []
+            if cache:
+                self.cached_prefixes = set()
+
+    def _cache_usage(self, params: Dict[str, Any]) -> tuple:
+        """Tokens leídos y escritos en caché según los ``cachePoint`` de la petición."""
+        # Orden del prefijo en Bedrock: herramientas, sistema y mensajes
+        blocks = list((params.get("toolConfig") or {}).get("tools", [])) + list(params.get("system") or [])
+        for message in params.get("messages", []):
+            blocks += [{"role": message.get("role")}] + list(message.get("content", []))
+        prefix, points = [], []
+        for block in blocks:
+            if "cachePoint" in block:
+                serialized = json.dumps(prefix, ensure_ascii=False)
+                # La caché es por modelo: cambiar de modelo entre rondas no reutiliza el prefijo
+                points.append((f"{params.get('modelId')}:{serialized}", len(serialized) // 4))
+            else:
+                prefix.append(block)
+        if not points:
+            return 0, 0
+        with self._lock:
+            read = max((tokens for key, tokens in points if key in self.cached_prefixes), default=0)
+            write = max(points[-1][1] - read, 0) if points[-1][0] not in self.cached_prefixes else 0
+            self.cached_prefixes.update(key for key, _ in points)
+        return read, write
+
+    @staticmethod
+    def tool_round(messages: List[Dict[str, Any]]) -> int:
+        """Resultados de herramienta enviados desde el último mensaje de texto del usuario."""
+        rounds = 0
+        for message in reversed(messages):
+            if message.get("role") != "user":
+                continue
+            if any("toolResult" in block for block in message.get("content", [])):
+                rounds += 1
+            else:
+                break
+        return rounds
+
+    def _next_step(self, params: Dict[str, Any]) -> str:
+        messages = params.get("messages", [])
+        if not params.get("toolConfig"):
+            return "end_turn"
+        step = self.tool_round(messages)
+        if self.script is not None:
+            return self.script[step] if step < len(self.script) else "end_turn"
+        return self.tool_name if self.tool_name and step == 0 else "end_turn"
+
+    def _converse(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        messages = params.get("messages", [])
+        last_content = messages[-1]["content"] if messages else []
+        input_tokens = len(json.dumps(params, ensure_ascii=False)) // 4
+        step = self._next_step(params)
+
+        if step != "end_turn":
+            question = next(
+                (block["text"] for message in reversed(messages) if message.get("role") == "user"
+                 for block in message.get("content", []) if "text" in block),
+                "",
+            )
+            content = [
+                {"text": "<thinking>Necesito consultar la base de conocimientos.</thinking>"},
+                {"toolUse": {"toolUseId": f"tool-{len(messages)}", "name": step, "input": {"query": question}}},
+            ]
+            stop_reason = "tool_use"
+        else:
+            words = ("Según los materiales del curso, la respuesta es la siguiente " * self.answer_words).split()
+            content = [{"text": " ".join(words[:self.answer_words])}]
+            stop_reason = "end_turn"
+
+        output_tokens = len(json.dumps(content, ensure_ascii=False)) // 4
+        cache_read, cache_write = self._cache_usage(params)
+        usage = {
+            "inputTokens": max(input_tokens - cache_read - cache_write, 0),
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + output_tokens,
+        }
+        if cache_read or cache_write:
+            usage.update(cacheReadInputTokens=cache_read, cacheWriteInputTokens=cache_write)
+        return {
+            "output": {"message": {"role": "assistant", "content": content}},
+            "stopReason": stop_reason,
+            "usage": usage,
+            "metrics": {"latencyMs": 0},
+        }
+
+    def _invoke_model(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        from botocore.response import StreamingBody
+        import io
+
+        payload = json.dumps({
+            "embedding": text_embedding(params.get("inputText", "")),
+            "inputTextTokenCount": len(params.get("inputText", "").split()),
+        }).encode("utf-8")
+        return {"body": StreamingBody(io.BytesIO(payload), len(payload)), "contentType": "application/json"}
@@ -0,0 +1,159 @@
+"""
+Generador determinista de documentos de prueba (PDF, DOCX, PPTX, XLSX) con texto
+de tipo académico en español.
+
+Los archivos no se versionan: se generan bajo demanda en ``benchmarks/.cache``
+y se reutilizan mientras no cambien sus parámetros.
+"""
+import random
+from pathlib import Path
+
+CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "documents"
+
+# Palabras aproximadas por página/diapositiva/hoja, según el formato
+WORDS_PER_PAGE = {"pdf": 450, "docx": 450, "pptx": 80, "xlsx": 600}
+
+VOCABULARY = (
+    "el la los las un una de del en con por para según como sobre entre durante "
+    "curso clase unidad semana tema concepto definición ejemplo ejercicio evaluación "
+    "análisis proceso sistema modelo método resultado objetivo competencia aprendizaje "
+    "estudiante docente sílabo recurso lectura práctica laboratorio proyecto informe "
+    "variable función estructura algoritmo dato información conocimiento teoría "
+    "economía contabilidad gestión empresa mercado costo precio demanda oferta "
+    "derecho norma contrato sociedad historia cultura comunicación lenguaje "
+    "biología célula energía materia física química ecuación derivada integral "
+    "importante principal general específico básico avanzado aplicado relevante "
+    "permite explica describe compara identifica resuelve aplica desarrolla presenta"
+).split()
+
+
+def sample_text(words: int, seed: str = "0") -> str:
+    """
+    Texto pseudoaleatorio reproducible con frases y saltos de párrafo.
+
+    :param words: Número aproximado de palabras.
+    :param seed: Semilla; el mismo valor produce el mismo texto.
+    """
+    rng = random.Random(seed)
+    sentences = []
+    count = 0
+    while count < words:
+        length = min(rng.randint(8, 22), words - count)
+        sentence = " ".join(rng.choice(VOCABULARY) for _ in range(length))
+        sentences.append(sentence.capitalize() + ".")
+        count += length
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n".join(paragraphs)
+
+
+def generate_document(file_format: str, pages: int, seed: str = "0") -> Path:
+    """
+    Devuelve la ruta de un documento generado (reutilizando la caché).
+
+    :param file_format: "pdf", "docx", "pptx" o "xlsx".
+    :param pages: Páginas (PDF/DOCX), diapositivas (PPTX) u hojas (XLSX).
+    :param seed: Semilla del contenido.
+    """
+    path = CACHE_PATH / f"{file_format}-{pages}-{seed}.{file_format}"
+    if path.exists():
+        return path
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    page_texts = [
+        sample_text(WORDS_PER_PAGE[file_format], seed=f"{seed}-{page}") for page in range(pages)
+    ]
+    tmp_path = path.with_suffix(f".tmp.{file_format}")
+    WRITERS[file_format](page_texts, tmp_path)
+    tmp_path.replace(path)
+    return path
+
+
+def _write_pdf(page_texts, path: Path) -> None:
+    # PDF mínimo con fuente Helvetica estándar; suficiente para PyPDF2.extract_text
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for text in page_texts:
+        lines = []
+        for paragraph in text.split("\n"):
+            words = paragraph.split()
+            for start in range(0, len(words), 14):
+                lines.append(" ".join(words[start:start + 14]))
+        stream_lines = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        for line in lines:
+            stream_lines.append(f"({escape(line)}) Tj T*")
+        stream_lines.append("ET")
+        stream = "\n".join(stream_lines).encode("cp1252", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(bytes(output))
+
+
+def _write_docx(page_texts, path: Path) -> None:
+    from docx import Document
+
+    document = Document()
+    for number, text in enumerate(page_texts, start=1):
+        document.add_heading(f"Tema {number}", level=1)
+        for paragraph in text.split("\n"):
+            document.add_paragraph(paragraph)
+        document.add_page_break()
+    document.save(str(path))
+
+
+def _write_pptx(page_texts, path: Path) -> None:
+    from pptx import Presentation
+
+    presentation = Presentation()
+    layout = presentation.slide_layouts[1]
+    for number, text in enumerate(page_texts, start=1):
+        slide = presentation.slides.add_slide(layout)
+        slide.shapes.title.text = f"Diapositiva {number}"
+        slide.placeholders[1].text = text
+    presentation.save(str(path))
+
+
+def _write_xlsx(page_texts, path: Path) -> None:
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for number, text in enumerate(page_texts, start=1):
+        sheet = workbook.create_sheet(f"Hoja {number}")
+        sheet.append(["Semana", "Tema", "Descripción", "Horas"])
+        for row, paragraph in enumerate(text.split("\n"), start=1):
+            words = paragraph.split()
+            sheet.append([row, " ".join(words[:4]), " ".join(words[4:]), (row % 4) + 1])
+    workbook.save(str(path))
+
+
+WRITERS = {
+    "pdf": _write_pdf,
+    "docx": _write_docx,
+    "pptx": _write_pptx,
+    "xlsx": _write_xlsx,
+}
@@ -0,0 +1,276 @@
+"""
+Benchmark offline de la ingesta de ``add_resource`` sobre un corpus sintético.
+
+El corpus (``CORPUS``) tiene PDF, DOCX, PPTX y XLSX en tres tamaños, generados con
+``benchmarks.fixtures.documents``. Cada documento se procesa en un proceso nuevo
+(para medir su pico de RSS por separado) con ``process_document_to_pinecone`` del
+handler: ``DocumentProcessor.process_document``, ``clean_pdf_text_keep_lines``,
+``chunk_text``, embeddings y upsert contra los sustitutos locales de
+``benchmarks.stubs``. Se reporta por documento:
+
+- Tiempo propio de la ingesta (sin el CPU de los sustitutos ni la latencia simulada)
+  y tiempos por etapa (``extract``, ``clean``, ``chunk``, ``embed``, ``upsert``).
+- Throughput en MB/s (tamaño del archivo) y chunks/s.
+- Pico de RSS del proceso durante el procesamiento y cuánto crece sobre el RSS tras
+  cargar el handler, más el pico del heap de Python (pasada aparte con tracemalloc).
+
+Con ``--baseline`` compara contra un informe anterior y termina con código 1 si
+algún documento es más lento que el umbral (``--threshold``, 20% por defecto) y la
+diferencia supera ``--min-delta-ms`` (para no fallar por ruido en documentos
+pequeños). Los informes solo son comparables si se generan en la misma máquina.
+
+Uso:
+    python -m benchmarks.ingestion
+    python -m benchmarks.ingestion --formats pdf docx --sizes small medium --runs 5
+    python -m benchmarks.ingestion --baseline benchmarks/reports/ingestion-<commit>.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import stubs
+
+REPORTS_PATH = Path(__file__).resolve().parent / "reports"
+
+# Páginas (PDF/DOCX), diapositivas (PPTX) u hojas (XLSX) por tamaño
+CORPUS = {
+    "pdf": {"small": 5, "medium": 25, "large": 100},
+    "docx": {"small": 5, "medium": 25, "large": 100},
+    "pptx": {"small": 10, "medium": 40, "large": 120},
+    "xlsx": {"small": 1, "medium": 5, "large": 20},
+}
+STAGES = ["extract", "clean", "chunk", "embed", "upsert"]
+
+
+def _proc_status_kb(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss() -> int:
+    """
+    Reinicia el pico de RSS del proceso (Linux, ``/proc/self/clear_refs``) para que
+    la carga de moto y del handler no lo oculte, y devuelve el RSS actual en KB.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+    current = _proc_status_kb("VmRSS")
+    return current if current is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def peak_rss() -> int:
+    """Pico de RSS en KB desde el último ``reset_peak_rss`` (o desde el inicio del proceso)."""
+    peak = _proc_status_kb("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_child(file_format: str, pages: int, latency_scale: float) -> None:
+    """Procesa un documento en este proceso e imprime las mediciones en JSON por stdout."""
+    from benchmarks.fakes import LatencyModel
+    from benchmarks.fixtures.documents import generate_document
+
+    stubs.apply_lambda_env({"POWERTOOLS_LOG_LEVEL": "WARNING"})
+    with stubs.StubEnvironment(latency=LatencyModel(scale=latency_scale)) as env:
+        module = stubs.load_handler("add_resource")
+        from shared.config import get_config
+        from shared.tracing import start_trace
+        get_config().wait_for_prefetch(timeout=10)
+
+        metadata = {"resource_id": "bench", "resource_title": f"bench.{file_format}", "drive_id": "bench", "file_hash": "bench"}
+        # Calentamiento con un documento mínimo del mismo formato (imports perezosos, clientes)
+        module.process_document_to_pinecone(str(generate_document(file_format, 1, seed="warmup")), metadata)
+
+        path = generate_document(file_format, pages)
+        env.meter.reset()
+        env.latency.reset()
+        rss_before_kb = reset_peak_rss()
+        with start_trace("ingestion") as trace:
+            started = time.perf_counter()
+            vector_ids = module.process_document_to_pinecone(str(path), metadata)
+            wall_s = time.perf_counter() - started
+        rss_peak_kb = peak_rss()
+        standin_s = env.meter.cpu_seconds
+        simulated_s = env.latency.simulated_seconds
+
+        tracemalloc.start()
+        module.process_document_to_pinecone(str(path), metadata)
+        _, heap_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if not vector_ids:
+        raise RuntimeError(f"No se indexó ningún chunk de {path}")
+    own_s = max(wall_s - standin_s - simulated_s, 1e-9)
+    print(json.dumps({
+        "bytes": path.stat().st_size,
+        "wall_ms": wall_s * 1000,
+        "own_ms": own_s * 1000,
+        "standin_ms": standin_s * 1000,
+        "simulated_wait_ms": simulated_s * 1000,
+        "stages_ms": {stage: trace.phases_ms.get(stage, 0.0) for stage in STAGES},
+        "values": trace.values,
+        "rss_peak_mb": rss_peak_kb / 1024,
+        "rss_peak_delta_mb": max(rss_peak_kb - rss_before_kb, 0) / 1024,
+        "heap_peak_mb": heap_peak / (1024 * 1024),
+    }))
+
+
+def run_document(file_format: str, size: str, runs: int, latency_scale: float) -> Dict[str, Any]:
+    """Ejecuta ``runs`` veces la ingesta de un documento del corpus y agrega los resultados."""
+    from benchmarks.fixtures.documents import generate_document
+
+    pages = CORPUS[file_format][size]
+    # Se generan aquí para que los procesos hijos solo lean la caché
+    generate_document(file_format, pages)
+    generate_document(file_format, 1, seed="warmup")
+
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ingestion", "--child", file_format, str(pages),
+             "--latency-scale", str(latency_scale)],
+            cwd=stubs.REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Falló la ingesta de {file_format}/{size}:\n{completed.stderr[-4000:]}")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    own_ms = statistics.median(r["own_ms"] for r in results)
+    chunks = results[0]["values"].get("chunks", 0)
+    size_bytes = results[0]["bytes"]
+    return {
+        "pages": pages,
+        "bytes": size_bytes,
+        "chunks": chunks,
+        "characters": results[0]["values"].get("characters", 0),
+        "runs": runs,
+        "own_ms_median": own_ms,
+        "own_ms_best": min(r["own_ms"] for r in results),
+        "wall_ms_median": statistics.median(r["wall_ms"] for r in results),
+        "stages_ms": {stage: statistics.median(r["stages_ms"][stage] for r in results) for stage in STAGES},
+        "mb_per_second": size_bytes / (1024 * 1024) / (own_ms / 1000),
+        "chunks_per_second": chunks / (own_ms / 1000),
+        "rss_peak_mb": max(r["rss_peak_mb"] for r in results),
+        "rss_peak_delta_mb": max(r["rss_peak_delta_mb"] for r in results),
+        "heap_peak_mb": max(r["heap_peak_mb"] for r in results),
+    }
+
+
+def find_regressions(report: Dict[str, Any], baseline: Dict[str, Any], threshold: float,
+                     min_delta_ms: float = 0.0) -> List[str]:
+    """
+    Documentos cuyo mejor tiempo propio (el mínimo de las ejecuciones, menos sensible
+    al ruido que la mediana) empeora más de ``threshold`` (y más de ``min_delta_ms``
+    en términos absolutos) respecto al informe base.
+
+    :return: Descripción de cada regresión (vacía si no hay).
+    """
+    regressions = []
+    for key, result in report["documents"].items():
+        base = baseline.get("documents", {}).get(key)
+        if not base:
+            continue
+        slowdown = result["own_ms_best"] / base["own_ms_best"] - 1
+        if slowdown > threshold and result["own_ms_best"] - base["own_ms_best"] > min_delta_ms:
+            regressions.append(
+                f"{key}: {base['own_ms_best']:.0f} ms -> {result['own_ms_best']:.0f} ms ({slowdown:+.0%})"
+            )
+    return regressions
+
+
+def render_markdown(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Tabla resumen por documento, con la diferencia respecto al informe base si se indica."""
+    stage_headers = " | ".join(f"{stage} (ms)" for stage in STAGES)
+    header = f"| Documento | KB | Chunks | Propio (ms) | MB/s | Chunks/s | {stage_headers} | RSS (MB) | Δ RSS (MB) | Heap (MB) |"
+    separator = "|---|" + "---:|" * (8 + len(STAGES))
+    if baseline:
+        header += " Δ vs base |"
+        separator += "---:|"
+
+    rows = [f"Revisión: `{report['revision']}`", "", header, separator]
+    for key, result in report["documents"].items():
+        cells = [
+            key,
+            f"{result['bytes'] / 1024:.0f}",
+            str(result["chunks"]),
+            f"{result['own_ms_median']:.0f}",
+            f"{result['mb_per_second']:.2f}",
+            f"{result['chunks_per_second']:.1f}",
+            *(f"{result['stages_ms'][stage]:.1f}" for stage in STAGES),
+            f"{result['rss_peak_mb']:.0f}",
+            f"{result['rss_peak_delta_mb']:.1f}",
+            f"{result['heap_peak_mb']:.1f}",
+        ]
+        if baseline:
+            base = baseline.get("documents", {}).get(key)
+            cells.append(f"{result['own_ms_best'] / base['own_ms_best'] - 1:+.0%}" if base else "n/a")
+        rows.append("| " + " | ".join(cells) + " |")
+    return "\n".join(rows)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", nargs=2, metavar=("FORMATO", "PAGINAS"), help=argparse.SUPPRESS)
+    parser.add_argument("--formats", nargs="+", choices=sorted(CORPUS), default=list(CORPUS))
+    parser.add_argument("--sizes", nargs="+", choices=["small", "medium", "large"], default=["small", "medium", "large"])
+    parser.add_argument("--runs", type=int, default=5, help="Ejecuciones por documento")
+    parser.add_argument("--latency-scale", type=float, default=0.0,
+                        help="Factor de las latencias simuladas (0 mide solo CPU)")
+    parser.add_argument("--baseline", type=Path, help="Informe JSON base para detectar regresiones")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Lentitud máxima tolerada frente a la base")
+    parser.add_argument("--min-delta-ms", type=float, default=20.0,
+                        help="Diferencia absoluta mínima para considerar una regresión")
+    parser.add_argument("--output", type=Path, help="Ruta del informe JSON (por defecto benchmarks/reports/)")
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child[0], int(args.child[1]), args.latency_scale)
+        return
+
+    report = {
+        "revision": stubs.git_revision(),
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "documents": {},
+    }
+    for file_format in args.formats:
+        for size in args.sizes:
+            report["documents"][f"{file_format}/{size}"] = run_document(file_format, size, args.runs, args.latency_scale)
+
+    output = args.output or REPORTS_PATH / f"ingestion-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    print(render_markdown(report, baseline))
+    print(f"\nInforme guardado en {output}")
+
+    if baseline:
+        regressions = find_regressions(report, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"\nRegresiones de más del {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f" - {regression}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
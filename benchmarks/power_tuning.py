@@ -0,0 +1,332 @@
+"""
+Power tuning local de los handlers de Lambda.
+
+Reproduce los requests grabados en ``benchmarks/fixtures/requests.json`` contra cada
+``lambda_handler`` usando los sustitutos locales de ``benchmarks.stubs`` (DynamoDB,
+S3, SSM y Secrets Manager con moto; Pinecone y Bedrock en memoria) con latencias
+simuladas. Por cada request mide:
+
+- CPU propio del handler (descontando el CPU de los sustitutos) y tiempo de espera
+  de red simulada.
+- CPU por fase (extracción, limpieza, chunking, construcción de JSON...).
+- Pico de memoria Python del request (pasada aparte con tracemalloc).
+
+Con esas mediciones modela la duración y el coste por cada tamaño de memoria:
+Lambda asigna CPU proporcional a la memoria (1 vCPU completa a 1769 MB), así que
+la parte de CPU escala con ``1769 / memoria`` (sin mejora por encima, el código es
+de un solo hilo) y la espera de red no cambia.
+
+Uso:
+    python -m benchmarks.power_tuning
+    python -m benchmarks.power_tuning --handlers add_resource --runs 5 --memory 512 1024 1769 3008
+    python -m benchmarks.power_tuning --latency bedrock-runtime.Converse=1500 --latency-scale 0.5
+    python -m benchmarks.power_tuning --cpu-scale 1.3 --architecture arm64 --csv
+"""
+import argparse
+import contextlib
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks import stubs
+from benchmarks.fakes import LatencyModel
+
+FIXTURES_PATH = Path(__file__).resolve().parent / "fixtures" / "requests.json"
+REPORTS_PATH = Path(__file__).resolve().parent / "reports"
+
+MEMORY_TIERS = [128, 256, 512, 1024, 1536, 1769, 2048, 3008]
+FULL_VCPU_MEMORY_MB = 1769
+
+# Precios on-demand de Lambda (us-east-1)
+PRICE_PER_GB_SECOND = {"x86_64": 0.0000166667, "arm64": 0.0000133334}
+PRICE_PER_REQUEST = 0.0000002
+
+# Memoria base estimada del runtime con boto3 y las capas cargadas
+RUNTIME_BASE_MEMORY_MB = 90
+
+# Funciones de cada handler medidas como fases (atributo del módulo, admite "objeto.método")
+HANDLER_PHASES = {
+    "ask": {
+        "history": "get_message_history",
+        "retrieval": "get_documents_context_json",
+        "resources_lookup": "get_resources",
+        "answer_cleanup": "strip_internal_thoughts",
+        "history_write": "upload_message",
+        "json_building": "format_success_response",
+    },
+    "get_history": {},
+    "delete_history": {},
+    "add_resource": {
+        "hashing": "generate_file_hash",
+        "extraction": "document_processor.process_document",
+        "cleaning": "clean_pdf_text_keep_lines",
+        "chunking": "chunk_text",
+        "indexing": "process_document_to_pinecone",
+    },
+    "delete_resource": {
+        "deletion": "process_resource_deletion",
+    },
+}
+
+
+class PhaseProfiler:
+    """Envuelve funciones de un módulo para medir CPU propio (sin sustitutos) y tiempo de pared."""
+
+    def __init__(self, meter) -> None:
+        self.meter = meter
+        self.cpu: Dict[str, float] = {}
+        self.wall: Dict[str, float] = {}
+
+    def instrument(self, module, phases: Dict[str, str]) -> None:
+        for phase, path in phases.items():
+            *parents, attribute = path.split(".")
+            owner = module
+            for parent in parents:
+                owner = getattr(owner, parent)
+            setattr(owner, attribute, self._wrap(phase, getattr(owner, attribute)))
+
+    def _wrap(self, phase: str, function):
+        def wrapper(*args, **kwargs):
+            cpu_started, meter_started = time.process_time(), self.meter.cpu_seconds
+            wall_started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                cpu = (time.process_time() - cpu_started) - (self.meter.cpu_seconds - meter_started)
+                self.cpu[phase] = self.cpu.get(phase, 0.0) + max(cpu, 0.0)
+                self.wall[phase] = self.wall.get(phase, 0.0) + time.perf_counter() - wall_started
+
+        wrapper.__wrapped__ = function
+        return wrapper
+
+    def reset(self) -> None:
+        self.cpu = {}
+        self.wall = {}
+
+
+@contextlib.contextmanager
+def silenced_stdout():
+    """Descarta stdout a nivel de descriptor: los logs se siguen formateando y escribiendo, como en Lambda."""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def invoke(env: stubs.StubEnvironment, module, event: Dict[str, Any], setup: Dict[str, Any], profiler: PhaseProfiler,
+           trace_memory: bool = False) -> Dict[str, Any]:
+    """Ejecuta un request sobre datos recién sembrados y devuelve sus mediciones."""
+    env.reset()
+    env.seed(setup)
+    env.meter.reset()
+    env.latency.reset()
+    profiler.reset()
+
+    if trace_memory:
+        tracemalloc.start()
+    with silenced_stdout():
+        wall_started, cpu_started = time.perf_counter(), time.process_time()
+        response = module.lambda_handler(json.loads(json.dumps(event)), None)
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+    peak_bytes = 0
+    if trace_memory:
+        peak_bytes = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    handler_cpu = max(cpu - env.meter.cpu_seconds, 0.0)
+    return {
+        "status": response.get("statusCode"),
+        "body": response.get("body"),
+        "wall_s": wall,
+        "handler_cpu_s": handler_cpu,
+        # Lo que no es CPU del proceso es espera (latencias simuladas)
+        "wait_s": max(wall - cpu, 0.0),
+        "phases_cpu_s": dict(profiler.cpu),
+        "calls": dict(env.latency.calls),
+        "peak_mb": peak_bytes / 1024 / 1024,
+    }
+
+
+def model_tiers(handler_cpu_s: float, wait_s: float, peak_mb: float, memory_tiers: List[int],
+                cpu_scale: float, architecture: str) -> List[Dict[str, Any]]:
+    """Duración y coste estimados por tamaño de memoria."""
+    tiers = []
+    for memory_mb in memory_tiers:
+        cpu_share = min(memory_mb / FULL_VCPU_MEMORY_MB, 1.0)
+        duration_s = handler_cpu_s * cpu_scale / cpu_share + wait_s
+        billed_ms = max(1, int(duration_s * 1000 + 0.999))
+        cost = billed_ms / 1000 * memory_mb / 1024 * PRICE_PER_GB_SECOND[architecture] + PRICE_PER_REQUEST
+        tiers.append({
+            "memory_mb": memory_mb,
+            "duration_ms": duration_s * 1000,
+            "cost_per_million_usd": cost * 1_000_000,
+            "fits_in_memory": RUNTIME_BASE_MEMORY_MB + peak_mb <= memory_mb,
+        })
+    return tiers
+
+
+def recommend(tiers: List[Dict[str, Any]], max_slowdown: float) -> Optional[Dict[str, Any]]:
+    """Tier más barato cuya duración no supera en más de ``max_slowdown`` a la del más rápido."""
+    feasible = [tier for tier in tiers if tier["fits_in_memory"]]
+    if not feasible:
+        return None
+    fastest = min(tier["duration_ms"] for tier in feasible)
+    candidates = [tier for tier in feasible if tier["duration_ms"] <= fastest * (1 + max_slowdown)]
+    return min(candidates, key=lambda tier: (tier["cost_per_million_usd"], tier["memory_mb"]))
+
+
+def run_handler(env: stubs.StubEnvironment, name: str, fixture: Dict[str, Any], args) -> Dict[str, Any]:
+    module = stubs.load_handler(name)
+    # La precarga de configuración del init debe terminar antes de reiniciar los sustitutos
+    from shared.config import get_config
+    get_config().wait_for_prefetch()
+    if hasattr(module, "download_file_from_gdrive"):
+        env.install_drive_stand_in(module)
+    profiler = PhaseProfiler(env.meter)
+    profiler.instrument(module, HANDLER_PHASES.get(name, {}))
+
+    results = {}
+    for request in fixture["requests"]:
+        expected_status = request.get("expect_status", 200)
+        samples = []
+        for attempt in range(args.warmup + args.runs):
+            sample = invoke(env, module, request["event"], fixture.get("setup", {}), profiler)
+            if sample["status"] != expected_status:
+                raise RuntimeError(f"{name}/{request['name']} devolvió {sample['status']}: {sample['body']}")
+            if attempt >= args.warmup:
+                samples.append(sample)
+        memory_sample = invoke(env, module, request["event"], fixture.get("setup", {}), profiler, trace_memory=True)
+
+        handler_cpu = statistics.median(s["handler_cpu_s"] for s in samples)
+        wait = statistics.median(s["wait_s"] for s in samples)
+        phases = sorted({phase for s in samples for phase in s["phases_cpu_s"]})
+        tiers = model_tiers(handler_cpu, wait, memory_sample["peak_mb"], args.memory, args.cpu_scale, args.architecture)
+        results[request["name"]] = {
+            "runs": args.runs,
+            "wall_ms_median": statistics.median(s["wall_s"] for s in samples) * 1000,
+            "handler_cpu_ms_median": handler_cpu * 1000,
+            "wait_ms_median": wait * 1000,
+            "peak_mb": memory_sample["peak_mb"],
+            "phases_cpu_ms": {
+                phase: statistics.median(s["phases_cpu_s"].get(phase, 0.0) for s in samples) * 1000 for phase in phases
+            },
+            "calls": samples[-1]["calls"],
+            "tiers": tiers,
+            "recommended": recommend(tiers, args.max_slowdown),
+        }
+    return results
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    memory_tiers = report["settings"]["memory"]
+    lines = [
+        f"Revisión: `{report['revision']}` · arquitectura {report['settings']['architecture']}"
+        f" · cpu-scale {report['settings']['cpu_scale']}",
+        "",
+        "| Handler / request | CPU (ms) | Espera (ms) | Pico (MB) | "
+        + " | ".join(f"{m} MB" for m in memory_tiers) + " | Recomendado |",
+        "|---|---:|---:|---:|" + "---:|" * len(memory_tiers) + "---|",
+    ]
+    for handler, requests in report["handlers"].items():
+        for request, result in requests.items():
+            cells = []
+            for tier in result["tiers"]:
+                cell = f"{tier['duration_ms']:.0f} ms / ${tier['cost_per_million_usd']:.2f}"
+                cells.append(cell if tier["fits_in_memory"] else f"~~{cell}~~")
+            recommended = result["recommended"]
+            lines.append(
+                f"| {handler} / {request} | {result['handler_cpu_ms_median']:.0f} | {result['wait_ms_median']:.0f} | "
+                f"{result['peak_mb']:.0f} | " + " | ".join(cells) + " | "
+                + (f"{recommended['memory_mb']} MB" if recommended else "-") + " |"
+            )
+    lines += ["", "Celdas: duración estimada / coste por millón de invocaciones (tachado: no cabe en memoria).", ""]
+    lines += ["| Handler / request | Fase | CPU (ms) |", "|---|---|---:|"]
+    for handler, requests in report["handlers"].items():
+        for request, result in requests.items():
+            for phase, ms in result["phases_cpu_ms"].items():
+                lines.append(f"| {handler} / {request} | {phase} | {ms:.1f} |")
+    return "\n".join(lines)
+
+
+def write_csv(report: Dict[str, Any], path: Path) -> None:
+    with path.open("w", newline="") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["handler", "request", "memory_mb", "duration_ms", "cost_per_million_usd", "fits_in_memory"])
+        for handler, requests in report["handlers"].items():
+            for request, result in requests.items():
+                for tier in result["tiers"]:
+                    writer.writerow([handler, request, tier["memory_mb"], f"{tier['duration_ms']:.1f}",
+                                     f"{tier['cost_per_million_usd']:.4f}", tier["fits_in_memory"]])
+
+
+def parse_latency(values: List[str]) -> Dict[str, float]:
+    latencies = {}
+    for value in values:
+        key, _, ms = value.partition("=")
+        latencies[key] = float(ms)
+    return latencies
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--handlers", nargs="+", choices=sorted(stubs.HANDLER_PATHS), default=list(stubs.HANDLER_PATHS))
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_PATH)
+    parser.add_argument("--runs", type=int, default=3, help="Repeticiones medidas por request")
+    parser.add_argument("--warmup", type=int, default=1, help="Repeticiones de calentamiento por request")
+    parser.add_argument("--memory", type=int, nargs="+", default=MEMORY_TIERS, help="Tamaños de memoria (MB)")
+    parser.add_argument("--architecture", choices=sorted(PRICE_PER_GB_SECOND), default="x86_64")
+    parser.add_argument("--cpu-scale", type=float, default=1.0,
+                        help="Segundos de CPU en 1 vCPU de Lambda por segundo de CPU local")
+    parser.add_argument("--latency", action="append", default=[], metavar="SERVICIO[.Operacion]=MS",
+                        help="Sobrescribe una latencia simulada (ver benchmarks.fakes.DEFAULT_LATENCIES_MS)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="Factor para todas las latencias simuladas")
+    parser.add_argument("--max-slowdown", type=float, default=0.1,
+                        help="Lentitud máxima aceptada frente al tier más rápido para recomendar")
+    parser.add_argument("--output", type=Path, help="Ruta del informe JSON (por defecto benchmarks/reports/)")
+    parser.add_argument("--csv", action="store_true", help="Escribe también las curvas coste/latencia en CSV")
+    args = parser.parse_args(argv)
+
+    fixtures = json.loads(args.fixtures.read_text())
+    latency = LatencyModel(parse_latency(args.latency), scale=args.latency_scale)
+
+    report = {
+        "revision": stubs.git_revision(),
+        "settings": {
+            "memory": args.memory,
+            "architecture": args.architecture,
+            "cpu_scale": args.cpu_scale,
+            "latencies_ms": latency.latencies_ms,
+            "latency_scale": args.latency_scale,
+        },
+        "handlers": {},
+    }
+    with stubs.StubEnvironment(latency=latency) as env:
+        for name in args.handlers:
+            report["handlers"][name] = run_handler(env, name, fixtures[name], args)
+
+    output = args.output or REPORTS_PATH / f"power_tuning-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    if args.csv:
+        write_csv(report, output.with_suffix(".csv"))
+
+    print(render_markdown(report))
+    print(f"\nInforme guardado en {output}")
+
+
+if __name__ == "__main__":
+    main()
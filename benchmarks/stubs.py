@@ -0,0 +1,510 @@
+"""
+Entorno local para ejecutar los handlers de Lambda sin AWS ni Pinecone.
+
+Incluye:
+- Variables de entorno equivalentes a las que define CdkAgentsResourcesStack.
+- Respuestas predefinidas para las llamadas de la fase de init (SSM, Secrets
+  Manager, DescribeTable, HeadBucket).
+- Un registro de llamadas de red (operaciones de botocore y conexiones de
+  socket) que además bloquea cualquier conexión real fuera de localhost.
+- Un cargador de handlers por ruta de archivo.
+
+Los paquetes de las capas de Lambda (aje_libs, aws_lambda_powertools,
+pinecone) deben estar instalados en el entorno local.
+"""
+import importlib.abc
+import importlib.util
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+LAMBDA_ARTIFACTS_PATH = REPO_ROOT / "artifacts" / "aws-lambda"
+LAMBDA_CODE_PATH = LAMBDA_ARTIFACTS_PATH / "code" / "chatbot"
+
+HANDLER_PATHS = {
+    "ask": LAMBDA_CODE_PATH / "ask" / "lambda_function.py",
+    "get_history": LAMBDA_CODE_PATH / "get_history" / "lambda_function.py",
+    "delete_history": LAMBDA_CODE_PATH / "delete_history" / "lambda_function.py",
+    "delete_resource": LAMBDA_CODE_PATH / "delete_resource" / "lambda_function.py",
+    "add_resource": LAMBDA_ARTIFACTS_PATH / "docker" / "chatbot" / "add_resource" / "lambda_function.py",
+}
+
+LAMBDA_ENV = {
+    "ENVIRONMENT": "bench",
+    "PROJECT_NAME": "cdk-agents-resources",
+    "OWNER": "benchmarks",
+    "DYNAMO_CHAT_HISTORY_TABLE": "bench-chat-history",
+    "DYNAMO_LIBRARY_TABLE": "bench-library",
+    "DYNAMO_RESOURCES_TABLE": "bench-learning-resources",
+    "DYNAMO_RESOURCES_HASH_TABLE": "bench-learning-resources-hash",
+    "DYNAMO_CHUNKS_TABLE": "bench-chunks",
+    "S3_RESOURCES_BUCKET": "bench-resources",
+    "CONFIG_CACHE_TTL_SECONDS": "300",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "AWS_ACCESS_KEY_ID": "benchmark",
+    "AWS_SECRET_ACCESS_KEY": "benchmark",
+    "AWS_SESSION_TOKEN": "benchmark",
+}
+
+CHATBOT_PARAMETER = {
+    "CHATBOT_MODEL_ID": "us.amazon.nova-pro-v1:0",
+    "CHATBOT_REGION": "us-east-1",
+    "CHATBOT_LLM_MAX_TOKENS": "1024",
+    "CHATBOT_HISTORY_ELEMENTS": "5",
+    "PINECONE_MAX_RETRIEVE_DOCUMENTS": "5",
+    "PINECONE_MIN_THRESHOLD": "0.3",
+    "EMBEDDINGS_MODEL_ID": "amazon.titan-embed-text-v2:0",
+    "EMBEDDINGS_REGION": "us-east-1",
+}
+
+PINECONE_SECRET = {
+    "PINECONE_INDEX_NAME": "bench-index",
+    "PINECONE_API_KEY": "bench-key",
+}
+
+
+def apply_lambda_env(overrides: Optional[Dict[str, str]] = None) -> None:
+    """Define en el proceso actual las variables de entorno de las Lambdas."""
+    os.environ.update(LAMBDA_ENV)
+    if overrides:
+        os.environ.update(overrides)
+
+
+class NetworkRecorder:
+    """Registra las llamadas de red hechas por los handlers, etiquetadas por fase."""
+
+    def __init__(self) -> None:
+        self.phase = "init"
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, target: str) -> None:
+        with self._lock:
+            self.calls.append({
+                "phase": self.phase,
+                "kind": kind,
+                "target": target,
+                "thread": threading.current_thread().name,
+                "at": time.perf_counter(),
+            })
+
+    def calls_in_phase(self, phase: str) -> List[Dict[str, Any]]:
+        return [call for call in self.calls if call["phase"] == phase]
+
+    def botocore_hook(self, model=None, **kwargs) -> None:
+        """Handler del evento ``before-call`` de botocore; solo registra."""
+        if model is not None:
+            self.record("aws", f"{model.service_model.service_name}.{model.name}")
+
+
+def guard_sockets(recorder: NetworkRecorder, allowed_hosts=("127.0.0.1", "localhost", "::1")) -> None:
+    """
+    Registra cada conexión de socket y rechaza las que no vayan a localhost,
+    para que ningún benchmark dependa de (ni ensucie) servicios reales.
+    """
+    original_connect = socket.socket.connect
+
+    def connect(sock, address):
+        host = address[0] if isinstance(address, tuple) else str(address)
+        recorder.record("socket", f"{host}:{address[1]}" if isinstance(address, tuple) else host)
+        if host not in allowed_hosts:
+            raise ConnectionRefusedError(f"Conexión bloqueada por el entorno de benchmark: {host}")
+        return original_connect(sock, address)
+
+    socket.socket.connect = connect
+
+
+def canned_init_response(service: str, operation: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Respuestas (ya parseadas) para las operaciones que los handlers hacen al
+    inicializarse. Devuelve None para cualquier otra operación.
+    """
+    if service == "ssm" and operation == "GetParameter":
+        return {"Parameter": {"Name": params.get("Name"), "Type": "String", "Value": json.dumps(CHATBOT_PARAMETER)}}
+    if service == "secretsmanager" and operation == "GetSecretValue":
+        return {"Name": params.get("SecretId"), "SecretString": json.dumps(PINECONE_SECRET)}
+    if service == "dynamodb" and operation == "DescribeTable":
+        return {"Table": {"TableName": params.get("TableName"), "TableStatus": "ACTIVE"}}
+    if service == "s3" and operation == "HeadBucket":
+        return {}
+    return None
+
+
+def make_responder(resolver: Callable[[str, str, Dict[str, Any]], Optional[Dict[str, Any]]]):
+    """
+    Construye un handler de ``before-call`` que responde localmente (sin red) con
+    lo que devuelva ``resolver``; si devuelve None la llamada sigue su curso.
+    """
+    def responder(model=None, params=None, **kwargs):
+        from botocore.awsrequest import AWSResponse
+
+        if model is None:
+            return None
+        body = (params or {}).get("body")
+        request_params = body if isinstance(body, dict) else {}
+        if isinstance(body, (bytes, str)) and body:
+            try:
+                request_params = json.loads(body)
+            except ValueError:
+                request_params = {}
+        # Bedrock lleva el modelo en la ruta (/model/{modelId}/converse), no en el body
+        url_path = (params or {}).get("url_path") or ""
+        if url_path.startswith("/model/"):
+            from urllib.parse import unquote
+            request_params.setdefault("modelId", unquote(url_path.split("/")[2]))
+        parsed = resolver(model.service_model.service_name, model.name, request_params)
+        if parsed is None:
+            return None
+        parsed.setdefault("ResponseMetadata", {"HTTPStatusCode": 200, "HTTPHeaders": {}, "RetryAttempts": 0})
+        return AWSResponse("https://stub.local", 200, {}, None), parsed
+
+    return responder
+
+
+class _PostImportHook(importlib.abc.MetaPathFinder):
+    """Ejecuta un callback justo después de importar un módulo concreto."""
+
+    def __init__(self, module_name: str, callback: Callable[[Any], None]) -> None:
+        self.module_name = module_name
+        self.callback = callback
+
+    def find_spec(self, fullname, path=None, target=None):
+        if fullname != self.module_name:
+            return None
+        sys.meta_path.remove(self)
+        spec = importlib.util.find_spec(fullname)
+        original_exec_module = spec.loader.exec_module
+
+        def exec_module(module):
+            original_exec_module(module)
+            self.callback(module)
+
+        spec.loader.exec_module = exec_module
+        return spec
+
+
+def register_botocore_handlers(handlers: List[tuple]) -> None:
+    """
+    Registra handlers de eventos en todas las sesiones de botocore que se creen.
+
+    Si botocore aún no se ha importado se espera a que el handler lo importe, de
+    forma que su coste de importación se atribuya al handler y no al benchmark.
+    """
+    def install(handlers_module):
+        handlers_module.BUILTIN_HANDLERS.extend(handlers)
+
+    if "botocore.handlers" in sys.modules:
+        install(sys.modules["botocore.handlers"])
+    else:
+        sys.meta_path.insert(0, _PostImportHook("botocore.handlers", install))
+
+
+def load_handler(name: str):
+    """
+    Importa el ``lambda_function.py`` de un handler con un nombre de módulo propio,
+    con el código compartido (``shared``) en el path como en Lambda.
+
+    :param name: Nombre del handler (clave de HANDLER_PATHS).
+    :return: Módulo del handler.
+    """
+    if str(LAMBDA_CODE_PATH) not in sys.path:
+        sys.path.insert(0, str(LAMBDA_CODE_PATH))
+    module_name = f"{name}_lambda_function"
+    spec = importlib.util.spec_from_file_location(module_name, HANDLER_PATHS[name])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def git_revision() -> str:
+    """Revisión actual del repositorio (``git describe``), usada para nombrar informes."""
+    import subprocess
+
+    completed = subprocess.run(
+        ["git", "describe", "--always", "--dirty"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    return completed.stdout.strip() or "unknown"
+
+
+TABLE_KEYS = {
+    "DYNAMO_CHAT_HISTORY_TABLE": ("ALUMNO_ID", "DATE_TIME"),
+    "DYNAMO_LIBRARY_TABLE": ("silabus_id", None),
+    "DYNAMO_RESOURCES_TABLE": ("resource_id", None),
+    "DYNAMO_RESOURCES_HASH_TABLE": ("file_hash", None),
+    "DYNAMO_CHUNKS_TABLE": ("resource_id", "chunk_id"),
+}
+
+
+class StubEnvironment:
+    """
+    Entorno en proceso para ejecutar handlers contra sustitutos locales:
+
+    - DynamoDB, S3, SSM y Secrets Manager con moto (tablas y bucket con el mismo
+      esquema que CdkAgentsResourcesStack).
+    - Pinecone con ``FakePineconeIndex`` (se sustituye ``LazyPineconeHelper._connect``).
+    - Bedrock con ``BedrockStandIn``.
+    - Descargas de Google Drive servidas desde archivos locales (``drive_files``).
+
+    Todas las llamadas pasan por ``LatencyModel`` y el CPU de los sustitutos se
+    acumula en ``meter`` para poder descontarlo.
+
+    Uso::
+
+        with StubEnvironment() as env:
+            module = load_handler("ask")
+            env.seed({...})
+            module.lambda_handler(event, None)
+    """
+
+    def __init__(self, latency=None, bedrock=None) -> None:
+        from benchmarks.fakes import BedrockStandIn, FakePineconeIndex, LatencyModel, StandInMeter
+
+        self.latency = latency or LatencyModel()
+        self.meter = StandInMeter()
+        self.bedrock = bedrock or BedrockStandIn()
+        self.index = FakePineconeIndex(self.latency, self.meter)
+        self.recorder = NetworkRecorder()
+        self.drive_files: Dict[str, Path] = {}
+        self._mock = None
+        self._handlers: List[tuple] = []
+        self._restore: List[Callable[[], None]] = []
+
+    def __enter__(self) -> "StubEnvironment":
+        import boto3
+        import botocore.handlers
+        from moto import mock_aws
+        from moto.core.botocore_stubber import BotocoreStubber
+
+        apply_lambda_env()
+        if str(LAMBDA_CODE_PATH) not in sys.path:
+            sys.path.insert(0, str(LAMBDA_CODE_PATH))
+
+        # El CPU que moto gasta emulando AWS no es del handler
+        original_stubber_call = BotocoreStubber.__call__
+        meter = self.meter
+
+        def metered_stubber_call(stubber, *args, **kwargs):
+            with meter.measure():
+                return original_stubber_call(stubber, *args, **kwargs)
+
+        BotocoreStubber.__call__ = metered_stubber_call
+        self._restore.append(lambda: setattr(BotocoreStubber, "__call__", original_stubber_call))
+
+        self._mock = mock_aws()
+        self._mock.start()
+        self._handlers = [
+            ("before-call", self.recorder.botocore_hook),
+            ("before-call", self.latency.botocore_hook),
+            ("before-call.bedrock-runtime", make_responder(self._bedrock_response)),
+        ]
+        botocore.handlers.BUILTIN_HANDLERS.extend(self._handlers)
+        boto3.DEFAULT_SESSION = None
+
+        from shared.pinecone_client import LazyPineconeHelper
+        original_connect = LazyPineconeHelper._connect
+        LazyPineconeHelper._connect = lambda helper: self.index
+        self._restore.append(lambda: setattr(LazyPineconeHelper, "_connect", original_connect))
+
+        self.create_resources()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        import boto3
+        import botocore.handlers
+
+        for handler in self._handlers:
+            botocore.handlers.BUILTIN_HANDLERS.remove(handler)
+        self._mock.stop()
+        for restore in reversed(self._restore):
+            restore()
+        boto3.DEFAULT_SESSION = None
+
+    def _bedrock_response(self, service: str, operation: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # El emisor de botocore detiene la cadena en la primera respuesta y los
+        # handlers más específicos van primero: latencia y registro se aplican aquí
+        self.recorder.record("aws", f"{service}.{operation}")
+        self.latency.wait(service, operation)
+        with self.meter.measure():
+            response = self.bedrock.respond(operation, params)
+        if response is not None and operation == "Converse":
+            # Tiempo de generación proporcional a los tokens de salida
+            self.latency.wait_seconds(f"{service}.{operation}.generation",
+                                      self.bedrock.generation_seconds(response) * self.latency.scale)
+        return response
+
+    def create_resources(self) -> None:
+        """Crea tablas, bucket, parámetro y secreto (sin latencia simulada)."""
+        import boto3
+
+        with self.latency.paused():
+            dynamodb = boto3.client("dynamodb")
+            for env_name, (pk, sk) in TABLE_KEYS.items():
+                key_schema = [{"AttributeName": pk, "KeyType": "HASH"}]
+                attributes = [{"AttributeName": pk, "AttributeType": "S"}]
+                if sk:
+                    key_schema.append({"AttributeName": sk, "KeyType": "RANGE"})
+                    attributes.append({"AttributeName": sk, "AttributeType": "S"})
+                dynamodb.create_table(
+                    TableName=LAMBDA_ENV[env_name],
+                    KeySchema=key_schema,
+                    AttributeDefinitions=attributes,
+                    BillingMode="PAY_PER_REQUEST",
+                )
+            boto3.client("s3").create_bucket(Bucket=LAMBDA_ENV["S3_RESOURCES_BUCKET"])
+            boto3.client("ssm").put_parameter(
+                Name=f"/{LAMBDA_ENV['ENVIRONMENT']}/{LAMBDA_ENV['PROJECT_NAME']}/chatbot",
+                Value=json.dumps(CHATBOT_PARAMETER),
+                Type="String",
+            )
+            boto3.client("secretsmanager").create_secret(
+                Name=f"{LAMBDA_ENV['ENVIRONMENT']}/{LAMBDA_ENV['PROJECT_NAME']}/pinecone-api",
+                SecretString=json.dumps(PINECONE_SECRET),
+            )
+
+    def reset(self) -> None:
+        """Vacía todos los sustitutos y vuelve a crear los recursos base."""
+        self._mock.reset()
+        self.index.namespaces.clear()
+        self.bedrock.reset(cache=True)
+        self.create_resources()
+
+    def table(self, env_name: str):
+        """Tabla de DynamoDB (boto3 resource) a partir del nombre de su variable de entorno."""
+        import boto3
+
+        return boto3.resource("dynamodb").Table(LAMBDA_ENV[env_name])
+
+    def seed(self, setup: Dict[str, Any]) -> None:
+        """
+        Carga datos de partida descritos en un fixture (sin latencia simulada):
+
+        - ``history``: ``[{"user_id", "syllabus_event_id", "count", "message_words"}]``
+        - ``resources``: ``[{"resource_id", "title", "silabus_id", "chunks", "chunk_words"}]``
+          (registro en DynamoDB, entrada en la biblioteca, objeto en S3 y vectores)
+        - ``documents``: ``[{"drive_id", "format", "pages"}]`` servidos como descargas de Drive
+        - ``bedrock``: parámetros de ``BedrockStandIn`` (``tool_name``, ``answer_words``,
+          ``script``, ``ms_per_output_token``)
+        - ``chatbot``: valores que sobrescriben ``CHATBOT_PARAMETER`` en el parámetro de SSM
+          (p. ej. ``CHATBOT_HISTORY_ELEMENTS``)
+        """
+        from benchmarks.fixtures.documents import generate_document, sample_text
+
+        with self.latency.paused():
+            history = self.table("DYNAMO_CHAT_HISTORY_TABLE")
+            for spec in setup.get("history", []):
+                words = spec.get("message_words", 40)
+                with history.batch_writer() as batch:
+                    for i in range(spec["count"]):
+                        batch.put_item(Item={
+                            "ALUMNO_ID": spec["user_id"],
+                            "DATE_TIME": f"2025-03-{1 + i // 1440:02d} {(i // 60) % 24:02d}:{i % 60:02d}:00",
+                            "SILABUS_ID": spec["syllabus_event_id"],
+                            "USER_MESSAGE": sample_text(words, seed=f"user-{i}"),
+                            "AI_MESSAGE": sample_text(words * 3, seed=f"ai-{i}"),
+                            "PROMPT": "",
+                            "IS_DELETED": False,
+                        })
+
+            library: Dict[str, Set[str]] = {}
+            for spec in setup.get("resources", []):
+                self.seed_resource(**spec)
+                library.setdefault(spec["silabus_id"], set()).add(spec["resource_id"])
+            for silabus_id, resource_ids in library.items():
+                self.table("DYNAMO_LIBRARY_TABLE").put_item(Item={
+                    "silabus_id": silabus_id,
+                    "resource_ids": resource_ids,
+                    "last_updated": "2025-03-01 00:00:00",
+                })
+
+            for spec in setup.get("documents", []):
+                self.drive_files[spec["drive_id"]] = generate_document(spec["format"], spec.get("pages", 5))
+
+        for name, value in setup.get("bedrock", {}).items():
+            setattr(self.bedrock, name, value)
+
+        if setup.get("chatbot"):
+            self.set_chatbot_parameter(setup["chatbot"])
+
+    def set_chatbot_parameter(self, overrides: Dict[str, Any]) -> None:
+        """Sobrescribe valores del parámetro ``chatbot`` y descarta la configuración en caché."""
+        import boto3
+        from shared.config import get_config
+
+        with self.latency.paused():
+            boto3.client("ssm").put_parameter(
+                Name=f"/{LAMBDA_ENV['ENVIRONMENT']}/{LAMBDA_ENV['PROJECT_NAME']}/chatbot",
+                Value=json.dumps({**CHATBOT_PARAMETER, **{key: str(value) for key, value in overrides.items()}}),
+                Type="String",
+                Overwrite=True,
+            )
+        get_config().invalidate()
+
+    def seed_resource(self, resource_id: str, title: str, silabus_id: str, chunks: int = 20, chunk_words: int = 400) -> None:
+        """
+        Registra un recurso ya indexado: filas en DynamoDB, chunks, objeto en S3, vectores
+        en el índice y su snapshot para el índice local.
+        """
+        import boto3
+        from benchmarks.fakes import text_embedding
+        from benchmarks.fixtures.documents import sample_text
+
+        vector_ids = [f"{resource_id}#{i}" for i in range(chunks)]
+        vectors = []
+        with self.table("DYNAMO_CHUNKS_TABLE").batch_writer() as writer:
+            for i, vector_id in enumerate(vector_ids):
+                text = sample_text(chunk_words, seed=f"{resource_id}-{i}")
+                # El texto va a la tabla de chunks; en el índice solo queda el metadato filtrable
+                writer.put_item(Item={
+                    "resource_id": resource_id, "chunk_id": vector_id, "resource_title": title, "text": text,
+                })
+                vectors.append({"id": vector_id, "values": text_embedding(text), "metadata": {"resource_id": resource_id}})
+        # Mismo namespace en el que escribiría add_resource con PINECONE_NAMESPACE_MODE
+        from shared.namespaces import vector_namespace
+        self.index.upsert(vectors, namespace=vector_namespace(silabus_id))
+
+        from shared.local_index import write_snapshot
+        write_snapshot(boto3.client("s3"), LAMBDA_ENV["S3_RESOURCES_BUCKET"], resource_id,
+                       [vector["values"] for vector in vectors])
+
+        object_key = f"SOFIA_FILE/PLANIFICACION/AV_Recursos/{resource_id}"
+        boto3.client("s3").put_object(Bucket=LAMBDA_ENV["S3_RESOURCES_BUCKET"], Key=object_key, Body=b"%PDF-1.4")
+        self.table("DYNAMO_RESOURCES_TABLE").put_item(Item={
+            "resource_id": resource_id,
+            "resource_title": title,
+            "drive_id": f"drive-{resource_id}",
+            "file_hash": f"hash-{resource_id}",
+            "s3_path": f"s3://{LAMBDA_ENV['S3_RESOURCES_BUCKET']}/{object_key}",
+            "vector_count": chunks,
+        })
+        self.table("DYNAMO_RESOURCES_HASH_TABLE").put_item(Item={
+            "file_hash": f"hash-{resource_id}",
+            "s3_path": f"s3://{LAMBDA_ENV['S3_RESOURCES_BUCKET']}/{object_key}",
+        })
+
+    def install_drive_stand_in(self, module) -> None:
+        """
+        Sustituye ``download_file_from_gdrive`` del handler por la lectura del archivo
+        local registrado en ``drive_files`` para ese DriveId, escrito en un
+        ``DocumentBuffer`` como lo haría la descarga.
+        """
+        def download_file_from_gdrive(file_name: str, gdrive_id: str):
+            self.latency.wait("drive", "download")
+            source = self.drive_files[gdrive_id]
+            document = module.DocumentBuffer(file_name, directory=module.DOWNLOAD_FOLDER)
+            document.expect(os.path.getsize(source))
+            with open(source, "rb") as handle:
+                for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                    document.write(chunk)
+            return document.finalize()
+
+        original = module.download_file_from_gdrive
+        module.download_file_from_gdrive = download_file_from_gdrive
+        self._restore.append(lambda: setattr(module, "download_file_from_gdrive", original))
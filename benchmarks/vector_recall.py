@@ -0,0 +1,299 @@
+"""
+Benchmark de recall@k y latencia de los backends de vectores.
+
+Compara, sobre el mismo corpus y las mismas consultas, los backends que implementan
+``shared.vector_store.VectorStore`` y el índice en memoria de ``ask``:
+
+- ``local-exact``: ``LocalVectorStore`` con búsqueda exacta (también es la referencia
+  del recall, calculada aparte con NumPy).
+- ``local-ivf-<nprobe>``: ``LocalVectorStore`` aproximado (IVF) para cada ``--nprobe``.
+- ``local-index-float32`` y ``local-index-int8``: ``LocalVectorIndex`` por sílabo.
+- ``pinecone`` (con ``--pinecone-environment``): el índice real, en un namespace
+  temporal que se borra al terminar. Su latencia incluye la red.
+
+Corpus:
+
+- Sintético (por defecto): ``--resources`` recursos de ``--chunks`` chunks de texto de
+  ``benchmarks.fixtures.documents`` con los embeddings deterministas de ``benchmarks.fakes``.
+- ``--snapshots DIR``: snapshots ``vector_snapshots/*.npy`` descargados del bucket de
+  recursos, es decir, embeddings reales de nuestros documentos (un archivo por recurso).
+
+Cada consulta es un chunk del corpus con ruido gaussiano (``--noise``) y se limita,
+como en ``ask``, a los recursos de un sílabo: ``--syllabus-resources`` recursos al azar
+(0 para buscar en todo el corpus). Se reporta recall@k medio y latencia p50/p95 por
+consulta, sin contar el embedding.
+
+Uso:
+    python -m benchmarks.vector_recall
+    python -m benchmarks.vector_recall --resources 40 --chunks 100 --top-k 5 10 --nprobe 2 8 32
+    python -m benchmarks.vector_recall --snapshots ./snapshots --syllabus-resources 12
+    python -m benchmarks.vector_recall --pinecone-environment dev --project-name cdk-agents-resources
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks import stubs
+from benchmarks.ask_latency import percentile
+
+REPORTS_PATH = Path(__file__).resolve().parent / "reports"
+SILABUS_ID = "silabo-bench"
+UPSERT_BATCH = 100
+
+
+def synthetic_corpus(resources: int, chunks: int, words: int) -> Dict[str, List[List[float]]]:
+    """Embeddings por recurso de un corpus sintético reproducible."""
+    from benchmarks.fakes import text_embedding
+    from benchmarks.fixtures.documents import sample_text
+
+    return {
+        f"rec-{r}": [text_embedding(sample_text(words, seed=f"rec-{r}-{c}")) for c in range(chunks)]
+        for r in range(resources)
+    }
+
+
+def snapshot_corpus(directory: Path) -> Dict[str, List[List[float]]]:
+    """Embeddings por recurso leídos de snapshots ``.npy`` (el nombre es el resource_id)."""
+    import numpy as np
+
+    return {path.stem: np.load(path, allow_pickle=False).astype(np.float32).tolist()
+            for path in sorted(directory.glob("*.npy"))}
+
+
+def build_queries(corpus: Dict[str, List[List[float]]], count: int, noise: float,
+                  syllabus_resources: int, seed: int) -> List[Dict[str, Any]]:
+    """Consultas: un chunk al azar con ruido, limitadas a un subconjunto de recursos que lo incluye."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    resource_ids = sorted(corpus)
+    queries = []
+    for _ in range(count):
+        resource_id = resource_ids[rng.integers(len(resource_ids))]
+        vector = np.asarray(corpus[resource_id][rng.integers(len(corpus[resource_id]))], dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1)
+        vector = vector + rng.normal(scale=noise / np.sqrt(len(vector)), size=len(vector))
+        scope = None
+        if syllabus_resources:
+            others = [rid for rid in resource_ids if rid != resource_id]
+            picked = rng.choice(len(others), min(syllabus_resources - 1, len(others)), replace=False)
+            scope = sorted([resource_id] + [others[i] for i in picked])
+        queries.append({"values": vector.astype(np.float32).tolist(), "resources": scope})
+    return queries
+
+
+def ground_truth(corpus: Dict[str, List[List[float]]], queries: List[Dict[str, Any]], top_k: int) -> List[List[str]]:
+    """Top-k exacto por similitud coseno (referencia del recall)."""
+    import numpy as np
+
+    ids, owners, rows = [], [], []
+    for resource_id, vectors in corpus.items():
+        for chunk, vector in enumerate(vectors):
+            ids.append(f"{resource_id}#{chunk}")
+            owners.append(resource_id)
+            rows.append(vector)
+    matrix = np.asarray(rows, dtype=np.float32)
+    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+    owners = np.asarray(owners)
+    truth = []
+    for query in queries:
+        vector = np.asarray(query["values"], dtype=np.float32)
+        scores = matrix @ (vector / (np.linalg.norm(vector) or 1))
+        if query["resources"] is not None:
+            scores = np.where(np.isin(owners, query["resources"]), scores, -np.inf)
+        truth.append([ids[i] for i in np.argsort(-scores, kind="stable")[:top_k]])
+    return truth
+
+
+def corpus_vectors(corpus: Dict[str, List[List[float]]]) -> List[Dict[str, Any]]:
+    return [
+        {"id": f"{resource_id}#{chunk}", "values": vector, "metadata": {"resource_id": resource_id}}
+        for resource_id, vectors in corpus.items() for chunk, vector in enumerate(vectors)
+    ]
+
+
+def store_backend(store, namespace: Optional[str] = None) -> Callable[[Dict[str, Any], int], List[str]]:
+    """Consulta de un ``VectorStore`` con el filtro ``$in`` que usa ``ask``."""
+    def search(query: Dict[str, Any], top_k: int) -> List[str]:
+        conditions = {"resource_id": {"$in": query["resources"]}} if query["resources"] is not None else None
+        matches = store.query(query["values"], filter_conditions=conditions, top_k=top_k, namespace=namespace)
+        return [match["id"] for match in matches]
+    return search
+
+
+def local_index_backend(index, corpus: Dict[str, Any]) -> Callable[[Dict[str, Any], int], List[str]]:
+    """Consulta del índice en memoria de ``ask`` (el sílabo son los recursos de la consulta)."""
+    def search(query: Dict[str, Any], top_k: int) -> List[str]:
+        resources = query["resources"] if query["resources"] is not None else list(corpus)
+        return [match["id"] for match in index.query(SILABUS_ID, resources, query["values"], top_k, -1.0)]
+    return search
+
+
+def measure(search: Callable, queries: List[Dict[str, Any]], truth: List[List[str]], top_k: int) -> Dict[str, Any]:
+    """Recall@k medio y latencia por consulta (la primera calienta y no se mide)."""
+    search(queries[0], top_k)
+    latencies_ms, recalls = [], []
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        found = search(query, top_k)
+        latencies_ms.append((time.perf_counter() - started) * 1000)
+        recalls.append(len(set(found) & set(expected)) / len(expected) if expected else 1.0)
+    return {
+        "recall": statistics.mean(recalls),
+        "latency_ms": {"p50": percentile(latencies_ms, 50), "p95": percentile(latencies_ms, 95)},
+    }
+
+
+def local_backends(corpus: Dict[str, List[List[float]]], nprobes: List[int], nlist: Optional[int]) -> Dict[str, Any]:
+    """Backends locales ya cargados con el corpus, con su tiempo de carga."""
+    import numpy as np
+
+    from shared.local_index import FLOAT32, INT8, LocalVectorIndex
+    from shared.local_vector_store import APPROXIMATE, EXACT, LocalVectorStore
+
+    vectors = corpus_vectors(corpus)
+    backends = {}
+    for name, search, nprobe in [("local-exact", EXACT, 1)] + [
+        (f"local-ivf-{nprobe}", APPROXIMATE, nprobe) for nprobe in nprobes
+    ]:
+        started = time.perf_counter()
+        store = LocalVectorStore("bench-model", "us-east-1", min_threshold=-1.0,
+                                 search=search, nlist=nlist, nprobe=nprobe)
+        store.upsert_vectors(vectors)
+        # La matriz (y el IVF) se construye en la primera consulta: se incluye en la carga
+        store.query(vectors[0]["values"], top_k=1)
+        backends[name] = (store_backend(store), (time.perf_counter() - started) * 1000)
+
+    snapshots = {resource_id: np.asarray(rows, dtype=np.float16) for resource_id, rows in corpus.items()}
+    for dtype in (FLOAT32, INT8):
+        started = time.perf_counter()
+        index = LocalVectorIndex(snapshots.get, memory_budget_bytes=1 << 40, dtype=dtype)
+        index.query(SILABUS_ID, list(corpus), vectors[0]["values"], 1, -1.0)
+        backends[f"local-index-{dtype}"] = (local_index_backend(index, corpus), (time.perf_counter() - started) * 1000)
+    return backends
+
+
+def pinecone_backend(corpus: Dict[str, List[List[float]]], environment: str, project_name: str,
+                     timeout_seconds: float = 120):
+    """
+    Carga el corpus en un namespace temporal del índice real y espera a que sea
+    consultable. Devuelve la consulta, el tiempo de carga y la función de limpieza.
+    """
+    from tools.migrate_vector_namespaces import connect_index
+
+    index = connect_index(environment, project_name)
+    namespace = f"bench-recall-{stubs.git_revision()}"
+    vectors = corpus_vectors(corpus)
+    started = time.perf_counter()
+    for start in range(0, len(vectors), UPSERT_BATCH):
+        index.upsert(vectors=vectors[start:start + UPSERT_BATCH], namespace=namespace)
+    deadline = time.monotonic() + timeout_seconds
+    while time.monotonic() < deadline:
+        stats = index.describe_index_stats()
+        namespaces = stats.get("namespaces", {}) if isinstance(stats, dict) else getattr(stats, "namespaces", {})
+        summary = namespaces.get(namespace)
+        count = summary.get("vector_count") if isinstance(summary, dict) else getattr(summary, "vector_count", 0)
+        if count == len(vectors):
+            break
+        time.sleep(2)
+    load_ms = (time.perf_counter() - started) * 1000
+
+    def search(query: Dict[str, Any], top_k: int) -> List[str]:
+        kwargs = {"vector": query["values"], "top_k": top_k, "namespace": namespace}
+        if query["resources"] is not None:
+            kwargs["filter"] = {"resource_id": {"$in": query["resources"]}}
+        response = index.query(**kwargs)
+        matches = response.get("matches", []) if isinstance(response, dict) else response.matches
+        return [match["id"] if isinstance(match, dict) else match.id for match in matches]
+
+    return search, load_ms, lambda: index.delete(delete_all=True, namespace=namespace)
+
+
+def render_markdown(report: Dict[str, Any]) -> str:
+    settings = report["settings"]
+    lines = [
+        f"Revisión: `{report['revision']}` · corpus {settings['corpus']} · {settings['vectors']} vectores"
+        f" · {settings['queries']} consultas · recursos por sílabo: {settings['syllabus_resources'] or 'todos'}",
+        "",
+        "| Backend | k | Recall@k | p50 (ms) | p95 (ms) | Carga (ms) |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        lines.append(f"| {result['backend']} | {result['top_k']} | {result['recall']:.3f} | "
+                     f"{latency['p50']:.2f} | {latency['p95']:.2f} | {result['load_ms']:.0f} |")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=20, help="Recursos del corpus sintético")
+    parser.add_argument("--chunks", type=int, default=50, help="Chunks por recurso del corpus sintético")
+    parser.add_argument("--chunk-words", type=int, default=120, help="Palabras por chunk del corpus sintético")
+    parser.add_argument("--snapshots", type=Path, help="Directorio con snapshots .npy (corpus real)")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas medidas")
+    parser.add_argument("--noise", type=float, default=0.3, help="Norma aproximada del ruido de cada consulta")
+    parser.add_argument("--syllabus-resources", type=int, default=8,
+                        help="Recursos del sílabo de cada consulta (0: todo el corpus)")
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5], help="Valores de k")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16], help="Listas sondeadas por el IVF")
+    parser.add_argument("--nlist", type=int, help="Listas del IVF (por defecto, raíz del número de vectores)")
+    parser.add_argument("--pinecone-environment", help="Entorno del índice real (añade el backend pinecone)")
+    parser.add_argument("--project-name", default="cdk-agents-resources", help="Proyecto del secreto de Pinecone")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de las consultas")
+    parser.add_argument("--output", type=Path, help="Ruta del informe JSON (por defecto benchmarks/reports/)")
+    args = parser.parse_args(argv)
+
+    if str(stubs.LAMBDA_CODE_PATH) not in sys.path:
+        sys.path.insert(0, str(stubs.LAMBDA_CODE_PATH))
+    if args.snapshots:
+        corpus, corpus_name = snapshot_corpus(args.snapshots), str(args.snapshots)
+    else:
+        corpus, corpus_name = synthetic_corpus(args.resources, args.chunks, args.chunk_words), "sintético"
+    queries = build_queries(corpus, args.queries, args.noise, args.syllabus_resources, args.seed)
+
+    backends = local_backends(corpus, args.nprobe, args.nlist)
+    cleanup = None
+    if args.pinecone_environment:
+        search, load_ms, cleanup = pinecone_backend(corpus, args.pinecone_environment, args.project_name)
+        backends["pinecone"] = (search, load_ms)
+
+    report = {
+        "revision": stubs.git_revision(),
+        "python": sys.version.split()[0],
+        "settings": {
+            "corpus": corpus_name,
+            "resources": len(corpus),
+            "vectors": sum(len(vectors) for vectors in corpus.values()),
+            "queries": len(queries),
+            "noise": args.noise,
+            "syllabus_resources": args.syllabus_resources,
+            "nlist": args.nlist,
+            "seed": args.seed,
+        },
+        "results": [],
+    }
+    try:
+        for top_k in args.top_k:
+            truth = ground_truth(corpus, queries, top_k)
+            for name, (search, load_ms) in backends.items():
+                result = measure(search, queries, truth, top_k)
+                report["results"].append({"backend": name, "top_k": top_k, "load_ms": load_ms, **result})
+    finally:
+        if cleanup:
+            cleanup()
+
+    output = args.output or REPORTS_PATH / f"vector_recall-{report['revision']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+    print(render_markdown(report))
+    print(f"\nInforme guardado en {output}")
+
+
+if __name__ == "__main__":
+    main()
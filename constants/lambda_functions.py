@@ -0,0 +1,67 @@
+import copy
+
+# Values used when cdk.json does not override them (the sizing the stack has always used)
+DEFAULT_LAMBDA_FUNCTIONS = {
+    "defaults": {
+        "runtime": "python3.11",
+        "architecture": "x86_64",
+        "alias": None,
+        "provisioned_concurrency": 0,
+        "scheduled_scaling": [],
+        "target_utilization": None,
+        "time_zone": None,
+        "snap_start": False,
+    },
+    "ask": {"memory_size": 1024, "timeout": 60},
+    "delete_history": {"memory_size": 512, "timeout": 30},
+    "get_history": {"memory_size": 512, "timeout": 30},
+    "add_resource": {"memory_size": 1024, "timeout": 60},
+    "delete_resource": {"memory_size": 512, "timeout": 30},
+}
+
+# Python runtimes that support SnapStart
+SNAP_START_RUNTIMES = ("python3.12", "python3.13")
+
+
+class LambdaFunctions:
+    """
+    Per-function sizing and warm-capacity settings, read from the
+    "lambda_functions" section of the project config in cdk.json:
+
+        "lambda_functions": {
+            "defaults": {"architecture": "arm64"},
+            "ask": {
+                "memory_size": 1769,
+                "alias": "live",
+                "provisioned_concurrency": 2,
+                "time_zone": "America/Lima",
+                "scheduled_scaling": [
+                    {"name": "morning", "schedule": "cron(30 6 ? * MON-FRI *)", "min_capacity": 20, "max_capacity": 40},
+                    {"name": "evening", "schedule": "cron(0 23 ? * MON-FRI *)", "min_capacity": 2, "max_capacity": 4}
+                ],
+                "target_utilization": 0.7
+            }
+        }
+
+    Function entries override "defaults", which override DEFAULT_LAMBDA_FUNCTIONS.
+    """
+    def __init__(self, app_config: dict):
+        self.LAMBDA_FUNCTIONS = copy.deepcopy(DEFAULT_LAMBDA_FUNCTIONS)
+        for key, value in (app_config.get("lambda_functions") or {}).items():
+            self.LAMBDA_FUNCTIONS.setdefault(key, {}).update(value)
+
+    def get(self, function_name: str) -> dict:
+        """Resolved settings for a function"""
+        settings = dict(self.LAMBDA_FUNCTIONS["defaults"])
+        settings.update(self.LAMBDA_FUNCTIONS.get(function_name, {}))
+
+        if settings["architecture"] not in ("x86_64", "arm64"):
+            raise ValueError(f"Invalid architecture for {function_name}: {settings['architecture']}")
+        if settings["snap_start"] and settings["runtime"] not in SNAP_START_RUNTIMES:
+            raise ValueError(f"SnapStart for {function_name} requires one of {SNAP_START_RUNTIMES}, got {settings['runtime']}")
+        if settings["snap_start"] and (settings["provisioned_concurrency"] or settings["scheduled_scaling"]):
+            raise ValueError(f"SnapStart and provisioned concurrency cannot be combined on {function_name}")
+        if (settings["provisioned_concurrency"] or settings["scheduled_scaling"] or settings["snap_start"]) and not settings["alias"]:
+            # Provisioned concurrency and SnapStart only apply to published versions
+            settings["alias"] = "live"
+        return settings
@@ -11,7 +11,10 @@ from aws_cdk import (
     aws_secretsmanager as secretsmanager,
     aws_s3_notifications as s3n,
     aws_apigateway as apigw,
-    CfnOutput
+    aws_applicationautoscaling as appscaling,
+    aws_ecr_assets as ecr_assets,
+    CfnOutput,
+    TimeZone
 )
 from constructs import Construct
 from aje_cdk_libs.builders.resource_builder import ResourceBuilder
@@ -19,6 +22,7 @@ from aje_cdk_libs.models.configs import *
 from aje_cdk_libs.constants.environments import Environments
 from constants.paths import Paths
 from constants.layers import Layers
+from constants.lambda_functions import LambdaFunctions
 import os
 from dotenv import load_dotenv
 import urllib.parse
@@ -31,6 +35,7 @@ class CdkAgentsResourcesStack(Stack):
         self.builder = ResourceBuilder(self, self.PROJECT_CONFIG)
         self.Paths = Paths(self.PROJECT_CONFIG.app_config)
         self.Layers = Layers(self.PROJECT_CONFIG.app_config, project_config.region_name, project_config.account_id)
+        self.LambdaFunctions = LambdaFunctions(self.PROJECT_CONFIG.app_config)
  
         # Create all resources
         self.create_dynamodb_tables()
@@ -80,6 +85,17 @@ class CdkAgentsResourcesStack(Stack):
         )
         self.library_table = self.builder.build_dynamodb_table(dynamodb_config)
 
+        # Chunk Store Table: chunk text keyed by vector ID (Pinecone keeps only filterable metadata)
+        dynamodb_config = DynamoDBConfig(
+            table_name="chunk_store",
+            partition_key="resource_id",
+            partition_key_type=dynamodb.AttributeType.STRING,
+            sort_key="chunk_id",
+            sort_key_type=dynamodb.AttributeType.STRING,
+            removal_policy=RemovalPolicy.DESTROY
+        )
+        self.chunk_store_table = self.builder.build_dynamodb_table(dynamodb_config)
+
         # MCP Session Table
         '''
         dynamodb_config = DynamoDBConfig(
@@ -132,6 +148,24 @@ class CdkAgentsResourcesStack(Stack):
             "LambdaRequestsLayer",
             layer_version_arn=self.Layers.AWS_LAMBDA_LAYERS.get("layer_requests")
         )
+
+        # Optional AWS Parameters and Secrets Lambda Extension (local cache for SSM/Secrets Manager)
+        self.lambda_layer_parameters_secrets = None
+        if self.Layers.AWS_LAMBDA_LAYERS.get("layer_parameters_secrets"):
+            self.lambda_layer_parameters_secrets = _lambda.LayerVersion.from_layer_version_arn(
+                self,
+                "LambdaParametersSecretsLayer",
+                layer_version_arn=self.Layers.AWS_LAMBDA_LAYERS.get("layer_parameters_secrets")
+            )
+
+        # Optional NumPy layer for the in-memory vector index of the ask Lambda
+        self.lambda_layer_numpy = None
+        if self.Layers.AWS_LAMBDA_LAYERS.get("layer_numpy"):
+            self.lambda_layer_numpy = _lambda.LayerVersion.from_layer_version_arn(
+                self,
+                "LambdaNumpyLayer",
+                layer_version_arn=self.Layers.AWS_LAMBDA_LAYERS.get("layer_numpy")
+            )
         '''
         self.lambda_layer_awslabs_mcp_lambda_handler = _lambda.LayerVersion.from_layer_version_arn(
             self,
@@ -149,18 +183,68 @@ class CdkAgentsResourcesStack(Stack):
     def create_lambda_functions(self):
         """Create all Lambda functions needed for the chatbot"""
         
+        # Large payload dumps (messages, prompts, chunks): every request in dev, sampled elsewhere
+        environment = self.PROJECT_CONFIG.environment.value.lower()
+        payload_logging = {
+            "mode": "full" if environment == "dev" else "sampled",
+            "sample_rate": 0.01,
+            "field_max_chars": 300,
+            **(self.PROJECT_CONFIG.app_config.get("payload_logging") or {})
+        }
+
+        # Bedrock retries with full jitter, per-container rate limits and throttling fallbacks.
+        # Set converse_rps/embeddings_rps to the account quota divided by the expected concurrent containers.
+        bedrock = {
+            "max_attempts": 4,
+            "base_delay_ms": 200,
+            "max_delay_ms": 4000,
+            "max_total_ms": 20000,
+            "converse_rps": 0,
+            "embeddings_rps": 0,
+            "fallback_regions": [],
+            "model_fallbacks": {},
+            **(self.PROJECT_CONFIG.app_config.get("bedrock") or {})
+        }
+
         # Common environment variables for all Lambda functions
         common_env_vars = {
-            "ENVIRONMENT": self.PROJECT_CONFIG.environment.value.lower(),
+            "ENVIRONMENT": environment,
             "PROJECT_NAME": self.PROJECT_CONFIG.project_name,
             "OWNER": self.PROJECT_CONFIG.author,
             "DYNAMO_CHAT_HISTORY_TABLE": self.chat_history_table.table_name,
             "DYNAMO_LIBRARY_TABLE": self.library_table.table_name,
             "DYNAMO_RESOURCES_TABLE": self.learning_resources_table.table_name,
             "DYNAMO_RESOURCES_HASH_TABLE": self.learning_resources_hash_table.table_name,
+            "DYNAMO_CHUNKS_TABLE": self.chunk_store_table.table_name,
             #"DYNAMO_MCP_SESSIONS_TABLE": self.mcp_sessions_table.table_name,
-            "S3_RESOURCES_BUCKET": self.resources_bucket.bucket_name
+            "S3_RESOURCES_BUCKET": self.resources_bucket.bucket_name,
+            "CONFIG_CACHE_TTL_SECONDS": str(self.PROJECT_CONFIG.app_config.get("config_cache_ttl_seconds", 300)),
+            "POWERTOOLS_METRICS_NAMESPACE": self.PROJECT_CONFIG.project_name,
+            # Per-phase timings can be returned in the response body ("debug": true) when enabled
+            "DEBUG_RESPONSE_ENABLED": str(self.PROJECT_CONFIG.app_config.get("debug_response_enabled", False)).lower(),
+            "LOG_PAYLOAD_MODE": payload_logging["mode"],
+            "LOG_PAYLOAD_SAMPLE_RATE": str(payload_logging["sample_rate"]),
+            "LOG_FIELD_MAX_CHARS": str(payload_logging["field_max_chars"]),
+            # "shared" (one namespace filtered by resource_id) or "syllabus" (one namespace per syllabus)
+            "PINECONE_NAMESPACE_MODE": self.PROJECT_CONFIG.app_config.get("pinecone_namespace_mode", "shared"),
+            "BEDROCK_MAX_ATTEMPTS": str(bedrock["max_attempts"]),
+            "BEDROCK_BASE_DELAY_MS": str(bedrock["base_delay_ms"]),
+            "BEDROCK_MAX_DELAY_MS": str(bedrock["max_delay_ms"]),
+            "BEDROCK_MAX_TOTAL_MS": str(bedrock["max_total_ms"]),
+            "BEDROCK_CONVERSE_RPS": str(bedrock["converse_rps"]),
+            "BEDROCK_EMBEDDINGS_RPS": str(bedrock["embeddings_rps"]),
+            "BEDROCK_FALLBACK_REGIONS": ",".join(bedrock["fallback_regions"]),
+            "BEDROCK_MODEL_FALLBACKS": ",".join(f"{model}={fallback}" for model, fallback in bedrock["model_fallbacks"].items())
         }
+
+        # Zip-based functions read SSM/Secrets through the extension cache when the layer is configured
+        code_env_vars = dict(common_env_vars)
+        extension_layers = []
+        if self.lambda_layer_parameters_secrets:
+            code_env_vars["CONFIG_USE_EXTENSION"] = "true"
+            code_env_vars["SSM_PARAMETER_STORE_TTL"] = common_env_vars["CONFIG_CACHE_TTL_SECONDS"]
+            code_env_vars["SECRETS_MANAGER_TTL"] = common_env_vars["CONFIG_CACHE_TTL_SECONDS"]
+            extension_layers.append(self.lambda_layer_parameters_secrets)
         
         # Create ask Lambda function
         function_name = "ask"
@@ -178,73 +262,179 @@ class CdkAgentsResourcesStack(Stack):
         )
         self.ask_lambda = self.builder.build_lambda_docker_function(lambda_config)
         '''
+        settings = self.LambdaFunctions.get(function_name)
+        # In-memory per-syllabus vector index (needs the NumPy layer); Pinecone stays the fallback
+        local_index = {
+            "enabled": False,
+            "memory_budget_mb": 256,
+            "dtype": "float32",
+            "retry_seconds": 60,
+            "segment_ttl_seconds": 300,
+            **(self.PROJECT_CONFIG.app_config.get("local_index") or {})
+        }
+        # Retrieved chunks are merged, deduplicated and capped before going back to the model
+        context_compression = {
+            "enabled": True,
+            "token_budget": 2500,
+            "duplicate_threshold": 0.85,
+            **(self.PROJECT_CONFIG.app_config.get("context_compression") or {})
+        }
+        # Bedrock prompt caching for the stable prefix; ignored for models without cache points
+        prompt_cache = {
+            "enabled": True,
+            "cache_messages": True,
+            **(self.PROJECT_CONFIG.app_config.get("prompt_cache") or {})
+        }
+        # Resource listings and greetings are answered without calling the model
+        intent_router = {
+            "enabled": True,
+            "intents": ["list_resources", "greeting"],
+            "embeddings": False,
+            "embedding_threshold": 0.8,
+            **(self.PROJECT_CONFIG.app_config.get("intent_router") or {})
+        }
+        # Model per turn type; route models are CHATBOT_MODEL_ID_* keys in the chatbot SSM parameter
+        model_router = {
+            "enabled": True,
+            "large_input_tokens": 6000,
+            "latency_budget_ms": 0,
+            "fast_below_ms": 0,
+            **(self.PROJECT_CONFIG.app_config.get("model_router") or {})
+        }
+        ask_layers = [self.lambda_layer_powertools, self.lambda_layer_aje_libs, self.lambda_layer_pinecone, *extension_layers]
+        if self.lambda_layer_numpy:
+            ask_layers.append(self.lambda_layer_numpy)
+        ask_env_vars = {
+            **code_env_vars,
+            "LOCAL_INDEX_ENABLED": str(bool(local_index["enabled"] and self.lambda_layer_numpy)).lower(),
+            "LOCAL_INDEX_MEMORY_MB": str(local_index["memory_budget_mb"]),
+            "LOCAL_INDEX_DTYPE": local_index["dtype"],
+            "LOCAL_INDEX_RETRY_SECONDS": str(local_index["retry_seconds"]),
+            "LOCAL_INDEX_SEGMENT_TTL_SECONDS": str(local_index["segment_ttl_seconds"]),
+            "CONTEXT_COMPRESSION_ENABLED": str(context_compression["enabled"]).lower(),
+            "CONTEXT_TOKEN_BUDGET": str(context_compression["token_budget"]),
+            "CONTEXT_DUPLICATE_THRESHOLD": str(context_compression["duplicate_threshold"]),
+            "PROMPT_CACHE_ENABLED": str(prompt_cache["enabled"]).lower(),
+            "PROMPT_CACHE_MESSAGES": str(prompt_cache["cache_messages"]).lower(),
+            "INTENT_ROUTER_ENABLED": str(intent_router["enabled"]).lower(),
+            "INTENT_ROUTER_INTENTS": ",".join(intent_router["intents"]),
+            "INTENT_ROUTER_EMBEDDINGS": str(intent_router["embeddings"]).lower(),
+            "INTENT_ROUTER_THRESHOLD": str(intent_router["embedding_threshold"]),
+            "MODEL_ROUTER_ENABLED": str(model_router["enabled"]).lower(),
+            "MODEL_ROUTER_LARGE_INPUT_TOKENS": str(model_router["large_input_tokens"]),
+            "MODEL_ROUTER_LATENCY_BUDGET_MS": str(model_router["latency_budget_ms"]),
+            "MODEL_ROUTER_FAST_BELOW_MS": str(model_router["fast_below_ms"])
+        }
         lambda_config = LambdaConfig(
             function_name=function_name,
             handler=f"{function_name}/lambda_function.lambda_handler",
             code_path=f"{self.Paths.LOCAL_ARTIFACTS_LAMBDA_CODE}/chatbot",
-            runtime=_lambda.Runtime.PYTHON_3_11,
-            memory_size=1024,
-            timeout=Duration.seconds(60),
-            environment=common_env_vars,
-            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs, self.lambda_layer_pinecone]
+            runtime=_lambda.Runtime(settings["runtime"], _lambda.RuntimeFamily.PYTHON),
+            memory_size=settings["memory_size"],
+            timeout=Duration.seconds(settings["timeout"]),
+            environment=ask_env_vars,
+            layers=ask_layers
         )
         self.ask_lambda = self.builder.build_lambda_function(lambda_config)
+        self.ask_lambda_endpoint = self.configure_lambda_function(function_name, self.ask_lambda, settings)
 
         # Create delete_history Lambda function
         function_name = "delete_history"
+        settings = self.LambdaFunctions.get(function_name)
         lambda_config = LambdaConfig(
             function_name=function_name,
             handler=f"{function_name}/lambda_function.lambda_handler",
             code_path=f"{self.Paths.LOCAL_ARTIFACTS_LAMBDA_CODE}/chatbot",
-            runtime=_lambda.Runtime.PYTHON_3_11,
-            memory_size=512,
-            timeout=Duration.seconds(30),
-            environment=common_env_vars,
-            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs]
+            runtime=_lambda.Runtime(settings["runtime"], _lambda.RuntimeFamily.PYTHON),
+            memory_size=settings["memory_size"],
+            timeout=Duration.seconds(settings["timeout"]),
+            environment=code_env_vars,
+            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs, *extension_layers]
         )
         self.delete_history_lambda = self.builder.build_lambda_function(lambda_config)
+        self.delete_history_lambda_endpoint = self.configure_lambda_function(function_name, self.delete_history_lambda, settings)
         
         # Create get_history Lambda function
         function_name = "get_history"
+        settings = self.LambdaFunctions.get(function_name)
         lambda_config = LambdaConfig(
             function_name=function_name,
             handler=f"{function_name}/lambda_function.lambda_handler",
             code_path=f"{self.Paths.LOCAL_ARTIFACTS_LAMBDA_CODE}/chatbot",
-            runtime=_lambda.Runtime.PYTHON_3_11,
-            memory_size=512,
-            timeout=Duration.seconds(30),
-            environment=common_env_vars,
-            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs]
+            runtime=_lambda.Runtime(settings["runtime"], _lambda.RuntimeFamily.PYTHON),
+            memory_size=settings["memory_size"],
+            timeout=Duration.seconds(settings["timeout"]),
+            environment=code_env_vars,
+            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs, *extension_layers]
         )
         self.get_history_lambda = self.builder.build_lambda_function(lambda_config)
+        self.get_history_lambda_endpoint = self.configure_lambda_function(function_name, self.get_history_lambda, settings)
         
         # Create add_resource Lambda Docker function 
         function_name = "add_resource"       
+        settings = self.LambdaFunctions.get(function_name)
+        # Downloads up to spool_max_bytes stay in memory; larger ones go to /tmp within the quota
+        document_buffer = {
+            "spool_max_bytes": 8 * 1024 * 1024,
+            "tmp_quota_bytes": 384 * 1024 * 1024,
+            **(self.PROJECT_CONFIG.app_config.get("document_buffer") or {})
+        }
+        # Multipart upload to S3, overlapped with indexing
+        s3_upload = {
+            "part_size_bytes": 8 * 1024 * 1024,
+            "concurrency": 4,
+            **(self.PROJECT_CONFIG.app_config.get("s3_upload") or {})
+        }
+        # Bulk onboarding (POST /api/v1/add_resource/bulk) and Pinecone upsert batching
+        bulk_ingestion = {
+            "max_resources": 50,
+            "max_parallelism": 4,
+            "upsert_batch_vectors": 100,
+            "upsert_batch_wait_ms": 50,
+            **(self.PROJECT_CONFIG.app_config.get("bulk_ingestion") or {})
+        }
+        add_resource_env_vars = {
+            **common_env_vars,
+            "DOCUMENT_SPOOL_MAX_BYTES": str(document_buffer["spool_max_bytes"]),
+            "TMP_QUOTA_BYTES": str(document_buffer["tmp_quota_bytes"]),
+            "S3_MULTIPART_CHUNK_BYTES": str(s3_upload["part_size_bytes"]),
+            "S3_UPLOAD_CONCURRENCY": str(s3_upload["concurrency"]),
+            "BULK_MAX_RESOURCES": str(bulk_ingestion["max_resources"]),
+            "BULK_MAX_PARALLELISM": str(bulk_ingestion["max_parallelism"]),
+            "UPSERT_BATCH_VECTORS": str(bulk_ingestion["upsert_batch_vectors"]),
+            "UPSERT_BATCH_WAIT_MS": str(bulk_ingestion["upsert_batch_wait_ms"])
+        }
+        # Build context is the Lambda artifacts root so the image can include the shared code
         docker_image = _lambda.DockerImageCode.from_image_asset(
-            directory=f"{self.Paths.LOCAL_ARTIFACTS_LAMBDA_DOCKER}/chatbot/{function_name}",
+            directory=self.Paths.LOCAL_ARTIFACTS_LAMBDA,
+            file=f"docker/chatbot/{function_name}/Dockerfile",
+            platform=ecr_assets.Platform.LINUX_ARM64 if settings["architecture"] == "arm64" else None,
         )
         lambda_config = LambdaDockerConfig(
             function_name=function_name,
             code=docker_image,
-            memory_size=1024,
-            timeout=Duration.seconds(60),
-            environment=common_env_vars
+            memory_size=settings["memory_size"],
+            timeout=Duration.seconds(settings["timeout"]),
+            environment=add_resource_env_vars
         )
         self.add_resource_lambda = self.builder.build_lambda_docker_function(lambda_config)
+        self.add_resource_lambda_endpoint = self.configure_lambda_function(function_name, self.add_resource_lambda, settings, docker=True)
         
         # Create delete_resource Lambda function
         function_name = "delete_resource"
+        settings = self.LambdaFunctions.get(function_name)
         lambda_config = LambdaConfig(
             function_name=function_name,
             handler=f"{function_name}/lambda_function.lambda_handler",
             code_path=f"{self.Paths.LOCAL_ARTIFACTS_LAMBDA_CODE}/chatbot",
-            runtime=_lambda.Runtime.PYTHON_3_11,
-            memory_size=512,
-            timeout=Duration.seconds(30),
-            environment=common_env_vars,
-            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs, self.lambda_layer_pinecone]
+            runtime=_lambda.Runtime(settings["runtime"], _lambda.RuntimeFamily.PYTHON),
+            memory_size=settings["memory_size"],
+            timeout=Duration.seconds(settings["timeout"]),
+            environment=code_env_vars,
+            layers=[self.lambda_layer_powertools, self.lambda_layer_aje_libs, self.lambda_layer_pinecone, *extension_layers]
         )
         self.delete_resource_lambda = self.builder.build_lambda_function(lambda_config)
+        self.delete_resource_lambda_endpoint = self.configure_lambda_function(function_name, self.delete_resource_lambda, settings)
 
         # Create MCP Lambda function
         '''
@@ -298,6 +488,9 @@ class CdkAgentsResourcesStack(Stack):
         self.learning_resources_hash_table.grant_read_write_data(self.add_resource_lambda)
         self.learning_resources_hash_table.grant_read_write_data(self.delete_resource_lambda)
         #self.learning_resources_hash_table.grant_read_write_data(self.mcp_server_lambda)
+        self.chunk_store_table.grant_read_data(self.ask_lambda)
+        self.chunk_store_table.grant_read_write_data(self.add_resource_lambda)
+        self.chunk_store_table.grant_read_write_data(self.delete_resource_lambda)
 
         #self.mcp_sessions_table.grant_read_write_data(self.mcp_authorizer_lambda)
         #self.mcp_sessions_table.grant_read_write_data(self.mcp_server_lambda)
@@ -348,6 +541,55 @@ class CdkAgentsResourcesStack(Stack):
         self.get_history_lambda.add_to_role_policy(secrets_policy)
         self.delete_history_lambda.add_to_role_policy(secrets_policy) 
         
+    def configure_lambda_function(self, function_name: str, function: _lambda.Function, settings: dict, docker: bool = False):
+        """
+        Apply architecture, SnapStart and warm-capacity settings to a function.
+        Returns the alias when one is configured (so API Gateway invokes the
+        published version), otherwise the function itself.
+        """
+        cfn_function = function.node.default_child
+        if settings["architecture"] != "x86_64":
+            cfn_function.add_property_override("Architectures", [settings["architecture"]])
+        if settings["snap_start"]:
+            if docker:
+                raise ValueError(f"SnapStart is not supported for container image function {function_name}")
+            cfn_function.add_property_override("SnapStart", {"ApplyOn": "PublishedVersions"})
+
+        if not settings["alias"]:
+            return function
+
+        construct_name = function_name.title().replace("_", "")
+        alias = _lambda.Alias(
+            self,
+            f"Lambda{construct_name}Alias",
+            alias_name=settings["alias"],
+            version=function.current_version,
+            provisioned_concurrent_executions=settings["provisioned_concurrency"] or None
+        )
+
+        # Scheduled scaling of provisioned concurrency around class hours
+        schedules = settings["scheduled_scaling"]
+        if schedules or settings["target_utilization"]:
+            max_capacity = settings.get("max_capacity") or max(
+                [schedule["max_capacity"] for schedule in schedules] + [settings["provisioned_concurrency"], 1]
+            )
+            scaling = alias.add_auto_scaling(
+                min_capacity=settings["provisioned_concurrency"] or 1,
+                max_capacity=max_capacity
+            )
+            time_zone = TimeZone.of(settings["time_zone"]) if settings["time_zone"] else None
+            for schedule in schedules:
+                scaling.scale_on_schedule(
+                    schedule["name"],
+                    schedule=appscaling.Schedule.expression(schedule["schedule"]),
+                    min_capacity=schedule["min_capacity"],
+                    max_capacity=schedule.get("max_capacity"),
+                    time_zone=time_zone
+                )
+            if settings["target_utilization"]:
+                scaling.scale_on_utilization(utilization_target=settings["target_utilization"])
+        return alias
+
     def create_api_gateway(self):
         """
         Method to create the REST-API Gateway for exposing the chatbot
@@ -380,16 +622,20 @@ class CdkAgentsResourcesStack(Stack):
         root_resource_delete_history = root_resource_v1.add_resource("delete_history")
         root_resource_get_history = root_resource_v1.add_resource("get_history")
         root_resource_add_resource = root_resource_v1.add_resource("add_resource")
+        root_resource_add_resource_bulk = root_resource_add_resource.add_resource("bulk")
         root_resource_delete_resource = root_resource_v1.add_resource("delete_resource")
+        root_resource_delete_resource_bulk = root_resource_delete_resource.add_resource("bulk")
         #root_resource_mcp_authorizer = root_resource_v1.add_resource("authorizer")
         #root_resource_mcp_server = root_resource_v1.add_resource("server")
 
         # Define all API-Lambda integrations for the API methods
-        root_resource_ask.add_method("POST", apigw.LambdaIntegration(self.ask_lambda))
-        root_resource_delete_history.add_method("POST", apigw.LambdaIntegration(self.delete_history_lambda))
-        root_resource_get_history.add_method("POST", apigw.LambdaIntegration(self.get_history_lambda))
-        root_resource_add_resource.add_method("POST", apigw.LambdaIntegration(self.add_resource_lambda))
-        root_resource_delete_resource.add_method("POST", apigw.LambdaIntegration(self.delete_resource_lambda))
+        root_resource_ask.add_method("POST", apigw.LambdaIntegration(self.ask_lambda_endpoint))
+        root_resource_delete_history.add_method("POST", apigw.LambdaIntegration(self.delete_history_lambda_endpoint))
+        root_resource_get_history.add_method("POST", apigw.LambdaIntegration(self.get_history_lambda_endpoint))
+        root_resource_add_resource.add_method("POST", apigw.LambdaIntegration(self.add_resource_lambda_endpoint))
+        root_resource_add_resource_bulk.add_method("POST", apigw.LambdaIntegration(self.add_resource_lambda_endpoint))
+        root_resource_delete_resource.add_method("POST", apigw.LambdaIntegration(self.delete_resource_lambda_endpoint))
+        root_resource_delete_resource_bulk.add_method("POST", apigw.LambdaIntegration(self.delete_resource_lambda_endpoint))
         #root_resource_mcp_authorizer.add_method("POST", apigw.LambdaIntegration(self.mcp_authorizer_lambda))
         #root_resource_mcp_server.add_method("POST", apigw.LambdaIntegration(self.mcp_server_lambda))
         
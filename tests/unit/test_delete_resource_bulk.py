@@ -0,0 +1,200 @@
+import importlib.util
+import json
+import os
+
+import pytest
+
+pytest.importorskip("aje_libs")
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+HANDLER_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "artifacts", "aws-lambda", "code", "chatbot", "delete_resource", "lambda_function.py"
+)
+LAMBDA_ENV = {
+    "ENVIRONMENT": "test",
+    "PROJECT_NAME": "cdk-agents-resources",
+    "OWNER": "tests",
+    "DYNAMO_RESOURCES_TABLE": "resources",
+    "DYNAMO_LIBRARY_TABLE": "library",
+    "DYNAMO_RESOURCES_HASH_TABLE": "resources-hash",
+    "DYNAMO_CHUNKS_TABLE": "chunks",
+    "S3_RESOURCES_BUCKET": "bucket",
+    "AWS_DEFAULT_REGION": "us-east-1",
+}
+
+
+class FakeVectorStore:
+    def __init__(self, fail_ids=()):
+        self.fail_ids = set(fail_ids)
+        self.deleted = []
+        self.prefixes = []
+
+    def delete_vectors(self, ids, namespace=None):
+        if self.fail_ids & set(ids):
+            raise RuntimeError("Pinecone no disponible")
+        self.deleted.append((namespace, list(ids)))
+        return {}
+
+    def delete_by_prefix(self, prefix, namespace=None):
+        self.prefixes.append((namespace, prefix))
+        return 2
+
+
+class FakeTable:
+    def __init__(self, items=None, key="resource_id", fail_writes=False):
+        self.items = {item[key]: item for item in items or []}
+        self.key = key
+        self.fail_writes = fail_writes
+        self.deleted_keys = []
+
+    def get_item(self, key):
+        return self.items.get(key)
+
+    def batch_get_items(self, keys):
+        # Como DynamoDBHelper: solo se lee el primer lote de 100 claves de cada llamada
+        return [self.items[key[self.key]] for key in keys[:100] if key[self.key] in self.items]
+
+    def batch_write_items(self, delete_items=None, put_items=None):
+        if self.fail_writes:
+            raise RuntimeError("DynamoDB no disponible")
+        self.deleted_keys.extend(delete_items or [])
+
+
+class FakeS3:
+    def __init__(self, failed_keys=()):
+        self.failed_keys = set(failed_keys)
+        self.batches = []
+
+    def delete_objects(self, keys):
+        self.batches.append(list(keys))
+        return {"Errors": [{"Key": key} for key in keys if key in self.failed_keys]}
+
+
+def record(resource_id, vector_count=3):
+    return {
+        "resource_id": resource_id,
+        "file_hash": f"hash-{resource_id}",
+        "s3_path": f"s3://bucket/recursos/{resource_id}.pdf",
+        "vector_count": vector_count,
+    }
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    for name, value in LAMBDA_ENV.items():
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        # El handler precarga la configuración al importarse
+        boto3.client("ssm").put_parameter(Name="/test/cdk-agents-resources/chatbot", Value="{}", Type="String")
+        boto3.client("secretsmanager").create_secret(Name="test/cdk-agents-resources/pinecone-api", SecretString="{}")
+        spec = importlib.util.spec_from_file_location("delete_resource_lambda_function", HANDLER_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        module.config.wait_for_prefetch()
+        yield module
+
+
+def install(monkeypatch, handler, records, library=(), vector_store=None, s3=None, fail_records=False):
+    """Sustituye los helpers del handler por fakes y devuelve los que interesa inspeccionar."""
+    fakes = {
+        "vector_store": vector_store or FakeVectorStore(),
+        "s3": s3 or FakeS3(),
+        "files": FakeTable(records, fail_writes=fail_records),
+        "hashes": FakeTable(key="file_hash"),
+        "library": FakeTable([{"silabus_id": "silabo-1", "resource_ids": set(library)}], key="silabus_id"),
+        "removed_from_library": [],
+        "chunks": [],
+    }
+    monkeypatch.setattr(handler, "get_vector_store", lambda: fakes["vector_store"])
+    monkeypatch.setattr(handler, "s3_helper", fakes["s3"])
+    monkeypatch.setattr(handler, "files_table_helper", fakes["files"])
+    monkeypatch.setattr(handler, "hash_table_helper", fakes["hashes"])
+    monkeypatch.setattr(handler, "library_table_helper", fakes["library"])
+    monkeypatch.setattr(handler, "delete_chunks", lambda helper, ids: fakes["chunks"].extend(ids) or len(ids))
+    monkeypatch.setattr(handler, "delete_resource_chunks", lambda helper, resource_id: 0)
+
+    def remove_from_library(helper, silabus_id, resource_ids):
+        fakes["removed_from_library"].append(sorted(resource_ids))
+        return sorted(set(resource_ids) & set(library))
+
+    monkeypatch.setattr(handler, "remove_from_library", remove_from_library)
+    return fakes
+
+
+def bulk(handler, **body):
+    response = handler.lambda_handler({"body": json.dumps({"SilaboEventoId": "silabo-1", **body})}, None)
+    return response["statusCode"], json.loads(response["body"])
+
+
+def test_vectors_and_objects_are_deleted_in_batches_of_1000(monkeypatch, handler):
+    resource_ids = [f"rec-{i}" for i in range(600)]
+    fakes = install(monkeypatch, handler, [record(rid, vector_count=2) for rid in resource_ids], library=resource_ids)
+
+    status, body = bulk(handler, RecursoDidacticoIds=resource_ids)
+
+    assert status == 200 and body["success"]
+    assert body["data"]["summary"] == {"deleted": 600}
+    # 1.200 IDs por namespace (el del registro y el del sílabo) en lotes de 1.000
+    assert [(namespace, len(ids)) for namespace, ids in fakes["vector_store"].deleted] == [
+        (None, 1000), (None, 200), ("silabo-silabo-1", 1000), ("silabo-silabo-1", 200)
+    ]
+    # Objetos y snapshots: 1.200 claves en dos llamadas a DeleteObjects
+    assert [len(batch) for batch in fakes["s3"].batches] == [1000, 200]
+    assert len(fakes["chunks"]) == 1200
+    assert len(fakes["files"].deleted_keys) == 600 and len(fakes["hashes"].deleted_keys) == 600
+    # Los registros se leen en lotes de 100: los recursos más allá del 100 también se borran del todo
+    assert {"resource_id": "rec-599"} in fakes["files"].deleted_keys
+    assert "recursos/rec-599.pdf" in fakes["s3"].batches[0] + fakes["s3"].batches[1]
+    assert fakes["vector_store"].prefixes == []
+    # Un único DELETE sobre la biblioteca
+    assert fakes["removed_from_library"] == [sorted(resource_ids)]
+
+
+def test_partial_failures_are_reported_per_resource(monkeypatch, handler):
+    fakes = install(
+        monkeypatch, handler, [record("rec-1"), record("rec-2")], library=["rec-1", "rec-2", "rec-3"],
+        vector_store=FakeVectorStore(fail_ids={"rec-1#0"}),
+        s3=FakeS3(failed_keys={"recursos/rec-2.pdf"}),
+    )
+
+    # Lotes de 3 IDs: cada recurso va en su propio lote de Pinecone
+    monkeypatch.setattr(handler, "PINECONE_DELETE_BATCH", 3)
+    status, body = bulk(handler, RecursoDidacticoIds=["rec-1", "rec-2", "rec-3", "rec-1"])
+
+    assert status == 200 and body["success"]
+    results = {result["resourceId"]: result for result in body["data"]["results"]}
+    assert list(results) == ["rec-1", "rec-2", "rec-3"]
+    assert results["rec-1"]["details"] == {"removed_from_library": True, "deleted_from_pinecone": False, "deleted_from_s3": True}
+    assert results["rec-2"]["details"] == {"removed_from_library": True, "deleted_from_pinecone": True, "deleted_from_s3": False}
+    assert results["rec-3"]["status"] == "not_found"
+    assert body["data"]["summary"] == {"deleted": 2, "not_found": 1}
+    # El lote que falló no impide borrar el resto
+    assert fakes["files"].deleted_keys == [{"resource_id": "rec-1"}, {"resource_id": "rec-2"}]
+
+    # Si fallan los registros de DynamoDB, los recursos quedan en error
+    install(monkeypatch, handler, [record("rec-1")], library=["rec-1"], fail_records=True)
+    status, body = bulk(handler, RecursoDidacticoIds=["rec-1"])
+    assert status == 200 and not body["success"]
+    assert body["data"]["results"][0]["status"] == "error"
+
+
+def test_purge_deletes_the_whole_library_and_orphans_by_prefix(monkeypatch, handler):
+    fakes = install(monkeypatch, handler, [record("rec-1", vector_count=2)], library=["rec-1", "ghost"])
+
+    status, body = bulk(handler, Purge=True)
+
+    assert status == 200
+    assert body["data"]["summary"] == {"deleted": 1, "not_found": 1}
+    assert fakes["vector_store"].deleted == [(None, ["rec-1#0", "rec-1#1"]), ("silabo-silabo-1", ["rec-1#0", "rec-1#1"])]
+    # El recurso sin registro se borra por prefijo en los dos namespaces
+    assert fakes["vector_store"].prefixes == [(None, "ghost#"), ("silabo-silabo-1", "ghost#")]
+    assert fakes["s3"].batches == [["recursos/rec-1.pdf", "vector_snapshots/ghost.npy", "vector_snapshots/rec-1.npy"]]
+    assert fakes["removed_from_library"] == [["ghost", "rec-1"]]
+
+
+def test_bulk_requests_are_validated(monkeypatch, handler):
+    install(monkeypatch, handler, [])
+    assert bulk(handler, RecursoDidacticoIds=[])[0] == 400
+    status, body = handler.lambda_handler({"body": json.dumps({"Purge": True})}, None).values()
+    assert status == 400 and json.loads(body)["error"]["code"] == "MISSING_FIELDS"
@@ -0,0 +1,40 @@
+import pytest
+
+from constants.lambda_functions import LambdaFunctions
+
+
+def test_defaults_keep_current_sizing():
+    settings = LambdaFunctions({}).get("ask")
+    assert settings["memory_size"] == 1024
+    assert settings["timeout"] == 60
+    assert settings["architecture"] == "x86_64"
+    assert settings["alias"] is None
+
+
+def test_context_overrides_defaults_and_function_settings():
+    functions = LambdaFunctions({
+        "lambda_functions": {
+            "defaults": {"architecture": "arm64"},
+            "ask": {"memory_size": 1769, "provisioned_concurrency": 2},
+        }
+    })
+    ask = functions.get("ask")
+    assert ask["memory_size"] == 1769
+    assert ask["timeout"] == 60
+    assert ask["architecture"] == "arm64"
+    # Provisioned concurrency needs a published version behind an alias
+    assert ask["alias"] == "live"
+    assert functions.get("get_history")["architecture"] == "arm64"
+
+
+def test_snap_start_requires_supported_runtime_and_no_provisioned_concurrency():
+    with pytest.raises(ValueError):
+        LambdaFunctions({"lambda_functions": {"ask": {"snap_start": True}}}).get("ask")
+
+    with pytest.raises(ValueError):
+        LambdaFunctions({"lambda_functions": {"ask": {
+            "snap_start": True, "runtime": "python3.12", "provisioned_concurrency": 1
+        }}}).get("ask")
+
+    settings = LambdaFunctions({"lambda_functions": {"ask": {"snap_start": True, "runtime": "python3.12"}}}).get("ask")
+    assert settings["alias"] == "live"
@@ -0,0 +1,132 @@
+import pytest
+
+pytest.importorskip("aje_libs")
+
+from shared.namespaces import deletion_namespaces, syllabus_namespace, vector_namespace
+from tools.migrate_vector_namespaces import migrate_syllabus
+
+
+class FakeIndex:
+    """Índice de Pinecone en memoria que registra el orden de las operaciones."""
+
+    def __init__(self, vectors):
+        self.namespaces = {"": dict(vectors)}
+        self.operations = []
+
+    def fetch(self, ids, namespace=None):
+        stored = self.namespaces.get(namespace or "", {})
+        self.operations.append(("fetch", namespace, len(ids)))
+        return {"vectors": {vector_id: stored[vector_id] for vector_id in ids if vector_id in stored}}
+
+    def upsert(self, vectors, namespace=None):
+        self.operations.append(("upsert", namespace, len(vectors)))
+        target = self.namespaces.setdefault(namespace or "", {})
+        for vector in vectors:
+            target[vector["id"]] = {"values": vector["values"], "metadata": vector["metadata"]}
+
+    def delete(self, ids, namespace=None):
+        self.operations.append(("delete", namespace, len(ids)))
+        for vector_id in ids:
+            self.namespaces.get(namespace or "", {}).pop(vector_id, None)
+
+
+class FakeTable:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues):
+        self.owner.index.operations.append(("update_record", Key["resource_id"]))
+        self.owner.records[Key["resource_id"]]["namespace"] = ExpressionAttributeValues[":namespace"]
+
+
+class FakeResources:
+    def __init__(self, records, index):
+        self.records = {record["resource_id"]: dict(record) for record in records}
+        self.index = index
+        self.table = FakeTable(self)
+
+    def batch_get_items(self, keys):
+        # Como DynamoDBHelper: solo se lee el primer lote de 100 claves de cada llamada
+        return [dict(self.records[key["resource_id"]]) for key in keys[:100] if key["resource_id"] in self.records]
+
+
+def vectors(*ids):
+    return {vector_id: {"values": [0.1, 0.2], "metadata": {"resource_id": vector_id.split("#")[0]}} for vector_id in ids}
+
+
+@pytest.fixture
+def corpus():
+    index = FakeIndex(vectors("rec-1#0", "rec-1#1", "legacy-uuid", "other#0"))
+    resources = FakeResources([
+        {"resource_id": "rec-1", "vector_count": 2},
+        {"resource_id": "rec-2", "pinecone_ids": ["legacy-uuid"]},
+    ], index)
+    return index, resources
+
+
+def test_copy_keeps_the_source_and_finalize_deletes_it_before_updating_records(corpus):
+    index, resources = corpus
+    target = syllabus_namespace("silabo-1")
+
+    stats = migrate_syllabus(index, resources, "silabo-1", ["rec-1", "rec-2", "missing"])
+    assert stats == {"resources": 2, "already_migrated": 0, "missing_records": 1, "vectors": 3, "vectors_copied": 3}
+    assert set(index.namespaces[target]) == {"rec-1#0", "rec-1#1", "legacy-uuid"}
+    assert "rec-1#0" in index.namespaces[""]
+    assert not any(operation[0] in ("delete", "update_record") for operation in index.operations)
+
+    index.operations.clear()
+    migrate_syllabus(index, resources, "silabo-1", ["rec-1", "rec-2"], finalize=True)
+    # Por recurso: copia, borrado del origen y, solo después, el registro
+    kinds = [operation[0] for operation in index.operations]
+    assert kinds == ["fetch", "upsert", "delete", "update_record"] * 2
+    assert set(index.namespaces[""]) == {"other#0"}
+    assert {record["namespace"] for record in resources.records.values()} == {target}
+
+
+def test_reruns_do_not_duplicate_or_touch_migrated_resources(corpus):
+    index, resources = corpus
+    target = syllabus_namespace("silabo-1")
+    migrate_syllabus(index, resources, "silabo-1", ["rec-1"])
+    migrate_syllabus(index, resources, "silabo-1", ["rec-1"])
+    assert sorted(index.namespaces[target]) == ["rec-1#0", "rec-1#1"]
+
+    migrate_syllabus(index, resources, "silabo-1", ["rec-1"], finalize=True)
+    index.operations.clear()
+    stats = migrate_syllabus(index, resources, "silabo-1", ["rec-1"], finalize=True)
+    assert stats["already_migrated"] == 1 and stats["vectors"] == 0
+    assert index.operations == []
+
+
+def test_syllabus_with_more_than_100_resources_is_fully_copied():
+    resource_ids = [f"rec-{i}" for i in range(150)]
+    index = FakeIndex(vectors(*(f"{rid}#0" for rid in resource_ids)))
+    resources = FakeResources([{"resource_id": rid, "vector_count": 1} for rid in resource_ids], index)
+
+    stats = migrate_syllabus(index, resources, "silabo-1", resource_ids)
+    assert stats["resources"] == 150 and stats["missing_records"] == 0
+    assert stats["vectors_copied"] == 150
+    assert "rec-149#0" in index.namespaces[syllabus_namespace("silabo-1")]
+
+
+def test_dry_run_only_counts(corpus):
+    index, resources = corpus
+    stats = migrate_syllabus(index, resources, "silabo-1", ["rec-1"], finalize=True, dry_run=True)
+    assert stats["vectors_copied"] == 2
+    assert [operation[0] for operation in index.operations] == ["fetch"]
+    assert "namespace" not in resources.records["rec-1"]
+
+
+def test_deletion_covers_the_recorded_and_the_syllabus_namespace(monkeypatch):
+    # Registros anteriores a la migración: namespace por defecto y posible copia en el del sílabo
+    assert deletion_namespaces(None, "silabo-1") == [None, "silabo-silabo-1"]
+    assert deletion_namespaces("", "silabo-1") == [None, "silabo-silabo-1"]
+    # Registros ya migrados: solo el del sílabo
+    assert deletion_namespaces("silabo-silabo-1", "silabo-1") == ["silabo-silabo-1"]
+
+    monkeypatch.delenv("PINECONE_NAMESPACE_MODE", raising=False)
+    assert vector_namespace("silabo-1") is None
+    monkeypatch.setenv("PINECONE_NAMESPACE_MODE", "syllabus")
+    assert vector_namespace("silabo-1") == "silabo-silabo-1"
+    monkeypatch.setenv("PINECONE_NAMESPACE_MODE", "other")
+    with pytest.raises(ValueError):
+        vector_namespace("silabo-1")
@@ -0,0 +1,30 @@
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+pytest.importorskip("aje_libs")
+
+from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
+from shared.batch_get import batch_get_items
+
+
+def test_reads_every_key_beyond_the_first_batch(monkeypatch):
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with moto.mock_aws():
+        boto3.client("dynamodb").create_table(
+            TableName="resources",
+            KeySchema=[{"AttributeName": "resource_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "resource_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        helper = DynamoDBHelper(table_name="resources", pk_name="resource_id")
+        with helper.table.batch_writer() as writer:
+            for i in range(250):
+                writer.put_item(Item={"resource_id": f"rec-{i}"})
+        keys = [{"resource_id": f"rec-{i}"} for i in range(260)]
+
+        # El helper se queda en el primer lote; batch_get_items los lee todos
+        assert len(helper.batch_get_items(keys)) == 100
+        items = batch_get_items(helper, keys)
+        assert sorted(item["resource_id"] for item in items) == sorted(f"rec-{i}" for i in range(250))
+        assert batch_get_items(helper, []) == []
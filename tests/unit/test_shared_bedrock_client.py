@@ -0,0 +1,108 @@
+import pytest
+
+pytest.importorskip("aje_libs")
+from botocore.exceptions import ClientError
+
+from shared.bedrock_client import ResilientBedrockClient, TokenBucket, is_throttling_error
+from shared.tracing import start_trace
+
+
+def client_error(code):
+    return ClientError({"Error": {"Code": code, "Message": code}}, "Converse")
+
+
+class FakeRuntime:
+    def __init__(self, region, failures):
+        self.region = region
+        self.failures = failures
+        self.calls = []
+
+    def converse(self, **kwargs):
+        self.calls.append(kwargs["modelId"])
+        if self.failures:
+            raise client_error(self.failures.pop(0))
+        return {"region": self.region, "modelId": kwargs["modelId"]}
+
+
+def build(failures, **kwargs):
+    runtimes = {}
+
+    def factory(region):
+        runtimes[region] = FakeRuntime(region, failures.get(region, []))
+        return runtimes[region]
+
+    sleeps = []
+    client = ResilientBedrockClient("us-east-1", client_factory=factory, sleep=sleeps.append,
+                                    base_delay_ms=100, max_delay_ms=1000, **kwargs)
+    return client, runtimes, sleeps
+
+
+def test_throttling_is_retried_with_full_jitter_and_counted():
+    client, runtimes, sleeps = build({"us-east-1": ["ThrottlingException", "ServiceUnavailableException"]}, max_attempts=3)
+    with start_trace("ask") as trace:
+        assert client.converse(modelId="m")["region"] == "us-east-1"
+    assert len(runtimes["us-east-1"].calls) == 3
+    # Jitter completo: entre 0 y el backoff exponencial de cada intento
+    assert 0 <= sleeps[0] <= 0.1 and 0 <= sleeps[1] <= 0.2
+    assert trace.values == {"bedrock_throttles": 1, "bedrock_retries": 2}
+
+    client, runtimes, _ = build({"us-east-1": ["ValidationException"]})
+    with pytest.raises(ClientError):
+        client.converse(modelId="m")
+    assert len(runtimes["us-east-1"].calls) == 1
+
+
+def test_saturated_targets_fall_back_to_the_profile_and_then_other_regions():
+    client, runtimes, _ = build(
+        {"us-east-1": ["ThrottlingException"] * 4},
+        max_attempts=2, model_fallbacks={"m": "us.m"}, fallback_regions=["us-west-2"],
+    )
+    with start_trace("ask") as trace:
+        response = client.converse(modelId="m")
+    assert runtimes["us-east-1"].calls == ["m", "m", "us.m", "us.m"]
+    assert response == {"region": "us-west-2", "modelId": "m"}
+    assert trace.values["bedrock_fallbacks"] == 2
+
+    # Sin presupuesto para esperar, los destinos alternativos se prueban igualmente
+    client, runtimes, sleeps = build(
+        {"us-east-1": ["ThrottlingException"] * 2}, max_total_ms=0, model_fallbacks={"m": "us.m"},
+        fallback_regions=["us-west-2"],
+    )
+    assert client.converse(modelId="m") == {"region": "us-west-2", "modelId": "m"}
+    assert runtimes["us-east-1"].calls == ["m", "us.m"] and sleeps == []
+
+    client, _, _ = build({"us-east-1": ["ThrottlingException"] * 2}, max_attempts=2)
+    with pytest.raises(ClientError) as error:
+        client.converse(modelId="m")
+    assert is_throttling_error(error.value)
+
+
+def test_token_bucket_waits_and_adapts_to_throttling():
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=2, burst=2, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(0.5)
+    bucket.on_throttle()
+    assert bucket.rate == 1
+    bucket.on_success()
+    assert bucket.rate == pytest.approx(1.2)
+    assert TokenBucket(0).acquire() == 0
+
+
+def test_token_bucket_below_one_request_per_second_still_grants_tokens():
+    now = [0.0]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=0.5, clock=lambda: now[0], sleep=sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(2.0)
+    bucket.on_throttle()
+    assert bucket.acquire() == pytest.approx(2.0)
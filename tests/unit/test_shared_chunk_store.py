@@ -0,0 +1,59 @@
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from shared.chunk_store import delete_chunks, delete_resource_chunks, get_texts, put_chunks, slim_metadata
+
+
+class ChunksTable:
+    def __init__(self):
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        client.create_table(
+            TableName="chunks",
+            KeySchema=[
+                {"AttributeName": "resource_id", "KeyType": "HASH"},
+                {"AttributeName": "chunk_id", "KeyType": "RANGE"},
+            ],
+            AttributeDefinitions=[
+                {"AttributeName": "resource_id", "AttributeType": "S"},
+                {"AttributeName": "chunk_id", "AttributeType": "S"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self.table = boto3.resource("dynamodb", region_name="us-east-1").Table("chunks")
+
+    def batch_write_items(self, put_items=None, delete_items=None):
+        with self.table.batch_writer() as writer:
+            for item in put_items or []:
+                writer.put_item(Item=item)
+            for key in delete_items or []:
+                writer.delete_item(Key=key)
+
+
+@pytest.fixture
+def chunks():
+    with moto.mock_aws():
+        yield ChunksTable()
+
+
+def chunk(resource_id, index):
+    return {"resource_id": resource_id, "chunk_id": f"{resource_id}#{index}", "text": f"texto {resource_id} {index}"}
+
+
+def test_texts_are_hydrated_by_vector_id_across_batches(chunks):
+    put_chunks(chunks, [chunk("rec-1", i) for i in range(150)])
+
+    texts = get_texts(chunks, ["rec-1#149", "rec-1#0", "rec-1#0", "rec-9#0"] + [f"rec-1#{i}" for i in range(150)])
+    assert len(texts) == 150
+    assert texts["rec-1#149"] == "texto rec-1 149"
+    assert "rec-9#0" not in texts
+    assert slim_metadata({"resource_id": "rec-1", "text": "...", "drive_id": "d"}) == {"resource_id": "rec-1"}
+
+
+def test_chunks_are_deleted_by_id_or_by_resource(chunks):
+    put_chunks(chunks, [chunk("rec-1", i) for i in range(3)] + [chunk("rec-10", i) for i in range(2)])
+
+    assert delete_chunks(chunks, ["rec-1#0", "rec-1#1"]) == 2
+    assert delete_resource_chunks(chunks, "rec-10") == 2
+    assert get_texts(chunks, ["rec-1#0", "rec-1#2", "rec-10#0"]) == {"rec-1#2": "texto rec-1 2"}
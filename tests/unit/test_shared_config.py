@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("aje_libs")
+
+from shared.config import LazyConfig
+
+
+class CountingConfig(LazyConfig):
+    def __init__(self, payloads, delay=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.payloads = payloads
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+        self._calls_lock = threading.Lock()
+
+    def _fetch(self, kind, name):
+        with self._calls_lock:
+            self.calls.append(name)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return json.dumps(self.payloads[name])
+
+
+def build_config(**kwargs):
+    config = CountingConfig({"/p": {"A": "1"}, "s": {"KEY": "x"}}, **kwargs)
+    config.register_parameter("chatbot", "/p")
+    config.register_secret("pinecone", "s")
+    return config
+
+
+def test_each_source_is_fetched_once():
+    config = build_config()
+    assert config.value("chatbot", "A") == "1"
+    assert config.value("chatbot", "A") == "1"
+    assert config.value("pinecone", "KEY") == "x"
+    assert config.calls == ["/p", "s"]
+
+
+def test_prefetch_loads_sources_concurrently():
+    config = build_config(delay=0.2)
+    started = time.monotonic()
+    config.prefetch()
+    config.get("chatbot")
+    config.get("pinecone")
+    assert time.monotonic() - started < 0.35
+    assert sorted(config.calls) == ["/p", "s"]
+
+
+def test_expired_values_are_refreshed_and_served_stale_on_error():
+    config = build_config(ttl_seconds=0)
+    config.get("chatbot")
+    config.payloads["/p"] = {"A": "2"}
+    assert config.value("chatbot", "A") == "2"
+
+    config.fail = True
+    assert config.value("chatbot", "A") == "2"
+
+
+def test_unknown_alias_raises():
+    with pytest.raises(KeyError):
+        build_config().get("missing")
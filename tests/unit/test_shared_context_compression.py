@@ -0,0 +1,39 @@
+from shared.context_compression import compress_chunks, estimate_tokens, format_passages
+
+
+def words(start, end):
+    return " ".join(f"w{i}" for i in range(start, end))
+
+
+def test_adjacent_chunks_are_merged_without_their_overlap():
+    chunks = [
+        {"id": "rec-1#4", "resource_id": "rec-1", "text": words(80, 180), "score": 0.7},
+        {"id": "rec-1#3", "resource_id": "rec-1", "text": words(0, 100), "score": 0.9},
+        {"id": "rec-2#0", "resource_id": "rec-2", "text": "otro recurso distinto", "score": 0.5},
+    ]
+    passages = compress_chunks(chunks)
+    assert [(p["resource_id"], p["chunks"]) for p in passages] == [("rec-1", [3, 4]), ("rec-2", [0])]
+    # Las 20 palabras solapadas aparecen una sola vez y el pasaje toma el mejor score
+    assert passages[0]["text"] == words(0, 180)
+    assert passages[0]["score"] == 0.9
+    assert format_passages(passages).startswith("[1] recurso rec-1, fragmentos 3-4 (score 0.90)\nw0 w1")
+
+
+def test_duplicates_are_dropped_and_the_budget_is_filled_by_score():
+    text = words(0, 200)
+    chunks = [
+        {"id": "rec-1#0", "resource_id": "rec-1", "text": text, "score": 0.9},
+        # Mismo contenido en otro recurso (p. ej. el mismo PDF subido dos veces)
+        {"id": "rec-2#5", "resource_id": "rec-2", "text": text, "score": 0.8},
+        {"id": "rec-3#0", "resource_id": "rec-3", "text": words(500, 900), "score": 0.7},
+        {"id": "legacy-uuid", "resource_id": "rec-4", "text": "breve", "score": 0.6},
+    ]
+    passages = compress_chunks(chunks, token_budget=estimate_tokens(text) + 10)
+    # rec-3 no cabe en el presupuesto, pero el pasaje corto de menor score sí
+    assert [p["resource_id"] for p in passages] == ["rec-1", "rec-4"]
+    assert passages[1]["chunks"] == []
+
+    # Si el mejor pasaje no cabe solo, se recorta en lugar de devolver nada
+    truncated = compress_chunks(chunks[:1], token_budget=50)
+    assert estimate_tokens(truncated[0]["text"]) <= 50
+    assert format_passages([]) != ""
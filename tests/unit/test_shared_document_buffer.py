@@ -0,0 +1,56 @@
+import hashlib
+import os
+
+import pytest
+
+from shared.document_buffer import DocumentBuffer, TmpQuotaExceededError, cleanup_stale, reserved_bytes
+
+
+def test_small_document_stays_in_memory_until_a_path_is_needed(tmp_path):
+    with DocumentBuffer("Semana 1.PDF", spool_max_bytes=1024, directory=str(tmp_path)) as document:
+        document.write(b"a" * 100)
+        document.finalize()
+        assert document.in_memory
+        with document.view() as content:
+            assert hashlib.sha256(content).hexdigest() == hashlib.sha256(b"a" * 100).hexdigest()
+        with document.open() as stream:
+            assert stream.read() == b"a" * 100
+
+        path = document.path
+        assert path.endswith(".pdf") and os.path.basename(path).startswith("doc-")
+        with open(path, "rb") as handle:
+            assert handle.read() == b"a" * 100
+    assert not os.path.exists(path)
+
+
+def test_large_document_spools_to_a_unique_file_and_is_removed_on_error(tmp_path):
+    with pytest.raises(RuntimeError):
+        with DocumentBuffer("../../etc/passwd", spool_max_bytes=10, directory=str(tmp_path)) as document:
+            document.write(b"x" * 8)
+            document.write(b"y" * 8)
+            assert not document.in_memory
+            assert os.path.dirname(document.path) == str(tmp_path)
+            with document.view() as content:
+                assert content[:] == b"x" * 8 + b"y" * 8
+            raise RuntimeError("fallo en la ingesta")
+    assert os.listdir(tmp_path) == []
+    assert reserved_bytes() == 0
+
+
+def test_quota_is_shared_by_live_buffers(tmp_path):
+    first = DocumentBuffer("a.pdf", spool_max_bytes=0, quota_bytes=100, min_free_bytes=0, directory=str(tmp_path))
+    first.expect(80)
+    with pytest.raises(TmpQuotaExceededError):
+        DocumentBuffer("b.pdf", spool_max_bytes=0, quota_bytes=100, min_free_bytes=0, directory=str(tmp_path)).expect(40)
+    first.close()
+    with DocumentBuffer("b.pdf", spool_max_bytes=0, quota_bytes=100, min_free_bytes=0, directory=str(tmp_path)) as second:
+        second.expect(40)
+
+
+def test_cleanup_stale_only_removes_old_document_files(tmp_path):
+    old, recent, other = tmp_path / "doc-old.pdf", tmp_path / "doc-new.pdf", tmp_path / "notes.txt"
+    for path in (old, recent, other):
+        path.write_bytes(b"x")
+    os.utime(old, (0, 0))
+    assert cleanup_stale(str(tmp_path), max_age_seconds=60) == 1
+    assert sorted(os.listdir(tmp_path)) == ["doc-new.pdf", "notes.txt"]
@@ -0,0 +1,35 @@
+import pytest
+
+from shared.intent_router import EMBEDDING, GREETING, LIST_RESOURCES, RULE, EmbeddingIntentClassifier, IntentRouter
+
+
+def test_rules_only_match_whole_listing_and_greeting_messages():
+    router = IntentRouter()
+    assert router.route("¿Qué recursos hay en el curso?") == (LIST_RESOURCES, RULE)
+    assert router.route("Muéstrame los documentos del curso, por favor") == (LIST_RESOURCES, RULE)
+    assert router.route("Hola Sofía, buenos días", assistant_name="Sofía") == (GREETING, RULE)
+    # Preguntas abiertas (aunque mencionen recursos o empiecen con un saludo) van al modelo
+    assert router.route("¿Qué recursos hay sobre inflación?") == (None, None)
+    assert router.route("Hola, ¿qué es la inflación?") == (None, None)
+
+    assert IntentRouter(intents=[GREETING]).route("¿Qué recursos hay?") == (None, None)
+    with pytest.raises(ValueError):
+        IntentRouter(intents=["desconocida"])
+
+
+def test_embedding_classifier_is_a_fallback_with_a_threshold():
+    keywords = {(1.0, 0.0, 0.0): ("recurso", "material", "documento", "archivo"), (0.0, 1.0, 0.0): ("hola", "buen")}
+    calls = []
+
+    def embed(text):
+        calls.append(text)
+        vector = next((v for v, words in keywords.items() if any(w in text.lower() for w in words)), (0.0, 0.0, 1.0))
+        return list(vector)
+
+    classifier = EmbeddingIntentClassifier(embed, threshold=0.9)
+    router = IntentRouter(classifier=classifier)
+    assert router.route("necesito el material de estudio") == (LIST_RESOURCES, EMBEDDING)
+    assert router.route("¿cuál es la capital de Francia?") == (None, None)
+    # Los ejemplos se vectorizan una sola vez
+    examples = sum(len(phrases) for phrases in classifier.examples.values())
+    assert len(calls) == examples + 2
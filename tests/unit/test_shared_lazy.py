@@ -0,0 +1,30 @@
+from shared.lazy import LazyResource
+
+
+class Helper:
+    def __init__(self):
+        self.table_name = "table"
+
+    def get_item(self, key):
+        return {"id": key}
+
+
+def test_factory_runs_on_first_attribute_access_only():
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return Helper()
+
+    resource = LazyResource(factory)
+    assert calls == []
+
+    assert resource.get_item("a") == {"id": "a"}
+    assert resource.table_name == "table"
+    assert len(calls) == 1
+
+
+def test_setattr_is_forwarded_to_instance():
+    resource = LazyResource(Helper)
+    resource.table_name = "other"
+    assert resource.get_instance().table_name == "other"
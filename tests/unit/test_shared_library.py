@@ -0,0 +1,61 @@
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from shared.library import add_to_library, library_resource_ids, remove_from_library
+
+
+class LibraryTable:
+    pk_name = "silabus_id"
+
+    def __init__(self):
+        client = boto3.client("dynamodb", region_name="us-east-1")
+        client.create_table(
+            TableName="library",
+            KeySchema=[{"AttributeName": "silabus_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "silabus_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self.table = boto3.resource("dynamodb", region_name="us-east-1").Table("library")
+
+
+@pytest.fixture
+def library():
+    with moto.mock_aws():
+        yield LibraryTable()
+
+
+def test_adds_from_stale_readers_do_not_lose_updates(library):
+    # Cada escritor leyó la biblioteca vacía antes de que los demás escribieran
+    stale_reads = [library_resource_ids(library.table.get_item(Key={"silabus_id": "silabo-1"}).get("Item"))
+                   for _ in range(20)]
+    assert stale_reads == [[]] * 20
+    resource_ids = [f"rec-{i}" for i in range(20)]
+    added = [add_to_library(library, "silabo-1", [rid]) for rid in resource_ids]
+
+    assert added == [[rid] for rid in resource_ids]
+    assert add_to_library(library, "silabo-1", ["rec-0"]) == []
+    item = library.table.get_item(Key={"silabus_id": "silabo-1"})["Item"]
+    assert library_resource_ids(item) == sorted(resource_ids)
+
+
+def test_remove_reports_only_associated_resources(library):
+    add_to_library(library, "silabo-1", ["rec-1", "rec-2"])
+    assert remove_from_library(library, "silabo-1", ["rec-1", "rec-9"]) == ["rec-1"]
+    assert remove_from_library(library, "silabo-2", ["rec-1"]) == []
+    item = library.table.get_item(Key={"silabus_id": "silabo-1"})["Item"]
+    assert library_resource_ids(item) == ["rec-2"]
+
+
+def test_legacy_list_is_read_and_migrated_on_removal(library):
+    library.table.put_item(Item={"silabus_id": "silabo-1", "resources": [{"resource_id": "rec-1"}, {"resource_id": "rec-2"}]})
+    # rec-1 ya estaba en la lista: no se informa como nueva asociación
+    assert add_to_library(library, "silabo-1", ["rec-1", "rec-3"]) == ["rec-3"]
+    item = library.table.get_item(Key={"silabus_id": "silabo-1"})["Item"]
+    assert library_resource_ids(item) == ["rec-1", "rec-2", "rec-3"]
+
+    assert remove_from_library(library, "silabo-1", ["rec-1"]) == ["rec-1"]
+    item = library.table.get_item(Key={"silabus_id": "silabo-1"})["Item"]
+    assert "resources" not in item
+    assert item["resource_ids"] == {"rec-2", "rec-3"}
@@ -0,0 +1,84 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from shared.local_index import INT8, LocalVectorIndex
+
+
+def unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def snapshots():
+    rng = np.random.default_rng(7)
+    # Como los escribe write_snapshot: filas normalizadas en float16
+    stored = {}
+    for i in range(3):
+        rows = rng.normal(size=(50, 16))
+        stored[f"rec-{i}"] = (rows / np.linalg.norm(rows, axis=1, keepdims=True)).astype(np.float16)
+    loads = []
+
+    def load(resource_id):
+        loads.append(resource_id)
+        return stored.get(resource_id)
+
+    return stored, loads, load
+
+
+def test_matches_exact_cosine_top_k_with_threshold(snapshots):
+    stored, loads, load = snapshots
+    index = LocalVectorIndex(load, memory_budget_bytes=10 * 1024 * 1024)
+    query = stored["rec-1"][7].astype(np.float32)
+
+    matches = index.query("silabo-1", ["rec-0", "rec-1"], query, top_k=5, min_score=0.3)
+    expected = sorted(
+        ((float(unit(row) @ unit(query)), f"{rid}#{i}") for rid in ("rec-0", "rec-1") for i, row in enumerate(stored[rid])),
+        reverse=True,
+    )
+    assert [match["id"] for match in matches] == [vector_id for score, vector_id in expected[:5] if score >= 0.3]
+    assert matches[0] == {"id": "rec-1#7", "score": pytest.approx(1.0, abs=1e-3), "metadata": {"resource_id": "rec-1"}}
+    # Consultas posteriores y subconjuntos de recursos no vuelven a leer S3
+    assert index.query("silabo-1", ["rec-0"], query, top_k=5, min_score=-1)[0]["metadata"]["resource_id"] == "rec-0"
+    assert sorted(loads) == ["rec-0", "rec-1"]
+
+
+def test_new_resources_reuse_loaded_rows_and_missing_snapshots_fall_back(snapshots):
+    stored, loads, load = snapshots
+    index = LocalVectorIndex(load, memory_budget_bytes=10 * 1024 * 1024, dtype=INT8)
+    query = stored["rec-2"][3].astype(np.float32)
+    index.query("silabo-1", ["rec-0"], query, top_k=3, min_score=0)
+
+    assert index.query("silabo-1", ["rec-0", "rec-2"], query, top_k=3, min_score=0)[0]["id"] == "rec-2#3"
+    assert sorted(loads) == ["rec-0", "rec-2"]
+    assert index.query("silabo-1", ["rec-0", "legacy"], query, top_k=3, min_score=0) is None
+
+
+def test_least_recently_used_syllabi_are_evicted_by_memory(snapshots):
+    stored, loads, load = snapshots
+    one_syllabus = 50 * 16 * 4 + 50 * 4
+    index = LocalVectorIndex(load, memory_budget_bytes=2 * one_syllabus)
+    query = stored["rec-0"][0].astype(np.float32)
+    for silabus_id, rid in (("s-0", "rec-0"), ("s-1", "rec-1"), ("s-0", "rec-0"), ("s-2", "rec-2")):
+        index.query(silabus_id, [rid], query, top_k=1, min_score=0)
+
+    assert list(index._indexes) == ["s-0", "s-2"]
+    assert index.nbytes <= 2 * one_syllabus
+    # Un sílabo que no cabe en el presupuesto se deja a Pinecone
+    assert LocalVectorIndex(load, memory_budget_bytes=100).query("s-3", ["rec-0"], query, top_k=1, min_score=0) is None
+
+
+def test_segments_are_reloaded_after_their_ttl(snapshots):
+    stored, loads, load = snapshots
+    query = stored["rec-0"][4].astype(np.float32)
+    cached = LocalVectorIndex(load, memory_budget_bytes=10 * 1024 * 1024)
+    expiring = LocalVectorIndex(load, memory_budget_bytes=10 * 1024 * 1024, segment_ttl_seconds=0)
+    for index in (cached, expiring):
+        assert index.query("silabo-1", ["rec-0"], query, top_k=1, min_score=0)[0]["id"] == "rec-0#4"
+
+    # Reingesta con menos chunks: el snapshot nuevo ya no tiene la fila 4
+    stored["rec-0"] = stored["rec-0"][:2]
+    assert cached.query("silabo-1", ["rec-0"], query, top_k=1, min_score=0)[0]["id"] == "rec-0#4"
+    assert expiring.query("silabo-1", ["rec-0"], query, top_k=1, min_score=-1)[0]["id"] in ("rec-0#0", "rec-0#1")
+    assert loads == ["rec-0", "rec-0", "rec-0"]
@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("aje_libs")
+
+from shared import vector_store
+from shared.local_vector_store import APPROXIMATE, LocalVectorStore
+from shared.vector_store import VectorStore, lazy_vector_store
+
+
+def corpus(resources=4, chunks=25, dimension=16):
+    rng = np.random.default_rng(3)
+    return [
+        {"id": f"rec-{r}#{c}", "values": rng.normal(size=dimension).tolist(), "metadata": {"resource_id": f"rec-{r}"}}
+        for r in range(resources) for c in range(chunks)
+    ]
+
+
+def test_exact_search_filters_and_deletes_like_pinecone():
+    vectors = corpus()
+    store = LocalVectorStore("model", "us-east-1", min_threshold=0.2)
+    store.upsert_vectors(vectors, namespace="silabo-1")
+    query = vectors[30]["values"]
+
+    matches = store.query(query, filter_conditions={"resource_id": {"$in": ["rec-1", "rec-2"]}}, namespace="silabo-1")
+    assert matches[0]["id"] == "rec-1#5" and matches[0]["score"] == pytest.approx(1.0)
+    assert all(m["metadata"]["resource_id"] in ("rec-1", "rec-2") and m["score"] >= 0.2 for m in matches)
+    assert store.query(query) == []
+
+    assert store.delete_by_prefix("rec-1#", namespace="silabo-1") == 25
+    assert all(not m["id"].startswith("rec-1#") for m in store.query(query, top_k=100, namespace="silabo-1"))
+
+
+def test_approximate_search_with_every_list_probed_is_exact():
+    vectors = corpus()
+    exact = LocalVectorStore("model", "us-east-1", min_threshold=-1)
+    approximate = LocalVectorStore("model", "us-east-1", min_threshold=-1, search=APPROXIMATE, nlist=5, nprobe=5)
+    for store in (exact, approximate):
+        store.upsert_vectors(vectors)
+
+    query = vectors[7]["values"]
+    assert [m["id"] for m in approximate.query(query, top_k=10)] == [m["id"] for m in exact.query(query, top_k=10)]
+    approximate.nprobe = 1
+    assert len(approximate.query(query, top_k=10)) <= 10
+
+
+def test_operations_persist_on_disk(tmp_path):
+    vectors = corpus(resources=2, chunks=3)
+    store = LocalVectorStore("model", "us-east-1", path=str(tmp_path))
+    store.upsert_vectors(vectors, namespace="silabo-1")
+    store.delete_vectors(["rec-0#0"], namespace="silabo-1")
+
+    reopened = LocalVectorStore("model", "us-east-1", min_threshold=-1, path=str(tmp_path))
+    ids = {m["id"] for m in reopened.query(vectors[0]["values"], top_k=10, namespace="silabo-1")}
+    assert ids == {v["id"] for v in vectors} - {"rec-0#0"}
+
+
+def test_backend_is_selected_by_environment(monkeypatch):
+    vector_store._helpers.clear()
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "local")
+    store = lazy_vector_store("index", "key", "model", "us-east-1")
+    assert isinstance(store, LocalVectorStore) and isinstance(store, VectorStore)
+    assert lazy_vector_store("index", "key", "model", "us-east-1") is store
+
+    monkeypatch.setenv("VECTOR_STORE_BACKEND", "elastic")
+    with pytest.raises(ValueError):
+        lazy_vector_store("index", "key", "model", "us-east-1")
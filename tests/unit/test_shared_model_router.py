@@ -0,0 +1,30 @@
+from shared.model_router import (
+    FAST, LONG_SYNTHESIS, SHORT_ANSWER, TOOL_SELECTION, choose_route, route_model, user_question,
+)
+
+
+def rounds(question):
+    first = [{"role": "user", "content": [{"text": question}]}]
+    second = first + [
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "retrieve_context", "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": [{"text": "contexto"}]}}]},
+    ]
+    return first, second
+
+
+def test_routes_by_turn_type_input_size_and_latency_budget():
+    first, second = rounds("¿Qué es la inflación?")
+    assert user_question(second) == "¿Qué es la inflación?"
+    assert choose_route(first, user_question(first), 500) == (TOOL_SELECTION, "turn_type")
+    assert choose_route(second, user_question(second), 500) == (SHORT_ANSWER, "turn_type")
+    assert choose_route(second, user_question(second), 9000, large_input_tokens=6000) == (LONG_SYNTHESIS, "input_size")
+    assert choose_route(second, user_question(second), 500, remaining_ms=1500, fast_below_ms=3000) == (FAST, "latency_budget")
+
+    _, second = rounds("Explícame por qué sube la inflación")
+    assert choose_route(second, user_question(second), 500) == (LONG_SYNTHESIS, "question")
+
+
+def test_routes_fall_back_to_the_default_model():
+    parameters = {"CHATBOT_MODEL_ID": "us.amazon.nova-pro-v1:0", "CHATBOT_MODEL_ID_SHORT_ANSWER": "us.amazon.nova-lite-v1:0"}
+    assert route_model(SHORT_ANSWER, parameters) == "us.amazon.nova-lite-v1:0"
+    assert route_model(TOOL_SELECTION, parameters) == "us.amazon.nova-pro-v1:0"
@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+
+from shared.payload_logging import PayloadLogger, truncate
+
+
+class RecordingLogger:
+    def __init__(self, level=logging.INFO):
+        self.level = level
+        self.records = []
+
+    def isEnabledFor(self, level):
+        return level >= self.level
+
+    def log(self, level, message, extra=None, stacklevel=1):
+        self.records.append((level, message, extra))
+
+    def error(self, message, extra=None):
+        self.records.append((logging.ERROR, message, extra))
+
+
+def test_truncate_recurses_into_containers():
+    value = {"text": "a" * 10, "items": [{"b": "b" * 3}], "n": 5}
+    assert truncate(value, 4) == {"text": "aaaa... (+6 caracteres)", "items": [{"b": "bbb"}], "n": 5}
+
+
+def test_unsampled_request_logs_fields_without_evaluating_payload():
+    logger = RecordingLogger()
+    payloads = PayloadLogger(logger, mode="sampled", sample_rate=0, field_max_chars=5)
+    payloads.start_request()
+
+    def build():
+        raise AssertionError("payload evaluated")
+
+    payloads.log("Mensajes", payload=build, messages=3, question="pregunta larga")
+    level, message, extra = logger.records[0]
+    assert message == "Mensajes"
+    assert extra == {"messages": 3, "question": "pregu... (+9 caracteres)"}
+
+
+def test_sampled_request_includes_payload():
+    logger = RecordingLogger()
+    payloads = PayloadLogger(logger, mode="full")
+    payloads.start_request()
+    payloads.log("Agent", payload=lambda: {"stopReason": "end_turn"})
+    assert logger.records[0][2]["payload"] == {"stopReason": "end_turn"}
+
+
+def test_error_mode_dumps_pending_payloads_once():
+    logger = RecordingLogger()
+    payloads = PayloadLogger(logger, mode="error")
+    payloads.start_request()
+    payloads.log("System prompt", payload="prompt", length=6)
+    payloads.flush_on_error()
+    payloads.flush_on_error()
+
+    errors = [record for record in logger.records if record[0] == logging.ERROR]
+    assert len(errors) == 1
+    assert errors[0][2]["payloads"] == [{"message": "System prompt", "payload": "prompt"}]
+
+
+def test_invalid_mode_is_rejected():
+    with pytest.raises(ValueError):
+        PayloadLogger(RecordingLogger(), mode="verbose")
@@ -0,0 +1,43 @@
+from shared.prompt_cache import CACHE_POINT, build_converse_request, cache_support
+
+TOOL_CONFIG = {"tools": [{"toolSpec": {"name": "retrieve_context"}}], "toolChoice": {"auto": {}}}
+
+
+def conversation():
+    return [
+        {"role": "user", "content": [{"text": "pregunta anterior"}]},
+        {"role": "assistant", "content": [{"text": "respuesta anterior"}]},
+        {"role": "user", "content": [{"text": "pregunta"}]},
+        {"role": "assistant", "content": [{"toolUse": {"toolUseId": "t1", "name": "retrieve_context", "input": {}}}]},
+        {"role": "user", "content": [{"toolResult": {"toolUseId": "t1", "content": [{"text": "contexto"}]}}]},
+    ]
+
+
+def test_cache_points_follow_what_the_model_supports():
+    assert cache_support("us.amazon.nova-pro-v1:0") == {"system", "messages"}
+    assert "tools" in cache_support("us.anthropic.claude-3-7-sonnet-20250219-v1:0")
+    assert not cache_support("meta.llama3-70b-instruct-v1:0")
+
+    request = build_converse_request("us.amazon.nova-pro-v1:0", conversation(), "sistema", {"max_tokens": 10}, TOOL_CONFIG)
+    assert request["system"] == [{"text": "sistema"}, CACHE_POINT]
+    # Nova no admite cachePoint en toolConfig
+    assert request["toolConfig"] == TOOL_CONFIG
+
+    request = build_converse_request("anthropic.claude-sonnet-4-20250514-v1:0", conversation(), "sistema", {}, TOOL_CONFIG)
+    assert request["toolConfig"]["tools"][-1] == CACHE_POINT
+    assert request["inferenceConfig"]["maxTokens"] == 1024
+
+    request = build_converse_request("meta.llama3-70b-instruct-v1:0", conversation(), "sistema", {}, TOOL_CONFIG)
+    assert "cachePoint" not in str(request)
+
+
+def test_the_last_two_user_messages_are_marked_without_touching_the_history():
+    messages = conversation()
+    request = build_converse_request("us.amazon.nova-pro-v1:0", messages, "sistema", {}, TOOL_CONFIG)
+    marked = [i for i, message in enumerate(request["messages"]) if CACHE_POINT in message["content"]]
+    # El resultado de la herramienta (nuevo) y la pregunta (último punto de la ronda anterior)
+    assert marked == [2, 4]
+    assert all(CACHE_POINT not in message["content"] for message in messages)
+
+    request = build_converse_request("us.amazon.nova-pro-v1:0", messages, "sistema", {}, TOOL_CONFIG, cache_messages=False)
+    assert request["messages"] is messages
@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from shared.task_graph import TaskGraph
+from shared.tracing import span, start_trace
+
+
+def test_independent_tasks_run_concurrently_and_results_flow_to_dependents():
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait_for_sibling(value):
+        barrier.wait()
+        return value
+
+    graph = TaskGraph(max_workers=2)
+    graph.add("index", lambda: wait_for_sibling(["id-1", "id-2"]))
+    graph.add("upload", lambda: wait_for_sibling("s3://bucket/key"))
+    graph.add("records", lambda index, upload: (len(index), upload), after=("index", "upload"))
+
+    assert graph.run()["records"] == (2, "s3://bucket/key")
+    assert graph.completed == {"index", "upload", "records"}
+
+
+def test_failure_stops_dependents_and_reports_completed_tasks():
+    def fail():
+        raise RuntimeError("Failed to process document for Pinecone")
+
+    graph = TaskGraph(max_workers=2)
+    graph.add("index", fail)
+    graph.add("upload", lambda: "s3://bucket/key")
+    graph.add("records", lambda index, upload: pytest.fail("no debe ejecutarse"), after=("index", "upload"))
+
+    with pytest.raises(RuntimeError, match="Pinecone"):
+        graph.run()
+    assert "records" not in graph.completed
+
+
+def test_dependencies_must_be_registered_first():
+    graph = TaskGraph()
+    with pytest.raises(ValueError):
+        graph.add("records", lambda index: None, after=("index",))
+
+
+def test_tasks_record_spans_in_the_callers_trace():
+    def upload():
+        with span("s3_upload"):
+            return True
+
+    with start_trace("add_resource") as trace:
+        graph = TaskGraph()
+        graph.add("upload", upload)
+        graph.run()
+    assert trace.phases_ms.keys() == {"s3_upload"}
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from shared.tracing import add_count, add_usage, attach_debug, current_trace, span, start_trace, traced
+
+
+@traced("converse")
+def converse(usage):
+    add_usage(usage)
+    return "ok"
+
+
+def test_spans_are_recorded_and_repeated_phases_are_numbered():
+    with start_trace("ask") as trace:
+        with span("history_load"):
+            pass
+        converse({"inputTokens": 10, "outputTokens": 3})
+        converse({"inputTokens": 20, "outputTokens": 7})
+
+    assert current_trace() is None
+    assert [s["name"] for s in trace.spans] == ["history_load", "converse", "converse_2"]
+    summary = trace.summary()
+    assert summary["input_tokens"] == 30
+    assert summary["output_tokens"] == 10
+    assert summary["total_ms"] >= max(summary["phases_ms"].values())
+
+
+def test_span_records_failures_and_is_noop_without_trace():
+    with span("orphan"):
+        pass
+    assert converse({"inputTokens": 1}) == "ok"
+
+    with start_trace("ask") as trace:
+        with pytest.raises(ValueError):
+            with span("pinecone_query"):
+                raise ValueError("boom")
+    assert trace.spans[0]["error"] == "ValueError"
+
+
+def test_attach_debug_adds_summary_to_body():
+    with start_trace("ask") as trace:
+        with span("history_write"):
+            pass
+    response = attach_debug({"statusCode": 200, "body": json.dumps({"success": True})}, trace)
+    body = json.loads(response["body"])
+    assert body["success"] is True
+    assert set(body["debug"]["phases_ms"]) == {"history_write"}
+
+
+def test_counters_accumulate_and_values_are_overwritten():
+    with start_trace("add_resource") as trace:
+        add_count("chunks", 10)
+        add_count("chunks", 5)
+        add_count("downloaded_bytes", 2048, unit="Bytes")
+        trace.set_value("embeddings_per_second", 12.5, unit="CountPerSecond")
+        trace.set_value("embeddings_per_second", 20.0, unit="CountPerSecond")
+    add_count("chunks", 1)
+
+    assert trace.summary()["values"] == {"chunks": 15, "downloaded_bytes": 2048, "embeddings_per_second": 20.0}
+    assert trace.units["downloaded_bytes"] == "Bytes"
+
+
+def test_cache_tokens_are_reported_only_when_present():
+    with start_trace("ask") as trace:
+        converse({"inputTokens": 10, "outputTokens": 3})
+    assert "cache_read_tokens" not in trace.summary()
+
+    with start_trace("ask") as trace:
+        converse({"inputTokens": 10, "outputTokens": 3, "cacheWriteInputTokens": 900})
+        converse({"inputTokens": 40, "outputTokens": 5, "cacheReadInputTokens": 900})
+    summary = trace.summary()
+    assert (summary["cache_read_tokens"], summary["cache_write_tokens"]) == (900, 900)
+    assert summary["input_tokens"] == 50
@@ -0,0 +1,46 @@
+import threading
+
+import pytest
+
+from shared.upsert_batcher import UpsertBatcher
+
+
+def vectors(prefix, count):
+    return [{"id": f"{prefix}-{i}", "values": [0.0], "metadata": {}} for i in range(count)]
+
+
+def test_concurrent_documents_share_batches():
+    batches = []
+    batcher = UpsertBatcher(lambda batch: batches.append([v["id"] for v in batch]), max_vectors=10, max_wait_seconds=5)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def index(prefix):
+        barrier.wait()
+        batcher.upsert(vectors(prefix, 5))
+
+    threads = [threading.Thread(target=index, args=(prefix,)) for prefix in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # Los dos documentos completan un lote de 10 sin agotar la espera
+    assert len(batches) == 1
+    assert sorted(batches[0]) == sorted([f"a-{i}" for i in range(5)] + [f"b-{i}" for i in range(5)])
+
+
+def test_large_documents_are_split_and_partial_batches_flush_after_the_wait():
+    batches = []
+    batcher = UpsertBatcher(lambda batch: batches.append(len(batch)), max_vectors=100, max_wait_seconds=0)
+    assert batcher.upsert(vectors("a", 250)) == 3
+    assert batches == [100, 100, 50]
+
+
+def test_failed_batch_is_reported_to_its_callers():
+    def fail(batch):
+        raise RuntimeError("Pinecone upsert failed")
+
+    batcher = UpsertBatcher(fail, max_vectors=10, max_wait_seconds=0)
+    with pytest.raises(RuntimeError, match="Pinecone"):
+        batcher.upsert(vectors("a", 3))
+    assert batcher.upsert([]) == 0
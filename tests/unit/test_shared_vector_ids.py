@@ -0,0 +1,22 @@
+from shared.vector_ids import resource_vector_ids, stale_vector_ids, vector_id, vector_ids, vector_prefix
+
+
+def test_ids_are_deterministic_and_prefix_addressable():
+    assert vector_ids("rec-1", 3) == ["rec-1#0", "rec-1#1", "rec-1#2"]
+    assert vector_id("rec-1", 2) == vector_ids("rec-1", 3)[2]
+    # El separador evita que el prefijo de rec-1 abarque los vectores de rec-10
+    assert not vector_id("rec-10", 0).startswith(vector_prefix("rec-1"))
+
+
+def test_ids_come_from_the_count_or_the_legacy_list():
+    assert resource_vector_ids("rec-1", {"resource_id": "rec-1", "vector_count": 2}) == ["rec-1#0", "rec-1#1"]
+    assert resource_vector_ids("rec-1", {"resource_id": "rec-1", "pinecone_ids": ["a1b2", "c3d4"]}) == ["a1b2", "c3d4"]
+    assert resource_vector_ids("rec-1", None) == []
+
+
+def test_reingesting_with_fewer_chunks_leaves_the_tail_stale():
+    previous = {"resource_id": "rec-1", "vector_count": 4}
+    assert stale_vector_ids("rec-1", previous, vector_ids("rec-1", 2)) == ["rec-1#2", "rec-1#3"]
+    assert stale_vector_ids("rec-1", previous, vector_ids("rec-1", 5)) == []
+    assert stale_vector_ids("rec-1", {"pinecone_ids": ["a1b2"]}, vector_ids("rec-1", 1)) == ["a1b2"]
+    assert stale_vector_ids("rec-1", None, vector_ids("rec-1", 1)) == []
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("aje_libs")
+pytest.importorskip("pinecone")
+
+from shared import vector_store
+from shared.pinecone_client import LazyPineconeHelper
+from shared.vector_store import lazy_pinecone_helper
+
+
+def test_helper_does_not_connect_on_construction(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("no network access expected at construction")
+
+    monkeypatch.setattr(LazyPineconeHelper, "_connect", fail)
+    helper = LazyPineconeHelper("index", "key", "model", "us-east-1")
+    assert helper._index is None
+    assert helper._bedrock_client is None
+
+
+def test_helper_is_reused_until_configuration_changes():
+    vector_store._helpers.clear()
+    first = lazy_pinecone_helper("index", "key", "model", "us-east-1")
+    assert lazy_pinecone_helper("index", "key", "model", "us-east-1") is first
+
+    rotated = lazy_pinecone_helper("index", "rotated-key", "model", "us-east-1")
+    assert rotated is not first
+    assert rotated.api_key == "rotated-key"
+
+
+def test_vector_store_is_built_from_the_project_config(monkeypatch):
+    from shared import config as shared_config
+
+    class FakeConfig:
+        values = {
+            "pinecone": {"PINECONE_INDEX_NAME": "index", "PINECONE_API_KEY": "key"},
+            "chatbot": {"EMBEDDINGS_MODEL_ID": "model", "EMBEDDINGS_REGION": "us-east-1", "CHATBOT_REGION": "us-west-2",
+                        "PINECONE_MAX_RETRIEVE_DOCUMENTS": "8", "PINECONE_MIN_THRESHOLD": "0.4"},
+        }
+
+        def get(self, alias):
+            return self.values[alias]
+
+        def value(self, alias, key):
+            return self.values[alias][key]
+
+    monkeypatch.setattr(shared_config, "get_config", FakeConfig)
+    vector_store._helpers.clear()
+    ingest = vector_store.get_vector_store()
+    assert (ingest.embeddings_region, ingest.max_retrieve_documents) == ("us-east-1", 5)
+    retrieval = vector_store.get_vector_store("CHATBOT_REGION", retrieval=True)
+    assert (retrieval.embeddings_region, retrieval.max_retrieve_documents, retrieval.min_threshold) == ("us-west-2", 8, 0.4)
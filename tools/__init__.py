@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Operational scripts reuse the Lambda shared code from artifacts/aws-lambda/code/chatbot
+LAMBDA_CODE_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "artifacts", "aws-lambda", "code", "chatbot")
+)
+if LAMBDA_CODE_PATH not in sys.path:
+    sys.path.insert(0, LAMBDA_CODE_PATH)
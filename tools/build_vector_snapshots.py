@@ -0,0 +1,97 @@
+"""
+Genera los snapshots del índice local (``shared.local_index``) de recursos ingestados
+antes de que add_resource los escribiera.
+
+Para cada recurso de los sílabos indicados (o de toda la biblioteca) se leen sus
+vectores de Pinecone con ``fetch``, en el orden de sus chunks, y se guarda el snapshot
+en el bucket de recursos. Los recursos con la lista ``pinecone_ids`` del formato
+anterior no tienen IDs ``{resource_id}#{chunk}`` y se omiten: sus sílabos seguirán
+consultando Pinecone.
+
+Uso:
+    python -m tools.build_vector_snapshots --environment dev --project-name cdk-agents-resources \\
+        --library-table <tabla> --resources-table <tabla> --bucket <bucket> [--silabus silabo-1 ...] [--dry-run]
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Optional
+
+import boto3
+
+import tools  # noqa: F401  (añade el código compartido de las Lambdas al path)
+from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
+from shared.batch_get import batch_get_items
+from shared.library import library_resource_ids
+from shared.local_index import write_snapshot
+from shared.namespaces import NAMESPACE_ATTRIBUTE
+from shared.vector_ids import LEGACY_VECTOR_IDS, resource_vector_ids
+from tools.migrate_vector_namespaces import FETCH_BATCH, batches, connect_index, field, library_items
+
+
+def build_snapshot(index, s3_client, bucket: str, resource_id: str, item: Dict, dry_run: bool = False) -> str:
+    """
+    Genera el snapshot de un recurso a partir de sus vectores en Pinecone.
+
+    :param index: Índice de Pinecone.
+    :param s3_client: Cliente de S3.
+    :param bucket: Bucket de recursos.
+    :param resource_id: ID del recurso.
+    :param item: Registro del recurso.
+    :param dry_run: Solo comprobar que están todos los vectores.
+    :return: Estado: ``written``, ``legacy``, ``incomplete`` o ``checked``.
+    """
+    if LEGACY_VECTOR_IDS in item:
+        return "legacy"
+    vector_ids = resource_vector_ids(resource_id, item)
+    namespace = item.get(NAMESPACE_ATTRIBUTE) or None
+    values = {}
+    for batch in batches(vector_ids, FETCH_BATCH):
+        kwargs = {"ids": batch}
+        if namespace:
+            kwargs["namespace"] = namespace
+        fetched = field(index.fetch(**kwargs), "vectors") or {}
+        values.update((vector_id, list(field(vector, "values"))) for vector_id, vector in fetched.items())
+    # La fila i del snapshot es el chunk i: si falta alguno, el snapshot no sirve
+    if not vector_ids or len(values) != len(vector_ids):
+        return "incomplete"
+    if dry_run:
+        return "checked"
+    write_snapshot(s3_client, bucket, resource_id, [values[vector_id] for vector_id in vector_ids])
+    return "written"
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--environment", required=True, help="Entorno (prefijo del secreto de Pinecone)")
+    parser.add_argument("--project-name", required=True, help="Nombre del proyecto")
+    parser.add_argument("--library-table", required=True, help="Tabla de biblioteca (DYNAMO_LIBRARY_TABLE)")
+    parser.add_argument("--resources-table", required=True, help="Tabla de recursos (DYNAMO_RESOURCES_TABLE)")
+    parser.add_argument("--bucket", required=True, help="Bucket de recursos (S3_RESOURCES_BUCKET)")
+    parser.add_argument("--silabus", nargs="+", help="Sílabos a procesar (por defecto, todos)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo comprobar, sin escribir")
+    args = parser.parse_args(argv)
+
+    index = connect_index(args.environment, args.project_name)
+    s3_client = boto3.client("s3")
+    library_helper = DynamoDBHelper(table_name=args.library_table, pk_name="silabus_id")
+    resources_helper = DynamoDBHelper(table_name=args.resources_table, pk_name="resource_id")
+
+    # Un recurso puede estar en varios sílabos: se procesa una sola vez
+    done = set()
+    totals: Dict[str, int] = {}
+    for library_item in library_items(library_helper, args.silabus):
+        resource_ids = [rid for rid in library_resource_ids(library_item) if rid not in done]
+        done.update(resource_ids)
+        stats: Dict[str, int] = {}
+        for item in batch_get_items(resources_helper, [{"resource_id": rid} for rid in resource_ids]):
+            status = build_snapshot(index, s3_client, args.bucket, item["resource_id"], item, args.dry_run)
+            stats[status] = stats.get(status, 0) + 1
+        print(json.dumps({"silabus_id": library_item["silabus_id"], **stats}, ensure_ascii=False))
+        for name, value in stats.items():
+            totals[name] = totals.get(name, 0) + value
+    print(json.dumps({"total": totals}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
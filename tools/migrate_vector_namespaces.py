@@ -0,0 +1,193 @@
+"""
+Migra los vectores de Pinecone del namespace compartido al namespace de cada sílabo
+(``shared.namespaces.syllabus_namespace``).
+
+Para cada sílabo de la tabla de biblioteca se leen los registros de sus recursos, se
+obtienen los IDs de sus vectores (``vector_count`` o la lista ``pinecone_ids`` de los
+registros anteriores) y se copian con ``fetch`` + ``upsert`` al namespace del sílabo.
+Los IDs no cambian, así que repetir la migración no duplica nada.
+
+Pasos del despliegue:
+
+1. Copiar (por defecto): los vectores quedan en los dos namespaces y ``ask`` sigue
+   consultando el compartido.
+2. Desplegar con ``"pinecone_namespace_mode": "syllabus"`` en ``project_config``: las
+   ingestas escriben en el namespace del sílabo y ``ask`` consulta solo ese.
+3. Ejecutar con ``--finalize``: copia lo ingestado entre 1 y 2, elimina los vectores
+   del namespace compartido y guarda el namespace en el registro del recurso.
+
+Uso:
+    python -m tools.migrate_vector_namespaces --environment dev --project-name cdk-agents-resources \\
+        --library-table <tabla> --resources-table <tabla> [--silabus silabo-1 ...] [--finalize] [--dry-run]
+"""
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Optional
+
+import tools  # noqa: F401  (añade el código compartido de las Lambdas al path)
+from aje_libs.common.helpers.dynamodb_helper import DynamoDBHelper
+from shared.batch_get import batch_get_items
+from shared.library import library_resource_ids
+from shared.namespaces import NAMESPACE_ATTRIBUTE, syllabus_namespace
+from shared.vector_ids import resource_vector_ids
+
+# Tamaño de los lotes: fetch lleva los IDs en la URL y upsert admite hasta 2 MB por petición
+FETCH_BATCH = 100
+UPSERT_BATCH = 100
+DELETE_BATCH = 1000
+
+
+def batches(values: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def field(value: Any, name: str) -> Any:
+    """Lee un campo de una respuesta del SDK (objeto) o de un dict."""
+    return value.get(name) if isinstance(value, dict) else getattr(value, name, None)
+
+
+def copy_vectors(index, vector_ids: List[str], source: Optional[str], target: str, dry_run: bool) -> int:
+    """
+    Copia vectores entre namespaces conservando ID, valores y metadatos.
+
+    :param index: Índice de Pinecone.
+    :param vector_ids: IDs a copiar.
+    :param source: Namespace de origen (None para el namespace por defecto).
+    :param target: Namespace de destino.
+    :param dry_run: Solo contar los vectores encontrados.
+    :return: Vectores encontrados en el origen.
+    """
+    copied = 0
+    for batch in batches(vector_ids, FETCH_BATCH):
+        kwargs = {"ids": batch}
+        if source:
+            kwargs["namespace"] = source
+        fetched = field(index.fetch(**kwargs), "vectors") or {}
+        vectors = [
+            {"id": vector_id, "values": list(field(vector, "values")), "metadata": dict(field(vector, "metadata") or {})}
+            for vector_id, vector in fetched.items()
+        ]
+        copied += len(vectors)
+        if not dry_run:
+            for upsert_batch in batches(vectors, UPSERT_BATCH):
+                index.upsert(vectors=upsert_batch, namespace=target)
+    return copied
+
+
+def migrate_syllabus(index, resources_helper, silabus_id: str, resource_ids: List[str],
+                     finalize: bool = False, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Migra los vectores de los recursos de un sílabo a su namespace.
+
+    Con ``finalize`` se eliminan del origen y el registro pasa a indicar el nuevo
+    namespace (después del borrado: si este falla, una nueva ejecución lo repite).
+
+    :param index: Índice de Pinecone.
+    :param resources_helper: DynamoDBHelper de la tabla de recursos.
+    :param silabus_id: ID del sílabo.
+    :param resource_ids: Recursos asociados al sílabo.
+    :param finalize: Eliminar el origen y actualizar los registros.
+    :param dry_run: No escribir nada.
+    :return: Recursos y vectores procesados.
+    """
+    target = syllabus_namespace(silabus_id)
+    stats = {"resources": 0, "already_migrated": 0, "missing_records": 0, "vectors": 0, "vectors_copied": 0}
+    records = {}
+    for item in batch_get_items(resources_helper, [{"resource_id": resource_id} for resource_id in resource_ids]):
+        records[item["resource_id"]] = item
+
+    for resource_id in resource_ids:
+        item = records.get(resource_id)
+        if item is None:
+            stats["missing_records"] += 1
+            continue
+        if item.get(NAMESPACE_ATTRIBUTE) == target:
+            stats["already_migrated"] += 1
+            continue
+        source = item.get(NAMESPACE_ATTRIBUTE) or None
+        vector_ids = resource_vector_ids(resource_id, item)
+        stats["resources"] += 1
+        stats["vectors"] += len(vector_ids)
+        stats["vectors_copied"] += copy_vectors(index, vector_ids, source, target, dry_run)
+
+        if finalize and not dry_run:
+            for delete_batch in batches(vector_ids, DELETE_BATCH):
+                kwargs = {"ids": delete_batch}
+                if source:
+                    kwargs["namespace"] = source
+                index.delete(**kwargs)
+            resources_helper.table.update_item(
+                Key={"resource_id": resource_id},
+                UpdateExpression=f"SET {NAMESPACE_ATTRIBUTE} = :namespace",
+                ExpressionAttributeValues={":namespace": target},
+            )
+    return stats
+
+
+def library_items(library_helper, silabus_ids: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """Entradas de la biblioteca: las indicadas o la tabla completa (paginada)."""
+    if silabus_ids:
+        for silabus_id in silabus_ids:
+            item = library_helper.get_item(silabus_id)
+            if item:
+                yield item
+        return
+    kwargs: Dict[str, Any] = {}
+    while True:
+        response = library_helper.table.scan(**kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def connect_index(environment: str, project_name: str):
+    """Índice de Pinecone con las credenciales del secreto del entorno (como las Lambdas)."""
+    os.environ.setdefault("ENVIRONMENT", environment)
+    os.environ.setdefault("PROJECT_NAME", project_name)
+    from shared.config import get_config
+    from shared.pinecone_client import LazyPineconeHelper
+
+    config = get_config()
+    secret = config.get("pinecone")
+    return LazyPineconeHelper(
+        index_name=secret["PINECONE_INDEX_NAME"],
+        api_key=secret["PINECONE_API_KEY"],
+        embeddings_model_id=config.value("chatbot", "EMBEDDINGS_MODEL_ID"),
+        embeddings_region=config.value("chatbot", "EMBEDDINGS_REGION"),
+        index_host=secret.get("PINECONE_INDEX_HOST"),
+    ).index
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--environment", required=True, help="Entorno (prefijo del secreto de Pinecone)")
+    parser.add_argument("--project-name", required=True, help="Nombre del proyecto")
+    parser.add_argument("--library-table", required=True, help="Tabla de biblioteca (DYNAMO_LIBRARY_TABLE)")
+    parser.add_argument("--resources-table", required=True, help="Tabla de recursos (DYNAMO_RESOURCES_TABLE)")
+    parser.add_argument("--silabus", nargs="+", help="Sílabos a migrar (por defecto, todos)")
+    parser.add_argument("--finalize", action="store_true",
+                        help="Eliminar los vectores del origen y guardar el namespace en los registros")
+    parser.add_argument("--dry-run", action="store_true", help="Solo contar, sin escribir")
+    args = parser.parse_args(argv)
+
+    index = connect_index(args.environment, args.project_name)
+    library_helper = DynamoDBHelper(table_name=args.library_table, pk_name="silabus_id")
+    resources_helper = DynamoDBHelper(table_name=args.resources_table, pk_name="resource_id")
+
+    totals: Dict[str, int] = {}
+    for item in library_items(library_helper, args.silabus):
+        silabus_id = item["silabus_id"]
+        stats = migrate_syllabus(index, resources_helper, silabus_id, library_resource_ids(item),
+                                 finalize=args.finalize, dry_run=args.dry_run)
+        print(json.dumps({"silabus_id": silabus_id, **stats}, ensure_ascii=False))
+        for name, value in stats.items():
+            totals[name] = totals.get(name, 0) + value
+    print(json.dumps({"total": totals}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()